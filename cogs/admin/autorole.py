@@ -168,6 +168,8 @@ class AutoRole(commands.Cog):
 
     async def handle_join_roles(self, member):
         """Handle giving roles on join."""
+        if not self.bot.configured.might_have('autorole', member.guild.id):
+            return
         settings = await self.db.autorole.find_one({'guild_id': member.guild.id}) or {}
         join_roles = settings.get('join_roles', [])
         
@@ -181,6 +183,8 @@ class AutoRole(commands.Cog):
 
     async def handle_bot_roles(self, member):
         """Handle giving roles to bots."""
+        if not self.bot.configured.might_have('autorole', member.guild.id):
+            return
         settings = await self.db.autorole.find_one({'guild_id': member.guild.id}) or {}
         bot_roles = settings.get('bot_roles', [])
         
@@ -194,6 +198,8 @@ class AutoRole(commands.Cog):
 
     async def handle_boost_roles(self, member):
         """Handle giving roles on boost."""
+        if not self.bot.configured.might_have('autorole', member.guild.id):
+            return
         settings = await self.db.autorole.find_one({'guild_id': member.guild.id}) or {}
         boost_roles = settings.get('boost_roles', [])
         
@@ -1,11 +1,29 @@
 import discord
+import asyncio
+from datetime import timedelta
 from discord.ext import commands
-from typing import Optional, Union
+from typing import Optional, Union, Dict, List
+from core.logger import get_logger
+from core.raid_detector import RaidDetector, RaidVerdict
+from core.settings import JoinGateSettings
 from utils.embeds import powered_embed
 
+RAID_ACTIONS = ["lockdown", "verification", "timeout"]
+
 class ServerManagement(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.db = bot.db
+        self.logger = get_logger()
+        self.raid_detector = RaidDetector()
+        # Join streams are live detection state: measured, never shrunk
+        self.bot.caches.register('raid_streams', self.raid_detector.streams, shrinkable=False)
+        # Members that joined during an active raid, awaiting the next batch timeout
+        self.pending_timeouts: Dict[int, List[int]] = {}
+        self.flush_tasks: Dict[int, asyncio.Task] = {}
+
+    def cog_unload(self):
+        self.bot.caches.unregister('raid_streams')
 
     @commands.hybrid_group(name="server", description="Server management commands.")
     @commands.has_permissions(manage_guild=True)
@@ -185,7 +203,15 @@ class ServerManagement(commands.Cog):
     @server_restrictions.command(name="age")
     async def restrictions_age(self, ctx, days: int):
         """Set minimum account age requirement."""
-        # Implementation for account age restriction
+        if days < 0:
+            await ctx.send(embed=powered_embed("Days must be 0 or more."))
+            return
+        await self.db.guild_settings.update_one(
+            {'_id': ctx.guild.id},
+            {'$set': {'restrictions.min_account_age_days': days}},
+            upsert=True
+        )
+        self.bot.settings_cache.pop(f"settings:{ctx.guild.id}", None)
         await ctx.send(embed=powered_embed(f"Set minimum account age to {days} days"))
 
     @server.group(name="alerts")
@@ -195,10 +221,145 @@ class ServerManagement(commands.Cog):
             await ctx.send("Use a subcommand: joins, leaves, bans, channel, mentions, raids.")
 
     @server_alerts.command(name="raids")
-    async def alerts_raids(self, ctx, threshold: int, interval: int):
+    async def alerts_raids(self, ctx, threshold: int, interval: int, action: str = "lockdown", timeout_minutes: int = 60):
         """Configure raid detection alerts."""
-        # Implementation for raid alerts
+        if threshold < 2 or interval < 1:
+            await ctx.send(embed=powered_embed("Threshold must be at least 2 and interval at least 1 second."))
+            return
+        if action not in RAID_ACTIONS:
+            await ctx.send(embed=powered_embed(f"Invalid action. Valid actions: {', '.join(RAID_ACTIONS)}"))
+            return
+
+        await self.db.guild_settings.update_one(
+            {'_id': ctx.guild.id},
+            {'$set': {'raid': {
+                'enabled': True,
+                'threshold': threshold,
+                'interval': interval,
+                'action': action,
+                'timeout_minutes': timeout_minutes,
+                'alert_channel_id': ctx.channel.id
+            }}},
+            upsert=True
+        )
+        self.bot.settings_cache.pop(f"settings:{ctx.guild.id}", None)
+        self.raid_detector.clear(ctx.guild.id)
         await ctx.send(embed=powered_embed(f"Set raid alert threshold to {threshold} joins per {interval} seconds"))
 
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        """Feed joins into the raid detector and enforce the account age restriction."""
+        try:
+            raid = await self.bot.get_settings(JoinGateSettings, member.guild.id)
+            min_age = raid.min_account_age_days
+            if not raid.raid_enabled and not min_age:
+                return
+
+            account_age = (discord.utils.utcnow() - member.created_at).total_seconds() / 86400
+
+            if raid.raid_enabled:
+                guild_id = member.guild.id
+                was_raiding = self.raid_detector.in_raid(guild_id)
+                verdict = self.raid_detector.record_join(
+                    guild_id,
+                    member.id,
+                    member.name,
+                    member.avatar.key if member.avatar else None,
+                    account_age,
+                    raid.threshold,
+                    raid.interval
+                )
+                if verdict:
+                    await self.handle_raid(member.guild, raid, verdict)
+                    return
+                if was_raiding:
+                    # Late raiders are folded into the next batch instead of handled one by one
+                    if raid.action == 'timeout':
+                        self.queue_timeout(member.guild, raid, member.id)
+                    return
+
+            if min_age and account_age < min_age:
+                await member.kick(reason=f"Account younger than {min_age} days")
+
+        except Exception as e:
+            self.logger.error(f"Error in raid join handler: {str(e)}")
+
+    async def handle_raid(self, guild: discord.Guild, raid: JoinGateSettings, verdict: RaidVerdict):
+        """Run the configured bulk action once for a detected raid."""
+        action = raid.action
+        self.logger.warning(
+            f"Raid detected in {guild}: {verdict.reason}",
+            extra={'guild_id': guild.id, 'join_count': verdict.join_count, 'action': action}
+        )
+
+        try:
+            if action == 'lockdown':
+                await self.lockdown_channels(guild, True, reason=f"Raid detected: {verdict.reason}")
+            elif action == 'verification':
+                await guild.edit(
+                    verification_level=discord.VerificationLevel.highest,
+                    reason=f"Raid detected: {verdict.reason}"
+                )
+            elif action == 'timeout':
+                for member_id in verdict.suspects:
+                    self.queue_timeout(guild, raid, member_id)
+        except discord.HTTPException as e:
+            self.logger.error(f"Raid action {action} failed in {guild.id}: {str(e)}")
+
+        channel = guild.get_channel(raid.alert_channel_id or 0)
+        if channel:
+            embed = powered_embed("Raid Detected", f"{verdict.reason}. Action taken: {action}.", color=0xff0000)
+            embed.add_field(name="Suspects", value=str(len(verdict.suspects)))
+            try:
+                await channel.send(embed=embed)
+            except discord.HTTPException:
+                pass
+
+    def queue_timeout(self, guild: discord.Guild, raid: JoinGateSettings, member_id: int):
+        """Add a member to the guild's pending timeout batch."""
+        self.pending_timeouts.setdefault(guild.id, []).append(member_id)
+        task = self.flush_tasks.get(guild.id)
+        if task is None or task.done():
+            self.flush_tasks[guild.id] = asyncio.create_task(
+                self.flush_timeouts(guild, raid.timeout_minutes)
+            )
+
+    async def flush_timeouts(self, guild: discord.Guild, minutes: int, delay: float = 2.0):
+        """Apply batched timeouts until nobody is left queued for the guild."""
+        semaphore = asyncio.Semaphore(5)
+
+        async def timeout(member_id: int, until: str):
+            async with semaphore:
+                try:
+                    # Members are not cached, so edit through the HTTP route directly
+                    await self.bot.http.edit_member(
+                        guild.id, member_id,
+                        communication_disabled_until=until,
+                        reason="Raid protection"
+                    )
+                except discord.HTTPException:
+                    pass
+
+        # Members queued while a batch is being sent see this task alive, so pick them up here
+        while self.pending_timeouts.get(guild.id):
+            await asyncio.sleep(delay)  # Let the burst settle so one batch covers it
+            member_ids = set(self.pending_timeouts.pop(guild.id, []))
+            until = (discord.utils.utcnow() + timedelta(minutes=minutes)).isoformat()
+            await asyncio.gather(*(timeout(member_id, until) for member_id in member_ids))
+            self.logger.info(f"Timed out {len(member_ids)} raid suspects in {guild.id}")
+
+    async def lockdown_channels(self, guild: discord.Guild, state: bool, reason: str = None):
+        """Toggle send permissions for @everyone on all text channels."""
+        semaphore = asyncio.Semaphore(5)
+
+        async def lock(channel):
+            async with semaphore:
+                try:
+                    await channel.set_permissions(guild.default_role, send_messages=not state, reason=reason)
+                except discord.HTTPException:
+                    pass
+
+        await asyncio.gather(*(lock(channel) for channel in guild.text_channels))
+
 async def setup(bot):
     await bot.add_cog(ServerManagement(bot))
@@ -1,14 +1,39 @@
+import re
 import discord
 from discord import app_commands, Embed
 from discord.ext import commands
+from typing import Optional
 from core.database import Database
+from core.escalation import EscalationStep
+from core.logger import get_logger
+from core.settings import AutomodSettings
 from utils.embeds import powered_embed
 from utils.permissions import owner_only
 
+INVITE_RE = re.compile(r'(?:discord(?:app)?\.com/invite|discord\.gg)/[\w-]+', re.IGNORECASE)
+LINK_RE = re.compile(r'https?://\S+|www\.\S+', re.IGNORECASE)
+WORD_RE = re.compile(r'\w+')
+
+def find_violation(settings: AutomodSettings, content: str) -> Optional[str]:
+    """The first rule ``content`` breaks, by violation name."""
+    if not content:
+        return None
+    if settings.anti_invites and INVITE_RE.search(content):
+        return "invites"
+    if settings.anti_links and LINK_RE.search(content):
+        return "links"
+    if settings.anti_badwords and settings.badwords:
+        lowered = content.lower()
+        words = set(WORD_RE.findall(lowered))
+        if any(word in words if word.isalnum() else word in lowered for word in settings.badwords):
+            return "badwords"
+    return None
+
 class AutoMod(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.db = bot.db
+        self.logger = get_logger()
 
     @app_commands.command(name="automod_enable", description="Enable auto-moderation for the guild.")
     @commands.has_permissions(manage_guild=True)
@@ -112,23 +137,46 @@ class AutoMod(commands.Cog):
 
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.author.bot:
+        if message.author.bot or not message.guild:
             return
         
-        automod_settings = await self.db.automod_settings.find_one({'_id': message.guild.id})
-        if automod_settings and automod_settings.get('enabled'):
-            # Implement automod logic here
-            pass
+        automod_settings = await self.bot.get_settings(AutomodSettings, message.guild.id)
+        if automod_settings.enabled:
+            await self.check_message(message, automod_settings)
 
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
-        if before.author.bot:
+        if before.author.bot or not before.guild or before.content == after.content:
             return
         
-        automod_settings = await self.db.automod_settings.find_one({'_id': before.guild.id})
-        if automod_settings and automod_settings.get('enabled'):
-            # Implement edit detection logic here
+        automod_settings = await self.bot.get_settings(AutomodSettings, before.guild.id)
+        if automod_settings.enabled:
+            # Edits go through the same rules, so a clean message cannot be edited into a bad one
+            await self.check_message(after, automod_settings)
+
+    async def check_message(self, message, settings: AutomodSettings) -> Optional[str]:
+        """Remove a rule-breaking message and punish its author through the escalation ladder."""
+        member = message.author
+        if not isinstance(member, discord.Member) or any(role.id in settings.bypass_roles for role in member.roles):
+            return None
+        violation = find_violation(settings, message.content)
+        if violation is None:
+            return None
+
+        try:
+            await message.delete()
+        except discord.HTTPException:
             pass
 
+        punishments = self.bot.get_cog("AutoModPunishments")
+        if punishments is not None:
+            # The guild's flat automod action applies until escalation steps are set for the violation
+            default = EscalationStep(settings.action_type, settings.action_minutes)
+            try:
+                await punishments.apply_violation(member, violation, f"AutoMod: {violation}", default=default)
+            except Exception as e:
+                self.logger.error(f"Error punishing {member.id} for {violation} in {message.guild.id}: {str(e)}")
+        return violation
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(AutoMod(bot))
\ No newline at end of file
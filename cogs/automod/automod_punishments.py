@@ -1,12 +1,51 @@
 import discord
+from datetime import timedelta
 from discord.ext import commands
 from typing import Union, Optional
+from core.escalation import MIN_HALF_LIFE_HOURS, EscalationStep
+from core.logger import get_logger
+from core.settings import ModerationSettings
 from utils.embeds import powered_embed
 
 class AutoModPunishments(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        self.logger = get_logger()
+
+    async def apply_violation(self, member: discord.Member, violation: str, reason: str = None,
+                              default: Optional[EscalationStep] = None) -> Optional[EscalationStep]:
+        """Count a violation and carry out the escalation step it lands on.
+
+        ``default`` is applied when the guild has no escalation steps for the violation.
+        """
+        step = await self.bot.escalation.record(member.guild.id, member.id, violation) or default
+        if step is None:
+            return None
+
+        reason = reason or f"AutoMod: {violation}"
+        try:
+            if step.action == "warn":
+                await member.send(embed=powered_embed(f"You were warned in {member.guild.name}: {reason}"))
+            elif step.action == "timeout":
+                await member.timeout(timedelta(minutes=step.duration or 10), reason=reason)
+            elif step.action == "mute":
+                moderation = self.bot.get_cog("Moderation")
+                settings = await self.bot.get_settings(ModerationSettings, member.guild.id)
+                role = member.guild.get_role(settings.mute_role_id or 0)
+                if role is not None and moderation is not None:
+                    await member.add_roles(role, reason=reason)
+                    await moderation.schedule_role_removal(member.guild.id, member.id, role.id, step.duration, "Mute expired")
+            elif step.action == "kick":
+                await member.kick(reason=reason)
+            elif step.action == "ban":
+                await member.ban(reason=reason, delete_message_days=0)
+        except discord.HTTPException as e:
+            self.logger.error(f"Error applying {step} to {member.id} in {member.guild.id}: {str(e)}")
+            return step
+
+        await self.bot.cases.create(member.guild.id, member.id, self.bot.user.id, step.action, reason, step.duration or None)
+        return step
 
     @commands.hybrid_group(name="automod_punishments", description="Configure AutoMod punishments.")
     async def punishments(self, ctx):
@@ -93,18 +132,22 @@ class AutoModPunishments(commands.Cog):
             {'$set': {'punishments.escalation.enabled': enabled}},
             upsert=True
         )
+        self.bot.escalation.invalidate(ctx.guild.id)
         await ctx.send(embed=powered_embed(f"{'Enabled' if enabled else 'Disabled'} punishment escalation"))
 
     @escalation_settings.command(name="steps")
     async def escalation_steps(self, ctx, violation: str, *, steps: str):
-        """Set escalation steps for a violation."""
+        """Set escalation steps for a violation, e.g. `warn, timeout:10, mute:60, kick, ban`."""
         try:
             steps_list = [step.strip() for step in steps.split(',')]
+            for step in steps_list:
+                EscalationStep.parse(step)
             await self.db.automod_settings.update_one(
                 {'_id': ctx.guild.id},
                 {'$set': {f'punishments.escalation.steps.{violation}': steps_list}},
                 upsert=True
             )
+            self.bot.escalation.invalidate(ctx.guild.id)
             await ctx.send(embed=powered_embed(f"Set escalation steps for {violation}"))
         except Exception as e:
             await ctx.send(embed=powered_embed(f"Error: {str(e)}"))
@@ -114,16 +157,21 @@ class AutoModPunishments(commands.Cog):
         """Reset escalation steps for a violation or all violations."""
         update = {'$unset': {f'punishments.escalation.steps.{violation}': ""}} if violation else {'$unset': {'punishments.escalation.steps': ""}}
         await self.db.automod_settings.update_one({'_id': ctx.guild.id}, update, upsert=True)
+        self.bot.escalation.invalidate(ctx.guild.id)
         await ctx.send(embed=powered_embed(f"Reset escalation steps for {violation if violation else 'all violations'}"))
 
     @escalation_settings.command(name="timeout")
     async def escalation_timeout(self, ctx, hours: int):
         """Set timeout period for escalation reset."""
+        if hours < MIN_HALF_LIFE_HOURS:
+            await ctx.send(embed=powered_embed(f"Timeout must be at least {MIN_HALF_LIFE_HOURS} hour."))
+            return
         await self.db.automod_settings.update_one(
             {'_id': ctx.guild.id},
             {'$set': {'punishments.escalation.timeout': hours}},
             upsert=True
         )
+        self.bot.escalation.invalidate(ctx.guild.id)
         await ctx.send(embed=powered_embed(f"Set escalation timeout to {hours} hours"))
 
     @punishments.group(name="thresholds")
@@ -1,6 +1,7 @@
 import discord
 from discord.ext import commands
 from typing import Optional, Union, Dict
+from core.settings import AutoresponderSettings
 from utils.embeds import powered_embed
 
 class AutoResponder(commands.Cog):
@@ -142,12 +143,15 @@ class AutoResponder(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, message):
         """Handle auto-responses."""
-        if message.author.bot:
+        if message.author.bot or not message.guild:
             return
 
-        # Get guild settings
-        settings = await self.db.guild_settings.find_one({'_id': message.guild.id}) or {}
-        if not settings.get('autoresponder', {}).get('enabled', False):
+        # Guilds without triggers never reach the database
+        if not self.bot.configured.might_have('autoresponder', message.guild.id):
+            return
+
+        settings = await self.bot.get_settings(AutoresponderSettings, message.guild.id)
+        if not settings.enabled:
             return
 
         # Process triggers
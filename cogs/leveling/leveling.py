@@ -1,7 +1,8 @@
 import discord
 from discord import Embed, Member
 from discord.ext import commands
-from core.database import Database
+from pymongo import ReturnDocument
+from core.indexes import member_key
 from utils.embeds import powered_embed
 
 class Leveling(commands.Cog):
@@ -46,25 +47,29 @@ class Leveling(commands.Cog):
         await ctx.send(f"Removed {amount} XP from {user.mention} (implement logic)")
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.db = Database(bot.config.MONGO_URI).db
+        self.db = bot.db
 
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.author.bot:
+        # XP is non-essential; skip it while the database is degraded
+        if message.author.bot or not message.guild or self.bot.db.degraded:
             return
         
         # Add XP logic here
         xp_gained = 10  # Example XP gain
-        await self.add_xp(message.author.id, xp_gained)
+        await self.add_xp(message.guild.id, message.author.id, xp_gained)
 
-    async def add_xp(self, user_id: int, xp: int):
-        user_data = await self.db.levels.find_one({'_id': user_id})
-        if user_data:
-            new_xp = user_data['xp'] + xp
-            new_level = self.calculate_level(new_xp)
-            await self.db.levels.update_one({'_id': user_id}, {'$set': {'xp': new_xp, 'level': new_level}})
-        else:
-            await self.db.levels.insert_one({'_id': user_id, 'xp': xp, 'level': 1})
+    async def add_xp(self, guild_id: int, user_id: int, xp: int):
+        # One upsert on the _id index; the level only needs a second write when it changes
+        user_data = await self.db.levels.find_one_and_update(
+            {'_id': member_key(guild_id, user_id)},
+            {'$inc': {'xp': xp}, '$setOnInsert': {'guild_id': guild_id, 'user_id': user_id, 'level': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        new_level = self.calculate_level(user_data['xp'])
+        if new_level != user_data.get('level'):
+            await self.db.levels.update_one({'_id': user_data['_id']}, {'$set': {'level': new_level}})
 
     def calculate_level(self, xp: int) -> int:
         # Example level calculation based on XP
@@ -73,7 +78,7 @@ class Leveling(commands.Cog):
     @commands.hybrid_command(name="rank", description="Check your rank and XP.")
     async def rank(self, ctx, member: Member = None):
         member = member or ctx.author
-        user_data = await self.db.levels.find_one({'_id': member.id})
+        user_data = await self.db.levels.find_one({'_id': member_key(ctx.guild.id, member.id)})
         
         if user_data:
             embed = powered_embed(title=f"{member.display_name}'s Rank", description=f"Level: {user_data['level']}\nXP: {user_data['xp']}")
@@ -84,11 +89,11 @@ class Leveling(commands.Cog):
 
     @commands.hybrid_command(name="leaderboard", description="Show the top users by XP.")
     async def leaderboard(self, ctx):
-        top_users = await self.db.levels.find().sort('xp', -1).limit(10).to_list(length=10)
+        top_users = await self.db.levels.find({'guild_id': ctx.guild.id}).sort('xp', -1).limit(10).to_list(length=10)
         embed = powered_embed(title="Leaderboard")
         
         for index, user in enumerate(top_users, start=1):
-            embed.add_field(name=f"{index}. User ID: {user['_id']}", value=f"Level: {user['level']} | XP: {user['xp']}", inline=False)
+            embed.add_field(name=f"{index}. User ID: {user['user_id']}", value=f"Level: {user['level']} | XP: {user['xp']}", inline=False)
         
         await ctx.send(embed=embed)
 
@@ -1,6 +1,8 @@
 import discord
 from discord.ext import commands
 from typing import Optional, Union
+from core.indexes import member_key
+from core.settings import LevelingSettings
 from utils.embeds import powered_embed
 
 class LevelingSystem(commands.Cog):
@@ -130,10 +132,7 @@ class LevelingSystem(commands.Cog):
     async def rank(self, ctx, member: discord.Member = None):
         """Check rank of a user."""
         member = member or ctx.author
-        user_data = await self.db.user_levels.find_one({
-            'guild_id': ctx.guild.id,
-            'user_id': member.id
-        })
+        user_data = await self.db.user_levels.find_one({'_id': member_key(ctx.guild.id, member.id)})
         if not user_data:
             await ctx.send(embed=powered_embed(f"{member.name} hasn't earned any XP yet"))
             return
@@ -168,10 +167,7 @@ class LevelingSystem(commands.Cog):
     async def stats(self, ctx, member: discord.Member = None):
         """View detailed leveling stats."""
         member = member or ctx.author
-        stats = await self.db.user_levels.find_one({
-            'guild_id': ctx.guild.id,
-            'user_id': member.id
-        })
+        stats = await self.db.user_levels.find_one({'_id': member_key(ctx.guild.id, member.id)})
         if not stats:
             await ctx.send(embed=powered_embed(f"No stats found for {member.name}"))
             return
@@ -186,11 +182,12 @@ class LevelingSystem(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, message):
         """Handle XP gain from messages."""
-        if message.author.bot:
+        # XP is non-essential; skip it while the database is degraded
+        if message.author.bot or self.bot.db.degraded:
             return
 
-        guild_settings = await self.db.guild_settings.find_one({'_id': message.guild.id}) or {}
-        if not guild_settings.get('leveling', {}).get('enabled', False):
+        settings = await self.bot.get_settings(LevelingSettings, message.guild.id)
+        if not settings.enabled:
             return
 
         # Implementation for XP calculation and level up checks
@@ -199,11 +196,11 @@ class LevelingSystem(commands.Cog):
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         """Handle XP gain from voice activity."""
-        if member.bot:
+        if member.bot or self.bot.db.degraded:
             return
 
-        guild_settings = await self.db.guild_settings.find_one({'_id': member.guild.id}) or {}
-        if not guild_settings.get('leveling', {}).get('enabled', False):
+        settings = await self.bot.get_settings(LevelingSettings, member.guild.id)
+        if not settings.enabled:
             return
 
         # Implementation for voice XP tracking
@@ -1,11 +1,15 @@
 import discord
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from discord import app_commands, Member, Embed
 from discord.ext import commands
-from core.logger import logger
+from core.logger import get_logger
+from core.purge import PurgeJob, PurgeFilter, PurgeFilterError
+from core.settings import ModerationSettings
 from utils.embeds import powered_embed
 from utils.permissions import owner_only
 
+logger = get_logger()
+
 class Moderation(commands.Cog):
     @commands.hybrid_group(name="moderation", description="Moderation command group.")
     async def moderation(self, ctx):
@@ -55,6 +59,18 @@ class Moderation(commands.Cog):
         await ctx.send(f"Cleared {amount} messages (implement logic)")
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.bot.scheduler.register('remove_role', self.expire_role)
+
+    async def expire_role(self, payload):
+        """Scheduled job: take back a mute or temporary role."""
+        try:
+            # Members are not cached, so go through the HTTP route directly
+            await self.bot.http.remove_role(
+                payload['guild_id'], payload['user_id'], payload['role_id'],
+                reason=payload.get('reason', 'Temporary role expired')
+            )
+        except discord.NotFound:
+            pass  # Member left or role was deleted
 
     @owner_only()
     @commands.hybrid_command(name="setstatus", description="Sets the bot presence.")
@@ -64,23 +80,26 @@ class Moderation(commands.Cog):
 
     @commands.hybrid_command(name="ban", description="Ban a member from the server.")
     @commands.has_permissions(ban_members=True)
-    async def ban(self, member: Member, *, reason: str = "No reason provided."):
+    async def ban(self, ctx, member: Member, *, reason: str = "No reason provided."):
         await member.ban(reason=reason)
-        await self.bot.get_context(self).send(embed=powered_embed(f"Banned {member.mention} for: {reason}"))
+        case = await self.bot.cases.create(ctx.guild.id, member.id, ctx.author.id, "ban", reason)
+        await ctx.send(embed=powered_embed(f"Case #{case['case_no']}: Banned {member.mention} for: {reason}"))
         logger.info(f"Banned {member} for: {reason}")
 
     @commands.hybrid_command(name="kick", description="Kick a member from the server.")
     @commands.has_permissions(kick_members=True)
-    async def kick(self, member: Member, *, reason: str = "No reason provided."):
+    async def kick(self, ctx, member: Member, *, reason: str = "No reason provided."):
         await member.kick(reason=reason)
-        await self.bot.get_context(self).send(embed=powered_embed(f"Kicked {member.mention} for: {reason}"))
+        case = await self.bot.cases.create(ctx.guild.id, member.id, ctx.author.id, "kick", reason)
+        await ctx.send(embed=powered_embed(f"Case #{case['case_no']}: Kicked {member.mention} for: {reason}"))
         logger.info(f"Kicked {member} for: {reason}")
 
     @commands.hybrid_command(name="timeout", description="Timeout a member for a specified duration.")
     @commands.has_permissions(moderate_members=True)
-    async def timeout(self, member: Member, minutes: int = 30):
+    async def timeout(self, ctx, member: Member, minutes: int = 30):
         await member.edit(timeout=discord.utils.utcnow() + timedelta(minutes=minutes))
-        await self.bot.get_context(self).send(embed=powered_embed(f"Timed out {member.mention} for {minutes} minutes."))
+        case = await self.bot.cases.create(ctx.guild.id, member.id, ctx.author.id, "timeout", duration=minutes)
+        await ctx.send(embed=powered_embed(f"Case #{case['case_no']}: Timed out {member.mention} for {minutes} minutes."))
         logger.info(f"Timed out {member} for {minutes} minutes.")
 
     @commands.hybrid_command(name="untimeout", description="Remove timeout from a member.")
@@ -89,30 +108,171 @@ class Moderation(commands.Cog):
         await self.bot.get_context(self).send(embed=powered_embed(f"Removed timeout from {member.mention}."))
         logger.info(f"Removed timeout from {member}.")
 
+    @commands.hybrid_command(name="muterole", description="Set the role used by mute.")
+    @commands.has_permissions(manage_roles=True)
+    async def muterole(self, ctx, role: discord.Role):
+        await self.bot.db.guild_settings.update_one(
+            {'_id': ctx.guild.id},
+            {'$set': {'moderation.mute_role_id': role.id}},
+            upsert=True
+        )
+        self.bot.settings_cache.pop(f"settings:{ctx.guild.id}", None)
+        await ctx.send(embed=powered_embed(f"Mute role set to {role.name}."))
+
     @commands.hybrid_command(name="mute", description="Mute a member for a specified duration.")
-    async def mute(self, member: Member, minutes: int = None):
-        # Implement mute logic here (e.g., assigning a mute role)
-        await self.bot.get_context(self).send(embed=powered_embed(f"Muted {member.mention} for {minutes} minutes." if minutes else "Muted {member.mention}."))
+    @commands.has_permissions(manage_roles=True)
+    async def mute(self, ctx, member: Member, minutes: int = None):
+        settings = await self.bot.get_settings(ModerationSettings, ctx.guild.id)
+        role = ctx.guild.get_role(settings.mute_role_id or 0)
+        if role is None:
+            await ctx.send(embed=powered_embed("No mute role configured. Use `muterole` first."))
+            return
+
+        await member.add_roles(role, reason=f"Muted by {ctx.author}")
+        await self.schedule_role_removal(ctx.guild.id, member.id, role.id, minutes, "Mute expired")
+        await self.bot.cases.create(ctx.guild.id, member.id, ctx.author.id, "mute", duration=minutes)
+        await ctx.send(embed=powered_embed(f"Muted {member.mention} for {minutes} minutes." if minutes else f"Muted {member.mention}."))
         logger.info(f"Mute {member} for {minutes} minutes." if minutes else f"Mute {member}.")
 
+    @commands.hybrid_command(name="unmute", description="Unmute a member.")
+    @commands.has_permissions(manage_roles=True)
+    async def unmute(self, ctx, member: Member):
+        settings = await self.bot.get_settings(ModerationSettings, ctx.guild.id)
+        role = ctx.guild.get_role(settings.mute_role_id or 0)
+        if role is not None:
+            await member.remove_roles(role, reason=f"Unmuted by {ctx.author}")
+            await self.bot.scheduler.cancel(f"role:{ctx.guild.id}:{member.id}:{role.id}")
+        await ctx.send(embed=powered_embed(f"Unmuted {member.mention}."))
+
+    @commands.hybrid_command(name="temprole", description="Give a member a role for a limited time.")
+    @commands.has_permissions(manage_roles=True)
+    async def temprole(self, ctx, member: Member, role: discord.Role, minutes: int):
+        if role >= ctx.guild.me.top_role:
+            await ctx.send(embed=powered_embed("I cannot assign that role."))
+            return
+        await member.add_roles(role, reason=f"Temporary role from {ctx.author}")
+        await self.schedule_role_removal(ctx.guild.id, member.id, role.id, minutes, "Temporary role expired")
+        await ctx.send(embed=powered_embed(f"Gave {role.name} to {member.mention} for {minutes} minutes."))
+
+    async def schedule_role_removal(self, guild_id: int, user_id: int, role_id: int, minutes: int, reason: str):
+        """Persist the role removal; permanent when ``minutes`` is empty."""
+        key = f"role:{guild_id}:{user_id}:{role_id}"
+        if not minutes:
+            await self.bot.scheduler.cancel(key)
+            return
+        await self.bot.scheduler.schedule(
+            'remove_role',
+            datetime.utcnow() + timedelta(minutes=minutes),
+            {'guild_id': guild_id, 'user_id': user_id, 'role_id': role_id, 'reason': reason},
+            key=key
+        )
+
     @commands.hybrid_command(name="warn", description="Warn a member.")
-    async def warn(self, member: Member, *, reason: str):
-        # Implement warning logic here (e.g., incrementing warnings in the database)
-        await self.bot.get_context(self).send(embed=powered_embed(f"Warned {member.mention} for: {reason}"))
+    @commands.has_permissions(moderate_members=True)
+    async def warn(self, ctx, member: Member, *, reason: str):
+        case = await self.bot.cases.create(ctx.guild.id, member.id, ctx.author.id, "warn", reason)
+        await ctx.send(embed=powered_embed(f"Case #{case['case_no']}: Warned {member.mention} for: {reason}"))
         logger.info(f"Warned {member} for: {reason}")
 
     @commands.hybrid_command(name="warnings", description="List warnings for a member.")
-    async def warnings(self, member: Member):
-        # Implement logic to retrieve and display warnings
-        await self.bot.get_context(self).send(embed=powered_embed(f"Warnings for {member.mention}: ..."))  # Replace with actual warnings
-        logger.info(f"Retrieved warnings for {member}")
+    @commands.has_permissions(moderate_members=True)
+    async def warnings(self, ctx, member: discord.User):
+        await self.send_history(ctx, member, "warn")
+
+    @commands.hybrid_command(name="history", description="Show a member's moderation history.")
+    @commands.has_permissions(moderate_members=True)
+    async def history(self, ctx, member: discord.User):
+        await self.send_history(ctx, member, None)
+
+    async def send_history(self, ctx, member, action):
+        view = CaseHistoryView(self.bot, ctx.author.id, ctx.guild.id, member, action)
+        embed = await view.load_page()
+        await ctx.send(embed=embed, view=view if view.has_more else None)
+        logger.info(f"Retrieved {action or 'moderation'} history for {member}")
 
     @commands.hybrid_command(name="clear", description="Clear messages in a channel.")
     @commands.has_permissions(manage_messages=True)
-    async def clear(self, amount: int = 5):
-        await self.bot.get_context(self).channel.purge(limit=amount)
-        await self.bot.get_context(self).send(embed=powered_embed(f"Cleared {amount} messages."))
-        logger.info(f"Cleared {amount} messages.")
+    async def clear(self, ctx, amount: int = 5, *, filters: str = ""):
+        """Delete up to `amount` matching messages.
+
+        Filters: user:<id> bots humans regex:<pattern> contains:<text> links attachments before:<id> after:<id>
+        """
+        try:
+            message_filter = PurgeFilter(filters)
+        except PurgeFilterError as e:
+            await ctx.send(embed=powered_embed(str(e)))
+            return
+
+        await ctx.defer()
+        status = await ctx.send(embed=powered_embed(f"Clearing up to {amount} messages..."))
+
+        async def progress(state):
+            await status.edit(embed=powered_embed(
+                f"Clearing messages: {state['deleted']}/{amount} deleted, {state['scanned']} scanned"
+            ))
+
+        skip_ids = {status.id}
+        if ctx.interaction is None:
+            skip_ids.add(ctx.message.id)
+        job = PurgeJob(ctx.channel, amount, message_filter, skip_ids=skip_ids, progress=progress)
+        state = await job.run()
+
+        await status.edit(embed=powered_embed(
+            f"Cleared {state['deleted']} messages.",
+            f"Scanned {state['scanned']}, failed {state['failed']}." if state['failed'] else None
+        ))
+        logger.info(f"Cleared {state['deleted']} messages in {ctx.channel} ({filters or 'no filters'}).")
+
+class CaseHistoryView(discord.ui.View):
+    """Pages through a member's cases with keyset cursors; only one page is held."""
+    PAGE_SIZE = 10
+
+    def __init__(self, bot, author_id: int, guild_id: int, member, action):
+        super().__init__(timeout=300)
+        self.bot = bot
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.member = member
+        self.action = action
+        self.cursors = [None]  # Cursor that starts each visited page
+        self.has_more = False
+
+    async def load_page(self) -> Embed:
+        cases, next_cursor = await self.bot.cases.history(
+            self.guild_id, self.member.id, self.action,
+            after=self.cursors[-1], limit=self.PAGE_SIZE
+        )
+        self.has_more = next_cursor is not None
+        if self.has_more:
+            self.cursors.append(next_cursor)
+        self.newer.disabled = len(self.cursors) <= 1 + self.has_more
+        self.older.disabled = not self.has_more
+
+        title = f"{'Warnings' if self.action == 'warn' else 'Moderation history'} for {self.member}"
+        if not cases:
+            return powered_embed(title, "No cases found.")
+        lines = []
+        for case in cases:
+            line = f"**#{case['case_no']}** {case['action']} by <@{case['moderator_id']}> {discord.utils.format_dt(case['created_at'].replace(tzinfo=timezone.utc), 'R')}"
+            if case.get('duration'):
+                line += f" ({case['duration']}m)"
+            if case.get('reason'):
+                line += f"\n{case['reason']}"
+            lines.append(line)
+        return powered_embed(title, "\n".join(lines))
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    @discord.ui.button(label="Newer", style=discord.ButtonStyle.secondary)
+    async def newer(self, interaction: discord.Interaction, button: discord.ui.Button):
+        # Drop the cursor for the page after this one and the one for this page
+        del self.cursors[-1 - self.has_more:]
+        await interaction.response.edit_message(embed=await self.load_page(), view=self)
+
+    @discord.ui.button(label="Older", style=discord.ButtonStyle.secondary)
+    async def older(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(embed=await self.load_page(), view=self)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Moderation(bot))
\ No newline at end of file
@@ -1,11 +1,13 @@
 import discord
 from discord import Embed, Message, User
 from discord.ext import commands
-from core.database import Database
 from core.logger import get_logger
+from core.modmail_router import thread_id
+from core.settings import ModMailSettings
+from core.transcripts import export_transcript
 from utils.embeds import powered_embed
 
-logger = get_logger(__name__)
+logger = get_logger()
 
 class ModMail(commands.Cog):
     @commands.hybrid_group(name="modmail", description="ModMail command group.")
@@ -15,57 +17,148 @@ class ModMail(commands.Cog):
             await ctx.send("Use a subcommand: thread, reply, close, list, transcript.")
 
     @modmail.command(name="thread")
+    @commands.has_permissions(manage_messages=True)
     async def thread(self, ctx, user: discord.Member):
-        await ctx.send(f"Opened modmail thread for {user.mention} (implement logic)")
+        settings = await self.bot.get_settings(ModMailSettings, ctx.guild.id)
+        await self.bot.modmail.open_thread(user.id, ctx.guild.id, settings.channel_id)
+        await ctx.send(embed=powered_embed(f"Opened modmail thread for {user.mention}."))
 
     @modmail.command(name="reply")
     async def reply(self, ctx, thread_id: str, *, message: str):
         await ctx.send(f"Replied to thread {thread_id}: {message} (implement logic)")
 
     @modmail.command(name="close")
-    async def close(self, ctx, thread_id: str):
-        await ctx.send(f"Closed modmail thread {thread_id} (implement logic)")
+    @commands.has_permissions(manage_messages=True)
+    async def close(self, ctx, user: discord.User):
+        if await self.bot.modmail.close_thread(user.id, ctx.guild.id):
+            await ctx.send(embed=powered_embed(f"Closed modmail thread for {user.mention}."))
+        else:
+            await ctx.send(embed=powered_embed(f"{user.mention} has no open modmail thread."))
 
     @modmail.command(name="list")
     async def list_threads(self, ctx):
-        await ctx.send("List of modmail threads (implement logic)")
+        threads = self.bot.modmail.open_threads(ctx.guild.id)
+        if not threads:
+            await ctx.send(embed=powered_embed("No open modmail threads."))
+            return
+        lines = [f"<@{user_id}>" for user_id, _ in threads[:25]]
+        await ctx.send(embed=powered_embed(f"Open modmail threads ({len(threads)})", "\n".join(lines)))
 
     @modmail.command(name="transcript")
-    async def transcript(self, ctx, thread_id: str):
-        await ctx.send(f"Transcript for thread {thread_id} (implement logic)")
+    @commands.has_permissions(manage_messages=True)
+    async def transcript(self, ctx, user: discord.User):
+        """Export what ``user`` sent to this server's ModMail, never the whole DM history."""
+        doc = await self.db.modmail_threads.find_one(
+            {'_id': thread_id(user.id, ctx.guild.id)}, {'thread_channel_id': 1}
+        )
+        if doc is None:
+            await ctx.send(embed=powered_embed(f"{user.mention} has no modmail thread in this server."))
+            return
+        channel = ctx.guild.get_channel(doc.get('thread_channel_id') or 0)
+        if channel is None:
+            await ctx.send(embed=powered_embed("The ModMail channel for this thread no longer exists."))
+            return
+
+        footer = f"User ID: {user.id}"
+
+        def forwarded(message) -> bool:
+            return any(embed.footer.text == footer for embed in message.embeds)
+
+        async with ctx.typing():
+            try:
+                file, count = await export_transcript(
+                    channel, f"ModMail - {user} ({user.id})", f"modmail-{user.id}", include=forwarded
+                )
+            except discord.HTTPException as e:
+                logger.error(f"Error exporting modmail transcript for {user.id}: {str(e)}")
+                await ctx.send(embed=powered_embed(f"Could not read the conversation with {user.mention}."))
+                return
+        await ctx.send(embed=powered_embed(f"ModMail transcript for {user.mention} ({count} messages)"), file=file)
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.db = Database(bot.config.MONGO_URI).db
+        self.db = bot.db
 
     async def get_modmail_channel(self, guild_id: int):
-        # Fetch the modmail channel from the database
-        modmail_config = await self.db.modmail_threads.find_one({'_id': guild_id})
-        return modmail_config['modmail_channel'] if modmail_config else None
+        settings = await self.bot.get_settings(ModMailSettings, guild_id)
+        return settings.channel_id
 
     @commands.Cog.listener()
     async def on_message(self, message: Message):
-        if message.author.bot:
+        if message.author.bot or not isinstance(message.channel, discord.DMChannel):
             return
-        
-        # Check if the message is a DM
-        if isinstance(message.channel, discord.DMChannel):
-            guild_id = self.get_guild_id_from_user(message.author.id)
-            modmail_channel_id = await self.get_modmail_channel(guild_id)
-            if modmail_channel_id:
-                modmail_channel = self.bot.get_channel(modmail_channel_id)
-                if modmail_channel:
-                    embed = powered_embed(title="New ModMail", description=message.content, color=0x00ff00)
-                    await modmail_channel.send(embed=embed)
-                    await message.channel.send("Your message has been sent to the staff.")
-                else:
-                    await message.channel.send("ModMail channel not found.")
-            else:
-                await message.channel.send("ModMail is not set up for this server.")
-
-    def get_guild_id_from_user(self, user_id: int):
-        # Logic to retrieve the guild ID from the user ID
-        # This is a placeholder and should be implemented based on your logic
-        return 123456789012345678  # Replace with actual logic
+
+        route = await self.bot.modmail.route(message.author.id)
+        if route.guild_id is not None:
+            await self.forward(message, route.guild_id)
+        elif route.candidates:
+            view = GuildPickerView(self, message, route.candidates)
+            await message.channel.send(embed=powered_embed("Which server is this about?"), view=view)
+        else:
+            await message.channel.send("ModMail is not set up in any server we share.")
+
+    async def forward(self, message: Message, guild_id: int) -> bool:
+        """Post a DM to the guild's ModMail channel and make sure a thread is open."""
+        channel_id = await self.get_modmail_channel(guild_id)
+        if not channel_id:
+            await message.channel.send("ModMail channel not found.")
+            return False
+        # The guild may sit on another shard's bot; sending only needs the REST API
+        modmail_channel = self.bot.get_channel(channel_id) or self.bot.get_partial_messageable(channel_id)
+
+        embed = powered_embed(title="New ModMail", description=message.content, color=0x00ff00)
+        embed.set_author(name=str(message.author), icon_url=message.author.display_avatar.url)
+        embed.set_footer(text=f"User ID: {message.author.id}")
+        try:
+            await modmail_channel.send(embed=embed)
+        except (discord.NotFound, discord.Forbidden):
+            await message.channel.send("ModMail channel not found.")
+            return False
+
+        if self.bot.modmail.thread_channel(message.author.id, guild_id) is None:
+            await self.bot.modmail.open_thread(message.author.id, guild_id, channel_id)
+        await message.channel.send("Your message has been sent to the staff.")
+        return True
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Membership records for this bot's ModMail guilds; skipped if recently synced
+        await self.bot.modmail.sync_guilds(self.bot.guilds)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        await self.bot.modmail.member_joined(member.guild.id, member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        await self.bot.modmail.member_left(member.guild.id, member.id)
+
+class GuildPickerView(discord.ui.View):
+    """Asks a user who shares several ModMail guilds which one a DM is for."""
+
+    def __init__(self, cog: ModMail, message: Message, guild_ids, timeout: float = 120):
+        super().__init__(timeout=timeout)
+        self.cog = cog
+        self.message = message
+        # Guilds on other shards are not cached here; the router knows their names
+        options = [
+            discord.SelectOption(label=cog.bot.modmail.guild_name(guild_id)[:100], value=str(guild_id))
+            for guild_id in guild_ids[:25]
+        ]
+        self.select = discord.ui.Select(placeholder="Choose a server", options=options)
+        self.select.callback = self.on_select
+        self.add_item(self.select)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.message.author.id
+
+    async def on_select(self, interaction: discord.Interaction):
+        guild_id = int(self.select.values[0])
+        self.stop()
+        await interaction.response.edit_message(
+            embed=powered_embed(f"Sending to {self.cog.bot.modmail.guild_name(guild_id)}."), view=None
+        )
+        await self.cog.forward(self.message, guild_id)
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(ModMail(bot))
\ No newline at end of file
+    await bot.add_cog(ModMail(bot))
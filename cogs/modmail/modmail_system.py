@@ -40,6 +40,16 @@ class ModMailSystem(commands.Cog):
         )
         await ctx.send(embed=powered_embed("Disabled ModMail system"))
 
+    @modmail_setup.command(name="channel")
+    async def setup_channel(self, ctx, channel: discord.TextChannel):
+        """Set the channel ModMail DMs are forwarded to."""
+        await self.db.guild_settings.update_one(
+            {'_id': ctx.guild.id},
+            {'$set': {'modmail.channel_id': channel.id}},
+            upsert=True
+        )
+        await ctx.send(embed=powered_embed(f"ModMail messages will be sent to {channel.mention}"))
+
     @modmail.group(name="categories")
     async def modmail_categories(self, ctx):
         """Manage ModMail categories."""
@@ -1,8 +1,9 @@
 import discord
 from discord import app_commands, Interaction, Member, SelectOption
-from discord.ext import commands, tasks
+from discord.ext import commands
 from datetime import datetime, timedelta
 from typing import Optional
+from core.components import custom_id, static_view
 from core.config import PREFIX, OWNER_ID
 from core.logger import get_logger
 from utils.embeds import powered_embed
@@ -10,30 +11,36 @@ from utils.embeds import powered_embed
 class NoPrefix(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_expired_task.start()
         self.logger = get_logger()
+        self.bot.scheduler.register('noprefix_expire', self.expire_user)
+        self.bot.components.register('np.duration', self.choose_duration, int, int)
 
     def cog_unload(self):
-        self.check_expired_task.cancel()
+        self.bot.components.unregister('np.duration')
 
-    @tasks.loop(minutes=5.0)
-    async def check_expired_task(self):
-        """Check for and remove expired no-prefix users."""
+    async def cog_load(self):
+        """Make sure every expiring entry has a scheduler job; existing jobs keep their lease."""
         try:
-            now = datetime.utcnow().isoformat()
-            # Find and remove expired entries
-            result = await self.bot.db.noprefix_users.delete_many({
-                'expires_at': {'$lt': now}
-            })
-            if result.deleted_count > 0:
-                self.logger.info(f"Removed {result.deleted_count} expired no-prefix users")
+            async for user in self.bot.db.noprefix_users.find({'expires_at': {'$ne': None}}, {'expires_at': 1}):
+                await schedule_expiry(self.bot, user['_id'], user['expires_at'], replace=False)
         except Exception as e:
-            self.logger.error(f"Error checking expired no-prefix users: {str(e)}")
+            self.logger.error(f"Error scheduling no-prefix expiries: {str(e)}")
 
-    @check_expired_task.before_loop
-    async def before_check_expired(self):
-        """Wait until the bot is ready before starting the task."""
-        await self.bot.wait_until_ready()
+    async def expire_user(self, payload):
+        """Scheduled job: remove a no-prefix entry whose duration ran out."""
+        result = await self.bot.db.noprefix_users.delete_one({
+            '_id': payload['user_id'],
+            'expires_at': {'$lte': datetime.utcnow()}
+        })
+        if result.deleted_count > 0:
+            self.bot.prefix_cache.pop("noprefix_users", None)
+            await self.bot.db.noprefix_audit.insert_one({
+                'timestamp': datetime.utcnow().isoformat(),
+                'action': 'expire',
+                'actor_id': self.bot.user.id if self.bot.user else None,
+                'target_id': payload['user_id']
+            })
+            self.logger.info(f"Removed expired no-prefix user {payload['user_id']}")
 
     @commands.hybrid_group(name="noprefix", description="No-Prefix command group.")
     @commands.has_permissions(administrator=True)
@@ -64,7 +71,7 @@ class NoPrefix(commands.Cog):
                 )
                 return
 
-            view = NoPrefixDurationView(self.bot, interaction.user, user)
+            view = duration_panel(interaction.user.id, user.id)
             embed = powered_embed("No-Prefix Duration Selection")
             embed.description = f"Select duration for {user.mention}'s no-prefix access:"
             embed.add_field(
@@ -89,6 +96,8 @@ class NoPrefix(commands.Cog):
         """Remove a user from the no-prefix users list."""
         try:
             result = await self.bot.db.noprefix_users.delete_one({'_id': user.id})
+            await self.bot.scheduler.cancel(f"noprefix:{user.id}")
+            self.bot.prefix_cache.pop("noprefix_users", None)
             
             if result.deleted_count > 0:
                 embed = powered_embed("No-Prefix Access Removed")
@@ -163,9 +172,8 @@ class NoPrefix(commands.Cog):
                 ]
                 
                 if expires_at:
-                    exp_time = datetime.fromisoformat(expires_at)
-                    if exp_time > datetime.utcnow():
-                        value.append(f"Expires: <t:{int(exp_time.timestamp())}:R>")
+                    if expires_at > datetime.utcnow():
+                        value.append(f"Expires: <t:{int(expires_at.timestamp())}:R>")
                     else:
                         value.append("Expired")
                 else:
@@ -238,84 +246,18 @@ class NoPrefix(commands.Cog):
                 ephemeral=True
             )
 
-class NoPrefixDurationView(discord.ui.View):
-    def __init__(self, bot, owner, target_user):
-        super().__init__(timeout=300)
-        self.bot = bot
-        self.owner = owner
-        self.target_user = target_user
-        
-        # Add duration selector
-        self.add_item(DurationSelect(bot, owner, target_user))
-
-class DurationSelect(discord.ui.Select):
-    def __init__(self, bot, owner, target_user):
-        self.bot = bot
-        self.owner = owner
-        self.target_user = target_user
-        self.logger = get_logger()
-        
-        options = [
-            SelectOption(
-                label="1 Hour",
-                description="No-prefix access for 1 hour",
-                value="1h",
-                emoji="⏱️"
-            ),
-            SelectOption(
-                label="6 Hours",
-                description="No-prefix access for 6 hours",
-                value="6h",
-                emoji="⏱️"
-            ),
-            SelectOption(
-                label="12 Hours",
-                description="No-prefix access for 12 hours",
-                value="12h",
-                emoji="⏱️"
-            ),
-            SelectOption(
-                label="1 Day",
-                description="No-prefix access for 24 hours",
-                value="24h",
-                emoji="📅"
-            ),
-            SelectOption(
-                label="1 Week",
-                description="No-prefix access for 1 week",
-                value="1w",
-                emoji="📅"
-            ),
-            SelectOption(
-                label="1 Month",
-                description="No-prefix access for 1 month",
-                value="1m",
-                emoji="📅"
-            ),
-            SelectOption(
-                label="Permanent",
-                description="Permanent no-prefix access",
-                value="permanent",
-                emoji="♾️"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select duration...",
-            options=options,
-            row=0
-        )
-
-    async def callback(self, interaction: discord.Interaction):
+    async def choose_duration(self, interaction: Interaction, owner_id: int, target_id: int):
+        """Duration picked on a panel sent by np_add; both ids travel in the custom_id."""
         try:
-            if interaction.user != self.owner:
+            if interaction.user.id != owner_id:
                 await interaction.response.send_message(
                     "You cannot use this panel",
                     ephemeral=True
                 )
                 return
 
-            duration = self.values[0]
+            target_user = self.bot.get_user(target_id) or await self.bot.fetch_user(target_id)
+            duration = interaction.data['values'][0]
             expires_at = None
             duration_text = "permanently"
             
@@ -347,31 +289,34 @@ class DurationSelect(discord.ui.Select):
             try:
                 # Update database
                 await self.bot.db.noprefix_users.update_one(
-                    {'_id': self.target_user.id},
+                    {'_id': target_user.id},
                     {'$set': {
-                        'added_by': self.owner.id,
+                        'added_by': interaction.user.id,
                         'added_at': now.isoformat(),
-                        'expires_at': expires_at.isoformat() if expires_at else None,
+                        'expires_at': expires_at,
                         'duration': duration
                     }},
                     upsert=True
                 )
+                self.bot.prefix_cache.pop("noprefix_users", None)
+                if expires_at:
+                    await schedule_expiry(self.bot, target_user.id, expires_at)
                 
                 # Add audit log entry
                 await self.bot.db.noprefix_audit.insert_one({
                     'timestamp': now.isoformat(),
                     'action': 'add',
-                    'actor_id': self.owner.id,
-                    'target_id': self.target_user.id,
+                    'actor_id': interaction.user.id,
+                    'target_id': target_user.id,
                     'details': f"Duration: {duration_text}"
                 })
                 
                 self.logger.info(
-                    f"No-prefix added to {self.target_user} by {self.owner} with duration {duration_text}"
+                    f"No-prefix added to {target_user} by {interaction.user} with duration {duration_text}"
                 )
                 
             except Exception as e:
-                self.logger.error(f"Database error in DurationSelect: {str(e)}")
+                self.logger.error(f"Database error in choose_duration: {str(e)}")
                 await interaction.response.send_message(
                     "An error occurred while updating the database. Please try again.",
                     ephemeral=True
@@ -380,7 +325,7 @@ class DurationSelect(discord.ui.Select):
 
             # Create confirmation embed
             embed = powered_embed("No-Prefix Access Granted")
-            embed.description = f"{self.target_user.mention} has been given no-prefix access {duration_text}."
+            embed.description = f"{target_user.mention} has been given no-prefix access {duration_text}."
             
             if expires_at:
                 embed.add_field(
@@ -392,13 +337,12 @@ class DurationSelect(discord.ui.Select):
 
             embed.add_field(
                 name="Added By",
-                value=self.owner.mention,
+                value=interaction.user.mention,
                 inline=True
             )
 
             # Disable the select menu and update the message
-            self.disabled = True
-            await interaction.response.edit_message(embed=embed, view=self.view)
+            await interaction.response.edit_message(embed=embed, view=duration_panel(owner_id, target_id, disabled=True))
 
             # Send DM to target user
             try:
@@ -409,36 +353,47 @@ class DurationSelect(discord.ui.Select):
                         name="Expires",
                         value=f"<t:{int(expires_at.timestamp())}:F> (<t:{int(expires_at.timestamp())}:R>)"
                     )
-                await self.target_user.send(embed=dm_embed)
+                await target_user.send(embed=dm_embed)
             except discord.Forbidden:
                 # If we can't DM the user, just ignore it
                 pass
 
         except Exception as e:
-            self.logger.error(f"Error in DurationSelect callback: {str(e)}")
+            self.logger.error(f"Error in choose_duration: {str(e)}")
             await interaction.response.send_message(
                 "An error occurred while processing your request. Please try again.",
                 ephemeral=True
             )
 
-    @commands.hybrid_command(name="np_remove", description="Remove a user from no-prefix users.")
-    @commands.has_permissions(administrator=True)
-    async def np_remove(self, interaction: Interaction, user: Member):
-        """Remove a user from the no-prefix users list."""
-        await self.bot.db.noprefix_users.delete_one({'_id': user.id})
-        await interaction.response.send_message(embed=powered_embed(f"{user.mention} has been removed from no-prefix users."))
+async def schedule_expiry(bot, user_id: int, expires_at: datetime, replace: bool = True):
+    """Schedule removal of a user's no-prefix access at ``expires_at``."""
+    await bot.scheduler.schedule(
+        'noprefix_expire',
+        expires_at,
+        {'user_id': user_id},
+        key=f"noprefix:{user_id}",
+        replace=replace
+    )
 
-    @commands.hybrid_command(name="np_list", description="List all no-prefix users.")
-    @commands.has_permissions(administrator=True)
-    async def np_list(self, interaction: Interaction):
-        """List all users in the no-prefix users list."""
-        users = await self.bot.db.noprefix_users.find().to_list(length=None)
-        if not users:
-            await interaction.response.send_message(embed=powered_embed("No users found in no-prefix list."))
-            return
+DURATION_OPTIONS = [
+    SelectOption(label="1 Hour", description="No-prefix access for 1 hour", value="1h", emoji="⏱️"),
+    SelectOption(label="6 Hours", description="No-prefix access for 6 hours", value="6h", emoji="⏱️"),
+    SelectOption(label="12 Hours", description="No-prefix access for 12 hours", value="12h", emoji="⏱️"),
+    SelectOption(label="1 Day", description="No-prefix access for 24 hours", value="24h", emoji="📅"),
+    SelectOption(label="1 Week", description="No-prefix access for 1 week", value="1w", emoji="📅"),
+    SelectOption(label="1 Month", description="No-prefix access for 1 month", value="1m", emoji="📅"),
+    SelectOption(label="Permanent", description="Permanent no-prefix access", value="permanent", emoji="♾️")
+]
 
-        user_mentions = [f"<@{user['_id']}>" for user in users]
-        await interaction.response.send_message(embed=powered_embed("No-Prefix Users:\n" + "\n".join(user_mentions)))
+def duration_panel(owner_id: int, target_id: int, disabled: bool = False) -> discord.ui.View:
+    """Duration selector for np_add; answered by NoPrefix.choose_duration."""
+    return static_view(discord.ui.Select(
+        custom_id=custom_id('np.duration', owner_id, target_id),
+        placeholder="Select duration...",
+        options=DURATION_OPTIONS,
+        disabled=disabled,
+        row=0
+    ))
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(NoPrefix(bot))
\ No newline at end of file
@@ -1,3 +1,39 @@
+import discord
+from discord import app_commands, Interaction, Member, ButtonStyle, SelectOption
+from discord.ext import commands
+from discord.ui import View, Button
+from core.components import custom_id, static_view
+from core.logger import get_logger
+from core.settings import TicketSettings
+from core.transcripts import export_transcript
+from utils.embeds import powered_embed
+
+def ticket_panel() -> View:
+    return static_view(Button(label="Create Ticket", style=ButtonStyle.primary, custom_id=custom_id('tk.open')))
+
+class TicketCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.db = bot.db
+        self.logger = get_logger()
+        bot.components.register('tk.open', self.open_from_panel)
+
+    def cog_unload(self):
+        self.bot.components.unregister('tk.open')
+
+    async def open_from_panel(self, interaction: Interaction):
+        # The guild's channel queue may hold the request past the 3 second window
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            ticket = await self.bot.tickets.open(interaction.guild, interaction.user, interaction.id)
+        except discord.HTTPException:
+            await interaction.followup.send("Could not create your ticket, please try again later.", ephemeral=True)
+            return
+        if ticket.created:
+            await interaction.followup.send(f'Ticket #{ticket.number} created: <#{ticket.channel_id}>', ephemeral=True)
+        else:
+            await interaction.followup.send(f'You already have an open ticket: <#{ticket.channel_id}>', ephemeral=True)
+
     @commands.hybrid_group(name="ticket", description="Ticket command group.")
     async def ticket(self, ctx):
         """Ticket command group."""
@@ -47,45 +83,50 @@
 
     @ticket.command(name="list")
     async def list_tickets(self, ctx):
-        await ctx.send("List of open tickets (implement logic)")
-from discord import app_commands, Interaction, Member, ButtonStyle, SelectOption
-from discord.ext import commands
-from discord.ui import View, Button, Select
-from core.database import Database
-from utils.embeds import powered_embed
-
-class TicketSetupView(View):
-    def __init__(self, bot, channel_id):
-        super().__init__(timeout=None)
-        self.bot = bot
-        self.channel_id = channel_id
-
-    @button(label="Create Ticket", style=ButtonStyle.primary)
-    async def create_ticket(self, button: Button, interaction: Interaction):
-        guild = interaction.guild
-        ticket_channel = await guild.create_text_channel(f'ticket-{interaction.user.name}', category=None)
-        await ticket_channel.set_permissions(interaction.user, read_messages=True, send_messages=True)
-        await ticket_channel.send(f'Ticket created by {interaction.user.mention}.')
-        await interaction.response.send_message(f'Ticket created: {ticket_channel.mention}', ephemeral=True)
-
-class TicketCog(commands.Cog):
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self.db = Database()
+        tickets = await self.bot.tickets.open_tickets(ctx.guild.id)
+        if not tickets:
+            await ctx.send(embed=powered_embed("No open tickets."))
+            return
+        lines = [f"#{t['number']} <#{t['channel_id']}> by <@{t['user_id']}>" for t in tickets]
+        await ctx.send(embed=powered_embed(f"Open tickets ({len(tickets)})", "\n".join(lines)))
 
     @app_commands.command(name="ticket_setup", description="Set up the ticket panel.")
     @commands.has_permissions(manage_guild=True)
     async def ticket_setup(self, interaction: Interaction):
-        view = TicketSetupView(self.bot, interaction.channel_id)
-        await interaction.response.send_message("Click the button below to create a ticket.", view=view)
+        await interaction.response.send_message("Click the button below to create a ticket.", view=ticket_panel())
+
+    async def send_transcript(self, channel: discord.TextChannel, closed_by: discord.abc.User):
+        """Stream the ticket's history to the log channel before the channel goes away."""
+        settings = await self.bot.get_settings(TicketSettings, channel.guild.id)
+        log_channel = channel.guild.get_channel(settings.log_channel_id or 0)
+        if log_channel is None:
+            return
+
+        try:
+            file, count = await export_transcript(channel, f"#{channel.name} - {channel.guild.name}", channel.name)
+            embed = powered_embed("Ticket Closed", f"{channel.name} closed by {closed_by.mention} ({count} messages)")
+            await log_channel.send(embed=embed, file=file)
+        except discord.HTTPException as e:
+            self.logger.error(f"Error sending transcript for {channel.id}: {str(e)}")
 
     @app_commands.command(name="ticket_close", description="Close the current ticket.")
     async def ticket_close(self, interaction: Interaction):
-        if interaction.channel.name.startswith('ticket-'):
-            await interaction.channel.delete()
-            await interaction.response.send_message("Ticket closed.", ephemeral=True)
-        else:
+        ticket = await self.bot.tickets.get(interaction.guild_id, interaction.channel_id)
+        if ticket is None:
             await interaction.response.send_message("This command can only be used in a ticket channel.", ephemeral=True)
+            return
+        # The opener, or staff who can manage this channel
+        if ticket['user_id'] != interaction.user.id and not interaction.channel.permissions_for(interaction.user).manage_channels:
+            await interaction.response.send_message("Only the ticket's creator or staff can close it.", ephemeral=True)
+            return
+
+        if await self.bot.tickets.close(interaction.guild_id, interaction.channel_id, interaction.user.id) is None:
+            await interaction.response.send_message("This ticket is already being closed.", ephemeral=True)
+            return
+        # Exporting can outlast the 3 second interaction window on long tickets
+        await interaction.response.send_message("Closing ticket and saving transcript...", ephemeral=True)
+        await self.send_transcript(interaction.channel, interaction.user)
+        await interaction.channel.delete()
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(TicketCog(bot))
\ No newline at end of file
+    await bot.add_cog(TicketCog(bot))
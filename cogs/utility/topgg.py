@@ -1,6 +1,5 @@
 import discord
 from discord.ext import commands, tasks
-import aiohttp
 import os
 from core.logger import get_logger
 from discord import Webhook, app_commands
@@ -45,21 +44,20 @@ class TopGG(commands.Cog):
             }
 
             if self.bot.is_ready():
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(self.stats_url, headers=headers, json=payload) as resp:
-                        if resp.status == 200:
-                            self.logger.info(
-                                f"Posted stats to Top.gg: {guild_count} servers",
-                                extra={
-                                    'guild_count': guild_count,
-                                    'shard_count': shard_count
-                                }
-                            )
-                        else:
-                            self.logger.error(
-                                f"Failed to post Top.gg stats. Status: {resp.status}",
-                                extra={'response': await resp.text()}
-                            )
+                async with self.bot.http_client.post(self.stats_url, headers=headers, json=payload) as resp:
+                    if resp.status == 200:
+                        self.logger.info(
+                            f"Posted stats to Top.gg: {guild_count} servers",
+                            extra={
+                                'guild_count': guild_count,
+                                'shard_count': shard_count
+                            }
+                        )
+                    else:
+                        self.logger.error(
+                            f"Failed to post Top.gg stats. Status: {resp.status}",
+                            extra={'response': await resp.text()}
+                        )
 
         except Exception as e:
             self.logger.error(f"Error updating Top.gg stats: {str(e)}")
@@ -1,6 +1,8 @@
 import discord
 from discord import Embed
 from discord.ext import commands
+from typing import Dict
+from core.mass_role import MassRoleJob, MemberCondition, ConditionError
 from utils.embeds import powered_embed
 
 class Utility(commands.Cog):
@@ -43,7 +45,7 @@ class Utility(commands.Cog):
     async def role_members(self, ctx):
         """Manage role members."""
         if ctx.invoked_subcommand is None:
-            await ctx.send("Use a subcommand: list, add, remove, clear, mass_add, mass_remove, search.")
+            await ctx.send("Use a subcommand: list, add, remove, clear, mass_add, mass_remove, mass_cancel, search.")
 
     @role_members.command(name="list")
     async def members_list(self, ctx, role: discord.Role):
@@ -62,12 +64,62 @@ class Utility(commands.Cog):
         await ctx.send(f"Cleared all members from {role.name}")
 
     @role_members.command(name="mass_add")
-    async def members_mass_add(self, ctx, role: discord.Role, condition: str):
-        await ctx.send(f"Mass adding members to {role.name} based on {condition}")
+    @commands.has_permissions(manage_roles=True)
+    async def members_mass_add(self, ctx, role: discord.Role, *, condition: str = ""):
+        """Add a role to every member matching a condition."""
+        await self.run_mass_role(ctx, role, "add", condition)
 
     @role_members.command(name="mass_remove")
-    async def members_mass_remove(self, ctx, role: discord.Role, condition: str):
-        await ctx.send(f"Mass removing members from {role.name} based on {condition}")
+    @commands.has_permissions(manage_roles=True)
+    async def members_mass_remove(self, ctx, role: discord.Role, *, condition: str = ""):
+        """Remove a role from every member matching a condition."""
+        await self.run_mass_role(ctx, role, "remove", condition)
+
+    @role_members.command(name="mass_cancel")
+    @commands.has_permissions(manage_roles=True)
+    async def members_mass_cancel(self, ctx, role: discord.Role):
+        """Stop running mass role jobs for a role; rerunning the command resumes them."""
+        cancelled = 0
+        for action in ("add", "remove"):
+            job = self.mass_role_jobs.get(f"{ctx.guild.id}:{role.id}:{action}")
+            if job:
+                job.cancelled = True
+                cancelled += 1
+        await ctx.send(embed=powered_embed(f"Cancelled {cancelled} mass role job(s) for {role.name}"))
+
+    async def run_mass_role(self, ctx, role: discord.Role, action: str, condition: str):
+        """Validate, start and report on a streamed mass role job."""
+        if role >= ctx.guild.me.top_role or role.managed:
+            await ctx.send(embed=powered_embed("I cannot manage that role."))
+            return
+        try:
+            compiled = MemberCondition.compile(condition)
+        except ConditionError as e:
+            await ctx.send(embed=powered_embed(f"Invalid condition: {str(e)}"))
+            return
+
+        job_key = f"{ctx.guild.id}:{role.id}:{action}"
+        if job_key in self.mass_role_jobs:
+            await ctx.send(embed=powered_embed("A mass role job for this role is already running."))
+            return
+
+        status = await ctx.send(embed=powered_embed(f"Mass role {action} started for {role.name}"))
+
+        async def progress(state):
+            embed = powered_embed(f"Mass role {action}: {role.name}")
+            embed.add_field(name="Scanned", value=str(state['scanned']))
+            embed.add_field(name="Matched", value=str(state['matched']))
+            embed.add_field(name="Applied", value=str(state['applied']))
+            embed.add_field(name="Failed", value=str(state['failed']))
+            embed.add_field(name="Status", value=state['status'])
+            await status.edit(embed=embed)
+
+        job = MassRoleJob(self.bot, ctx.guild, role, action, compiled, progress=progress)
+        self.mass_role_jobs[job_key] = job
+        try:
+            await job.run()
+        finally:
+            self.mass_role_jobs.pop(job_key, None)
 
     @role_members.command(name="search")
     async def members_search(self, ctx, role: discord.Role, query: str):
@@ -267,6 +319,7 @@ class Utility(commands.Cog):
         await ctx.send(embed=powered_embed("Embed sent. (implement logic)"))
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.mass_role_jobs: Dict[str, MassRoleJob] = {}
 
     @commands.hybrid_command(name="ping", description="Check the bot's latency.")
     async def ping(self, ctx: commands.Context):
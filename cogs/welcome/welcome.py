@@ -2,10 +2,11 @@ import discord
 from discord.ext import commands
 from discord import app_commands, Interaction, Member, SelectOption, TextChannel
 from core.logger import get_logger
+from core.settings import WelcomeSettings
 from utils.embeds import powered_embed
 from typing import Optional, Dict, Any
 import json
-from .welcome_config import WelcomeConfigView, WelcomePreviewdiscord
+from .welcome_config import WelcomeConfigPanel, WelcomePreview
 from discord.ext import commands
 from discord import app_commands, Interaction, SelectOption
 from core.logger import get_logger
@@ -17,18 +18,21 @@ class Welcome(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.logger = get_logger()
+        self.config_panel = WelcomeConfigPanel(bot)
+        self.config_panel.register(bot.components)
+
+    def cog_unload(self):
+        self.config_panel.unregister(self.bot.components)
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Handle member join events."""
         try:
             # Get welcome settings for the guild
-            settings = await self.bot.db.welcome_settings.find_one({'_id': member.guild.id})
-            if not settings:
-                return
+            settings = await self.bot.get_settings(WelcomeSettings, member.guild.id)
 
             # Get the welcome channel
-            channel_id = settings.get('welcome_channel')
+            channel_id = settings.welcome_channel
             if not channel_id:
                 return
 
@@ -37,7 +41,7 @@ class Welcome(commands.Cog):
                 return
 
             # Get welcome message
-            message = settings.get('welcome_message', 'Welcome {user} to {server}!')
+            message = settings.welcome_message
             message = message.replace('{user}', member.mention)
             message = message.replace('{server}', member.guild.name)
             message = message.replace('{count}', str(member.guild.member_count))
@@ -63,7 +67,7 @@ class Welcome(commands.Cog):
             await channel.send(embed=embed)
 
             # Assign auto-role if enabled
-            role_id = settings.get('autorole_id')
+            role_id = settings.autorole_id
             if role_id:
                 try:
                     role = member.guild.get_role(role_id)
@@ -88,12 +92,10 @@ class Welcome(commands.Cog):
         """Handle member leave events."""
         try:
             # Get leave settings for the guild
-            settings = await self.bot.db.welcome_settings.find_one({'_id': member.guild.id})
-            if not settings:
-                return
+            settings = await self.bot.get_settings(WelcomeSettings, member.guild.id)
 
             # Get the leave channel
-            channel_id = settings.get('leave_channel')
+            channel_id = settings.leave_channel
             if not channel_id:
                 return
 
@@ -102,7 +104,7 @@ class Welcome(commands.Cog):
                 return
 
             # Get leave message
-            message = settings.get('leave_message', 'Goodbye {user}! We now have {count} members.')
+            message = settings.leave_message
             message = message.replace('{user}', str(member))
             message = message.replace('{server}', member.guild.name)
             message = message.replace('{count}', str(member.guild.member_count))
@@ -142,7 +144,7 @@ class Welcome(commands.Cog):
     async def welcome(self, ctx):
         """Base welcome command that shows configuration UI."""
         if ctx.invoked_subcommand is None:
-            view = WelcomeConfigView(self.bot)
+            view = WelcomeConfigPanel.view(ctx.author.id)
             embed = powered_embed("Welcome System Configuration")
             embed.description = (
                 "Use the buttons below to configure:\n"
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands, Interaction, SelectOption, TextStyle
 from discord.ui import Modal, TextInput, View, Button, Select
+from core.components import custom_id, static_view
 from core.logger import get_logger
 from utils.embeds import powered_embed
 from typing import Optional, Dict, Any
@@ -95,24 +96,67 @@ class ConfigSelect(Select):
             options=options
         )
 
-class WelcomeConfigView(View):
-    def __init__(self, bot, timeout=180):
-        super().__init__(timeout=timeout)
+class WelcomeConfigPanel:
+    """Buttons of the welcome configuration panel, routed by custom_id.
+
+    The Welcome cog registers these once; the panel message and the reset
+    confirmation carry everything the handlers need, so no View is kept per
+    message. Like ``cfg.*``, every button carries the id of the admin who
+    opened the panel, and that member must still be an administrator.
+    """
+
+    def __init__(self, bot):
         self.bot = bot
         self.logger = get_logger()
 
-    @discord.ui.button(label="Configure Welcome", style=discord.ButtonStyle.primary)
-    async def welcome_config(self, interaction: Interaction, button: Button):
+    @staticmethod
+    def view(owner_id: int) -> View:
+        return static_view(
+            Button(label="Configure Welcome", style=discord.ButtonStyle.primary,
+                   custom_id=custom_id('wc.welcome', owner_id)),
+            Button(label="Configure Leave", style=discord.ButtonStyle.primary,
+                   custom_id=custom_id('wc.leave', owner_id)),
+            Button(label="Preview Settings", style=discord.ButtonStyle.secondary,
+                   custom_id=custom_id('wc.preview', owner_id)),
+            Button(label="Reset Settings", style=discord.ButtonStyle.danger,
+                   custom_id=custom_id('wc.reset', owner_id))
+        )
+
+    def register(self, router):
+        router.register('wc.welcome', self.welcome_config, int)
+        router.register('wc.leave', self.leave_config, int)
+        router.register('wc.preview', self.preview_settings, int)
+        router.register('wc.reset', self.reset_settings, int)
+        router.register('wc.reset_confirm', self.confirm_reset, int)
+        router.register('wc.reset_cancel', self.cancel_reset, int)
+
+    def unregister(self, router):
+        for action in ('wc.welcome', 'wc.leave', 'wc.preview', 'wc.reset', 'wc.reset_confirm', 'wc.reset_cancel'):
+            router.unregister(action)
+
+    async def check_owner(self, interaction: Interaction, owner_id: int) -> bool:
+        """Panels outlive restarts, so re-check who is clicking every time."""
+        permissions = getattr(interaction.user, 'guild_permissions', None)
+        if interaction.user.id != owner_id or permissions is None or not permissions.administrator:
+            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+            return False
+        return True
+
+    async def welcome_config(self, interaction: Interaction, owner_id: int):
+        if not await self.check_owner(interaction, owner_id):
+            return
         modal = WelcomeConfigModal()
         await interaction.response.send_modal(modal)
 
-    @discord.ui.button(label="Configure Leave", style=discord.ButtonStyle.primary)
-    async def leave_config(self, interaction: Interaction, button: Button):
+    async def leave_config(self, interaction: Interaction, owner_id: int):
+        if not await self.check_owner(interaction, owner_id):
+            return
         modal = LeaveConfigModal()
         await interaction.response.send_modal(modal)
 
-    @discord.ui.button(label="Preview Settings", style=discord.ButtonStyle.secondary)
-    async def preview_settings(self, interaction: Interaction, button: Button):
+    async def preview_settings(self, interaction: Interaction, owner_id: int):
+        if not await self.check_owner(interaction, owner_id):
+            return
         try:
             settings = await self.bot.db.welcome_settings.find_one({'_id': interaction.guild_id})
             if not settings:
@@ -176,41 +220,23 @@ class WelcomeConfigView(View):
                 ephemeral=True
             )
 
-    @discord.ui.button(label="Reset Settings", style=discord.ButtonStyle.danger)
-    async def reset_settings(self, interaction: Interaction, button: Button):
+    async def reset_settings(self, interaction: Interaction, owner_id: int):
+        if not await self.check_owner(interaction, owner_id):
+            return
         try:
-            # Add confirmation button
-            confirm_view = View(timeout=60)
-            
-            async def confirm_callback(i: Interaction):
-                if i.user != interaction.user:
-                    await i.response.send_message("You cannot use this confirmation.", ephemeral=True)
-                    return
-
-                await self.bot.db.welcome_settings.delete_one({'_id': interaction.guild_id})
-                await i.response.send_message("All welcome/leave settings have been reset.", ephemeral=True)
-                self.logger.info(f"Welcome settings reset in guild {interaction.guild_id}")
-
-            async def cancel_callback(i: Interaction):
-                if i.user != interaction.user:
-                    await i.response.send_message("You cannot use this confirmation.", ephemeral=True)
-                    return
-
-                await i.response.send_message("Reset cancelled.", ephemeral=True)
-
-            confirm_view.add_item(Button(
-                label="Confirm Reset",
-                style=discord.ButtonStyle.danger,
-                custom_id="confirm_reset"
-            ))
-            confirm_view.add_item(Button(
-                label="Cancel",
-                style=discord.ButtonStyle.secondary,
-                custom_id="cancel_reset"
-            ))
-
-            confirm_view.children[0].callback = confirm_callback
-            confirm_view.children[1].callback = cancel_callback
+            # Add confirmation button; only the member who asked can answer it
+            confirm_view = static_view(
+                Button(
+                    label="Confirm Reset",
+                    style=discord.ButtonStyle.danger,
+                    custom_id=custom_id('wc.reset_confirm', interaction.user.id)
+                ),
+                Button(
+                    label="Cancel",
+                    style=discord.ButtonStyle.secondary,
+                    custom_id=custom_id('wc.reset_cancel', interaction.user.id)
+                )
+            )
 
             await interaction.response.send_message(
                 "Are you sure you want to reset all welcome/leave settings?",
@@ -225,6 +251,21 @@ class WelcomeConfigView(View):
                 ephemeral=True
             )
 
+    async def confirm_reset(self, interaction: Interaction, owner_id: int):
+        if not await self.check_owner(interaction, owner_id):
+            return
+
+        await self.bot.db.welcome_settings.delete_one({'_id': interaction.guild_id})
+        await interaction.response.send_message("All welcome/leave settings have been reset.", ephemeral=True)
+        self.logger.info(f"Welcome settings reset in guild {interaction.guild_id}")
+
+    async def cancel_reset(self, interaction: Interaction, owner_id: int):
+        if interaction.user.id != owner_id:
+            await interaction.response.send_message("You cannot use this confirmation.", ephemeral=True)
+            return
+
+        await interaction.response.send_message("Reset cancelled.", ephemeral=True)
+
 class WelcomePreview:
     @staticmethod
     def format_message(message: str, member: discord.Member, guild: discord.Guild) -> str:
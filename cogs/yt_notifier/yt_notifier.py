@@ -1,11 +1,90 @@
 import discord
-from discord import app_commands, Embed
+from discord import Embed
 from discord.ext import commands, tasks
-import motor.motor_asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 import asyncio
-import logging
+import os
+import socket
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from core.config import Config
+from core.logger import get_logger
+from core.websub import WebSubReceiver
+from core.youtube import FeedPoller, Video
+from utils.embeds import powered_embed
+
+# Holder of the cluster-wide polling lease in the leases collection
+POLL_LEASE_ID = 'yt_poller'
+PROCESS_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+def valid_channel_id(channel_id: str) -> bool:
+    return len(channel_id) == 24 and channel_id.startswith("UC")
 
 class YTNotifier(commands.Cog):
+    # The launcher runs one bot per shard in a process, and each loads this cog.
+    # Feeds are fetched and announced by one of them: deliveries go out over
+    # REST, so any bot can post to every guild, and the shared yt_feeds
+    # ETags would hide new uploads from a second poller anyway. Across
+    # processes the same goes for a lease in Mongo; every process keeps its
+    # WebSub callback, since the hub may reach any of them.
+    poller_owner: Optional['YTNotifier'] = None
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.db = bot.db
+        self.logger = get_logger()
+        self.poller = FeedPoller(bot.db, bot.http_client, self.notify, concurrency=Config.YT_POLL_CONCURRENCY)
+        self.websub = None
+        if Config.YT_WEBSUB_CALLBACK_URL and Config.YT_WEBSUB_SECRET:
+            # Pushed uploads; polling then only covers channels without a live lease
+            self.websub = WebSubReceiver(
+                bot.db, self.poller, bot.scheduler, Config.YT_WEBSUB_CALLBACK_URL, Config.YT_WEBSUB_SECRET,
+                hub_url=Config.YT_WEBSUB_HUB, lease_seconds=Config.YT_WEBSUB_LEASE
+            )
+        self.check_youtube_feeds.start()
+
+    async def cog_load(self):
+        if self.websub is not None and self.bot.web_server is None:
+            self.logger.warning("No web server to receive WebSub callbacks on; YouTube feeds are polled")
+            self.websub = None
+
+    def cog_unload(self):
+        self.check_youtube_feeds.cancel()
+        if YTNotifier.poller_owner is self:
+            YTNotifier.poller_owner = None
+            if self.websub is not None:
+                self.websub.unregister(self.bot.web_server)
+
+    def owns_polling(self) -> bool:
+        """Claim polling and the WebSub callback for this process if no running bot has them."""
+        owner = YTNotifier.poller_owner
+        if owner is not None and owner is not self and not owner.bot.is_closed():
+            return False
+        if owner is not self:
+            if owner is not None and owner.websub is not None:
+                owner.websub.unregister(owner.bot.web_server)
+            YTNotifier.poller_owner = self
+            if self.websub is not None:
+                self.websub.register(self.bot.web_server)
+            self.logger.info("YouTube feeds are polled by this bot")
+        return True
+
+    async def holds_poll_lease(self) -> bool:
+        """Take or renew the cluster-wide polling lease; it lapses after three missed polls."""
+        now = datetime.utcnow()
+        try:
+            lease = await self.db.leases.find_one_and_update(
+                {'_id': POLL_LEASE_ID, '$or': [{'owner': PROCESS_ID}, {'until': {'$lt': now}}]},
+                {'$set': {'owner': PROCESS_ID, 'until': now + timedelta(seconds=3 * Config.YT_POLL_INTERVAL)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another process holds a live lease
+            return False
+        return lease is not None
+
     @commands.hybrid_group(name="yt", description="YouTube Notifier command group.")
     async def yt(self, ctx):
         """YouTube Notifier command group."""
@@ -13,62 +92,109 @@ class YTNotifier(commands.Cog):
             await ctx.send("Use a subcommand: sub, unsub, list, check, settings.")
 
     @yt.command(name="sub")
+    @commands.has_permissions(manage_guild=True)
     async def sub(self, ctx, channel_id: str, channel: discord.TextChannel = None):
-        await ctx.send(f"Subscribed to YouTube channel {channel_id} in {channel.mention if channel else 'default channel'} (implement logic)")
+        """Post new uploads of a YouTube channel (UC... ID) in a text channel."""
+        channel = channel or ctx.channel
+        if not valid_channel_id(channel_id):
+            await ctx.send(embed=powered_embed("Please give a YouTube channel ID (starts with UC)"))
+            return
+
+        doc = await self.db.yt_subscriptions.find_one({'_id': ctx.guild.id}) or {}
+        feeds = doc.get('feeds', [])
+        if any(f['channel_id'] == channel_id and f['webhook_channel'] == channel.id for f in feeds):
+            await ctx.send(embed=powered_embed(f"Already subscribed to {channel_id} in {channel.mention}"))
+            return
+        if Config.YT_MAX_SUBSCRIPTIONS and len(feeds) >= Config.YT_MAX_SUBSCRIPTIONS:
+            await ctx.send(embed=powered_embed(f"This server can follow at most {Config.YT_MAX_SUBSCRIPTIONS} channels"))
+            return
+
+        # Only uploads published from now on are announced
+        await self.db.yt_subscriptions.update_one(
+            {'_id': ctx.guild.id},
+            {'$push': {'feeds': {'channel_id': channel_id, 'webhook_channel': channel.id,
+                                 'last': datetime.now(timezone.utc).isoformat()}}},
+            upsert=True
+        )
+        if self.websub is not None:
+            await self.websub.sync([channel_id])
+        await ctx.send(embed=powered_embed(f"Subscribed to {channel_id} in {channel.mention}"))
 
     @yt.command(name="unsub")
+    @commands.has_permissions(manage_guild=True)
     async def unsub(self, ctx, channel_id: str):
-        await ctx.send(f"Unsubscribed from YouTube channel {channel_id} (implement logic)")
+        result = await self.db.yt_subscriptions.update_one(
+            {'_id': ctx.guild.id},
+            {'$pull': {'feeds': {'channel_id': channel_id}}}
+        )
+        if result.modified_count:
+            await ctx.send(embed=powered_embed(f"Unsubscribed from {channel_id}"))
+        else:
+            await ctx.send(embed=powered_embed(f"Not subscribed to {channel_id}"))
 
     @yt.command(name="list")
     async def list_subs(self, ctx):
-        await ctx.send("List of YouTube subscriptions (implement logic)")
+        doc = await self.db.yt_subscriptions.find_one({'_id': ctx.guild.id}) or {}
+        feeds = doc.get('feeds', [])
+        if not feeds:
+            await ctx.send(embed=powered_embed("No YouTube subscriptions"))
+            return
+        lines = [f"`{f['channel_id']}` → <#{f['webhook_channel']}>" for f in feeds]
+        await ctx.send(embed=powered_embed(f"YouTube subscriptions ({len(feeds)})", "\n".join(lines)))
 
     @yt.command(name="check")
+    @commands.has_permissions(manage_guild=True)
     async def check(self, ctx):
-        await ctx.send("Checked YouTube feeds (implement logic)")
+        """Check this server's feeds now instead of waiting for the next poll."""
+        doc = await self.db.yt_subscriptions.find_one({'_id': ctx.guild.id}) or {}
+        channel_ids = {f['channel_id'] for f in doc.get('feeds', [])}
+        if not channel_ids:
+            await ctx.send(embed=powered_embed("No YouTube subscriptions"))
+            return
+        async with ctx.typing():
+            stats = await self.poller.poll(channel_ids)
+        await ctx.send(embed=powered_embed(
+            "Checked YouTube feeds",
+            f"{stats.channels} feeds checked, {stats.videos} new videos, {stats.failed} failed"
+        ))
 
     @yt.command(name="settings")
     async def settings(self, ctx):
-        await ctx.send("YouTube notifier settings (implement logic)")
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self.db = bot.db
-        self.check_youtube_feeds.start()
-
-    def cog_unload(self):
-        self.check_youtube_feeds.stop()
+        doc = await self.db.yt_subscriptions.find_one({'_id': ctx.guild.id}) or {}
+        limit = Config.YT_MAX_SUBSCRIPTIONS or "unlimited"
+        await ctx.send(embed=powered_embed(
+            "YouTube Notifier Settings",
+            f"**Subscriptions:** {len(doc.get('feeds', []))}/{limit}\n"
+            f"**Check interval:** {Config.YT_POLL_INTERVAL} seconds"
+        ))
 
-    @tasks.loop(seconds=300)  # Check every 5 minutes
+    @tasks.loop(seconds=Config.YT_POLL_INTERVAL)
     async def check_youtube_feeds(self):
-        logging.info("Checking YouTube feeds...")
-        async for guild in self.db.yt_subscriptions.find():
-            for feed in guild['feeds']:
-                channel_id = feed['channel_id']
-                last_posted = feed['last']
-                # Fetch the latest video from the YouTube API (pseudo-code)
-                latest_video = await self.fetch_latest_video(channel_id)
-                if latest_video['published_at'] > last_posted:
-                    await self.notify_channel(feed['webhook_channel'], latest_video)
-                    await self.db.yt_subscriptions.update_one(
-                        {'_id': guild['_id'], 'feeds.channel_id': channel_id},
-                        {'$set': {'feeds.$.last': latest_video['published_at']}}
-                    )
-
-    async def fetch_latest_video(self, channel_id):
-        # Placeholder for actual YouTube API call
-        return {
-            'title': 'New Video Title',
-            'url': 'https://youtube.com/watch?v=example',
-            'published_at': '2023-10-01T12:00:00Z'
-        }
-
-    async def notify_channel(self, channel_id, video):
-        channel = self.bot.get_channel(channel_id)
-        if channel:
-            embed = Embed(title=video['title'], url=video['url'], description="Check out the latest video!")
-            embed.set_footer(text="Powered By SB Moderation™")
-            await channel.send(embed=embed)
+        if not self.owns_polling():
+            return
+        try:
+            if not await self.holds_poll_lease():
+                return
+            leased = set()
+            if self.websub is not None:
+                await self.websub.sync(await self.db.yt_subscriptions.distinct('feeds.channel_id'))
+                leased = await self.websub.active()
+            await self.poller.poll(exclude=leased)
+        except Exception as e:
+            self.logger.error(f"Error checking YouTube feeds: {str(e)}")
+
+    @check_youtube_feeds.before_loop
+    async def before_check(self):
+        await self.bot.wait_until_ready()
+
+    async def notify(self, video: Video, channel_ids: List[int]):
+        embed = Embed(title=video.title, url=video.url, description="Check out the latest video!")
+        embed.set_author(name=video.author)
+        embed.timestamp = video.published
+        embed.set_footer(text="Powered By SB Moderation™")
+        await self.bot.broadcaster.broadcast(
+            channel_ids, kind='youtube', embed=embed, retries=Config.YT_NOTIFY_RETRY_ATTEMPTS
+        )
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(YTNotifier(bot))
\ No newline at end of file
+    await bot.add_cog(YTNotifier(bot))
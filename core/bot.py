@@ -2,12 +2,25 @@ import discord
 from discord.ext import commands, tasks
 from core.config import PREFIX, SHARD_COUNT, Config
 from core.database import Database
+from core.scheduler import Scheduler
+from core.escalation import EscalationEngine
+from core.cases import CaseStore
+from core.modmail_router import ModMailRouter
+from core.tickets import TicketPipeline
+from core.components import ComponentRouter
+from core.fanout import Broadcaster
+from core.http_client import HTTPService
+from core.logger import use_http_client
+from core.templates import ConfigTemplates
+from core.settings import FEATURE_SETTINGS
 from core.logger import get_logger
 import asyncio
 import time
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Type, TypeVar
 from cachetools import TTLCache
+from core.cache import SWRCache
+from core.cache_registry import CACHE_COLLECTOR, CacheRegistry
 from prometheus_client import Counter, Histogram
 import psutil
 import functools
@@ -18,8 +31,10 @@ COMMAND_LATENCY = Histogram('bot_command_latency_seconds', 'Command processing l
 ERROR_COUNTER = Counter('bot_errors_total', 'Number of errors encountered')
 GUILD_COUNTER = Counter('bot_guilds_total', 'Number of guilds the bot is in')
 
+S = TypeVar('S', bound=tuple)
+
 class Bot(commands.AutoShardedBot):
-    def __init__(self, command_prefix=PREFIX, **options):
+    def __init__(self, command_prefix=PREFIX, http_client: Optional[HTTPService] = None, **options):
         intents = discord.Intents.default()
         intents.members = True  # Enable member intents for role management
         intents.message_content = True  # Enable message content for moderation
@@ -35,12 +50,51 @@ class Bot(commands.AutoShardedBot):
         
         # Initialize database with connection pooling
         self.db = Database()
+        self.db.health.breaker.on_change = self.on_db_state_change
+        self.scheduler = Scheduler(self.db)
+        self.escalation = EscalationEngine(self.db)
+        self.cases = CaseStore(self.db)
+        self.modmail = ModMailRouter(self)
+        self.components = ComponentRouter()
+        self.tickets = TicketPipeline(self, spacing=Config.TICKET_CREATE_SPACING)
+        self.peers = [self]  # every Bot in this process; the launcher shares one list across shards
+        self.templates = ConfigTemplates(self)
+        # The launcher passes one client shared by every shard and closes it itself
+        self.owns_http_client = http_client is None
+        self.http_client = http_client or HTTPService.from_config()
+        if self.owns_http_client:
+            use_http_client(self.http_client)
+        self.broadcaster = Broadcaster(self, concurrency=Config.BROADCAST_CONCURRENCY, rate=Config.BROADCAST_RATE)
+        self.web_server = None  # set by the launcher; webhooks register their routes on it
         self.author_credit = "Powered By SB Moderation™"
         
         # Caches
-        self.prefix_cache = TTLCache(maxsize=10000, ttl=300)  # 5-minute TTL
-        self.settings_cache = TTLCache(maxsize=10000, ttl=600)  # 10-minute TTL
+        # Stale entries keep being served while one refresh runs, and survive DB outages
+        self.prefix_cache = SWRCache(maxsize=10000, ttl=300, max_stale=Config.CACHE_MAX_STALE)  # 5-minute TTL
+        self.settings_cache = SWRCache(maxsize=10000, ttl=600, max_stale=Config.CACHE_MAX_STALE,
+                                       max_bytes=Config.CACHE_MAX_BYTES,
+                                       negative_ttl=Config.CACHE_NEGATIVE_TTL)  # 10-minute TTL
         self.cooldowns = TTLCache(maxsize=100000, ttl=60)  # 1-minute TTL
+
+        # Memory accounting; reloadable caches shrink when the budget is exceeded,
+        # cooldowns are only measured since evicting one would lift a rate limit
+        self.caches = CacheRegistry(budget=Config.CACHE_MEMORY_BUDGET or None)
+        self.caches.register('prefix', self.prefix_cache)
+        self.caches.register('settings', self.settings_cache)
+        self.caches.register('guild', self.db.guild_cache)
+        self.caches.register('user', self.db.user_cache)
+        self.caches.register('cooldowns', self.cooldowns, shrinkable=False)
+        self.caches.register('modmail_mutual', self.modmail.mutual)
+        CACHE_COLLECTOR.add(",".join(map(str, self.shard_ids or Config.SHARD_IDS or [0])), self.caches)
+
+        # Settings writes anywhere in the bot drop the cached copies
+        self.configured = self.db.configured
+        self.configured.subscribe('guild_settings', self.invalidate_guild_settings)
+        for feature in FEATURE_SETTINGS:
+            self.configured.subscribe(
+                feature.collection,
+                lambda guild_id, key=feature.key: self.settings_cache.pop(f"{key}:{guild_id}", None)
+            )
         
         # Rate limiting
         self.global_rate_limit = commands.CooldownMapping.from_cooldown(
@@ -59,7 +113,7 @@ class Bot(commands.AutoShardedBot):
         """Initialize bot settings and connections."""
         try:
             # Connect to MongoDB first
-            await self.db.connect()
+            await self.db.connect(on_ready=[self.modmail.start])
             get_logger().info("Connected to MongoDB")
             
             # Load extensions
@@ -80,14 +134,18 @@ class Bot(commands.AutoShardedBot):
 
             get_logger().info(f"Loaded {len(loaded_extensions)} extensions")
 
+            # Start timers once cogs have registered their job handlers
+            await self.scheduler.start()
+            self.escalation.start()
+
             # Initialize Top.gg webhook if configured
             topgg_token = os.getenv('TOPGG_TOKEN')
             topgg_auth = os.getenv('TOPGG_WEBHOOK_AUTH')
-            if topgg_token and topgg_auth:
+            if topgg_token and topgg_auth and self.web_server is not None:
                 try:
                     from core.topgg_webhook import TopGGWebhook
                     self.topgg_webhook = TopGGWebhook(self, topgg_auth)
-                    await self.topgg_webhook.start()
+                    self.topgg_webhook.register(self.web_server)
                     get_logger().info("Top.gg webhook initialized")
                 except Exception as e:
                     get_logger().error(f"Failed to initialize Top.gg webhook: {str(e)}")
@@ -125,46 +183,85 @@ class Bot(commands.AutoShardedBot):
         for shard_id in range(self.shard_count):
             get_logger().info(f'Shard {shard_id}: {len([g for g in self.guilds if g.shard_id == shard_id])} guilds')
 
+    async def on_interaction(self, interaction: discord.Interaction):
+        """Route stateless panel components (see core.components)."""
+        await self.components.dispatch(interaction)
+
+    def on_db_state_change(self, degraded: bool):
+        """Tell cogs about breaker changes through on_db_degraded / on_db_recovered."""
+        self.dispatch('db_degraded' if degraded else 'db_recovered')
+
     async def get_prefix(self, message):
         """Get guild prefix with caching."""
         if not message.guild:
             return PREFIX
             
-        # Check cache first
-        cache_key = f"prefix:{message.guild.id}"
-        if cache_key in self.prefix_cache:
-            return self.prefix_cache[cache_key]
-            
-        # Check for no-prefix users
-        if message.author.id in await self.db.noprefix_users.distinct('_id'):
-            return [""]
-            
-        # Get guild prefix from database
-        prefix = await self.db.guild_settings.find_one(
-            {'_id': message.guild.id},
-            {'prefix': 1}
-        )
-        
-        # Cache the result
-        result = prefix.get('prefix', PREFIX) if prefix else PREFIX
-        self.prefix_cache[cache_key] = result
-        return result
+        try:
+            # No-prefix users are global, so the whole set is one cache entry
+            noprefix_users = await self.prefix_cache.get_or_load("noprefix_users", self.load_noprefix_users)
+            if message.author.id in noprefix_users:
+                return [""]
+                
+            guild_id = message.guild.id
+            if not self.configured.might_have('guild_settings', guild_id):
+                return PREFIX
+            return await self.prefix_cache.get_or_load(f"prefix:{guild_id}", lambda: self.load_prefix(guild_id))
+        except Exception:
+            # Database down and nothing cached yet: fall back to the default prefix
+            return PREFIX
+
+    async def load_noprefix_users(self) -> frozenset:
+        return frozenset(await self.db.guarded(self.db.noprefix_users.distinct, '_id'))
+
+    async def load_prefix(self, guild_id: int) -> str:
+        settings = await self.db.guarded(self.db.guild_settings.find_one, {'_id': guild_id}, {'prefix': 1})
+        return settings.get('prefix', PREFIX) if settings else PREFIX
+
+    def find_guild(self, guild_id: int) -> Optional[discord.Guild]:
+        """Like ``get_guild``, but also looks at the other shards this process runs."""
+        for bot in self.peers:
+            guild = bot.get_guild(guild_id)
+            if guild is not None:
+                return guild
+        return None
+
+    def invalidate_guild_settings(self, guild_id: int):
+        self.settings_cache.pop(f"settings:{guild_id}", None)
+        self.prefix_cache.pop(f"prefix:{guild_id}", None)
 
     async def get_guild_settings(self, guild_id: int) -> Dict[str, Any]:
         """Get guild settings with caching."""
-        cache_key = f"settings:{guild_id}"
-        
-        # Check cache first
-        if cache_key in self.settings_cache:
-            return self.settings_cache[cache_key]
-            
-        # Get from database
-        settings = await self.db.guild_settings.find_one({'_id': guild_id})
-        if settings:
-            self.settings_cache[cache_key] = settings
-            return settings
-            
-        return {}
+        if not self.configured.might_have('guild_settings', guild_id):
+            return {}
+
+        async def load():
+            return await self.db.guarded(self.db.guild_settings.find_one, {'_id': guild_id})
+
+        try:
+            return await self.settings_cache.get_or_load(f"settings:{guild_id}", load) or {}
+        except Exception:
+            # While degraded, callers see no settings rather than waiting
+            return {}
+
+    async def get_settings(self, feature: Type[S], guild_id: int) -> S:
+        """Get one feature's settings (see core.settings), loading only its fields.
+
+        Unconfigured guilds, and guilds whose settings cannot be read while the
+        database is degraded, get the feature's defaults.
+        """
+        if not self.configured.might_have(feature.collection, guild_id):
+            return feature()
+
+        async def load():
+            doc = await self.db.guarded(
+                getattr(self.db, feature.collection).find_one, {'_id': guild_id}, feature.projection
+            )
+            return feature.from_doc(doc) if doc else None
+
+        try:
+            return await self.settings_cache.get_or_load(f"{feature.key}:{guild_id}", load) or feature()
+        except Exception:
+            return feature()
 
     async def process_commands(self, message):
         """Process commands with rate limiting and metrics."""
@@ -242,6 +339,10 @@ class Bot(commands.AutoShardedBot):
             # Update latency metrics
             if self.latency is not None:
                 COMMAND_LATENCY.observe(self.latency)
+
+            # Measure caches and shrink them if every shard's together outgrew the budget
+            self.caches.collect()
+            self.caches.enforce(CACHE_COLLECTOR.total_bytes)
                 
             # Log metrics update
             get_logger().debug(
@@ -268,10 +369,25 @@ class Bot(commands.AutoShardedBot):
         self.maintenance_task.cancel()
         self.metrics_task.cancel()
         
+        # Release scheduler leases so another process can pick the jobs up
+        await self.scheduler.stop()
+        await self.escalation.stop()
+        
+        # Stop taking webhooks for this bot
+        if self.web_server is not None:
+            if getattr(self, 'topgg_webhook', None) is not None:
+                self.topgg_webhook.unregister(self.web_server)
+            self.web_server.remove_bot(self)
+        
+        # Drain the HTTP pool unless other shards share it
+        if self.owns_http_client:
+            await self.http_client.close()
+        
         # Close database connection
         await self.db.close()
         
         # Clear caches
+        CACHE_COLLECTOR.remove(self.caches)
         self.prefix_cache.clear()
         self.settings_cache.clear()
         self.cooldowns.clear()
@@ -0,0 +1,223 @@
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from core.logger import get_logger
+
+Loader = Callable[[], Awaitable[Any]]
+
+def approx_size(value: Any, _depth: int = 0) -> int:
+    """Rough deep size in bytes of plain data (dicts, lists, strings, numbers)."""
+    size = sys.getsizeof(value)
+    if _depth > 6:
+        return size
+    if isinstance(value, dict):
+        size += sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(approx_size(v, _depth + 1) for v in value)
+    return size
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'size', 'retry_at', 'ttl')
+
+    def __init__(self, value: Any, size: int, ttl: float):
+        self.value = value
+        self.stored_at = time.monotonic()
+        self.size = size
+        self.retry_at = 0.0
+        self.ttl = ttl
+
+class SWRCache:
+    """Stale-while-revalidate cache with LRU eviction by entry count and bytes.
+
+    Entries younger than ``ttl`` are fresh. Older ones are still served by
+    ``get_or_load`` while a single background refresh runs; if that refresh
+    fails (database down) the last good value keeps being served until it is
+    ``max_stale`` seconds old, after which the entry is treated as missing.
+    Concurrent misses for the same key share one load.
+
+    With ``negative_ttl`` set, a loader result of ``None`` ("no such
+    document") is cached too, for that many seconds, so lookups for things
+    that do not exist stop reaching the database.
+
+    The mapping interface (``in``, ``[]``, ``pop``) matches the TTLCache it
+    replaces and never triggers loads.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_stale: Optional[float] = None,
+                 max_bytes: Optional[int] = None, retry_after: float = 5.0,
+                 sizeof: Callable[[Any], int] = approx_size, negative_ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_stale = max_stale if max_stale is not None else ttl * 12
+        self.max_bytes = max_bytes
+        self.retry_after = retry_after
+        self.sizeof = sizeof
+        self.currsize = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.logger = get_logger()
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._loading: Dict[Hashable, asyncio.Future] = {}
+        self._refreshing: set = set()
+        self._invalidated: set = set()
+
+    def _live(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry.stored_at > self.max_stale:
+            self._remove(key)
+            return None
+        return entry
+
+    def _remove(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.currsize -= entry.size
+        return entry
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._live(key) is not None
+
+    def __getitem__(self, key: Hashable) -> Any:
+        entry = self._live(key)
+        if entry is None:
+            raise KeyError(key)
+        self._data.move_to_end(key)
+        return entry.value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self._store(key, value, self.ttl)
+
+    def _store(self, key: Hashable, value: Any, ttl: float):
+        self._remove(key)
+        entry = _Entry(value, self.sizeof(value), ttl)
+        self._data[key] = entry
+        self.currsize += entry.size
+        while self._data and (len(self._data) > self.maxsize or
+                              (self.max_bytes is not None and self.currsize > self.max_bytes)):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def __delitem__(self, key: Hashable):
+        if key in self._loading:
+            self._invalidated.add(key)
+        if self._remove(key) is None:
+            raise KeyError(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        if key in self._loading:
+            self._invalidated.add(key)
+        entry = self._remove(key)
+        return entry.value if entry is not None else default
+
+    def clear(self):
+        self._invalidated.update(self._loading)
+        self._data.clear()
+        self.currsize = 0
+
+    def expire(self):
+        """Drop entries past ``max_stale``; fresh and stale-but-servable ones stay."""
+        now = time.monotonic()
+        for key in [k for k, e in self._data.items() if now - e.stored_at > self.max_stale]:
+            self._remove(key)
+
+    def shrink(self, max_bytes: int) -> int:
+        """Evict least recently used entries until ``currsize <= max_bytes``."""
+        evicted = 0
+        while self._data and self.currsize > max_bytes:
+            self._remove(next(iter(self._data)))
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def ages(self) -> List[float]:
+        now = time.monotonic()
+        return [now - entry.stored_at for entry in self._data.values()]
+
+    def age(self, key: Hashable) -> Optional[float]:
+        entry = self._data.get(key)
+        return time.monotonic() - entry.stored_at if entry else None
+
+    async def _load(self, key: Hashable, loader: Loader) -> Any:
+        future = self._loading.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        else:
+            # An invalidation during the load means the value may predate the change
+            if key not in self._invalidated:
+                if value is not None:
+                    self[key] = value
+                elif self.negative_ttl is not None:
+                    self._store(key, None, self.negative_ttl)
+            future.set_result(value)
+            return value
+        finally:
+            self._loading.pop(key, None)
+            self._invalidated.discard(key)
+
+    async def _refresh(self, key: Hashable, loader: Loader):
+        try:
+            await self._load(key, loader)
+        except Exception as e:
+            entry = self._data.get(key)
+            if entry is not None:
+                entry.retry_at = time.monotonic() + self.retry_after
+            self.logger.error(f"Cache refresh failed for {key}, serving stale value: {str(e)}")
+
+    async def get_or_load(self, key: Hashable, loader: Loader) -> Any:
+        """Return the cached value, loading or revalidating it as needed.
+
+        A ``None`` result is only cached when ``negative_ttl`` is set. Loader
+        errors propagate only when there is no servable value.
+        """
+        entry = self._live(key)
+        if entry is None:
+            self.misses += 1
+            return await self._load(key, loader)
+
+        self._data.move_to_end(key)
+        now = time.monotonic()
+        if now - entry.stored_at <= entry.ttl:
+            self.hits += 1
+            if entry.value is None:
+                self.negative_hits += 1
+            return entry.value
+
+        self.stale_hits += 1
+        if key not in self._loading and now >= entry.retry_at:
+            # Holds off further refreshes until this one lands or fails
+            entry.retry_at = now + self.retry_after
+            task = asyncio.create_task(self._refresh(key, loader))
+            self._refreshing.add(task)
+            task.add_done_callback(self._refreshing.discard)
+        return entry.value
@@ -0,0 +1,198 @@
+import itertools
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, NamedTuple, Optional
+
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from core.cache import SWRCache, approx_size
+from core.logger import get_logger
+
+class CacheStats(NamedTuple):
+    entries: int
+    bytes: int
+    hits: Optional[int]
+    misses: Optional[int]
+    evictions: Optional[int]
+    oldest_age: Optional[float]
+    mean_age: Optional[float]
+
+class _Registered:
+    __slots__ = ('name', 'cache', 'shrinkable')
+
+    def __init__(self, name: str, cache: Any, shrinkable: bool):
+        self.name = name
+        self.cache = cache
+        self.shrinkable = shrinkable
+
+class CacheRegistry:
+    """Memory accounting, Prometheus export and a global budget for in-process caches.
+
+    ``SWRCache`` instances keep an exact running byte count and hit/miss
+    counters. Any other mapping (cachetools caches, plain or ordered dicts
+    such as the raid detector's join streams) is sized by walking a sample of
+    its entries, which keeps ``collect`` cheap for caches with 100k keys.
+
+    ``collect`` runs on the event loop (from the bot's metrics task) and
+    stores a snapshot; the Prometheus scrape thread only reads that snapshot,
+    so it never iterates a cache while the loop is mutating it. When the total
+    exceeds ``budget`` bytes, ``enforce`` shrinks every shrinkable cache in
+    proportion to its share, oldest entries first.
+
+    The launcher runs one bot (and one registry) per shard in a process, and
+    the budget covers all of them: bots pass ``CACHE_COLLECTOR.total_bytes``
+    to ``enforce`` so each shrinks by the same ratio until the sum fits.
+    """
+
+    def __init__(self, budget: Optional[int] = None, sample_size: int = 256, headroom: float = 0.9):
+        self.budget = budget
+        self.sample_size = sample_size
+        self.headroom = headroom
+        self.caches: Dict[str, _Registered] = {}
+        self.snapshot: Dict[str, CacheStats] = {}
+        self.logger = get_logger()
+
+    def register(self, name: str, cache: Any, shrinkable: bool = True):
+        """Track ``cache`` under ``name``; re-registering a name replaces it."""
+        self.caches[name] = _Registered(name, cache, shrinkable)
+
+    def unregister(self, name: str):
+        self.caches.pop(name, None)
+        self.snapshot.pop(name, None)
+
+    def _sampled_bytes(self, cache: Any) -> int:
+        count = len(cache)
+        if not count:
+            return sys.getsizeof(cache)
+        keys = list(itertools.islice(iter(cache), self.sample_size))
+        # .get skips entries a TTL cache expires between listing and reading
+        sample = sum(approx_size(key) + approx_size(cache.get(key)) for key in keys)
+        return sys.getsizeof(cache) + int(sample / max(len(keys), 1) * count)
+
+    def stats(self, cache: Any) -> CacheStats:
+        if isinstance(cache, SWRCache):
+            ages = cache.ages()
+            return CacheStats(
+                entries=len(cache),
+                bytes=cache.currsize,
+                hits=cache.hits + cache.stale_hits,
+                misses=cache.misses,
+                evictions=cache.evictions,
+                oldest_age=max(ages) if ages else 0.0,
+                mean_age=sum(ages) / len(ages) if ages else 0.0
+            )
+        return CacheStats(len(cache), self._sampled_bytes(cache), None, None, None, None, None)
+
+    def collect(self) -> Dict[str, CacheStats]:
+        snapshot = {}
+        for name, registered in list(self.caches.items()):
+            try:
+                snapshot[name] = self.stats(registered.cache)
+            except Exception as e:
+                self.logger.error(f"Failed to measure cache {name}: {str(e)}")
+        self.snapshot = snapshot
+        return snapshot
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(stats.bytes for stats in self.snapshot.values())
+
+    def _shrink(self, cache: Any, target_bytes: int, current_bytes: int) -> int:
+        if isinstance(cache, SWRCache):
+            return cache.shrink(target_bytes)
+
+        # Sampled caches: drop the same fraction of entries, oldest first
+        drop = len(cache) - int(len(cache) * target_bytes / max(current_bytes, 1))
+        evicted = 0
+        for _ in range(max(drop, 0)):
+            try:
+                if isinstance(cache, OrderedDict):
+                    cache.popitem(last=False)
+                elif isinstance(cache, dict):
+                    del cache[next(iter(cache))]
+                else:
+                    # cachetools caches evict by their own policy (LRU/soonest to expire)
+                    cache.popitem()
+            except (KeyError, StopIteration):
+                break
+            evicted += 1
+        return evicted
+
+    def enforce(self, total: Optional[int] = None) -> int:
+        """Shrink caches until ``total`` (default: this registry's last snapshot) fits the budget.
+
+        Returns entries evicted.
+        """
+        if total is None:
+            total = self.total_bytes
+        if self.budget is None or total <= self.budget:
+            return 0
+
+        ratio = self.budget * self.headroom / total
+        evicted = 0
+        for name, stats in self.snapshot.items():
+            registered = self.caches.get(name)
+            if registered is None or not registered.shrinkable or not stats.bytes:
+                continue
+            evicted += self._shrink(registered.cache, int(stats.bytes * ratio), stats.bytes)
+
+        self.logger.warning(
+            f"Cache memory {total / 2**20:.1f}MB over budget {self.budget / 2**20:.1f}MB; evicted {evicted} entries"
+        )
+        self.collect()
+        return evicted
+
+class CacheCollector:
+    """Adapter registered with prometheus_client; reads each registry's last snapshot.
+
+    A process runs one bot per shard, each with its own ``CacheRegistry``, so
+    one collector serves them all and labels every sample with its bot's
+    shards. Registering a collector per bot would clash on metric names.
+    """
+
+    def __init__(self):
+        self.registries: Dict[str, CacheRegistry] = {}
+
+    def add(self, shards: str, registry: CacheRegistry):
+        self.registries[shards] = registry
+
+    def remove(self, registry: CacheRegistry):
+        for shards, registered in list(self.registries.items()):
+            if registered is registry:
+                del self.registries[shards]
+
+    @property
+    def total_bytes(self) -> int:
+        """Bytes held by every bot's caches, as of their last snapshots."""
+        return sum(registry.total_bytes for registry in list(self.registries.values()))
+
+    def collect(self) -> Iterator:
+        labels = ['shards', 'cache']
+        gauges = {
+            'bytes': GaugeMetricFamily('bot_cache_bytes', 'Approximate deep size of the cache in bytes', labels=labels),
+            'entries': GaugeMetricFamily('bot_cache_entries', 'Entries held by the cache', labels=labels),
+            'oldest_age': GaugeMetricFamily('bot_cache_oldest_entry_seconds', 'Age of the oldest cache entry', labels=labels),
+            'mean_age': GaugeMetricFamily('bot_cache_mean_entry_age_seconds', 'Mean age of cache entries', labels=labels),
+        }
+        counters = {
+            'hits': CounterMetricFamily('bot_cache_hits', 'Lookups answered from the cache, fresh or stale', labels=labels),
+            'misses': CounterMetricFamily('bot_cache_misses', 'Lookups that had to load', labels=labels),
+            'evictions': CounterMetricFamily('bot_cache_evictions', 'Entries evicted for size or budget', labels=labels),
+        }
+        budget = GaugeMetricFamily('bot_cache_budget_bytes', 'Cache memory budget shared by every bot in the process (0 = unlimited)', labels=['shards'])
+        # The scrape thread may run while a bot is added or removed
+        for shards, registry in list(self.registries.items()):
+            for name, stats in registry.snapshot.items():
+                for field, family in itertools.chain(gauges.items(), counters.items()):
+                    value = getattr(stats, field)
+                    if value is not None:
+                        family.add_metric([shards, name], value)
+            budget.add_metric([shards], registry.budget or 0)
+
+        yield from gauges.values()
+        yield from counters.values()
+        yield budget
+
+# One per process; bots add their registries to it
+CACHE_COLLECTOR = CacheCollector()
+REGISTRY.register(CACHE_COLLECTOR)
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import DESCENDING, ReturnDocument
+from core.logger import get_logger
+
+# (created_at, case_no) of the last case on a page; the next page starts after it
+HistoryCursor = Tuple[datetime, int]
+
+class CaseStore:
+    """Moderation cases (warns, mutes, kicks, bans) numbered per guild.
+
+    Case numbers come from a counter document per guild in ``case_counters``.
+    Each process reserves a block of numbers with one ``$inc`` and hands them
+    out from memory, so a burst of cases costs one counter round trip per
+    block. Numbers left in a block when the process stops are skipped, which
+    keeps them unique and increasing but not always contiguous.
+
+    History is read with keyset pagination on
+    ``(guild_id, target_id, created_at, case_no)``: each page continues from
+    the last case of the previous one, so page 300 costs the same as page 1.
+    """
+
+    def __init__(self, db, block_size: int = 10):
+        self.db = db
+        self.block_size = block_size
+        self.logger = get_logger()
+        self.blocks: Dict[int, List[int]] = {}  # guild_id -> [next, end]
+        self.locks: Dict[int, asyncio.Lock] = {}
+
+    async def next_case_no(self, guild_id: int) -> int:
+        """Hand out the next case number, reserving a new block when needed."""
+        block = self.blocks.get(guild_id)
+        if block and block[0] <= block[1]:
+            block[0] += 1
+            return block[0] - 1
+
+        lock = self.locks.setdefault(guild_id, asyncio.Lock())
+        async with lock:
+            block = self.blocks.get(guild_id)
+            if not block or block[0] > block[1]:
+                counter = await self.db.case_counters.find_one_and_update(
+                    {'_id': guild_id},
+                    {'$inc': {'last': self.block_size}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                end = counter['last']
+                block = [end - self.block_size + 1, end]
+                self.blocks[guild_id] = block
+            block[0] += 1
+            return block[0] - 1
+
+    async def create(self, guild_id: int, target_id: int, moderator_id: int, action: str,
+                     reason: Optional[str] = None, duration: Optional[int] = None) -> Dict[str, Any]:
+        """Record a case and return it."""
+        case = {
+            'guild_id': guild_id,
+            'case_no': await self.next_case_no(guild_id),
+            'target_id': target_id,
+            'moderator_id': moderator_id,
+            'action': action,
+            'reason': reason,
+            'duration': duration,
+            'created_at': datetime.utcnow()
+        }
+        await self.db.cases.insert_one(case)
+        return case
+
+    async def get(self, guild_id: int, case_no: int) -> Optional[Dict[str, Any]]:
+        return await self.db.cases.find_one({'guild_id': guild_id, 'case_no': case_no})
+
+    async def history(self, guild_id: int, target_id: int, action: Optional[str] = None,
+                      after: Optional[HistoryCursor] = None,
+                      limit: int = 10) -> Tuple[List[Dict[str, Any]], Optional[HistoryCursor]]:
+        """One page of a member's cases, newest first, and the cursor for the next page."""
+        query: Dict[str, Any] = {'guild_id': guild_id, 'target_id': target_id}
+        if action:
+            query['action'] = action
+        if after:
+            created_at, case_no = after
+            query['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, 'case_no': {'$lt': case_no}}
+            ]
+
+        # Fetch one extra to know whether another page exists
+        cases = await self.db.cases.find(query).sort(
+            [('created_at', DESCENDING), ('case_no', DESCENDING)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+
+        if len(cases) <= limit:
+            return cases, None
+        cases = cases[:limit]
+        return cases, (cases[-1]['created_at'], cases[-1]['case_no'])
@@ -0,0 +1,113 @@
+"""Stateless routing for message components.
+
+A persistent ``discord.ui.View`` costs a View, its items and their callbacks
+for every message it is attached to, and only survives a restart if the
+code remembers to ``add_view`` it again. Here the state a panel needs lives
+in the component's ``custom_id`` instead::
+
+    np.duration:3h8x1k2v9c0w:1pq0d3l5n2a8
+
+is the action ``np.duration`` with two snowflakes in base 36. Handlers are
+registered once per action, like scheduler job kinds, and the bot's
+``on_interaction`` hands every component click and modal submit to
+``ComponentRouter.dispatch``. Messages carry their own state, so a panel
+sent before a restart keeps working and 10k live panels hold no memory.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import discord
+from discord import ui
+from core.logger import get_logger
+
+SEP = ":"
+MAX_CUSTOM_ID = 100
+
+ComponentHandler = Callable[..., Awaitable[None]]
+
+_DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+def _base36(value: int) -> str:
+    if value < 0:
+        return "-" + _base36(-value)
+    out = ""
+    while True:
+        value, digit = divmod(value, 36)
+        out = _DIGITS[digit] + out
+        if not value:
+            return out
+
+def custom_id(action: str, *state: Any) -> str:
+    """Encode ``action`` and its state; ints are written in base 36."""
+    parts = [action]
+    for value in state:
+        text = _base36(value) if isinstance(value, int) else str(value)
+        if SEP in text:
+            raise ValueError(f"Component state may not contain '{SEP}': {text!r}")
+        parts.append(text)
+    encoded = SEP.join(parts)
+    if len(encoded) > MAX_CUSTOM_ID:
+        raise ValueError(f"custom_id longer than {MAX_CUSTOM_ID} characters: {encoded!r}")
+    return encoded
+
+def parse(value: str) -> Tuple[str, Tuple[str, ...]]:
+    action, *state = value.split(SEP)
+    return action, tuple(state)
+
+def static_view(*items: ui.Item) -> ui.View:
+    """A View used only to lay out components; it is never stored or dispatched.
+
+    discord.py keeps every unfinished View it sends in its view store, so the
+    View is stopped before it is returned. Clicks reach the router instead.
+    """
+    view = ui.View(timeout=None)
+    for item in items:
+        view.add_item(item)
+    view.stop()
+    return view
+
+class ComponentRouter:
+    """Maps ``custom_id`` actions to handlers."""
+
+    def __init__(self):
+        self.handlers: Dict[str, Tuple[ComponentHandler, Tuple[Type, ...]]] = {}
+        self.logger = get_logger()
+
+    def register(self, action: str, handler: ComponentHandler, *types: Type):
+        """Route ``action`` to ``handler(interaction, *state)``, converting state with ``types``."""
+        if SEP in action:
+            raise ValueError(f"Component action may not contain '{SEP}': {action!r}")
+        self.handlers[action] = (handler, types)
+
+    def unregister(self, action: str):
+        self.handlers.pop(action, None)
+
+    def resolve(self, value: str) -> Optional[Tuple[ComponentHandler, Tuple[Any, ...]]]:
+        """The handler and converted state for ``value``, or None if it is not routed here."""
+        action, state = parse(value)
+        entry = self.handlers.get(action)
+        if entry is None:
+            return None
+        handler, types = entry
+        if len(state) != len(types):
+            return None
+        try:
+            return handler, tuple(int(v, 36) if t is int else t(v) for t, v in zip(types, state))
+        except ValueError:
+            return None
+
+    async def dispatch(self, interaction: discord.Interaction) -> bool:
+        """Run the handler for a component or modal interaction. Returns whether one ran."""
+        if interaction.type not in (discord.InteractionType.component, discord.InteractionType.modal_submit):
+            return False
+        resolved = self.resolve((interaction.data or {}).get('custom_id', ''))
+        if resolved is None:
+            return False
+
+        handler, state = resolved
+        try:
+            await handler(interaction, *state)
+        except Exception as e:
+            self.logger.error(f"Error in component {interaction.data.get('custom_id')}: {str(e)}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("An error occurred. Please try again.", ephemeral=True)
+        return True
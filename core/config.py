@@ -42,14 +42,32 @@ class Config:
     MONGO_URI: str = os.getenv("MONGO_URI")
     MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", 100))
     MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", 10))
+    MONGO_OP_TIMEOUT: float = float(os.getenv("MONGO_OP_TIMEOUT", 2.0))  # seconds per guarded query
+    MONGO_PROBE_INTERVAL: float = float(os.getenv("MONGO_PROBE_INTERVAL", 5.0))
+    MONGO_BREAKER_THRESHOLD: int = int(os.getenv("MONGO_BREAKER_THRESHOLD", 5))  # consecutive failures
+    MONGO_BREAKER_RESET: float = float(os.getenv("MONGO_BREAKER_RESET", 15.0))  # seconds before a trial call
     
     # Cache Configuration
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", 300))  # 5 minutes
     MAX_CACHE_SIZE: int = int(os.getenv("MAX_CACHE_SIZE", 10000))
+    CACHE_MAX_STALE: int = int(os.getenv("CACHE_MAX_STALE", 3600))  # Serve last-known-good for up to 1 hour
+    CACHE_MAX_BYTES: int = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))  # Per cache
+    CACHE_NEGATIVE_TTL: int = int(os.getenv("CACHE_NEGATIVE_TTL", 60))  # How long "no document" is remembered
+    CONFIGURED_REFRESH: int = int(os.getenv("CONFIGURED_REFRESH", 300))  # Reload configured-guild sets, 0 = never
+    CACHE_MEMORY_BUDGET: int = int(os.getenv("CACHE_MEMORY_BUDGET", 256 * 1024 * 1024))  # All caches together, 0 = unlimited
     
     # Rate Limiting
     GLOBAL_RATE_LIMIT: int = int(os.getenv("GLOBAL_RATE_LIMIT", 30))  # commands per
     GLOBAL_RATE_LIMIT_PERIOD: int = int(os.getenv("GLOBAL_RATE_LIMIT_PERIOD", 10))  # seconds
+    TICKET_CREATE_SPACING: float = float(os.getenv("TICKET_CREATE_SPACING", 1.0))  # seconds between ticket channels per guild
+    BROADCAST_CONCURRENCY: int = int(os.getenv("BROADCAST_CONCURRENCY", 50))  # channels sent to at once per broadcast
+    BROADCAST_RATE: float = float(os.getenv("BROADCAST_RATE", 40))  # broadcast requests per second, below the global limit
+    
+    # Outgoing HTTP (one shared pool per process)
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", 100))  # open connections in total
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 10))
+    HTTP_DNS_TTL: int = int(os.getenv("HTTP_DNS_TTL", 300))  # seconds DNS answers are cached
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", 15))  # seconds per request
     
     # Performance Settings
     CHUNK_GUILDS_AT_STARTUP: bool = os.getenv("CHUNK_GUILDS_AT_STARTUP", "false").lower() == "true"
@@ -61,8 +79,15 @@ class Config:
     
     # YouTube Configuration
     YT_MAX_SUBSCRIPTIONS: int = 0  # 0 means unlimited
-    YT_NOTIFY_RETRY_ATTEMPTS: int = 3
-    PROMETHEUS_PORT: int = int(os.getenv("PROMETHEUS_PORT", 8000))
+    YT_NOTIFY_RETRY_ATTEMPTS: int = int(os.getenv("YT_NOTIFY_RETRY_ATTEMPTS", 3))
+    YT_POLL_INTERVAL: int = int(os.getenv("YT_POLL_INTERVAL", 300))  # seconds between feed checks
+    YT_POLL_CONCURRENCY: int = int(os.getenv("YT_POLL_CONCURRENCY", 20))  # feeds fetched at once
+    YT_WEBSUB_CALLBACK_URL: str = os.getenv("YT_WEBSUB_CALLBACK_URL")  # public URL of /websub/youtube; unset = polling only
+    YT_WEBSUB_SECRET: str = os.getenv("YT_WEBSUB_SECRET")  # HMAC key the hub signs notifications with
+    YT_WEBSUB_HUB: str = os.getenv("YT_WEBSUB_HUB", "https://pubsubhubbub.appspot.com/subscribe")
+    YT_WEBSUB_LEASE: int = int(os.getenv("YT_WEBSUB_LEASE", 432000))  # seconds requested per subscription
+    WEB_PORT: int = int(os.getenv("WEB_PORT", os.getenv("PROMETHEUS_PORT", 8000)))  # metrics, health probes and webhooks
+    METRICS_CACHE_TTL: float = float(os.getenv("METRICS_CACHE_TTL", 5))  # seconds a rendered /metrics is reused
     
     # Error Reporting
     ERROR_WEBHOOK_URL: str = os.getenv("ERROR_WEBHOOK_URL")
@@ -72,7 +97,6 @@ class Config:
     TOPGG_TOKEN: str = os.getenv("TOPGG_TOKEN")
     TOPGG_WEBHOOK_AUTH: str = os.getenv("TOPGG_WEBHOOK_AUTH")
     TOPGG_WEBHOOK_URL: str = os.getenv("TOPGG_WEBHOOK_URL")
-    TOPGG_WEBHOOK_PORT: int = int(os.getenv("TOPGG_WEBHOOK_PORT", 8080))
     
     @classmethod
     def get_shard_config(cls) -> Dict[str, Any]:
@@ -87,7 +111,10 @@ class Config:
         """Get cache configuration."""
         return {
             "ttl": cls.CACHE_TTL,
-            "maxsize": cls.MAX_CACHE_SIZE
+            "maxsize": cls.MAX_CACHE_SIZE,
+            "max_stale": cls.CACHE_MAX_STALE,
+            "max_bytes": cls.CACHE_MAX_BYTES,
+            "negative_ttl": cls.CACHE_NEGATIVE_TTL
         }
     
     @classmethod
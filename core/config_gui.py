@@ -2,12 +2,22 @@ import discord
 from discord.ext import commands
 from discord import ui, ButtonStyle, SelectOption
 from typing import Optional, Dict, Any
+import tempfile
+from core.components import custom_id, static_view
+from core.snapshots import SnapshotError, restore_snapshot, write_snapshot
 from utils.embeds import powered_embed
 
 class ConfigurationPanel(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = bot.db
+        bot.components.register("cfg.module", self.choose_module, int)
+        bot.components.register("cfg.setting", self.choose_setting, str, int)
+        bot.components.register("cfg.back", self.go_back, int)
+
+    def cog_unload(self):
+        for action in ("cfg.module", "cfg.setting", "cfg.back"):
+            self.bot.components.unregister(action)
 
     @commands.hybrid_group(name="config", description="Server configuration panel.")
     @commands.has_permissions(manage_guild=True)
@@ -17,804 +27,257 @@ class ConfigurationPanel(commands.Cog):
 
     async def show_main_panel(self, ctx):
         """Show main configuration panel."""
-        embed = powered_embed("Server Configuration Panel")
-        embed.description = "Select a module to configure:"
-        
-        view = MainConfigView(self.bot, ctx.author)
-        await ctx.send(embed=embed, view=view)
-
-    @config.command(name="save")
-    async def config_save(self, ctx):
-        """Save current configuration to a file."""
-        config = await self.db.guild_settings.find_one({'_id': ctx.guild.id})
-        if not config:
-            await ctx.send(embed=powered_embed("No configuration found"))
-            return
-        
-        import json
-        config_str = json.dumps(config, indent=2)
-        await ctx.send(
-            embed=powered_embed("Current Configuration"),
-            file=discord.File(
-                fp=str.encode(config_str),
-                filename=f"config_{ctx.guild.id}.json"
-            )
-        )
-
-    @config.command(name="load")
-    async def config_load(self, ctx):
-        """Load configuration from a file."""
-        if not ctx.message.attachments:
-            await ctx.send(embed=powered_embed("Please attach a configuration file"))
-            return
-        
-        try:
-            import json
-            config_str = await ctx.message.attachments[0].read()
-            config = json.loads(config_str)
-            await self.db.guild_settings.update_one(
-                {'_id': ctx.guild.id},
-                {'$set': config},
-                upsert=True
-            )
-            await ctx.send(embed=powered_embed("Configuration loaded successfully"))
-        except Exception as e:
-            await ctx.send(embed=powered_embed(f"Error loading configuration: {str(e)}"))
-
-class MainConfigView(ui.View):
-    def __init__(self, bot, owner):
-        super().__init__(timeout=300)
-        self.bot = bot
-        self.owner = owner
-        
-        # Add module selector
-        self.add_item(ModuleSelect(bot, owner))
-
-class ModuleSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-        options = [
-            SelectOption(
-                label="Moderation",
-                description="Configure moderation settings",
-                emoji="🛡️",
-                value="mod"
-            ),
-            SelectOption(
-                label="AutoMod",
-                description="Configure auto-moderation settings",
-                emoji="🤖",
-                value="automod"
-            ),
-            SelectOption(
-                label="Tickets",
-                description="Configure ticket system",
-                emoji="🎫",
-                value="tickets"
-            ),
-            SelectOption(
-                label="Leveling",
-                description="Configure leveling system",
-                emoji="📈",
-                value="leveling"
-            ),
-            SelectOption(
-                label="Music",
-                description="Configure music system",
-                emoji="🎵",
-                value="music"
-            ),
-            SelectOption(
-                label="ModMail",
-                description="Configure ModMail system",
-                emoji="📨",
-                value="modmail"
-            ),
-            SelectOption(
-                label="Utility",
-                description="Configure utility features",
-                emoji="🔧",
-                value="utility"
-            ),
-            SelectOption(
-                label="AutoRole",
-                description="Configure auto-role system",
-                emoji="👥",
-                value="autorole"
-            ),
-            SelectOption(
-                label="AutoResponder",
-                description="Configure auto-responder system",
-                emoji="💬",
-                value="autorespond"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a module to configure...",
-            options=options,
-            row=0
-        )
+        await ctx.send(embed=main_embed(), view=main_panel(ctx.author.id))
 
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
+    async def choose_module(self, interaction: discord.Interaction, owner_id: int):
+        if interaction.user.id != owner_id:
             await interaction.response.send_message("You cannot use this panel", ephemeral=True)
             return
 
-        module = self.values[0]
-        panel = self.get_panel_class(module)(self.bot, interaction.user)
-        embed = powered_embed(f"{self.get_module_name(module)} Configuration")
-        await interaction.response.edit_message(embed=embed, view=panel)
-
-    def get_module_name(self, module):
-        """Get friendly module name."""
-        names = {
-            "mod": "Moderation",
-            "automod": "Auto-Moderation",
-            "tickets": "Ticket System",
-            "leveling": "Leveling System",
-            "music": "Music System",
-            "modmail": "ModMail System",
-            "utility": "Utility Features",
-            "autorole": "Auto-Role System",
-            "autorespond": "Auto-Responder System"
-        }
-        return names.get(module, module)
-
-    def get_panel_class(self, module):
-        """Get the appropriate panel class."""
-        panels = {
-            "mod": ModeratorPanel,
-            "automod": AutoModPanel,
-            "tickets": TicketPanel,
-            "leveling": LevelingPanel,
-            "music": MusicPanel,
-            "modmail": ModMailPanel,
-            "utility": UtilityPanel,
-            "autorole": AutoRolePanel,
-            "autorespond": AutoResponderPanel
-        }
-        return panels.get(module, ModeratorPanel) # Default to ModeratorPanel
+        module = interaction.data['values'][0]
+        if module not in MODULES:
+            module = "mod"
+        embed = powered_embed(f"{MODULES[module][3]} Configuration")
+        await interaction.response.edit_message(embed=embed, view=module_panel(module, owner_id))
 
-class BaseConfigPanel(ui.View):
-    def __init__(self, bot, owner):
-        super().__init__(timeout=300)
-        self.bot = bot
-        self.owner = owner
-        self.add_item(ui.Button(label="Back", style=ButtonStyle.secondary, custom_id="back"))
-
-    async def handle_back(self, interaction: discord.Interaction):
-        """Handle back button press."""
-        if interaction.user != self.owner:
+    async def choose_setting(self, interaction: discord.Interaction, module: str, owner_id: int):
+        if interaction.user.id != owner_id:
             await interaction.response.send_message("You cannot use this panel", ephemeral=True)
             return
 
-        main_view = MainConfigView(self.bot, self.owner)
-        embed = powered_embed("Server Configuration Panel")
-        embed.description = "Select a module to configure:"
-        await interaction.response.edit_message(embed=embed, view=main_view)
-
-class ModeratorPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(ModerationSettingsSelect(bot, owner))
-
-class AutoModPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(AutoModSettingsSelect(bot, owner))
-
-class ModerationSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-        options = [
-            SelectOption(
-                label="Punishment Settings",
-                description="Configure warning and punishment settings",
-                emoji="⚠️",
-                value="punishments"
-            ),
-            SelectOption(
-                label="Logging Settings",
-                description="Configure moderation logging",
-                emoji="📝",
-                value="logging"
-            ),
-            SelectOption(
-                label="Permission Settings",
-                description="Configure moderation permissions",
-                emoji="🔒",
-                value="permissions"
-            ),
-            SelectOption(
-                label="Appeal Settings",
-                description="Configure punishment appeals",
-                emoji="🔄",
-                value="appeals"
-            ),
-            SelectOption(
-                label="Notification Settings",
-                description="Configure moderation notifications",
-                emoji="🔔",
-                value="notifications"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
-
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+        modal = MODALS.get((module, interaction.data['values'][0]))
+        if modal is None:
+            await interaction.response.send_message("This setting is not available yet.", ephemeral=True)
             return
+        await interaction.response.send_modal(modal())
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        if setting == "punishments":
-            modal = PunishmentSettingsModal()
-            await interaction.response.send_modal(modal)
-        elif setting == "logging":
-            modal = LoggingSettingsModal()
-            await interaction.response.send_modal(modal)
-        # ... other settings will be handled similarly
-
-class AutoModSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-        options = [
-            SelectOption(
-                label="Filter Settings",
-                description="Configure automod filters",
-                emoji="🔍",
-                value="filters"
-            ),
-            SelectOption(
-                label="Action Settings",
-                description="Configure automated actions",
-                emoji="⚡",
-                value="actions"
-            ),
-            SelectOption(
-                label="Threshold Settings",
-                description="Configure trigger thresholds",
-                emoji="📊",
-                value="thresholds"
-            ),
-            SelectOption(
-                label="Whitelist Settings",
-                description="Configure exemptions and whitelists",
-                emoji="✅",
-                value="whitelist"
-            ),
-            SelectOption(
-                label="Logging Settings",
-                description="Configure automod logging",
-                emoji="📝",
-                value="logging"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
-
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
+    async def go_back(self, interaction: discord.Interaction, owner_id: int):
+        if interaction.user.id != owner_id:
             await interaction.response.send_message("You cannot use this panel", ephemeral=True)
             return
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        if setting == "filters":
-            modal = FilterSettingsModal()
-            await interaction.response.send_modal(modal)
-        elif setting == "actions":
-            modal = ActionSettingsModal()
-            await interaction.response.send_modal(modal)
-        # ... other settings will be handled similarly
-
-class TicketPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(TicketSettingsSelect(bot, owner))
-
-class LevelingPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(LevelingSettingsSelect(bot, owner))
-
-class MusicPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(MusicSettingsSelect(bot, owner))
-
-class ModMailPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(ModMailSettingsSelect(bot, owner))
-
-class UtilityPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(UtilitySettingsSelect(bot, owner))
+        await interaction.response.edit_message(embed=main_embed(), view=main_panel(owner_id))
 
-class AutoRolePanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(AutoRoleSettingsSelect(bot, owner))
-
-class AutoResponderPanel(BaseConfigPanel):
-    def __init__(self, bot, owner):
-        super().__init__(bot, owner)
-        self.add_item(AutoResponderSettingsSelect(bot, owner))
-
-class TicketSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+    @config.command(name="save")
+    async def config_save(self, ctx):
+        """Export every configuration collection for this server as one snapshot file."""
+        async with ctx.typing():
+            spool, counts = await write_snapshot(self.db, ctx.guild.id)
+        total = sum(counts.values())
+        if not total:
+            spool.close()
+            await ctx.send(embed=powered_embed("No configuration found"))
             return
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        if setting == "categories":
-            modal = TicketCategoryModal()
-            await interaction.response.send_modal(modal)
-        # Add other settings handlers
-        
-        options = [
-            SelectOption(
-                label="Category Settings",
-                description="Configure ticket categories",
-                emoji="📁",
-                value="categories"
-            ),
-            SelectOption(
-                label="Permission Settings",
-                description="Configure ticket permissions",
-                emoji="🔒",
-                value="permissions"
-            ),
-            SelectOption(
-                label="Template Settings",
-                description="Configure ticket templates",
-                emoji="📝",
-                value="templates"
-            ),
-            SelectOption(
-                label="Archive Settings",
-                description="Configure ticket archival",
-                emoji="📦",
-                value="archive"
-            ),
-            SelectOption(
-                label="Notification Settings",
-                description="Configure ticket notifications",
-                emoji="🔔",
-                value="notifications"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
+        embed = powered_embed("Configuration Snapshot")
+        embed.description = "\n".join(f"**{name}:** {count}" for name, count in counts.items() if count)
+        await ctx.send(
+            embed=embed,
+            file=discord.File(fp=spool, filename=f"config_{ctx.guild.id}.ndjson.gz")
         )
 
-class LevelingSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+    @config.command(name="load")
+    async def config_load(self, ctx, mode: str = "full"):
+        """Restore a snapshot file; mode "diff" only writes documents that changed."""
+        if not ctx.message.attachments:
+            await ctx.send(embed=powered_embed("Please attach a configuration snapshot"))
             return
-
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        if setting == "xp":
-            modal = LevelingXPModal()
-            await interaction.response.send_modal(modal)
-        # Add other settings handlers
-        
-        options = [
-            SelectOption(
-                label="XP Settings",
-                description="Configure XP gain settings",
-                emoji="⭐",
-                value="xp"
-            ),
-            SelectOption(
-                label="Reward Settings",
-                description="Configure level rewards",
-                emoji="🎁",
-                value="rewards"
-            ),
-            SelectOption(
-                label="Role Settings",
-                description="Configure level roles",
-                emoji="👥",
-                value="roles"
-            ),
-            SelectOption(
-                label="Notification Settings",
-                description="Configure level up notifications",
-                emoji="🔔",
-                value="notifications"
-            ),
-            SelectOption(
-                label="Leaderboard Settings",
-                description="Configure leaderboard display",
-                emoji="🏆",
-                value="leaderboard"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
-
-class MusicSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+        if mode not in ("full", "diff"):
+            await ctx.send(embed=powered_embed("Mode must be full or diff"))
             return
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        modal = None
-        
-        if setting == "permissions":
-            modal = MusicPermissionModal()
-        elif setting == "sources":
-            modal = MusicSourceModal()
-        elif setting == "quality":
-            modal = MusicQualityModal()
-        elif setting == "playlists":
-            modal = MusicPlaylistModal()
-        elif setting == "restrictions":
-            modal = MusicRestrictionModal()
-        
-        if modal:
-            await interaction.response.send_modal(modal)
-        else:
-            await interaction.response.send_message(f"Settings for {setting} are coming soon!", ephemeral=True)
-        
-        options = [
-            SelectOption(
-                label="Permission Settings",
-                description="Configure music permissions",
-                emoji="🔒",
-                value="permissions"
-            ),
-            SelectOption(
-                label="Source Settings",
-                description="Configure music sources",
-                emoji="🔗",
-                value="sources"
-            ),
-            SelectOption(
-                label="Quality Settings",
-                description="Configure audio quality",
-                emoji="🎵",
-                value="quality"
-            ),
-            SelectOption(
-                label="Playlist Settings",
-                description="Configure playlist features",
-                emoji="📜",
-                value="playlists"
-            ),
-            SelectOption(
-                label="Restriction Settings",
-                description="Configure music restrictions",
-                emoji="⛔",
-                value="restrictions"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
-
-class ModMailSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+        with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+            try:
+                async with ctx.typing():
+                    await ctx.message.attachments[0].save(spool)
+                    stats = await restore_snapshot(self.db, ctx.guild.id, spool, diff=mode == "diff")
+            except SnapshotError as e:
+                await ctx.send(embed=powered_embed(f"Error loading configuration: {str(e)}"))
+                return
+
+        embed = powered_embed("Configuration loaded successfully")
+        embed.description = "\n".join(
+            f"**{name}:** {s.written} written, {s.unchanged} unchanged, {s.deleted} removed"
+            + (f", {s.conflicts} skipped (owned by another server)" if s.conflicts else "")
+            for name, s in stats.items() if any(s)
+        ) or "Nothing changed"
+        await ctx.send(embed=embed)
+
+    @config.group(name="template")
+    async def template(self, ctx):
+        """Named configuration templates that can be applied to many servers."""
+        if ctx.invoked_subcommand is None:
+            names = await self.bot.templates.names()
+            embed = powered_embed("Configuration Templates")
+            embed.description = "\n".join(f"`{name}`" for name in names) or "No templates saved"
+            await ctx.send(embed=embed)
+
+    @template.command(name="save")
+    @commands.is_owner()
+    async def template_save(self, ctx, name: str):
+        """Save this server's AutoMod, welcome and autorole setup as a template."""
+        try:
+            counts = await self.bot.templates.save(name, ctx.guild, ctx.author.id)
+        except Exception as e:
+            await ctx.send(embed=powered_embed(f"Error saving template: {str(e)}"))
             return
-
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        modal = None
-        
-        if setting == "categories":
-            modal = ModMailCategoryModal()
-        elif setting == "permissions":
-            modal = ModMailPermissionModal()
-        elif setting == "templates":
-            modal = ModMailTemplateModal()
-        elif setting == "archive":
-            modal = ModMailArchiveModal()
-        elif setting == "notifications":
-            modal = ModMailNotificationModal()
-        
-        if modal:
-            await interaction.response.send_modal(modal)
-        else:
-            await interaction.response.send_message(f"Settings for {setting} are coming soon!", ephemeral=True)
-        
-        options = [
-            SelectOption(
-                label="Category Settings",
-                description="Configure modmail categories",
-                emoji="📁",
-                value="categories"
-            ),
-            SelectOption(
-                label="Permission Settings",
-                description="Configure modmail permissions",
-                emoji="🔒",
-                value="permissions"
-            ),
-            SelectOption(
-                label="Template Settings",
-                description="Configure modmail templates",
-                emoji="📝",
-                value="templates"
-            ),
-            SelectOption(
-                label="Archive Settings",
-                description="Configure modmail archival",
-                emoji="📦",
-                value="archive"
-            ),
-            SelectOption(
-                label="Notification Settings",
-                description="Configure modmail notifications",
-                emoji="🔔",
-                value="notifications"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
-
-class UtilitySettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+        if not counts:
+            await ctx.send(embed=powered_embed("No configuration found"))
             return
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        modal = None
-        
-        if setting == "commands":
-            modal = UtilityCommandsModal()
-        elif setting == "permissions":
-            modal = UtilityPermissionModal()
-        elif setting == "restrictions":
-            modal = UtilityRestrictionModal()
-        elif setting == "logging":
-            modal = UtilityLoggingModal()
-        elif setting == "cooldowns":
-            modal = UtilityCooldownModal()
-        
-        if modal:
-            await interaction.response.send_modal(modal)
-        else:
-            await interaction.response.send_message(f"Settings for {setting} are coming soon!", ephemeral=True)
-        
-        options = [
-            SelectOption(
-                label="Command Settings",
-                description="Configure utility commands",
-                emoji="🔧",
-                value="commands"
-            ),
-            SelectOption(
-                label="Permission Settings",
-                description="Configure command permissions",
-                emoji="🔒",
-                value="permissions"
-            ),
-            SelectOption(
-                label="Restriction Settings",
-                description="Configure command restrictions",
-                emoji="⛔",
-                value="restrictions"
-            ),
-            SelectOption(
-                label="Logging Settings",
-                description="Configure command logging",
-                emoji="📝",
-                value="logging"
-            ),
-            SelectOption(
-                label="Cooldown Settings",
-                description="Configure command cooldowns",
-                emoji="⏱️",
-                value="cooldowns"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
+        embed = powered_embed(f"Template {name} saved")
+        embed.description = "\n".join(f"**{collection}:** {n} settings" for collection, n in counts.items())
+        await ctx.send(embed=embed)
 
-class AutoRoleSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+    @template.command(name="apply")
+    @commands.is_owner()
+    async def template_apply(self, ctx, name: str, *, guild_ids: str):
+        """Apply a template to a list of server IDs separated by spaces or commas."""
+        try:
+            targets = [int(part) for part in guild_ids.replace(",", " ").split()]
+        except ValueError:
+            await ctx.send(embed=powered_embed("Server IDs must be numbers"))
             return
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        modal = None
-        
-        if setting == "join":
-            modal = AutoRoleJoinModal()
-        elif setting == "bots":
-            modal = AutoRoleBotModal()
-        elif setting == "levels":
-            modal = AutoRoleLevelModal()
-        elif setting == "reactions":
-            modal = AutoRoleReactionModal()
-        elif setting == "conditions":
-            modal = AutoRoleConditionModal()
-        
-        if modal:
-            await interaction.response.send_modal(modal)
-        else:
-            await interaction.response.send_message(f"Settings for {setting} are coming soon!", ephemeral=True)
-        
-        options = [
-            SelectOption(
-                label="Join Role Settings",
-                description="Configure roles on join",
-                emoji="➡️",
-                value="join"
-            ),
-            SelectOption(
-                label="Bot Role Settings",
-                description="Configure bot roles",
-                emoji="🤖",
-                value="bots"
-            ),
-            SelectOption(
-                label="Level Role Settings",
-                description="Configure level-based roles",
-                emoji="📈",
-                value="levels"
-            ),
-            SelectOption(
-                label="Reaction Role Settings",
-                description="Configure reaction roles",
-                emoji="🎯",
-                value="reactions"
-            ),
-            SelectOption(
-                label="Condition Settings",
-                description="Configure role conditions",
-                emoji="⚙️",
-                value="conditions"
-            )
-        ]
-        
-        super().__init__(
-            placeholder="Select a setting to configure...",
-            options=options,
-            row=1
-        )
-
-class AutoResponderSettingsSelect(ui.Select):
-    def __init__(self, bot, owner):
-        self.bot = bot
-        self.owner = owner
-        
-    async def callback(self, interaction: discord.Interaction):
-        if interaction.user != self.owner:
-            await interaction.response.send_message("You cannot use this panel", ephemeral=True)
+        try:
+            async with ctx.typing():
+                results = await self.bot.templates.apply(name, targets)
+        except KeyError:
+            await ctx.send(embed=powered_embed(f"Template {name} not found"))
             return
 
-        setting = self.values[0]
-        # Show appropriate modal for the selected setting
-        modal = None
-        
-        if setting == "triggers":
-            modal = AutoResponseTriggerModal()
-        elif setting == "responses":
-            modal = AutoResponseContentModal()
-        elif setting == "variables":
-            modal = AutoResponseVariableModal()
-        elif setting == "scheduling":
-            modal = AutoResponseScheduleModal()
-        elif setting == "conditions":
-            modal = AutoResponseConditionModal()
-        
-        if modal:
-            await interaction.response.send_modal(modal)
+        applied = [r for r in results if r.ok]
+        embed = powered_embed(f"Template {name} applied to {len(applied)}/{len(results)} servers")
+        lines = [f"❌ `{r.guild_id}`: {r.error}" for r in results if not r.ok]
+        lines += [f"⚠️ `{r.guild_id}`: missing {', '.join(r.missing)}" for r in applied if r.missing]
+        if lines:
+            embed.description = "\n".join(lines[:20])
+            if len(lines) > 20:
+                embed.description += f"\n...and {len(lines) - 20} more"
+        await ctx.send(embed=embed)
+
+    @template.command(name="delete")
+    @commands.is_owner()
+    async def template_delete(self, ctx, name: str):
+        """Delete a saved template."""
+        if await self.bot.templates.delete(name):
+            await ctx.send(embed=powered_embed(f"Template {name} deleted"))
         else:
-            await interaction.response.send_message(f"Settings for {setting} are coming soon!", ephemeral=True)
-        
-        options = [
-            SelectOption(
-                label="Trigger Settings",
-                description="Configure auto-response triggers",
-                emoji="🎯",
-                value="triggers"
-            ),
-            SelectOption(
-                label="Response Settings",
-                description="Configure auto-responses",
-                emoji="💬",
-                value="responses"
-            ),
-            SelectOption(
-                label="Variable Settings",
-                description="Configure response variables",
-                emoji="📝",
-                value="variables"
-            ),
-            SelectOption(
-                label="Schedule Settings",
-                description="Configure response schedules",
-                emoji="⏰",
-                value="scheduling"
-            ),
-            SelectOption(
-                label="Condition Settings",
-                description="Configure response conditions",
-                emoji="⚙️",
-                value="conditions"
-            )
-        ]
-        
-        super().__init__(
+            await ctx.send(embed=powered_embed(f"Template {name} not found"))
+
+# module value -> (label, description, emoji, panel title)
+MODULES = {
+    "mod": ("Moderation", "Configure moderation settings", "🛡️", "Moderation"),
+    "automod": ("AutoMod", "Configure auto-moderation settings", "🤖", "Auto-Moderation"),
+    "tickets": ("Tickets", "Configure ticket system", "🎫", "Ticket System"),
+    "leveling": ("Leveling", "Configure leveling system", "📈", "Leveling System"),
+    "music": ("Music", "Configure music system", "🎵", "Music System"),
+    "modmail": ("ModMail", "Configure ModMail system", "📨", "ModMail System"),
+    "utility": ("Utility", "Configure utility features", "🔧", "Utility Features"),
+    "autorole": ("AutoRole", "Configure auto-role system", "👥", "Auto-Role System"),
+    "autorespond": ("AutoResponder", "Configure auto-responder system", "💬", "Auto-Responder System")
+}
+
+# module value -> settings offered on its panel as (label, description, emoji, value)
+SETTINGS = {
+    "mod": [
+        ("Punishment Settings", "Configure warning and punishment settings", "⚠️", "punishments"),
+        ("Logging Settings", "Configure moderation logging", "📝", "logging"),
+        ("Permission Settings", "Configure moderation permissions", "🔒", "permissions"),
+        ("Appeal Settings", "Configure punishment appeals", "🔄", "appeals"),
+        ("Notification Settings", "Configure moderation notifications", "🔔", "notifications")
+    ],
+    "automod": [
+        ("Filter Settings", "Configure automod filters", "🔍", "filters"),
+        ("Action Settings", "Configure automated actions", "⚡", "actions"),
+        ("Threshold Settings", "Configure trigger thresholds", "📊", "thresholds"),
+        ("Whitelist Settings", "Configure exemptions and whitelists", "✅", "whitelist"),
+        ("Logging Settings", "Configure automod logging", "📝", "logging")
+    ],
+    "tickets": [
+        ("Category Settings", "Configure ticket categories", "📁", "categories"),
+        ("Permission Settings", "Configure ticket permissions", "🔒", "permissions"),
+        ("Template Settings", "Configure ticket templates", "📝", "templates"),
+        ("Archive Settings", "Configure ticket archival", "📦", "archive"),
+        ("Notification Settings", "Configure ticket notifications", "🔔", "notifications")
+    ],
+    "leveling": [
+        ("XP Settings", "Configure XP gain settings", "⭐", "xp"),
+        ("Reward Settings", "Configure level rewards", "🎁", "rewards"),
+        ("Role Settings", "Configure level roles", "👥", "roles"),
+        ("Notification Settings", "Configure level up notifications", "🔔", "notifications"),
+        ("Leaderboard Settings", "Configure leaderboard display", "🏆", "leaderboard")
+    ],
+    "music": [
+        ("Permission Settings", "Configure music permissions", "🔒", "permissions"),
+        ("Source Settings", "Configure music sources", "🔗", "sources"),
+        ("Quality Settings", "Configure audio quality", "🎵", "quality"),
+        ("Playlist Settings", "Configure playlist features", "📜", "playlists"),
+        ("Restriction Settings", "Configure music restrictions", "⛔", "restrictions")
+    ],
+    "modmail": [
+        ("Category Settings", "Configure modmail categories", "📁", "categories"),
+        ("Permission Settings", "Configure modmail permissions", "🔒", "permissions"),
+        ("Template Settings", "Configure modmail templates", "📝", "templates"),
+        ("Archive Settings", "Configure modmail archival", "📦", "archive"),
+        ("Notification Settings", "Configure modmail notifications", "🔔", "notifications")
+    ],
+    "utility": [
+        ("Command Settings", "Configure utility commands", "🔧", "commands"),
+        ("Permission Settings", "Configure command permissions", "🔒", "permissions"),
+        ("Restriction Settings", "Configure command restrictions", "⛔", "restrictions"),
+        ("Logging Settings", "Configure command logging", "📝", "logging"),
+        ("Cooldown Settings", "Configure command cooldowns", "⏱️", "cooldowns")
+    ],
+    "autorole": [
+        ("Join Role Settings", "Configure roles on join", "➡️", "join"),
+        ("Bot Role Settings", "Configure bot roles", "🤖", "bots"),
+        ("Level Role Settings", "Configure level-based roles", "📈", "levels"),
+        ("Reaction Role Settings", "Configure reaction roles", "🎯", "reactions"),
+        ("Condition Settings", "Configure role conditions", "⚙️", "conditions")
+    ],
+    "autorespond": [
+        ("Trigger Settings", "Configure auto-response triggers", "🎯", "triggers"),
+        ("Response Settings", "Configure auto-responses", "💬", "responses"),
+        ("Variable Settings", "Configure response variables", "📝", "variables"),
+        ("Schedule Settings", "Configure response schedules", "⏰", "scheduling"),
+        ("Condition Settings", "Configure response conditions", "⚙️", "conditions")
+    ]
+}
+
+def main_panel(owner_id: int) -> ui.View:
+    """Module selector; the owner's id rides in the custom_id."""
+    options = [
+        SelectOption(label=label, description=description, emoji=emoji, value=value)
+        for value, (label, description, emoji, _) in MODULES.items()
+    ]
+    return static_view(ui.Select(
+        custom_id=custom_id("cfg.module", owner_id),
+        placeholder="Select a module to configure...",
+        options=options,
+        row=0
+    ))
+
+def module_panel(module: str, owner_id: int) -> ui.View:
+    """Back button plus the module's settings selector."""
+    options = [
+        SelectOption(label=label, description=description, emoji=emoji, value=value)
+        for label, description, emoji, value in SETTINGS[module]
+    ]
+    return static_view(
+        ui.Button(label="Back", style=ButtonStyle.secondary, custom_id=custom_id("cfg.back", owner_id)),
+        ui.Select(
+            custom_id=custom_id("cfg.setting", module, owner_id),
             placeholder="Select a setting to configure...",
             options=options,
             row=1
         )
+    )
+
+def main_embed() -> discord.Embed:
+    embed = powered_embed("Server Configuration Panel")
+    embed.description = "Select a module to configure:"
+    return embed
 
 class PunishmentSettingsModal(ui.Modal):
     def __init__(self):
@@ -1046,5 +509,20 @@ class LevelingXPModal(ui.Modal):
 
 # ... Add more modals for other settings ...
 
+# (module, setting) -> modal; settings without one answer "not available yet"
+MODALS = {
+    ("mod", "punishments"): PunishmentSettingsModal,
+    ("mod", "logging"): LoggingSettingsModal,
+    ("automod", "filters"): FilterSettingsModal,
+    ("automod", "actions"): ActionSettingsModal,
+    ("tickets", "categories"): TicketCategoryModal,
+    ("leveling", "xp"): LevelingXPModal,
+    ("autorespond", "triggers"): AutoResponseTriggerModal,
+    ("autorespond", "responses"): AutoResponseContentModal,
+    ("autorespond", "variables"): AutoResponseVariableModal,
+    ("autorespond", "scheduling"): AutoResponseScheduleModal,
+    ("autorespond", "conditions"): AutoResponseConditionModal
+}
+
 async def setup(bot):
     await bot.add_cog(ConfigurationPanel(bot))
@@ -1,17 +1,20 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel, ASCENDING, DESCENDING
 from core.config import Config
+from core.db_health import CircuitBreaker, DBHealth, DatabaseUnavailable
+from core.guild_index import ConfiguredGuilds, TrackedCollection
+from core.indexes import member_key
+from core.migrations import MigrationRunner
 from core.logger import get_logger
 import asyncio
-from typing import Dict, Any, Optional, List
-from cachetools import TTLCache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+from core.cache import SWRCache
 import time
 
 class Database:
-    def __init__(self):
+    def __init__(self, uri: Optional[str] = None):
         # Initialize MongoDB connection with connection pooling
         self.client = AsyncIOMotorClient(
-            Config.MONGO_URI,
+            uri or Config.MONGO_URI,
             maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
             minPoolSize=Config.MONGO_MIN_POOL_SIZE,
             retryWrites=True,
@@ -21,80 +24,103 @@ class Database:
         
         # Initialize caches
         self.cache_config = Config.get_cache_config()
-        self.guild_cache = TTLCache(**self.cache_config)
-        self.user_cache = TTLCache(**self.cache_config)
+        self.guild_cache = SWRCache(**self.cache_config)
+        self.user_cache = SWRCache(**self.cache_config)
+
+        # Which guilds have settings documents at all; writes go through
+        # TrackedCollection so the sets (and caches) follow them; writes made
+        # elsewhere show up on the periodic reload
+        self.configured = ConfiguredGuilds(refresh=Config.CONFIGURED_REFRESH)
+        self._tracked: Dict[str, TrackedCollection] = {}
+        self.configured.subscribe('guild_settings', lambda guild_id: self.guild_cache.pop(f"guild:{guild_id}", None))
         
         # Track query metrics
         self.query_times = []
         self.cache_hits = 0
         self.cache_misses = 0
         
-        # Initialize collections with proper indexes
-        self._init_collections()
+        # Health probe and circuit breaker
+        self.health = DBHealth(
+            self.client,
+            Config.MONGO_MIN_POOL_SIZE,
+            op_timeout=Config.MONGO_OP_TIMEOUT,
+            probe_interval=Config.MONGO_PROBE_INTERVAL,
+            breaker=CircuitBreaker(Config.MONGO_BREAKER_THRESHOLD, Config.MONGO_BREAKER_RESET)
+        )
+        self._startup_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __getattr__(self, name: str):
+        # Cogs use bot.db.<collection>; anything not defined here is a collection
+        if name.startswith('_') or name in ('client', 'db', 'health', 'configured'):
+            raise AttributeError(name)
+        if name in self.configured.collections:
+            tracked = self._tracked.get(name)
+            if tracked is None:
+                tracked = self._tracked[name] = TrackedCollection(self.db[name], name, self.configured)
+            return tracked
+        return self.db[name]
+
+    def get_collection(self, name: str):
+        return getattr(self, name) if name in self.configured.collections else self.db[name]
+
+    @property
+    def degraded(self) -> bool:
+        """True while the circuit breaker is open; skip non-essential writes."""
+        return self.health.breaker.is_open
+
+    async def guarded(self, operation, *args, **kwargs):
+        """Run a query through the circuit breaker; raises DatabaseUnavailable while it is open."""
+        return await self.health.call(operation, *args, **kwargs)
+
+    async def connect(self, on_ready: Sequence[Callable[[], Awaitable[None]]] = ()):
+        """Warm up the pool, build indexes, run pending migrations and start the probe.
+
+        ``on_ready`` callbacks run after the migrations. If MongoDB does not
+        answer in time the bot starts degraded, and all of this follows once
+        the probe reaches it.
+        """
+        if await self.health.warm_up():
+            await self._prepare(on_ready)
+        else:
+            self._startup_task = asyncio.create_task(self._prepare_when_ready(on_ready))
+        self.health.start()
 
-    async def _init_collections(self):
-        """Initialize collections and indexes."""
+    async def _prepare(self, on_ready: Sequence[Callable[[], Awaitable[None]]]):
+        await MigrationRunner(self.db).run()
         try:
-            # Guild settings indexes
-            await self.db.guild_settings.create_indexes([
-                IndexModel([("_id", ASCENDING)]),
-                IndexModel([("prefix", ASCENDING)]),
-                IndexModel([("automod.enabled", ASCENDING)])
-            ])
-            
-            # User data indexes
-            await self.db.users.create_indexes([
-                IndexModel([("_id", ASCENDING)]),
-                IndexModel([("guild_id", ASCENDING)]),
-                IndexModel([("warns", ASCENDING)]),
-                IndexModel([("xp", DESCENDING)])
-            ])
-            
-            # Tickets indexes
-            await self.db.tickets.create_indexes([
-                IndexModel([("guild_id", ASCENDING)]),
-                IndexModel([("user_id", ASCENDING)]),
-                IndexModel([("status", ASCENDING)]),
-                IndexModel([("created_at", DESCENDING)])
-            ])
-            
-            # Auto-mod logs indexes
-            await self.db.automod_logs.create_indexes([
-                IndexModel([("guild_id", ASCENDING)]),
-                IndexModel([("user_id", ASCENDING)]),
-                IndexModel([("action", ASCENDING)]),
-                IndexModel([("timestamp", DESCENDING)])
-            ])
-            
-            get_logger().info("Database indexes created successfully")
-            
+            await self.configured.load(self.db)
         except Exception as e:
-            get_logger().error(f"Error creating database indexes: {str(e)}")
+            # Without the sets every guild is treated as configured
+            get_logger().error(f"Failed to load configured guilds: {str(e)}")
+        if self._refresh_task is None and self.configured.refresh:
+            self._refresh_task = asyncio.create_task(self.configured.refresh_forever(self.db))
+        for callback in on_ready:
+            await callback()
 
-    async def get_guild_settings(self, guild_id: int) -> Optional[Dict[str, Any]]:
-        """Get guild settings with caching."""
-        # Check cache first
-        cache_key = f"guild:{guild_id}"
-        if cache_key in self.guild_cache:
-            self.cache_hits += 1
-            return self.guild_cache[cache_key]
-
-        # Query database with timeout
-        start_time = time.time()
+    async def _prepare_when_ready(self, on_ready: Sequence[Callable[[], Awaitable[None]]]):
+        await self.health.ready.wait()
         try:
-            settings = await asyncio.wait_for(
-                self.db.guild_settings.find_one({"_id": guild_id}),
-                timeout=5.0
-            )
-            
-            # Update cache and metrics
-            if settings:
-                self.guild_cache[cache_key] = settings
-            self.cache_misses += 1
+            await self._prepare(on_ready)
+            get_logger().info("MongoDB reachable again; startup migrations done")
+        except Exception as e:
+            get_logger().error(f"Error running startup migrations: {str(e)}")
+
+    async def get_guild_settings(self, guild_id: int) -> Optional[Dict[str, Any]]:
+        """Get guild settings with caching; stale entries are served while they refresh."""
+        if not self.configured.might_have('guild_settings', guild_id):
+            return None
+
+        async def load():
+            start_time = time.time()
+            settings = await self.guarded(self.guild_settings.find_one, {"_id": guild_id})
             self.query_times.append(time.time() - start_time)
-            
             return settings
-            
+
+        try:
+            return await self.guild_cache.get_or_load(f"guild:{guild_id}", load)
+        except DatabaseUnavailable:
+            return None
         except asyncio.TimeoutError:
             get_logger().error(f"Database timeout getting guild settings for {guild_id}")
             return None
@@ -105,17 +131,12 @@ class Database:
     async def update_guild_settings(self, guild_id: int, update: Dict[str, Any]) -> bool:
         """Update guild settings with cache invalidation."""
         try:
-            result = await self.db.guild_settings.update_one(
+            # The write listener invalidates the cached copy
+            result = await self.guild_settings.update_one(
                 {"_id": guild_id},
                 {"$set": update},
                 upsert=True
             )
-            
-            # Invalidate cache
-            cache_key = f"guild:{guild_id}"
-            if cache_key in self.guild_cache:
-                del self.guild_cache[cache_key]
-                
             return result.modified_count > 0 or result.upserted_id is not None
             
         except Exception as e:
@@ -124,22 +145,11 @@ class Database:
 
     async def get_user_data(self, guild_id: int, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user data with caching."""
-        cache_key = f"user:{guild_id}:{user_id}"
-        if cache_key in self.user_cache:
-            self.cache_hits += 1
-            return self.user_cache[cache_key]
+        async def load():
+            return await self.guarded(self.db.users.find_one, {"_id": member_key(guild_id, user_id)})
 
         try:
-            data = await self.db.users.find_one({
-                "guild_id": guild_id,
-                "_id": user_id
-            })
-            
-            if data:
-                self.user_cache[cache_key] = data
-            self.cache_misses += 1
-            
-            return data
+            return await self.user_cache.get_or_load(f"user:{guild_id}:{user_id}", load)
             
         except Exception as e:
             get_logger().error(f"Database error getting user data: {str(e)}")
@@ -160,15 +170,14 @@ class Database:
                 else:
                     missing_ids.append(user_id)
             
-            # Query database for missing users
+            # Query database for missing users: one $in over the compound _id
             if missing_ids:
                 cursor = self.db.users.find({
-                    "guild_id": guild_id,
-                    "_id": {"$in": missing_ids}
+                    "_id": {"$in": [member_key(guild_id, user_id) for user_id in missing_ids]}
                 })
                 
                 async for user in cursor:
-                    user_id = user["_id"]
+                    user_id = user["_id"]["u"]
                     cache_key = f"user:{guild_id}:{user_id}"
                     self.user_cache[cache_key] = user
                     cached_users[user_id] = user
@@ -183,19 +192,30 @@ class Database:
     async def get_metrics(self) -> Dict[str, Any]:
         """Get database performance metrics."""
         avg_query_time = sum(self.query_times) / len(self.query_times) if self.query_times else 0
-        cache_hit_rate = self.cache_hits / (self.cache_hits + self.cache_misses) if (self.cache_hits + self.cache_misses) > 0 else 0
+        caches = (self.guild_cache, self.user_cache)
+        cache_hits = self.cache_hits + sum(c.hits + c.stale_hits for c in caches)
+        cache_misses = self.cache_misses + sum(c.misses for c in caches)
+        cache_hit_rate = cache_hits / (cache_hits + cache_misses) if (cache_hits + cache_misses) > 0 else 0
         
         return {
             "average_query_time": avg_query_time,
             "cache_hit_rate": cache_hit_rate,
-            "cache_hits": self.cache_hits,
-            "cache_misses": self.cache_misses,
+            "cache_hits": cache_hits,
+            "cache_misses": cache_misses,
+            "stale_hits": sum(c.stale_hits for c in caches),
+            "negative_hits": sum(c.negative_hits for c in caches),
             "cached_guilds": len(self.guild_cache),
-            "cached_users": len(self.user_cache)
+            "cached_users": len(self.user_cache),
+            "cache_bytes": sum(c.currsize for c in caches)
         }
 
     async def close(self):
         """Cleanup database resources."""
+        for task in (self._startup_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        await self.health.stop()
+        
         # Clear caches
         self.guild_cache.clear()
         self.user_cache.clear()
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+from prometheus_client import Counter, Gauge
+from pymongo.errors import ConnectionFailure
+from core.logger import get_logger
+
+# Errors that say the server is slow or unreachable; anything else is a normal reply
+UNHEALTHY_ERRORS = (asyncio.TimeoutError, ConnectionFailure)
+
+DB_PING_LATENCY = Gauge('bot_db_ping_seconds', 'Latency of the last MongoDB health probe')
+DB_CIRCUIT_OPEN = Gauge('bot_db_circuit_open', '1 while the MongoDB circuit breaker is open')
+DB_FAST_FAILS = Counter('bot_db_fast_fails_total', 'Database calls rejected while the breaker was open')
+
+class DatabaseUnavailable(Exception):
+    """Raised instead of waiting on MongoDB while the circuit breaker is open."""
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures or timeouts.
+
+    While open every call fails immediately. After ``reset_timeout`` seconds
+    one trial call is let through (half-open); it closes the breaker on
+    success and re-opens it on failure.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 15.0,
+                 on_change: Optional[Callable[[bool], None]] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.failures = 0
+        self.opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        return self._state == self.OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_running = False
+        if self._state != self.CLOSED:
+            self._set_state(self.CLOSED)
+
+    def trip(self):
+        """Open the breaker now, without waiting for ``failure_threshold`` failures."""
+        self.failures = max(self.failures, self.failure_threshold)
+        self._trial_running = False
+        self.opened_at = time.monotonic()
+        if self._state != self.OPEN:
+            self._set_state(self.OPEN)
+
+    def record_failure(self):
+        self.failures += 1
+        trial = self._trial_running
+        self._trial_running = False
+        if trial or (self._state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._set_state(self.OPEN)
+
+    def _set_state(self, state: str):
+        was_open = self._state == self.OPEN
+        self._state = state
+        DB_CIRCUIT_OPEN.set(1 if state == self.OPEN else 0)
+        if was_open != (state == self.OPEN):
+            get_logger().warning(f"Database circuit breaker {state}")
+            if self.on_change:
+                self.on_change(state == self.OPEN)
+
+class DBHealth:
+    """Connection warm-up, a background latency probe and the circuit breaker."""
+
+    def __init__(self, client, min_pool_size: int, op_timeout: float = 2.0,
+                 probe_interval: float = 5.0, breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.min_pool_size = min_pool_size
+        self.op_timeout = op_timeout
+        self.probe_interval = probe_interval
+        self.breaker = breaker or CircuitBreaker()
+        self.latency: Optional[float] = None
+        # Set once MongoDB has answered; startup work that needs it waits on this
+        self.ready = asyncio.Event()
+        self.logger = get_logger()
+        self._probe_task: Optional[asyncio.Task] = None
+
+    async def ping(self) -> float:
+        start = time.perf_counter()
+        await asyncio.wait_for(self.client.admin.command('ping'), timeout=self.op_timeout)
+        return time.perf_counter() - start
+
+    async def warm_up(self) -> bool:
+        """Open ``min_pool_size`` connections up front; concurrent pings each check one out.
+
+        A slow or unreachable server does not stop startup: the breaker is
+        opened so callers fail fast, and the probe closes it (and sets
+        ``ready``) once MongoDB answers.
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(self.ping() for _ in range(max(1, self.min_pool_size))))
+        except UNHEALTHY_ERRORS as e:
+            self.logger.error(f"MongoDB warm-up failed, starting degraded: {str(e) or type(e).__name__}")
+            self.breaker.trip()
+            return False
+        self.logger.info(f"Warmed up {self.min_pool_size} MongoDB connections in {time.perf_counter() - start:.2f}s")
+        self.ready.set()
+        return True
+
+    async def probe(self):
+        """One health check; success closes the breaker even while it is open."""
+        try:
+            self.latency = await self.ping()
+            DB_PING_LATENCY.set(self.latency)
+            self.breaker.record_success()
+            self.ready.set()
+        except Exception as e:
+            self.latency = None
+            self.logger.error(f"Database health probe failed: {str(e) or type(e).__name__}")
+            self.breaker.record_failure()
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe()
+
+    def start(self):
+        self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def stop(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+
+    async def call(self, operation: Callable[..., Awaitable], *args, timeout: Optional[float] = None, **kwargs):
+        """Run ``operation(*args, **kwargs)`` through the breaker with a short timeout.
+
+        The operation is only started when the breaker allows it, so nothing
+        is sent to MongoDB while it is open.
+        """
+        if not self.breaker.allow():
+            DB_FAST_FAILS.inc()
+            raise DatabaseUnavailable("Database circuit breaker is open")
+        try:
+            result = await asyncio.wait_for(operation(*args, **kwargs), timeout=timeout or self.op_timeout)
+        except UNHEALTHY_ERRORS:
+            self.breaker.record_failure()
+            raise
+        except Exception:
+            # The server answered (e.g. a duplicate key), so it is healthy
+            self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
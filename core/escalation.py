@@ -0,0 +1,233 @@
+import asyncio
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from core.logger import get_logger
+
+VALID_STEP_ACTIONS = ("warn", "mute", "timeout", "kick", "ban")
+DEFAULT_HALF_LIFE_HOURS = 24
+MIN_HALF_LIFE_HOURS = 1
+
+class EscalationStep:
+    """One rung of an escalation ladder, parsed from ``action[:minutes]``."""
+    __slots__ = ('action', 'duration')
+
+    def __init__(self, action: str, duration: int = 0):
+        self.action = action
+        self.duration = duration
+
+    @classmethod
+    def parse(cls, raw: str) -> "EscalationStep":
+        action, _, minutes = raw.strip().lower().partition(":")
+        if action not in VALID_STEP_ACTIONS:
+            raise ValueError(f"Invalid step '{raw}'. Valid actions: {', '.join(VALID_STEP_ACTIONS)}")
+        return cls(action, int(minutes) if minutes else 0)
+
+    def __repr__(self):
+        return f"{self.action}:{self.duration}" if self.duration else self.action
+
+class GuildEscalation:
+    """Parsed escalation config for one guild."""
+    __slots__ = ('enabled', 'half_life', 'steps', 'loaded_at')
+
+    def __init__(self, enabled: bool, half_life: float, steps: Dict[str, List[EscalationStep]]):
+        self.enabled = enabled
+        self.half_life = half_life
+        self.steps = steps
+        self.loaded_at = time.monotonic()
+
+class EscalationEngine:
+    """Counts automod violations and resolves the next punishment step.
+
+    Counters are keyed by (guild, user, violation) and decay exponentially
+    with the guild's escalation timeout as half-life. Scores and timestamps
+    live in two flat ``array('d')`` columns addressed through a slot index,
+    so a counter costs a dict entry plus 16 bytes. Config and existing
+    counters are loaded once per guild; after that ``record`` is pure memory
+    work and dirty counters reach Mongo through periodic bulk upserts.
+    """
+
+    def __init__(self, db, flush_interval: float = 30.0, config_ttl: float = 600.0):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.config_ttl = config_ttl
+        self.logger = get_logger()
+        self.slots: Dict[Tuple[int, int, str], int] = {}
+        self.scores = array('d')
+        self.stamps = array('d')
+        self.free: List[int] = []
+        self.dirty: set = set()
+        self.configs: Dict[int, GuildEscalation] = {}
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+            self._flush_task = None
+        await self.flush()
+
+    def invalidate(self, guild_id: int):
+        """Drop cached config after the escalation settings changed."""
+        self.configs.pop(guild_id, None)
+
+    async def _load_guild(self, guild_id: int) -> GuildEscalation:
+        doc = await self.db.automod_settings.find_one(
+            {'_id': guild_id},
+            {'punishments.escalation': 1}
+        ) or {}
+        escalation = doc.get('punishments', {}).get('escalation', {})
+        steps = {}
+        for violation, raw_steps in escalation.get('steps', {}).items():
+            try:
+                steps[violation] = [EscalationStep.parse(raw) for raw in raw_steps]
+            except ValueError as e:
+                self.logger.error(f"Bad escalation steps for {guild_id}/{violation}: {str(e)}")
+        try:
+            hours = float(escalation.get('timeout', DEFAULT_HALF_LIFE_HOURS))
+        except (TypeError, ValueError):
+            hours = DEFAULT_HALF_LIFE_HOURS
+        # A zero or negative half-life cannot decay anything; older configs may still hold one
+        config = GuildEscalation(
+            escalation.get('enabled', True),
+            max(hours, MIN_HALF_LIFE_HOURS) * 3600,
+            steps
+        )
+
+        # Counters from before a restart, skipping ones that have decayed to nothing
+        horizon = time.time() - config.half_life * 10
+        async for counter in self.db.violation_counters.find(
+            {'guild_id': guild_id, 'updated_at': {'$gte': horizon}}
+        ):
+            key = (guild_id, counter['user_id'], counter['violation'])
+            if key not in self.slots:
+                slot = self._slot(key)
+                self.scores[slot] = counter['score']
+                self.stamps[slot] = counter['updated_at']
+        return config
+
+    async def config_for(self, guild_id: int) -> GuildEscalation:
+        """Cached guild config; concurrent misses share one load."""
+        config = self.configs.get(guild_id)
+        if config and time.monotonic() - config.loaded_at < self.config_ttl:
+            return config
+
+        pending = self._loading.get(guild_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load_guild(guild_id))
+            self._loading[guild_id] = pending
+            try:
+                self.configs[guild_id] = await pending
+            finally:
+                self._loading.pop(guild_id, None)
+        else:
+            await pending
+        return self.configs[guild_id]
+
+    def _slot(self, key: Tuple[int, int, str]) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            if self.free:
+                slot = self.free.pop()
+                self.scores[slot] = 0.0
+                self.stamps[slot] = 0.0
+            else:
+                slot = len(self.scores)
+                self.scores.append(0.0)
+                self.stamps.append(0.0)
+            self.slots[key] = slot
+        return slot
+
+    def bump(self, config: GuildEscalation, guild_id: int, user_id: int, violation: str,
+             now: Optional[float] = None) -> Optional[EscalationStep]:
+        """Record one violation and return the step it lands on. O(1)."""
+        now = time.time() if now is None else now
+        slot = self._slot((guild_id, user_id, violation))
+        elapsed = now - self.stamps[slot]
+        score = self.scores[slot] * 0.5 ** (elapsed / config.half_life) + 1.0
+        self.scores[slot] = score
+        self.stamps[slot] = now
+        self.dirty.add((guild_id, user_id, violation))
+
+        steps = config.steps.get(violation)
+        if not config.enabled or not steps:
+            return None
+        # Older violations still count while they weigh at least half
+        index = min(int(score + 0.5) - 1, len(steps) - 1)
+        return steps[index]
+
+    async def record(self, guild_id: int, user_id: int, violation: str) -> Optional[EscalationStep]:
+        """Record a violation; the only awaited work is a once-per-guild config load."""
+        config = self.configs.get(guild_id)
+        if config is None or time.monotonic() - config.loaded_at >= self.config_ttl:
+            config = await self.config_for(guild_id)
+        return self.bump(config, guild_id, user_id, violation)
+
+    def reset(self, guild_id: int, user_id: int, violation: Optional[str] = None):
+        """Forget counters for a user (all violations when ``violation`` is None)."""
+        keys = [k for k in self.slots if k[0] == guild_id and k[1] == user_id and (violation is None or k[2] == violation)]
+        for key in keys:
+            slot = self.slots[key]
+            self.scores[slot] = 0.0
+            self.stamps[slot] = time.time()
+            self.dirty.add(key)
+
+    async def flush(self) -> int:
+        """Upsert dirty counters in one bulk write and recycle decayed slots."""
+        if not self.dirty:
+            return 0
+        dirty, self.dirty = self.dirty, set()
+        operations = []
+        for key in dirty:
+            slot = self.slots.get(key)
+            if slot is None:
+                continue
+            guild_id, user_id, violation = key
+            operations.append(UpdateOne(
+                {'_id': f"{guild_id}:{user_id}:{violation}"},
+                {'$set': {
+                    'guild_id': guild_id,
+                    'user_id': user_id,
+                    'violation': violation,
+                    'score': self.scores[slot],
+                    'updated_at': self.stamps[slot]
+                }},
+                upsert=True
+            ))
+        try:
+            await self.db.violation_counters.bulk_write(operations, ordered=False)
+        except Exception as e:
+            self.dirty |= dirty  # Retry on the next flush
+            self.logger.error(f"Error flushing violation counters: {str(e)}")
+            return 0
+        self._compact()
+        return len(operations)
+
+    def _compact(self):
+        """Free slots whose score has decayed below a hundredth of a violation."""
+        now = time.time()
+        for key, slot in list(self.slots.items()):
+            if key in self.dirty:
+                continue
+            config = self.configs.get(key[0])
+            half_life = config.half_life if config else DEFAULT_HALF_LIFE_HOURS * 3600
+            if self.scores[slot] * 0.5 ** ((now - self.stamps[slot]) / half_life) < 0.01:
+                del self.slots[key]
+                self.free.append(slot)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                self.logger.error(f"Escalation flush loop error: {str(e)}")
+
+    def __len__(self):
+        return len(self.slots)
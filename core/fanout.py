@@ -0,0 +1,162 @@
+"""One message, many channels.
+
+``Broadcaster.broadcast`` renders the message once with discord.py's
+``handle_message_parameters`` and posts that same payload to every target
+through ``bot.http.send_message``, so an announcement to 5,000 channels
+serialises its embed once instead of 5,000 times.
+
+Targets are grouped by the rate-limit bucket discord.py would use for the
+request (route plus major parameter). Each bucket is sent in order by a
+single worker, so sends that share a bucket never race each other into a
+429, while different buckets go out concurrently on ``concurrency``
+workers. All workers share one pacer that keeps the process under
+``rate`` requests per second, below Discord's global limit.
+
+Server errors and rate limits that discord.py gives up on are retried up to
+``retries`` times with exponential backoff. Missing channels and permissions
+fail at once. Delivery latency, from the start of the broadcast to each
+successful send, is recorded in a histogram and summarised as percentiles
+in the returned stats.
+"""
+import asyncio
+import math
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import discord
+from discord.http import Route, handle_message_parameters
+from prometheus_client import Counter, Histogram
+from core.logger import get_logger
+
+BROADCAST_LATENCY = Histogram(
+    'bot_broadcast_delivery_seconds', 'Time from the start of a broadcast to each delivered message', ['kind'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+BROADCAST_MESSAGES = Counter('bot_broadcast_messages_total', 'Broadcast messages by outcome', ['kind', 'outcome'])
+
+class BroadcastStats(NamedTuple):
+    targets: int = 0
+    sent: int = 0
+    failed: int = 0
+    retried: int = 0
+    p50: float = 0.0
+    p95: float = 0.0
+    p99: float = 0.0
+    elapsed: float = 0.0
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(q * len(ordered)))) - 1]
+
+def bucket_key(channel_id: int) -> str:
+    route = Route('POST', '/channels/{channel_id}/messages', channel_id=channel_id)
+    return f"{route.key}:{route.major_parameters}"
+
+class Pacer:
+    """Spaces calls ``1 / rate`` seconds apart across every worker."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class Broadcaster:
+    """Sends one rendered message to many channels."""
+
+    def __init__(self, bot, concurrency: int = 50, rate: float = 40.0, retries: int = 3, backoff: float = 1.0):
+        self.bot = bot
+        self.concurrency = concurrency
+        self.pacer = Pacer(rate)
+        self.retries = retries
+        self.backoff = backoff
+        self.logger = get_logger()
+
+    async def _send(self, channel_id: int, params, kind: str, retries: int) -> Tuple[Optional[Exception], int]:
+        """Deliver to one channel; returns the final error (None once sent) and the retries used."""
+        attempt = 0
+        while True:
+            await self.pacer.wait()
+            try:
+                await self.bot.http.send_message(channel_id, params=params)
+                return None, attempt
+            except (discord.Forbidden, discord.NotFound) as e:
+                return e, attempt
+            except discord.HTTPException as e:
+                if (e.status != 429 and e.status < 500) or attempt >= retries:
+                    return e, attempt
+            except (OSError, asyncio.TimeoutError) as e:
+                if attempt >= retries:
+                    return e, attempt
+            attempt += 1
+            BROADCAST_MESSAGES.labels(kind, 'retried').inc()
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+
+    async def broadcast(self, channel_ids: Iterable[int], *, kind: str = 'announcement',
+                        retries: Optional[int] = None, content: Optional[str] = None,
+                        embed: Optional[discord.Embed] = None,
+                        allowed_mentions: Optional[discord.AllowedMentions] = None) -> BroadcastStats:
+        """Send ``content``/``embed`` to every channel in ``channel_ids``."""
+        retries = self.retries if retries is None else retries
+        buckets: Dict[str, List[int]] = defaultdict(list)
+        for channel_id in dict.fromkeys(channel_ids):
+            buckets[bucket_key(channel_id)].append(channel_id)
+        targets = sum(len(ids) for ids in buckets.values())
+        if not targets:
+            return BroadcastStats()
+
+        # Rendered once; only the JSON payload is reused, so nothing needs closing
+        params = handle_message_parameters(
+            content=content if content is not None else discord.utils.MISSING,
+            embed=embed if embed is not None else discord.utils.MISSING,
+            allowed_mentions=allowed_mentions,
+            previous_allowed_mentions=getattr(self.bot, 'allowed_mentions', None),
+        )
+        started = time.perf_counter()
+        latencies: List[float] = []
+        failed = retried = 0
+        queue: asyncio.Queue = asyncio.Queue()
+        for channel_ids_in_bucket in buckets.values():
+            queue.put_nowait(channel_ids_in_bucket)
+
+        async def worker():
+            nonlocal failed, retried
+            while not queue.empty():
+                for channel_id in queue.get_nowait():
+                    error, attempts = await self._send(channel_id, params, kind, retries)
+                    retried += attempts
+                    if error is not None:
+                        failed += 1
+                        BROADCAST_MESSAGES.labels(kind, 'failed').inc()
+                        self.logger.warning(f"Broadcast {kind} to {channel_id} failed: {str(error)}")
+                        continue
+                    latency = time.perf_counter() - started
+                    latencies.append(latency)
+                    BROADCAST_LATENCY.labels(kind).observe(latency)
+                    BROADCAST_MESSAGES.labels(kind, 'sent').inc()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(buckets)))))
+
+        latencies.sort()
+        stats = BroadcastStats(
+            targets=targets, sent=len(latencies), failed=failed, retried=retried,
+            p50=percentile(latencies, 0.50), p95=percentile(latencies, 0.95), p99=percentile(latencies, 0.99),
+            elapsed=time.perf_counter() - started,
+        )
+        self.logger.info(
+            f"Broadcast {kind}: {stats.sent}/{stats.targets} delivered, {stats.failed} failed, "
+            f"{stats.retried} retries, p50 {stats.p50:.2f}s p95 {stats.p95:.2f}s p99 {stats.p99:.2f}s"
+        )
+        return stats
@@ -0,0 +1,185 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+
+from core.logger import get_logger
+
+# Collections whose documents mean "this guild configured the feature", and
+# the field holding the guild ID in each.
+TRACKED_COLLECTIONS: Dict[str, str] = {
+    'guild_settings': '_id',
+    'automod_settings': '_id',
+    'welcome_settings': '_id',
+    'autorole': 'guild_id',
+    'autoresponder': 'guild_id',
+}
+
+WriteListener = Callable[[int], None]
+
+class ConfiguredGuilds:
+    """Per-collection sets of guild IDs that have at least one document.
+
+    Loaded at startup with covered ``_id``/``guild_id`` scans and kept
+    current by ``TrackedCollection`` on every write through this instance,
+    so hot paths can skip the database entirely for guilds that never
+    configured a feature. Writes made elsewhere (another shard's bot,
+    another process, the mongo shell) are not seen until the next reload,
+    which ``refresh_forever`` runs every ``refresh`` seconds: a miss can be
+    up to that old. The sets may also hold IDs whose documents were since
+    deleted; a hit only means "go and look".
+    """
+
+    def __init__(self, collections: Optional[Dict[str, str]] = None, refresh: float = 300.0):
+        self.collections = collections or TRACKED_COLLECTIONS
+        self.refresh = refresh
+        self.guilds: Dict[str, Set[int]] = {name: set() for name in self.collections}
+        self.listeners: Dict[str, List[WriteListener]] = {name: [] for name in self.collections}
+        self.loaded = False
+        # Guilds marked while a reload is scanning; the scan may have missed them
+        self._marked: Optional[Dict[str, Set[int]]] = None
+        self.logger = get_logger()
+
+    async def _load_collection(self, db, name: str) -> Set[int]:
+        field = self.collections[name]
+        projection = {field: 1} if field == '_id' else {field: 1, '_id': 0}
+        return {doc[field] async for doc in db[name].find({}, projection) if field in doc}
+
+    async def load(self, db):
+        """(Re)build every set; until this succeeds every lookup answers True."""
+        names = list(self.collections)
+        self._marked = {name: set() for name in names}
+        try:
+            results = await asyncio.gather(*(self._load_collection(db, name) for name in names))
+            for name, ids in zip(names, results):
+                self.guilds[name] = ids | self._marked[name]
+        finally:
+            self._marked = None
+        self.loaded = True
+        self.logger.info("Configured guilds: " + ", ".join(f"{n}={len(self.guilds[n])}" for n in names))
+
+    async def refresh_forever(self, db):
+        """Reload every ``refresh`` seconds; a failed reload keeps the previous sets."""
+        while True:
+            await asyncio.sleep(self.refresh)
+            try:
+                await self.load(db)
+            except Exception as e:
+                self.logger.error(f"Failed to refresh configured guilds: {str(e)}")
+
+    def might_have(self, collection: str, guild_id: int) -> bool:
+        """False when ``collection`` held nothing for the guild at the last reload and nothing was written here since."""
+        if not self.loaded or collection not in self.guilds:
+            return True
+        return guild_id in self.guilds[collection]
+
+    def subscribe(self, collection: str, listener: WriteListener):
+        """Call ``listener(guild_id)`` after every tracked write to ``collection``."""
+        self.listeners[collection].append(listener)
+
+    def mark(self, collection: str, guild_id: Any):
+        if isinstance(guild_id, int):
+            self.guilds[collection].add(guild_id)
+            if self._marked is not None:
+                self._marked[collection].add(guild_id)
+
+    def unmark(self, collection: str, guild_id: Any):
+        if isinstance(guild_id, int):
+            self.guilds[collection].discard(guild_id)
+
+    def notify(self, collection: str, guild_id: Any):
+        if not isinstance(guild_id, int):
+            return
+        for listener in self.listeners[collection]:
+            try:
+                listener(guild_id)
+            except Exception as e:
+                self.logger.error(f"Write listener for {collection} failed: {str(e)}")
+
+class TrackedCollection:
+    """Collection proxy that keeps ``ConfiguredGuilds`` in step with writes.
+
+    Guilds are marked before an upsert or insert is sent, so a reader never
+    sees a document its set does not know about. Everything else is passed
+    straight through to the motor collection.
+    """
+
+    def __init__(self, collection, name: str, configured: ConfiguredGuilds):
+        self._collection = collection
+        self._name = name
+        self._field = configured.collections[name]
+        self._configured = configured
+
+    def __getattr__(self, attr):
+        return getattr(self._collection, attr)
+
+    def _key(self, doc: Dict[str, Any]) -> Any:
+        return doc.get(self._field) if isinstance(doc, dict) else None
+
+    async def _write(self, method: str, key: Any, creates: bool, *args, **kwargs):
+        if creates:
+            self._configured.mark(self._name, key)
+        result = await getattr(self._collection, method)(*args, **kwargs)
+        self._configured.notify(self._name, key)
+        return result
+
+    async def insert_one(self, document, *args, **kwargs):
+        return await self._write('insert_one', self._key(document), True, document, *args, **kwargs)
+
+    async def update_one(self, filter, update, *args, upsert=False, **kwargs):
+        return await self._write('update_one', self._key(filter), upsert, filter, update, *args, upsert=upsert, **kwargs)
+
+    async def update_many(self, filter, update, *args, upsert=False, **kwargs):
+        return await self._write('update_many', self._key(filter), upsert, filter, update, *args, upsert=upsert, **kwargs)
+
+    async def replace_one(self, filter, replacement, *args, upsert=False, **kwargs):
+        key = self._key(filter) or self._key(replacement)
+        return await self._write('replace_one', key, upsert, filter, replacement, *args, upsert=upsert, **kwargs)
+
+    async def find_one_and_update(self, filter, update, *args, upsert=False, **kwargs):
+        return await self._write('find_one_and_update', self._key(filter), upsert, filter, update, *args, upsert=upsert, **kwargs)
+
+    async def delete_one(self, filter, *args, **kwargs):
+        result = await self._write('delete_one', self._key(filter), False, filter, *args, **kwargs)
+        # Only a delete by the whole key proves the guild has nothing left
+        if self._field == '_id' and result.deleted_count and set(filter) == {'_id'}:
+            self._configured.unmark(self._name, filter['_id'])
+        return result
+
+    async def delete_many(self, filter, *args, **kwargs):
+        result = await self._write('delete_many', self._key(filter), False, filter, *args, **kwargs)
+        if set(filter) == {self._field}:
+            self._configured.unmark(self._name, filter[self._field])
+        return result
+
+    def _op_key(self, op) -> Tuple[Any, bool]:
+        """The guild a bulk operation writes to, and whether it may create a document."""
+        if isinstance(op, InsertOne):
+            return self._key(op._doc), True
+        filter = getattr(op, '_filter', None)
+        return self._key(filter) or self._key(getattr(op, '_doc', None)), bool(getattr(op, '_upsert', False))
+
+    async def bulk_write(self, requests, *args, **kwargs):
+        """Guilds are notified for every operation that was applied, even when others failed.
+
+        Deletes never unmark here: the result does not say which of them
+        matched a document.
+        """
+        requests = list(requests)
+        keys = []
+        for op in requests:
+            key, creates = self._op_key(op)
+            if creates:
+                self._configured.mark(self._name, key)
+            keys.append(key)
+        try:
+            result = await self._collection.bulk_write(requests, *args, **kwargs)
+        except BulkWriteError as e:
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            for key in dict.fromkeys(k for i, k in enumerate(keys) if i not in failed):
+                self._configured.notify(self._name, key)
+            raise
+        for key in dict.fromkeys(keys):
+            self._configured.notify(self._name, key)
+        return result
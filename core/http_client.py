@@ -0,0 +1,110 @@
+"""The process-wide outgoing HTTP client.
+
+Every outgoing request (YouTube feeds, the WebSub hub, Top.gg stats, the
+error-log webhook) goes through one ``aiohttp.ClientSession`` owned by the
+launcher and handed to every shard's bot as ``bot.http_client``. A session per request throws away its
+connection pool, DNS cache and TLS sessions every time. A shared session
+keeps connections alive between calls and caps how many it opens in total
+and per host.
+
+DNS answers are cached for ``dns_ttl`` seconds and resolved with aiodns
+when it is installed. Every request is timed by a trace hook into
+``bot_http_request_seconds`` (by host, method and status), and failures are
+counted in ``bot_http_errors_total``. ``close`` drains the pool on shutdown;
+only the owner (the launcher, or a bot that built its own) calls it.
+"""
+import time
+from types import SimpleNamespace
+from typing import Optional
+
+import aiohttp
+from prometheus_client import Counter, Histogram
+from core.config import Config
+from core.logger import get_logger
+
+try:
+    import aiodns  # noqa: F401  (AsyncResolver needs it)
+    from aiohttp.resolver import AsyncResolver
+except ImportError:
+    AsyncResolver = None
+
+HTTP_LATENCY = Histogram('bot_http_request_seconds', 'Outgoing HTTP request latency', ['host', 'method', 'status'])
+HTTP_ERRORS = Counter('bot_http_errors_total', 'Outgoing HTTP requests that raised', ['host', 'method', 'error'])
+
+USER_AGENT = "SB-Moderation (https://github.com/TheSBGames/SB-Moderation)"
+
+async def _on_request_start(session, context: SimpleNamespace, params):
+    context.started = time.perf_counter()
+
+async def _on_request_end(session, context: SimpleNamespace, params):
+    HTTP_LATENCY.labels(params.url.host or "", params.method, str(params.response.status)).observe(
+        time.perf_counter() - context.started
+    )
+
+async def _on_request_exception(session, context: SimpleNamespace, params):
+    HTTP_ERRORS.labels(params.url.host or "", params.method, type(params.exception).__name__).inc()
+
+def _trace_config() -> aiohttp.TraceConfig:
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(_on_request_start)
+    trace.on_request_end.append(_on_request_end)
+    trace.on_request_exception.append(_on_request_exception)
+    return trace
+
+class HTTPService:
+    """Owns the shared session; it is created on first use inside the running loop."""
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10, dns_ttl: int = 300,
+                 keepalive: float = 30.0, timeout: float = 15.0, user_agent: str = USER_AGENT):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_ttl = dns_ttl
+        self.keepalive = keepalive
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.user_agent = user_agent
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.logger = get_logger()
+
+    @classmethod
+    def from_config(cls) -> 'HTTPService':
+        return cls(
+            limit=Config.HTTP_POOL_LIMIT,
+            limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+            dns_ttl=Config.HTTP_DNS_TTL,
+            timeout=Config.HTTP_TIMEOUT
+        )
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.dns_ttl,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive,
+                resolver=AsyncResolver() if AsyncResolver is not None else None,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self.timeout,
+                headers={'User-Agent': self.user_agent},
+                trace_configs=[_trace_config()],
+            )
+        return self._session
+
+    def request(self, method: str, url: str, **kwargs):
+        """``session.request``; use as ``async with http.request(...) as response``."""
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.session.post(url, **kwargs)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            self.logger.info("HTTP client closed")
+        self._session = None
@@ -0,0 +1,133 @@
+"""Index advisor: find queries that scan collections or sort in memory.
+
+Runs workloads against a scratch database on a local ``mongod`` with the
+profiler on, then reports every profiled operation whose plan used a
+COLLSCAN or a blocking SORT stage, with the query that caused it.
+
+    python -m core.index_advisor
+    python -m core.index_advisor --uri mongodb://localhost:27017/sbmod_advisor
+
+Two workloads run. The engine workloads in ``core.index_workloads`` drive
+the bot's real query code, so they catch queries that have no index. The
+registry replay runs each ``core.indexes`` sample query, which checks that
+the declared indexes are usable. The database is dropped before and after
+the run, so the tool refuses names that do not look like scratch databases.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from core.database import Database
+from core.index_workloads import WORKLOADS, make_bot
+from core.indexes import INDEXES, ensure_indexes
+
+DEFAULT_URI = "mongodb://localhost:27017/sbmod_index_advisor"
+SCRATCH_MARKERS = ("advisor", "test", "scratch")
+
+async def replay_registry(db):
+    """Run every registered access pattern once."""
+    for spec in INDEXES:
+        cursor = db[spec.collection].find(spec.query)
+        if spec.sort:
+            cursor = cursor.sort(spec.sort)
+        await cursor.limit(10).to_list(length=10)
+
+async def run_workloads(uri: str) -> int:
+    """Drive every engine workload; returns how many failed to run."""
+    database = Database(uri)
+    bot = make_bot(database)
+    failed = 0
+    try:
+        for workload in WORKLOADS:
+            try:
+                await workload(bot)
+            except Exception as e:
+                failed += 1
+                print(f"Workload {workload.__name__} failed: {str(e)}", file=sys.stderr)
+    finally:
+        database.client.close()
+    return failed
+
+async def offending_operations(db) -> List[Dict[str, Any]]:
+    """Profiled operations that scanned a collection or sorted in memory."""
+    query = {
+        'ns': {'$regex': f'^{db.name}\\.(?!system\\.)'},
+        '$or': [{'planSummary': {'$regex': 'COLLSCAN'}}, {'hasSortStage': True}]
+    }
+    return await db.system.profile.find(query).sort('ts', 1).to_list(length=None)
+
+def describe(op: Dict[str, Any]) -> Dict[str, Any]:
+    command = op.get('command', {})
+    problems = []
+    if 'COLLSCAN' in op.get('planSummary', ''):
+        problems.append('COLLSCAN')
+    if op.get('hasSortStage'):
+        problems.append('in-memory SORT')
+    return {
+        'collection': op['ns'].split('.', 1)[1],
+        'op': op.get('op'),
+        'problems': problems,
+        'filter': command.get('filter', command.get('q', command.get('query'))),
+        'sort': command.get('sort'),
+        'plan': op.get('planSummary'),
+        'docs_examined': op.get('docsExamined'),
+        'millis': op.get('millis')
+    }
+
+def print_report(findings: List[Dict[str, Any]]):
+    if not findings:
+        print("No collection scans or in-memory sorts found.")
+        return
+
+    # One line per distinct query shape
+    seen = set()
+    for finding in findings:
+        shape = (finding['collection'], finding['op'], repr(sorted((finding['filter'] or {}).keys())),
+                 repr(finding['sort']), tuple(finding['problems']))
+        if shape in seen:
+            continue
+        seen.add(shape)
+        print(f"[{', '.join(finding['problems'])}] {finding['collection']} {finding['op']}")
+        print(f"    filter: {finding['filter']}")
+        if finding['sort']:
+            print(f"    sort:   {finding['sort']}")
+        print(f"    plan:   {finding['plan']} (examined {finding['docs_examined']}, {finding['millis']} ms)")
+    print(f"\n{len(seen)} query shape(s) need an index in core/indexes.py")
+
+async def advise(uri: str) -> int:
+    client = AsyncIOMotorClient(uri)
+    db = client.get_default_database()
+    try:
+        await client.drop_database(db.name)
+        # Make sure every registered collection exists so plans are real
+        for name in {spec.collection for spec in INDEXES}:
+            await db[name].insert_one({'_advisor_seed': True})
+        await ensure_indexes(db)
+        await db.command('profile', 2)
+
+        failed = await run_workloads(uri)
+        await replay_registry(db)
+
+        await db.command('profile', 0)
+        findings = [describe(op) for op in await offending_operations(db)]
+        print_report(findings)
+        return 1 if findings or failed else 0
+    finally:
+        await client.drop_database(db.name)
+        client.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Report queries that miss the index registry.")
+    parser.add_argument("--uri", default=DEFAULT_URI, help="Scratch database URI (dropped before and after)")
+    args = parser.parse_args()
+
+    name = args.uri.rsplit('/', 1)[-1].split('?', 1)[0]
+    if not any(marker in name for marker in SCRATCH_MARKERS):
+        parser.error(f"Refusing to drop '{name}': use a database name containing one of {SCRATCH_MARKERS}")
+
+    sys.exit(asyncio.run(advise(args.uri)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Workloads the index advisor runs against its scratch database.
+
+Each workload drives the real engine code the bot runs, through the same
+``Database`` wrapper the bot uses, after seeding a few documents. The
+profiler therefore sees the queries those classes actually send, including
+ones nobody added to ``core.indexes``. The registry's own sample queries
+only check that each declared index is usable.
+
+Queries written inline in cog commands are not driven here. The registry
+describes them, and a new engine belongs in ``WORKLOADS``.
+"""
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Awaitable, Callable, List
+
+from core.cases import CaseStore
+from core.database import Database
+from core.escalation import EscalationEngine
+from core.modmail_router import ModMailRouter
+from core.scheduler import Scheduler
+from core.snapshots import write_snapshot
+from core.templates import ConfigTemplates
+from core.tickets import TicketPipeline
+from core.websub import WebSubReceiver
+from core.youtube import FeedPoller
+
+GUILD_ID = 1
+USER_ID = 2
+CHANNEL_ID = 3
+YT_CHANNEL = "UC" + "x" * 22
+
+def make_bot(database: Database) -> SimpleNamespace:
+    """The parts of ``Bot`` the engines touch, over a real ``Database``."""
+    async def get_settings(feature, guild_id):
+        # Same query as Bot.get_settings, without its cache
+        doc = await database.get_collection(feature.collection).find_one({'_id': guild_id}, feature.projection)
+        return feature.from_doc(doc) if doc else feature()
+
+    return SimpleNamespace(db=database, get_settings=get_settings)
+
+async def cases(bot):
+    store = CaseStore(bot.db)
+    for action in ("warn", "timeout", "warn"):
+        await store.create(GUILD_ID, USER_ID, 0, action, "advisor")
+    await store.get(GUILD_ID, 1)
+    page, cursor = await store.history(GUILD_ID, USER_ID, limit=2)
+    await store.history(GUILD_ID, USER_ID, after=cursor, limit=2)
+    await store.history(GUILD_ID, USER_ID, action="warn")
+
+async def scheduler(bot):
+    jobs = Scheduler(bot.db)
+    await jobs.schedule('advisor', datetime.utcnow(), {}, key='advisor:1')
+    await jobs.claim()
+    await jobs.cancel('advisor:1')
+
+async def escalation(bot):
+    engine = EscalationEngine(bot.db)
+    await engine.record(GUILD_ID, USER_ID, 'spam')
+    await engine.flush()
+    # A second load reads the flushed counters back, as after a restart
+    engine.invalidate(GUILD_ID)
+    await engine.config_for(GUILD_ID)
+
+async def tickets(bot):
+    pipeline = TicketPipeline(bot, spacing=0)
+
+    async def create_channel(guild, user, number, category):
+        return SimpleNamespace(id=CHANNEL_ID)
+
+    # Everything but the Discord call runs as in the bot
+    pipeline.create_channel = create_channel
+    guild, user = SimpleNamespace(id=GUILD_ID), SimpleNamespace(id=USER_ID)
+    await pipeline.open(guild, user, interaction_id=1)
+    await pipeline.open(guild, user, interaction_id=2)
+    await pipeline.open_tickets(GUILD_ID)
+    await pipeline.close(GUILD_ID, CHANNEL_ID, USER_ID)
+
+async def modmail(bot):
+    router = ModMailRouter(bot)
+    await router.start()
+    router.enabled.add(GUILD_ID)
+    await router.member_joined(GUILD_ID, USER_ID)
+    await router.find_mutual(USER_ID, [GUILD_ID])
+    await bot.db.modmail_members.delete_many({'guild_id': GUILD_ID, 'seen_at': {'$lt': datetime.utcnow()}})
+
+async def templates(bot):
+    store = ConfigTemplates(bot)
+    await store.names()
+    await store.get('advisor')
+
+async def youtube(bot):
+    await bot.db.yt_subscriptions.update_one(
+        {'_id': GUILD_ID},
+        {'$push': {'feeds': {'channel_id': YT_CHANNEL, 'webhook_channel': CHANNEL_ID,
+                             'last': datetime.utcnow().isoformat()}}},
+        upsert=True
+    )
+
+    async def notify(video, channel_ids):
+        pass
+
+    poller = FeedPoller(bot.db, None, notify)
+    await poller.subscribers([YT_CHANNEL])
+    await poller.subscribers()
+    # YTNotifier's loop lists every followed channel before syncing WebSub leases
+    await bot.db.yt_subscriptions.distinct('feeds.channel_id')
+
+    receiver = WebSubReceiver(bot.db, poller, Scheduler(bot.db), "", "")
+    await bot.db.yt_websub.update_one(
+        {'_id': YT_CHANNEL},
+        {'$set': {'state': 'active', 'expires_at': datetime.utcnow() + timedelta(days=1)}},
+        upsert=True
+    )
+    await receiver.active()
+
+async def snapshots(bot):
+    spool, _ = await write_snapshot(bot.db, GUILD_ID)
+    spool.close()
+
+async def database(bot):
+    await bot.db.get_guild_settings(GUILD_ID)
+    await bot.db.get_user_data(GUILD_ID, USER_ID)
+    await bot.db.bulk_get_users(GUILD_ID, [USER_ID, USER_ID + 1])
+
+WORKLOADS: List[Callable[[SimpleNamespace], Awaitable[None]]] = [
+    cases, scheduler, escalation, tickets, modmail, templates, youtube, snapshots, database,
+]
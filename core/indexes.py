@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+class IndexSpec:
+    """One index and the query shape it exists for.
+
+    ``query`` and ``sort`` are a sample of the access pattern with dummy
+    values; the index advisor replays them against a profiled ``mongod`` to
+    check the planner actually uses the index.
+    """
+    __slots__ = ('collection', 'keys', 'query', 'sort', 'options')
+
+    def __init__(self, collection: str, keys: List[Tuple[str, int]], query: Dict[str, Any],
+                 sort: Optional[List[Tuple[str, int]]] = None, **options):
+        self.collection = collection
+        self.keys = keys
+        self.query = query
+        self.sort = sort
+        self.options = options
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def model(self) -> IndexModel:
+        return IndexModel(self.keys, name=self.name, **self.options)
+
+def member_key(guild_id: int, user_id: int) -> Dict[str, int]:
+    """Compound ``_id`` of a per-guild member document; field order matters to MongoDB."""
+    return {'g': guild_id, 'u': user_id}
+
+# Every secondary index the bot needs, grouped by collection. Add an entry
+# here next to the query that needs it instead of creating indexes in cogs.
+INDEXES: List[IndexSpec] = [
+    # Per-guild member documents (users, levels, user_levels) are keyed by
+    # member_key(); point reads, upserts and bulk $in lookups use the _id index.
+    IndexSpec("users", [("guild_id", ASCENDING), ("xp", DESCENDING)],
+              {"guild_id": 1}, sort=[("xp", DESCENDING)]),
+
+    # Leveling per-guild leaderboards
+    IndexSpec("user_levels", [("guild_id", ASCENDING), ("xp", DESCENDING)],
+              {"guild_id": 1}, sort=[("xp", DESCENDING)]),
+    IndexSpec("user_levels", [("guild_id", ASCENDING), ("messages", DESCENDING)],
+              {"guild_id": 1}, sort=[("messages", DESCENDING)]),
+    IndexSpec("levels", [("guild_id", ASCENDING), ("xp", DESCENDING)],
+              {"guild_id": 1}, sort=[("xp", DESCENDING)]),
+    IndexSpec("level_rewards", [("guild_id", ASCENDING), ("level", ASCENDING)],
+              {"guild_id": 1, "level": {"$lte": 10}}),
+    IndexSpec("level_roles", [("guild_id", ASCENDING), ("level", ASCENDING)],
+              {"guild_id": 1, "level": {"$lte": 10}}),
+    IndexSpec("xp_multipliers", [("guild_id", ASCENDING), ("type", ASCENDING)],
+              {"guild_id": 1, "type": "channel"}),
+
+    # ModMailRouter.start loads open threads
+    IndexSpec("modmail_threads", [("status", ASCENDING)], {"status": "open"},
+              partialFilterExpression={"status": "open"}),
+    # ModMailRouter.find_mutual, and the sweep after a member sync
+    IndexSpec("modmail_members", [("user_id", ASCENDING), ("guild_id", ASCENDING)],
+              {"user_id": 2, "guild_id": {"$in": [1]}}),
+    IndexSpec("modmail_members", [("guild_id", ASCENDING), ("seen_at", ASCENDING)],
+              {"guild_id": 1, "seen_at": {"$lt": 0}}),
+
+    # Tickets
+    IndexSpec("tickets", [("guild_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+              {"guild_id": 1, "status": "open"}, sort=[("created_at", DESCENDING)]),
+    IndexSpec("tickets", [("guild_id", ASCENDING), ("user_id", ASCENDING), ("status", ASCENDING)],
+              {"guild_id": 1, "user_id": 2, "status": "open"}),
+    IndexSpec("ticket_panels", [("guild_id", ASCENDING), ("_id", ASCENDING)],
+              {"guild_id": 1, "_id": "panel"}),
+
+    # AutoMod
+    IndexSpec("automod_logs", [("guild_id", ASCENDING), ("timestamp", DESCENDING)],
+              {"guild_id": 1}, sort=[("timestamp", DESCENDING)]),
+    IndexSpec("automod_logs", [("guild_id", ASCENDING), ("user_id", ASCENDING), ("timestamp", DESCENDING)],
+              {"guild_id": 1, "user_id": 2}, sort=[("timestamp", DESCENDING)]),
+    IndexSpec("warnings", [("guild_id", ASCENDING), ("user_id", ASCENDING)],
+              {"guild_id": 1, "user_id": 2}),
+    IndexSpec("autoresponder", [("guild_id", ASCENDING), ("_id", ASCENDING)],
+              {"guild_id": 1}),
+    IndexSpec("violation_counters", [("guild_id", ASCENDING), ("updated_at", ASCENDING)],
+              {"guild_id": 1, "updated_at": {"$gte": 0}}),
+
+    # Moderation cases (core.cases.CaseStore)
+    IndexSpec("cases", [("guild_id", ASCENDING), ("case_no", ASCENDING)],
+              {"guild_id": 1, "case_no": 5}, unique=True),
+    IndexSpec("cases", [("guild_id", ASCENDING), ("target_id", ASCENDING),
+                        ("created_at", DESCENDING), ("case_no", DESCENDING)],
+              {"guild_id": 1, "target_id": 2},
+              sort=[("created_at", DESCENDING), ("case_no", DESCENDING)]),
+
+    # Timers (core.scheduler.Scheduler)
+    IndexSpec("scheduled_jobs", [("due_at", ASCENDING), ("lease_until", ASCENDING)],
+              {"due_at": {"$lte": 0}, "$or": [{"lease_until": None}, {"lease_until": {"$lt": 0}}]},
+              sort=[("due_at", ASCENDING)]),
+    IndexSpec("scheduled_jobs", [("claim", ASCENDING)], {"claim": "token"}, sparse=True),
+
+    # YouTube notifier: WebSub pushes look up a channel's followers, and the
+    # poll loop lists every followed channel (core.youtube, core.websub)
+    IndexSpec("yt_subscriptions", [("feeds.channel_id", ASCENDING)],
+              {"feeds.channel_id": {"$in": ["UC"]}}),
+    IndexSpec("yt_websub", [("state", ASCENDING), ("expires_at", ASCENDING)],
+              {"state": "active", "expires_at": {"$gt": 0}}),
+
+    # Admin features
+    IndexSpec("autorole", [("guild_id", ASCENDING)], {"guild_id": 1}),
+    IndexSpec("playlists", [("guild_id", ASCENDING), ("name", ASCENDING)],
+              {"guild_id": 1, "name": "playlist"}),
+    IndexSpec("noprefix_users", [("expires_at", ASCENDING)],
+              {"expires_at": {"$ne": None}}),
+    IndexSpec("noprefix_audit", [("timestamp", DESCENDING)], {}, sort=[("timestamp", DESCENDING)]),
+]
+
+def indexes_for(collection: str, registry: Iterable[IndexSpec] = INDEXES) -> List[IndexSpec]:
+    return [spec for spec in registry if spec.collection == collection]
+
+async def ensure_indexes(db, collections: Optional[Iterable[str]] = None,
+                         registry: Iterable[IndexSpec] = INDEXES) -> Dict[str, List[str]]:
+    """Create registry indexes, one ``createIndexes`` call per collection, run concurrently."""
+    wanted = set(collections) if collections is not None else None
+    grouped: Dict[str, List[IndexSpec]] = {}
+    for spec in registry:
+        if wanted is None or spec.collection in wanted:
+            grouped.setdefault(spec.collection, []).append(spec)
+
+    names = list(grouped)
+    results = await asyncio.gather(
+        *(getattr(db, name).create_indexes([spec.model() for spec in grouped[name]]) for name in names)
+    )
+    return dict(zip(names, results))
@@ -4,6 +4,7 @@ import json
 import asyncio
 from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
 import discord
+from discord.ext import commands
 from datetime import datetime
 import traceback
 from typing import Dict, Any, List
@@ -22,9 +23,16 @@ class DiscordWebhookHandler(logging.Handler):
         self.lock = asyncio.Lock()
         self.flush_task = None
         self.session = None
+        self.http = None
+
+    def use(self, http):
+        """Send through the process's shared HTTP client from now on."""
+        self.http = http
 
     async def ensure_session(self):
         """Ensure aiohttp session exists."""
+        if self.http is not None:
+            return self.http.session
         if self.session is None or self.session.closed:
             self.session = aiohttp.ClientSession()
         return self.session
@@ -95,11 +103,13 @@ class DiscordWebhookHandler(logging.Handler):
                             'timestamp': datetime.utcnow().isoformat()
                         }
                         
-                        await session.post(
+                        response = await session.post(
                             self.webhook_url,
                             json={'embeds': [embed]},
                             timeout=aiohttp.ClientTimeout(total=10)
                         )
+                        # Hand the connection back to the (possibly shared) pool
+                        response.release()
                         await asyncio.sleep(1)  # Rate limit protection
                         
                 self.queue.clear()
@@ -361,6 +371,12 @@ def get_logger():
     """Get the global logger instance."""
     return logger.get_logger()
 
+def use_http_client(http):
+    """Send webhook log records through ``http`` (the process's shared HTTPService)."""
+    for handler in logger.get_logger().handlers:
+        if isinstance(handler, DiscordWebhookHandler):
+            handler.use(http)
+
 # Enhanced convenience functions
 def log_command(ctx: discord.ext.commands.Context, command_name: str, **kwargs):
     """Log command usage with enhanced context."""
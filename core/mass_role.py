@@ -0,0 +1,239 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+from core.logger import get_logger
+
+# Members fetched per checkpoint; also the most we ever hold in memory at once
+PAGE_SIZE = 1000
+
+class ConditionError(ValueError):
+    """Raised when a mass-role condition cannot be parsed."""
+
+def _parse_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ConditionError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+def _parse_int(value: str) -> int:
+    try:
+        return int(value)
+    except ValueError:
+        raise ConditionError(f"Invalid number '{value}'")
+
+class MemberCondition:
+    """A member filter compiled once from a condition string.
+
+    Terms are space separated and all must match, for example
+    ``joined_before:2024-01-01 has_role:1234 min_age:30 type:human``.
+    Each term compiles to a small predicate so evaluating a member is a
+    handful of attribute reads, with no parsing per member.
+    """
+    KEYS = ("joined_before", "joined_after", "has_role", "lacks_role", "min_age", "max_age", "type")
+
+    def __init__(self, source: str, predicates: List[Callable[[Any, datetime], bool]]):
+        self.source = source
+        self.predicates = predicates
+
+    @classmethod
+    def compile(cls, source: str) -> "MemberCondition":
+        predicates = []
+        for term in (source or "").split():
+            key, sep, value = term.partition(":")
+            if not sep or key not in cls.KEYS:
+                raise ConditionError(f"Unknown condition '{term}'. Valid keys: {', '.join(cls.KEYS)}")
+
+            if key == "joined_before":
+                cutoff = _parse_date(value)
+                predicates.append(lambda m, now, c=cutoff: m.joined_at is not None and m.joined_at < c)
+            elif key == "joined_after":
+                cutoff = _parse_date(value)
+                predicates.append(lambda m, now, c=cutoff: m.joined_at is not None and m.joined_at >= c)
+            elif key == "has_role":
+                role_id = _parse_int(value)
+                predicates.append(lambda m, now, r=role_id: m.get_role(r) is not None)
+            elif key == "lacks_role":
+                role_id = _parse_int(value)
+                predicates.append(lambda m, now, r=role_id: m.get_role(r) is None)
+            elif key == "min_age":
+                days = _parse_int(value)
+                predicates.append(lambda m, now, d=days: (now - m.created_at).days >= d)
+            elif key == "max_age":
+                days = _parse_int(value)
+                predicates.append(lambda m, now, d=days: (now - m.created_at).days <= d)
+            elif key == "type":
+                if value not in ("bot", "human"):
+                    raise ConditionError("type must be 'bot' or 'human'")
+                wants_bot = value == "bot"
+                predicates.append(lambda m, now, b=wants_bot: m.bot is b)
+
+        return cls(source or "", predicates)
+
+    def __call__(self, member, now: datetime) -> bool:
+        for predicate in self.predicates:
+            if not predicate(member, now):
+                return False
+        return True
+
+class MassRoleJob:
+    """Streams a guild's members and adds or removes a role on matches.
+
+    Members are fetched page by page through ``guild.fetch_members`` so memory
+    stays flat on 250k+ member guilds. Each page is applied by a small worker
+    pool, then the last member ID is checkpointed to ``mass_role_jobs`` so an
+    interrupted job resumes where it stopped.
+    """
+
+    def __init__(self, bot, guild: discord.Guild, role: discord.Role, action: str,
+                 condition: MemberCondition, workers: int = 4,
+                 progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                 progress_interval: float = 10.0):
+        self.bot = bot
+        self.guild = guild
+        self.role = role
+        self.action = action
+        self.condition = condition
+        self.workers = workers
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.logger = get_logger()
+        self.job_id = f"{guild.id}:{role.id}:{action}"
+        self.state: Dict[str, Any] = {
+            'scanned': 0, 'matched': 0, 'applied': 0, 'failed': 0,
+            'last_member_id': None, 'status': 'running'
+        }
+        self.cancelled = False
+        self._last_progress = 0.0
+
+    async def load_checkpoint(self) -> bool:
+        """Restore counters from an unfinished job with the same condition."""
+        doc = await self.bot.db.mass_role_jobs.find_one({'_id': self.job_id})
+        if not doc or doc.get('status') == 'done' or doc.get('condition') != self.condition.source:
+            return False
+        for key in ('scanned', 'matched', 'applied', 'failed', 'last_member_id'):
+            self.state[key] = doc.get(key, self.state[key])
+        return True
+
+    async def save_checkpoint(self):
+        await self.bot.db.mass_role_jobs.update_one(
+            {'_id': self.job_id},
+            {'$set': {
+                **self.state,
+                'guild_id': self.guild.id,
+                'role_id': self.role.id,
+                'action': self.action,
+                'condition': self.condition.source,
+                'updated_at': datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+    def needs_change(self, member) -> bool:
+        has_role = member.get_role(self.role.id) is not None
+        return not has_role if self.action == 'add' else has_role
+
+    async def apply(self, member) -> bool:
+        """Apply the role change to one member, backing off on rate limits."""
+        reason = f"Mass role {self.action}: {self.condition.source or 'all members'}"
+        for attempt in range(3):
+            try:
+                if self.action == 'add':
+                    await member.add_roles(self.role, reason=reason)
+                else:
+                    await member.remove_roles(self.role, reason=reason)
+                return True
+            except discord.Forbidden:
+                # Hierarchy or permission problems will not fix themselves mid-job
+                self.cancelled = True
+                return False
+            except discord.HTTPException as e:
+                if e.status == 429 or e.status >= 500:
+                    await asyncio.sleep(2 ** attempt)
+                    continue
+                return False
+        return False
+
+    async def process_page(self, members: List[Any]) -> bool:
+        """Apply every member in the page; False if the job stopped part way through."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for member in members:
+            queue.put_nowait(member)
+
+        async def worker():
+            while not queue.empty() and not self.cancelled:
+                member = queue.get_nowait()
+                if await self.apply(member):
+                    self.state['applied'] += 1
+                else:
+                    self.state['failed'] += 1
+
+        await asyncio.gather(*(worker() for _ in range(self.workers)))
+        return not self.cancelled
+
+    async def report(self, force: bool = False):
+        if not self.progress:
+            return
+        now = time.monotonic()
+        if force or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            try:
+                await self.progress(dict(self.state))
+            except Exception as e:
+                self.logger.error(f"Mass role progress callback failed: {str(e)}")
+
+    async def run(self) -> Dict[str, Any]:
+        """Run (or resume) the job and return the final counters."""
+        resumed = await self.load_checkpoint()
+        if resumed:
+            self.logger.info(f"Resuming mass role job {self.job_id} after {self.state['last_member_id']}")
+
+        after = discord.Object(id=self.state['last_member_id']) if self.state['last_member_id'] else None
+        now = discord.utils.utcnow()
+        page: List[Any] = []
+        last_seen = self.state['last_member_id']
+        # Counters as of the last checkpoint; a page that does not finish is rescanned on resume
+        committed = {'scanned': self.state['scanned'], 'matched': self.state['matched']}
+
+        def commit():
+            self.state['last_member_id'] = last_seen
+            committed.update(scanned=self.state['scanned'], matched=self.state['matched'])
+
+        try:
+            async for member in self.guild.fetch_members(limit=None, after=after):
+                if self.cancelled:
+                    break
+                self.state['scanned'] += 1
+                last_seen = member.id
+                if self.condition(member, now) and self.needs_change(member):
+                    self.state['matched'] += 1
+                    page.append(member)
+
+                if self.state['scanned'] % PAGE_SIZE == 0:
+                    if not await self.process_page(page):
+                        break
+                    page.clear()
+                    commit()
+                    await self.save_checkpoint()
+                    await self.report()
+
+            if not self.cancelled and await self.process_page(page):
+                commit()
+
+            if self.cancelled:
+                # Members past the checkpoint were not all applied; already applied ones no longer match
+                self.state.update(committed)
+                self.state['status'] = 'cancelled'
+            else:
+                self.state['status'] = 'done'
+
+        except Exception as e:
+            self.state['status'] = 'failed'
+            self.state.update(committed)
+            self.logger.error(f"Mass role job {self.job_id} failed: {str(e)}")
+
+        await self.save_checkpoint()
+        await self.report(force=True)
+        return self.state
@@ -0,0 +1,280 @@
+import asyncio
+import hashlib
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from core.indexes import INDEXES, ensure_indexes, member_key
+from core.logger import get_logger
+
+MigrationStep = Callable[[Any], Awaitable[None]]
+
+# Server error codes that mean "already gone" when dropping an index
+INDEX_NOT_FOUND = 27
+NAMESPACE_NOT_FOUND = 26
+
+class Migration:
+    """One versioned, idempotent migration step."""
+    __slots__ = ('version', 'name', 'run')
+
+    def __init__(self, version: int, name: str, run: MigrationStep):
+        self.version = version
+        self.name = name
+        self.run = run
+
+LEGACY_INDEXES = {
+    'guild_settings': ['prefix_1', 'automod.enabled_1'],
+    'users': ['guild_id_1', 'warns_1', 'xp_-1'],
+    'tickets': ['guild_id_1', 'user_id_1', 'status_1', 'created_at_-1'],
+    'automod_logs': ['guild_id_1', 'user_id_1', 'action_1', 'timestamp_-1'],
+}
+
+# Secondary indexes made redundant by member_key() _ids
+MEMBER_KEY_INDEXES = {
+    'users': ['guild_id_1__id_1'],
+    'user_levels': ['guild_id_1_user_id_1'],
+    'levels': ['xp_-1'],
+}
+
+async def _drop_indexes(db, indexes: Dict[str, List[str]]):
+    async def drop(collection: str, name: str):
+        try:
+            await db[collection].drop_index(name)
+        except OperationFailure as e:
+            if e.code not in (INDEX_NOT_FOUND, NAMESPACE_NOT_FOUND):
+                raise
+
+    await asyncio.gather(*(
+        drop(collection, name)
+        for collection, names in indexes.items()
+        for name in names
+    ))
+
+async def drop_legacy_indexes(db):
+    """Drop the single-field indexes the registry replaced."""
+    await _drop_indexes(db, LEGACY_INDEXES)
+
+async def noprefix_expiry_dates(db, batch_size: int = 500):
+    """Convert ``noprefix_users.expires_at`` from ISO strings to BSON dates in batches."""
+    unparsable: List[Any] = []
+    while True:
+        batch = await db.noprefix_users.find(
+            {'expires_at': {'$type': 'string'}, '_id': {'$nin': unparsable}},
+            {'expires_at': 1}
+        ).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            try:
+                expires_at = datetime.fromisoformat(doc['expires_at'])
+            except ValueError:
+                unparsable.append(doc['_id'])
+                continue
+            # Only rewrite the value we read, in case the entry changed meanwhile
+            operations.append(UpdateOne(
+                {'_id': doc['_id'], 'expires_at': doc['expires_at']},
+                {'$set': {'expires_at': expires_at}}
+            ))
+        if operations:
+            await db.noprefix_users.bulk_write(operations, ordered=False)
+
+    if unparsable:
+        get_logger().error(f"Left {len(unparsable)} no-prefix entries with unparsable expires_at: {unparsable[:10]}")
+
+async def _rekey(db, collection: str, key: Callable[[Dict[str, Any]], Optional[Dict[str, int]]],
+                 batch_size: int, orphans: Optional[str] = None):
+    """Stream every document without a compound ``_id`` and rewrite it under ``key(doc)``.
+
+    Documents ``key`` cannot place (no guild) are moved to ``orphans`` when
+    given. Each batch is written before its old documents are deleted, so an
+    interrupted run loses nothing and the next run picks up where it stopped.
+    """
+    moved, skipped = 0, 0
+
+    async def flush(batch: List[Dict[str, Any]]):
+        nonlocal moved, skipped
+        keyed = [(doc, key(doc)) for doc in batch]
+        operations = [ReplaceOne({'_id': new_id}, {**doc, '_id': new_id}, upsert=True)
+                      for doc, new_id in keyed if new_id is not None]
+        stray = [doc for doc, new_id in keyed if new_id is None]
+        if operations:
+            await db[collection].bulk_write(operations, ordered=False)
+        if stray and orphans:
+            await db[orphans].bulk_write(
+                [ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in stray], ordered=False
+            )
+        elif stray:
+            # Nowhere to put them; leave them where they are
+            skipped += len(stray)
+            keyed = [(doc, new_id) for doc, new_id in keyed if new_id is not None]
+        if keyed:
+            await db[collection].delete_many({'_id': {'$in': [doc['_id'] for doc, _ in keyed]}})
+        moved += len(keyed)
+
+    batch: List[Dict[str, Any]] = []
+    cursor = db[collection].find({'_id': {'$not': {'$type': 'object'}}}).batch_size(batch_size)
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    if moved:
+        get_logger().info(f"Re-keyed {moved} documents in {collection}")
+    if skipped:
+        get_logger().error(f"Left {skipped} documents in {collection} without a guild to key them by")
+
+async def member_compound_keys(db, batch_size: int = 1000):
+    """Key users, levels and user_levels by ``{g: guild_id, u: user_id}``.
+
+    ``users`` was keyed by user ID alone with a ``guild_id`` field, so a user
+    could only have data in one guild. ``user_levels`` used ObjectIds next to
+    ``guild_id``/``user_id`` fields. ``levels`` held global XP keyed by user
+    ID; those documents cannot be attributed to a guild and are kept in
+    ``levels_global``. The ``guild_id``/``user_id`` fields stay for the
+    leaderboard indexes.
+    """
+    def from_fields(doc: Dict[str, Any]) -> Optional[Dict[str, int]]:
+        user_id = doc.get('user_id', doc['_id'])
+        if not isinstance(doc.get('guild_id'), int) or not isinstance(user_id, int):
+            return None
+        doc['user_id'] = user_id
+        return member_key(doc['guild_id'], user_id)
+
+    await _rekey(db, 'users', from_fields, batch_size)
+    await _rekey(db, 'user_levels', from_fields, batch_size)
+    await _rekey(db, 'levels', from_fields, batch_size, orphans='levels_global')
+    await _drop_indexes(db, MEMBER_KEY_INDEXES)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "drop legacy single-field indexes", drop_legacy_indexes),
+    Migration(2, "noprefix_users.expires_at to BSON dates", noprefix_expiry_dates),
+    Migration(3, "per-guild compound keys for member documents", member_compound_keys),
+]
+
+def index_fingerprint() -> str:
+    """Changes whenever an index is added to, removed from or changed in the registry."""
+    parts = sorted(f"{spec.collection}:{spec.name}:{sorted(spec.options.items())}" for spec in INDEXES)
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+class MigrationRunner:
+    """Brings indexes and data up to date at startup.
+
+    State lives in ``_migrations``: one document per applied migration
+    version, an ``indexes`` document holding the fingerprint of the last
+    index registry built, and a ``lock`` document leased by the process
+    doing the work. When everything is current, startup costs a single
+    query. Otherwise one process takes the lease (renewing it while it
+    works) and the others wait for it to finish instead of repeating the
+    work.
+    """
+
+    def __init__(self, db, migrations: Optional[List[Migration]] = None,
+                 lease: float = 60.0, wait_timeout: float = 300.0):
+        self.db = db
+        self.migrations = sorted(migrations if migrations is not None else MIGRATIONS, key=lambda m: m.version)
+        self.lease = lease
+        self.wait_timeout = wait_timeout
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.logger = get_logger()
+        self.fingerprint = index_fingerprint()
+
+    @property
+    def collection(self):
+        return self.db['_migrations']
+
+    async def pending(self) -> Dict[str, Any]:
+        """What still needs doing: migration versions and whether indexes are stale."""
+        done = await self.collection.find({}, {'_id': 1, 'fingerprint': 1}).to_list(length=None)
+        applied = {doc['_id'] for doc in done}
+        indexes = next((doc for doc in done if doc['_id'] == 'indexes'), {})
+        return {
+            'migrations': [m for m in self.migrations if m.version not in applied],
+            'indexes': indexes.get('fingerprint') != self.fingerprint
+        }
+
+    async def acquire(self) -> bool:
+        now = datetime.utcnow()
+        try:
+            doc = await self.collection.find_one_and_update(
+                {'_id': 'lock', '$or': [
+                    {'lease_until': {'$lt': now}},
+                    {'owner': self.owner_id}
+                ]},
+                {'$set': {'owner': self.owner_id, 'lease_until': now + timedelta(seconds=self.lease)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return False  # Lock document exists and someone else holds the lease
+        return doc is not None and doc['owner'] == self.owner_id
+
+    async def release(self):
+        await self.collection.update_one(
+            {'_id': 'lock', 'owner': self.owner_id},
+            {'$set': {'lease_until': datetime.utcnow()}}
+        )
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            await self.collection.update_one(
+                {'_id': 'lock', 'owner': self.owner_id},
+                {'$set': {'lease_until': datetime.utcnow() + timedelta(seconds=self.lease)}}
+            )
+
+    async def run(self) -> bool:
+        """Apply whatever is pending. Returns False if another process did the work."""
+        todo = await self.pending()
+        if not todo['migrations'] and not todo['indexes']:
+            return True
+
+        deadline = time.monotonic() + self.wait_timeout
+        while not await self.acquire():
+            if time.monotonic() > deadline:
+                self.logger.error("Timed out waiting for the migration lock; starting anyway")
+                return False
+            await asyncio.sleep(1)
+            todo = await self.pending()
+            if not todo['migrations'] and not todo['indexes']:
+                return False
+
+        renew = asyncio.create_task(self._renew())
+        try:
+            # Re-check under the lock: the previous holder may have finished
+            todo = await self.pending()
+            if todo['indexes']:
+                started = time.monotonic()
+                await ensure_indexes(self.db)
+                await self.collection.update_one(
+                    {'_id': 'indexes'},
+                    {'$set': {'fingerprint': self.fingerprint, 'built_at': datetime.utcnow()}},
+                    upsert=True
+                )
+                self.logger.info(f"Built indexes in {time.monotonic() - started:.1f}s")
+
+            for migration in todo['migrations']:
+                started = time.monotonic()
+                await migration.run(self.db)
+                await self.collection.insert_one({
+                    '_id': migration.version,
+                    'name': migration.name,
+                    'applied_at': datetime.utcnow(),
+                    'duration': time.monotonic() - started,
+                    'owner': self.owner_id
+                })
+                self.logger.info(f"Applied migration {migration.version}: {migration.name}")
+            return True
+        finally:
+            renew.cancel()
+            await asyncio.gather(renew, return_exceptions=True)
+            await self.release()
@@ -0,0 +1,228 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import discord
+from pymongo import UpdateOne
+from core.cache import SWRCache
+from core.indexes import member_key
+from core.logger import get_logger
+
+# Members written per bulk_write while syncing a guild
+MEMBER_BATCH = 1000
+
+class Route(NamedTuple):
+    """Where a DM goes: one guild, or candidates the user has to pick from."""
+    guild_id: Optional[int]
+    candidates: Tuple[int, ...] = ()
+
+def thread_id(user_id: int, guild_id: int) -> str:
+    return f"dm-{user_id}-{guild_id}"
+
+class ModMailRouter:
+    """Works out which guild a ModMail DM belongs to.
+
+    Three pieces of state:
+
+    - open threads by user, loaded at startup and written through to
+      ``modmail_threads`` whenever a thread opens or closes;
+    - the set of guilds with ModMail enabled, kept current by the
+      ``guild_settings`` write listener;
+    - user -> mutual ModMail guilds, read with one indexed query from
+      ``modmail_members`` and cached for ``mutual_ttl``.
+
+    DMs only reach the bot running shard 0, but members are only seen by the
+    bot whose shard holds their guild. So every bot writes the membership of
+    its own ModMail guilds to ``modmail_members``: a paged member listing when
+    ModMail is enabled or the last one is older than ``resync_after``, then
+    join and leave events. Any bot can then answer for every shard without a
+    member lookup per guild.
+
+    A user with one open thread or one mutual guild is routed directly;
+    only a user with several gets the guild picker.
+    """
+
+    def __init__(self, bot, mutual_ttl: float = 300.0, resync_after: float = 86400.0):
+        self.bot = bot
+        self.db = bot.db
+        self.resync_after = resync_after
+        self.threads: Dict[int, Dict[int, int]] = {}
+        self.enabled: Set[int] = set()
+        # Guild names from the last member sync, for guilds this bot does not hold
+        self.names: Dict[int, str] = {}
+        self.mutual = SWRCache(maxsize=50000, ttl=mutual_ttl, max_stale=mutual_ttl * 6)
+        self.logger = get_logger()
+        self._refreshing: Set[asyncio.Task] = set()
+
+    async def start(self):
+        async for doc in self.db.modmail_threads.find(
+            {'status': 'open'}, {'user_id': 1, 'guild_id': 1, 'thread_channel_id': 1}
+        ):
+            self.threads.setdefault(doc['user_id'], {})[doc['guild_id']] = doc.get('thread_channel_id')
+        self.enabled = {
+            doc['_id'] async for doc in self.db.guild_settings.find({'modmail.enabled': True}, {'_id': 1})
+        }
+        self.names = {
+            doc['_id']: doc['name'] async for doc in self.db.modmail_member_syncs.find({}, {'name': 1}) if doc.get('name')
+        }
+        self.db.configured.subscribe('guild_settings', self.on_settings_write)
+        self.logger.info(f"ModMail routing: {len(self.enabled)} enabled guilds, "
+                         f"{sum(map(len, self.threads.values()))} open threads")
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    def on_settings_write(self, guild_id: int):
+        self._spawn(self.refresh_guild(guild_id))
+
+    async def refresh_guild(self, guild_id: int):
+        """Re-read one guild's enabled flag after its settings changed."""
+        try:
+            doc = await self.db.guild_settings.find_one({'_id': guild_id}, {'modmail.enabled': 1}) or {}
+        except Exception as e:
+            self.logger.error(f"Error refreshing ModMail state for {guild_id}: {str(e)}")
+            return
+        if doc.get('modmail', {}).get('enabled'):
+            if guild_id not in self.enabled:
+                self.enabled.add(guild_id)
+                # Cached mutual guild lists predate this guild
+                self.mutual.clear()
+                guild = self.bot.get_guild(guild_id)
+                if guild is not None:
+                    # Joins and leaves were not recorded while it was disabled
+                    self._spawn(self.sync_members(guild, force=True))
+        else:
+            self.enabled.discard(guild_id)
+
+    async def find_mutual(self, user_id: int, guild_ids: Iterable[int]) -> Tuple[int, ...]:
+        """Guilds among ``guild_ids`` with a membership record for ``user_id``, on any shard."""
+        query = {'user_id': user_id, 'guild_id': {'$in': list(guild_ids)}}
+        found = {doc['guild_id'] async for doc in self.db.modmail_members.find(query, {'guild_id': 1})}
+        return tuple(sorted(found))
+
+    async def sync_members(self, guild: discord.Guild, force: bool = False) -> int:
+        """Rewrite ``guild``'s membership records from a paged member listing.
+
+        Skipped when the last sync is younger than ``resync_after``, unless
+        ``force``. Returns how many members were written.
+        """
+        if not force:
+            state = await self.db.modmail_member_syncs.find_one({'_id': guild.id}, {'synced_at': 1}) or {}
+            synced_at = state.get('synced_at')
+            if synced_at and synced_at > datetime.utcnow() - timedelta(seconds=self.resync_after):
+                return 0
+
+        started = datetime.utcnow()
+        batch: List[UpdateOne] = []
+        count = 0
+        async for member in guild.fetch_members(limit=None):
+            batch.append(UpdateOne(
+                {'_id': member_key(guild.id, member.id)},
+                {'$set': {'guild_id': guild.id, 'user_id': member.id, 'seen_at': started}},
+                upsert=True
+            ))
+            if len(batch) >= MEMBER_BATCH:
+                await self.db.modmail_members.bulk_write(batch, ordered=False)
+                count += len(batch)
+                batch = []
+        if batch:
+            await self.db.modmail_members.bulk_write(batch, ordered=False)
+            count += len(batch)
+        # Members who left while no bot was watching; joins during the sync are newer
+        await self.db.modmail_members.delete_many({'guild_id': guild.id, 'seen_at': {'$lt': started}})
+        await self.db.modmail_member_syncs.update_one(
+            {'_id': guild.id},
+            {'$set': {'name': guild.name, 'synced_at': datetime.utcnow(), 'members': count}},
+            upsert=True
+        )
+        self.names[guild.id] = guild.name
+        self.mutual.clear()
+        self.logger.info(f"Synced {count} ModMail members for guild {guild.id}")
+        return count
+
+    async def sync_guilds(self, guilds: Iterable[discord.Guild]):
+        """Sync every ModMail guild among ``guilds``, one at a time."""
+        for guild in guilds:
+            if guild.id not in self.enabled:
+                continue
+            try:
+                await self.sync_members(guild)
+            except Exception as e:
+                self.logger.error(f"Error syncing ModMail members for {guild.id}: {str(e)}")
+
+    def guild_name(self, guild_id: int) -> str:
+        guild = self.bot.get_guild(guild_id)
+        if guild is not None:
+            return guild.name
+        return self.names.get(guild_id) or f"Server {guild_id}"
+
+    async def mutual_guilds(self, user_id: int) -> Tuple[int, ...]:
+        guild_ids = await self.mutual.get_or_load(user_id, lambda: self.find_mutual(user_id, list(self.enabled)))
+        # Drop guilds that disabled ModMail since the entry was cached
+        return tuple(g for g in guild_ids if g in self.enabled)
+
+    async def route(self, user_id: int) -> Route:
+        open_threads = [g for g in self.threads.get(user_id, {}) if g in self.enabled]
+        if len(open_threads) == 1:
+            return Route(open_threads[0])
+        if open_threads:
+            return Route(None, tuple(sorted(open_threads)))
+
+        candidates = await self.mutual_guilds(user_id)
+        if len(candidates) == 1:
+            return Route(candidates[0])
+        return Route(None, candidates)
+
+    def thread_channel(self, user_id: int, guild_id: int) -> Optional[int]:
+        return self.threads.get(user_id, {}).get(guild_id)
+
+    def user_for_channel(self, guild_id: int, channel_id: int) -> Optional[int]:
+        for user_id, threads in self.threads.items():
+            if threads.get(guild_id) == channel_id:
+                return user_id
+        return None
+
+    def open_threads(self, guild_id: int) -> List[Tuple[int, Optional[int]]]:
+        return [(user_id, threads[guild_id]) for user_id, threads in self.threads.items() if guild_id in threads]
+
+    async def open_thread(self, user_id: int, guild_id: int, channel_id: Optional[int] = None):
+        await self.db.modmail_threads.update_one(
+            {'_id': thread_id(user_id, guild_id)},
+            {'$set': {'user_id': user_id, 'guild_id': guild_id, 'thread_channel_id': channel_id, 'status': 'open'},
+             '$setOnInsert': {'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+        self.threads.setdefault(user_id, {})[guild_id] = channel_id
+
+    async def close_thread(self, user_id: int, guild_id: int) -> bool:
+        threads = self.threads.get(user_id, {})
+        if guild_id not in threads:
+            return False
+        await self.db.modmail_threads.update_one(
+            {'_id': thread_id(user_id, guild_id)},
+            {'$set': {'status': 'closed', 'closed_at': datetime.utcnow()}}
+        )
+        del threads[guild_id]
+        if not threads:
+            del self.threads[user_id]
+        return True
+
+    async def member_joined(self, guild_id: int, user_id: int):
+        if guild_id not in self.enabled:
+            return
+        await self.db.modmail_members.update_one(
+            {'_id': member_key(guild_id, user_id)},
+            {'$set': {'guild_id': guild_id, 'user_id': user_id, 'seen_at': datetime.utcnow()}},
+            upsert=True
+        )
+        cached = self.mutual.get(user_id)
+        if cached is not None and guild_id not in cached:
+            self.mutual[user_id] = tuple(sorted((*cached, guild_id)))
+
+    async def member_left(self, guild_id: int, user_id: int):
+        await self.db.modmail_members.delete_one({'_id': member_key(guild_id, user_id)})
+        cached = self.mutual.get(user_id)
+        if cached is not None and guild_id in cached:
+            self.mutual[user_id] = tuple(g for g in cached if g != guild_id)
@@ -0,0 +1,183 @@
+import asyncio
+import re
+import time
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+from core.logger import get_logger
+
+LINK_RE = re.compile(r'https?://\S+|www\.\S+', re.IGNORECASE)
+
+# Discord refuses bulk deletes for messages older than 14 days; keep a margin
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_DELETE_SIZE = 100
+
+class PurgeFilterError(ValueError):
+    """Raised when a purge filter string cannot be parsed."""
+
+class PurgeFilter:
+    """Message filter compiled once from ``key:value`` terms.
+
+    Supported terms: ``user:<id>``, ``bots``, ``humans``, ``regex:<pattern>``,
+    ``contains:<text>``, ``links``, ``attachments``, ``before:<message id>``
+    and ``after:<message id>``. ``before``/``after`` are pushed down into the
+    history request instead of being checked per message.
+    """
+
+    def __init__(self, source: str = ""):
+        self.source = source
+        self.before: Optional[int] = None
+        self.after: Optional[int] = None
+        self.predicates: List[Callable[[Any], bool]] = []
+
+        for term in (source or "").split():
+            key, _, value = term.partition(":")
+            try:
+                if key == "user":
+                    user_id = int(value.strip("<@!>"))
+                    self.predicates.append(lambda m, u=user_id: m.author.id == u)
+                elif key == "bots":
+                    self.predicates.append(lambda m: m.author.bot)
+                elif key == "humans":
+                    self.predicates.append(lambda m: not m.author.bot)
+                elif key == "regex":
+                    pattern = re.compile(value, re.IGNORECASE)
+                    self.predicates.append(lambda m, p=pattern: bool(p.search(m.content or "")))
+                elif key == "contains":
+                    needle = value.lower()
+                    self.predicates.append(lambda m, n=needle: n in (m.content or "").lower())
+                elif key == "links":
+                    self.predicates.append(lambda m: bool(LINK_RE.search(m.content or "")))
+                elif key == "attachments":
+                    self.predicates.append(lambda m: bool(m.attachments))
+                elif key == "before":
+                    self.before = int(value)
+                elif key == "after":
+                    self.after = int(value)
+                else:
+                    raise PurgeFilterError(f"Unknown filter '{term}'")
+            except (ValueError, re.error) as e:
+                if isinstance(e, PurgeFilterError):
+                    raise
+                raise PurgeFilterError(f"Invalid filter '{term}': {str(e)}")
+
+    def __call__(self, message) -> bool:
+        if message.pinned:
+            return False
+        for predicate in self.predicates:
+            if not predicate(message):
+                return False
+        return True
+
+class PurgeJob:
+    """Streams channel history and deletes matching messages.
+
+    History is scanned page by page while deletes run concurrently: recent
+    messages are bulk-deleted in chunks of 100 by a single consumer (the
+    bulk-delete route is rate limited per channel), and messages older than
+    14 days fall back to single deletes under a small semaphore. Nothing
+    beyond the current chunk is held in memory.
+    """
+
+    def __init__(self, channel, amount: int, message_filter: PurgeFilter,
+                 skip_ids: Optional[set] = None, max_scan: Optional[int] = None,
+                 single_delete_concurrency: int = 3,
+                 progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                 progress_interval: float = 5.0):
+        self.channel = channel
+        self.amount = amount
+        self.filter = message_filter
+        self.skip_ids = skip_ids or set()
+        self.max_scan = max_scan or min(max(amount * 10, 1000), 100_000)
+        self.single_semaphore = asyncio.Semaphore(single_delete_concurrency)
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.logger = get_logger()
+        self.state = {'scanned': 0, 'matched': 0, 'deleted': 0, 'failed': 0, 'status': 'running'}
+        self._last_progress = 0.0
+
+    async def _bulk_consumer(self, queue: asyncio.Queue):
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            try:
+                await self.channel.delete_messages(batch)
+                self.state['deleted'] += len(batch)
+            except discord.HTTPException as e:
+                self.logger.error(f"Bulk delete failed in {self.channel.id}: {str(e)}")
+                self.state['failed'] += len(batch)
+            await self.report()
+
+    async def _single_delete(self, message):
+        async with self.single_semaphore:
+            try:
+                await message.delete()
+                self.state['deleted'] += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                self.state['failed'] += 1
+
+    async def report(self, force: bool = False):
+        if not self.progress:
+            return
+        now = time.monotonic()
+        if force or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            try:
+                await self.progress(dict(self.state))
+            except Exception as e:
+                self.logger.error(f"Purge progress callback failed: {str(e)}")
+
+    async def run(self) -> Dict[str, Any]:
+        """Run the purge and return the final counters."""
+        bulk_queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        consumer = asyncio.create_task(self._bulk_consumer(bulk_queue))
+        single_tasks = set()
+        bulk: List[Any] = []
+        cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+
+        before = discord.Object(id=self.filter.before) if self.filter.before else None
+        after = discord.Object(id=self.filter.after) if self.filter.after else None
+
+        try:
+            async for message in self.channel.history(limit=self.max_scan, before=before, after=after):
+                self.state['scanned'] += 1
+                if message.id in self.skip_ids or not self.filter(message):
+                    continue
+
+                self.state['matched'] += 1
+                if message.created_at > cutoff:
+                    bulk.append(message)
+                    if len(bulk) == BULK_DELETE_SIZE:
+                        await bulk_queue.put(bulk)
+                        bulk = []
+                else:
+                    task = asyncio.create_task(self._single_delete(message))
+                    single_tasks.add(task)
+                    task.add_done_callback(single_tasks.discard)
+                    if len(single_tasks) >= 50:
+                        # Keep the backlog of old-message deletes bounded
+                        await asyncio.wait(single_tasks, return_when=asyncio.FIRST_COMPLETED)
+
+                if self.state['matched'] >= self.amount:
+                    break
+
+            if bulk:
+                await bulk_queue.put(bulk)
+            self.state['status'] = 'done'
+
+        except discord.HTTPException as e:
+            self.state['status'] = 'failed'
+            self.logger.error(f"Purge history scan failed in {self.channel.id}: {str(e)}")
+
+        finally:
+            await bulk_queue.put(None)
+            await consumer
+            if single_tasks:
+                await asyncio.gather(*single_tasks)
+
+        await self.report(force=True)
+        return self.state
@@ -0,0 +1,244 @@
+import asyncio
+import heapq
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+from core.logger import get_logger
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class Scheduler:
+    """Persistent timer for delayed actions (unmutes, temp roles, expiries).
+
+    Every job is a document in ``scheduled_jobs`` indexed by ``due_at``. Each
+    process claims the jobs due within the next ``window`` seconds by taking a
+    lease on them, keeps only those in an in-memory heap and fires each one
+    when it falls due. Jobs whose lease expired (their process died) are
+    reclaimed by whoever refills next, so overdue jobs are picked up on restart
+    and only one process runs each job.
+    """
+
+    def __init__(self, db, window: float = 60.0, lease: float = 120.0, claim_batch: int = 500,
+                 max_attempts: int = 5):
+        self.db = db
+        self.window = window
+        self.lease = lease
+        self.claim_batch = claim_batch
+        self.max_attempts = max_attempts
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, JobHandler] = {}
+        self.heap: List[tuple] = []  # (due_at, seq, job)
+        # job _id -> token of the live copy; heap entries with another token are stale
+        self.queued: Dict[Any, str] = {}
+        self.logger = get_logger()
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def collection(self):
+        return self.db.scheduled_jobs
+
+    def register(self, kind: str, handler: JobHandler):
+        """Register the coroutine that runs jobs of ``kind``."""
+        self.handlers[kind] = handler
+
+    async def start(self):
+        """Start the refill and dispatch loops (indexes come from core.indexes)."""
+        self._tasks = [
+            asyncio.create_task(self._refill_loop()),
+            asyncio.create_task(self._dispatch_loop())
+        ]
+        self.logger.info(f"Scheduler started as {self.owner_id}")
+
+    async def stop(self):
+        """Stop the loops and release leases on jobs that have not fired."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self.collection.update_many(
+                {'lease_owner': self.owner_id},
+                {'$set': {'lease_until': None, 'lease_owner': None}}
+            )
+        except Exception as e:
+            self.logger.error(f"Error releasing scheduler leases: {str(e)}")
+        self.heap.clear()
+        self.queued.clear()
+
+    async def schedule(self, kind: str, due_at: datetime, payload: Dict[str, Any],
+                       key: Optional[str] = None, replace: bool = True) -> Any:
+        """Persist a job. Reusing ``key`` replaces the earlier job with that key.
+
+        With ``replace=False`` an existing job under ``key`` is left as it is,
+        lease and all; use it to make sure a job exists without disturbing one
+        that another scheduler may be about to run.
+        """
+        now = datetime.utcnow()
+        near = due_at <= now + timedelta(seconds=self.window)
+        doc = {
+            'token': uuid.uuid4().hex,
+            'kind': kind,
+            'due_at': due_at,
+            'payload': payload,
+            'attempts': 0,
+            # Jobs due soon are leased to this process straight away
+            'lease_owner': self.owner_id if near else None,
+            'lease_until': max(due_at, now) + timedelta(seconds=self.lease) if near else None
+        }
+        if key is not None and not replace:
+            result = await self.collection.update_one({'_id': key}, {'$setOnInsert': doc}, upsert=True)
+            if result.upserted_id is None:
+                return key
+            doc['_id'] = key
+        elif key is not None:
+            await self.collection.replace_one({'_id': key}, {'_id': key, **doc}, upsert=True)
+            doc['_id'] = key
+        else:
+            result = await self.collection.insert_one(doc)
+            doc['_id'] = result.inserted_id
+
+        if near:
+            self._push(doc)
+        else:
+            # A copy of the replaced job may still be in the heap
+            self.queued.pop(doc['_id'], None)
+        return doc['_id']
+
+    async def cancel(self, key: Any) -> bool:
+        """Delete a pending job; a copy already in the heap is skipped when popped."""
+        result = await self.collection.delete_one({'_id': key})
+        self.queued.pop(key, None)
+        return result.deleted_count > 0
+
+    def _push(self, job: Dict[str, Any]):
+        if self.queued.get(job['_id']) == job['token']:
+            return
+        self._seq += 1
+        heapq.heappush(self.heap, (job['due_at'], self._seq, job))
+        self.queued[job['_id']] = job['token']
+        # Wake the dispatcher in case this job is due before the current head
+        self._wakeup.set()
+
+    async def claim(self) -> int:
+        """Lease jobs due within the window and add them to the heap."""
+        now = datetime.utcnow()
+        horizon = now + timedelta(seconds=self.window)
+        claimed = 0
+        while True:
+            candidates = await self.collection.find(
+                {'due_at': {'$lte': horizon}, '$or': [{'lease_until': None}, {'lease_until': {'$lt': now}}]},
+                {'_id': 1}
+            ).sort('due_at', ASCENDING).limit(self.claim_batch).to_list(length=self.claim_batch)
+            if not candidates:
+                return claimed
+
+            # Conditional update: another process may race us for some of these
+            token = uuid.uuid4().hex
+            await self.collection.update_many(
+                {'_id': {'$in': [c['_id'] for c in candidates]},
+                 '$or': [{'lease_until': None}, {'lease_until': {'$lt': now}}]},
+                {'$set': {
+                    'lease_owner': self.owner_id,
+                    'lease_until': horizon + timedelta(seconds=self.lease),
+                    'claim': token
+                }}
+            )
+            async for job in self.collection.find({'claim': token}):
+                self._push(job)
+                claimed += 1
+
+            if len(candidates) < self.claim_batch:
+                return claimed
+
+    async def _refill_loop(self):
+        while True:
+            try:
+                claimed = await self.claim()
+                if claimed:
+                    self.logger.debug(f"Scheduler claimed {claimed} jobs")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Scheduler refill error: {str(e)}")
+            await asyncio.sleep(self.window / 2)
+
+    async def _dispatch_loop(self):
+        while True:
+            self._wakeup.clear()
+            if not self.heap:
+                await self._wakeup.wait()
+                continue
+
+            due_at, _, job = self.heap[0]
+            delay = (due_at - datetime.utcnow()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            if self.queued.get(job['_id']) != job['token']:
+                continue  # Cancelled or replaced by a newer schedule
+            del self.queued[job['_id']]
+            asyncio.create_task(self._run(job))
+
+    async def _run(self, job: Dict[str, Any]):
+        # The heap copy may be stale: cancelled, replaced, or re-leased by another scheduler
+        result = await self.collection.update_one(
+            {'_id': job['_id'], 'token': job['token'], 'lease_owner': self.owner_id},
+            {'$set': {'lease_until': datetime.utcnow() + timedelta(seconds=self.lease)}}
+        )
+        if not result.matched_count:
+            return
+
+        handler = self.handlers.get(job['kind'])
+        if handler is None:
+            self.logger.error(f"No scheduler handler for job kind {job['kind']}")
+            await self._retry(job)
+            return
+
+        try:
+            await handler(job['payload'])
+        except Exception as e:
+            self.logger.error(f"Scheduled job {job['_id']} ({job['kind']}) failed: {str(e)}")
+            await self._retry(job)
+            return
+
+        try:
+            # A reschedule under the same key gets a new token and must survive
+            await self.collection.delete_one({'_id': job['_id'], 'token': job['token']})
+        except Exception as e:
+            self.logger.error(f"Error removing finished job {job['_id']}: {str(e)}")
+
+    async def _retry(self, job: Dict[str, Any]):
+        attempts = job.get('attempts', 0) + 1
+        if attempts >= self.max_attempts:
+            await self.collection.delete_one({'_id': job['_id'], 'token': job['token']})
+            self.logger.error(f"Dropping job {job['_id']} after {attempts} attempts")
+            return
+
+        updated = await self.collection.find_one_and_update(
+            {'_id': job['_id'], 'token': job['token']},
+            {'$set': {
+                'attempts': attempts,
+                'due_at': datetime.utcnow() + timedelta(seconds=min(2 ** attempts * 5, 3600)),
+                'lease_owner': None,
+                'lease_until': None
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if updated and updated['due_at'] <= datetime.utcnow() + timedelta(seconds=self.window):
+            # Retry falls inside our window; the next refill will reclaim it
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        """Number of jobs currently held in memory."""
+        return len(self.heap)
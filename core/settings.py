@@ -0,0 +1,186 @@
+"""Slim, read-only per-feature views of guild configuration.
+
+Hot paths (message, join and voice listeners) used to cache the whole
+``guild_settings`` document, music, modmail, tickets and all, just to read
+one flag. Each class here names the collection it lives in and the fields it
+needs; ``Bot.get_settings`` loads it with a projection of exactly those
+fields and caches the resulting tuple. Unconfigured guilds get the class
+defaults without touching the database.
+"""
+import sys
+from typing import Any, Dict, FrozenSet, NamedTuple, Optional, Tuple, Type
+
+def _get(doc: Dict[str, Any], path: str, default: Any = None) -> Any:
+    for part in path.split('.'):
+        if not isinstance(doc, dict):
+            return default
+        doc = doc.get(part)
+    return default if doc is None else doc
+
+def _str(value: Any) -> Optional[str]:
+    # Action names and badwords repeat across thousands of guilds; share one copy
+    return sys.intern(value) if isinstance(value, str) else None
+
+def _id(value: Any) -> Optional[int]:
+    return value if isinstance(value, int) and value else None
+
+def _ids(values: Any) -> FrozenSet[int]:
+    return frozenset(v for v in values or () if isinstance(v, int))
+
+class AutomodSettings(NamedTuple):
+    enabled: bool = False
+    anti_links: bool = False
+    anti_invites: bool = False
+    anti_badwords: bool = False
+    badwords: Tuple[str, ...] = ()
+    bypass_roles: FrozenSet[int] = frozenset()
+    action_type: str = 'timeout'
+    action_minutes: int = 30
+    log_channel: Optional[int] = None
+
+    collection = 'automod_settings'
+    key = 'automod'
+    projection = {'enabled': 1, 'anti_links': 1, 'anti_invites': 1, 'anti_badwords': 1,
+                  'badwords': 1, 'bypass_roles': 1, 'action': 1, 'log_channel': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'AutomodSettings':
+        return cls(
+            enabled=bool(doc.get('enabled')),
+            anti_links=bool(doc.get('anti_links')),
+            anti_invites=bool(doc.get('anti_invites')),
+            anti_badwords=bool(doc.get('anti_badwords')),
+            badwords=tuple(sys.intern(w.lower()) for w in doc.get('badwords') or () if isinstance(w, str)),
+            bypass_roles=_ids(doc.get('bypass_roles')),
+            action_type=_str(_get(doc, 'action.type')) or 'timeout',
+            action_minutes=int(_get(doc, 'action.duration_minutes', 30)),
+            log_channel=_id(doc.get('log_channel'))
+        )
+
+class AutoresponderSettings(NamedTuple):
+    enabled: bool = False
+
+    collection = 'guild_settings'
+    key = 'autoresponder'
+    projection = {'autoresponder.enabled': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'AutoresponderSettings':
+        return cls(enabled=bool(_get(doc, 'autoresponder.enabled')))
+
+class LevelingSettings(NamedTuple):
+    enabled: bool = False
+    min_xp: int = 15
+    max_xp: int = 25
+
+    collection = 'guild_settings'
+    key = 'leveling'
+    projection = {'leveling.enabled': 1, 'leveling.xp_range': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'LevelingSettings':
+        return cls(
+            enabled=bool(_get(doc, 'leveling.enabled')),
+            min_xp=int(_get(doc, 'leveling.xp_range.min', 15)),
+            max_xp=int(_get(doc, 'leveling.xp_range.max', 25))
+        )
+
+class ModerationSettings(NamedTuple):
+    mute_role_id: Optional[int] = None
+
+    collection = 'guild_settings'
+    key = 'moderation'
+    projection = {'moderation.mute_role_id': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'ModerationSettings':
+        return cls(mute_role_id=_id(_get(doc, 'moderation.mute_role_id')))
+
+class JoinGateSettings(NamedTuple):
+    raid_enabled: bool = False
+    threshold: int = 10
+    interval: int = 10
+    action: str = 'lockdown'
+    timeout_minutes: int = 60
+    alert_channel_id: Optional[int] = None
+    min_account_age_days: int = 0
+
+    collection = 'guild_settings'
+    key = 'joingate'
+    projection = {'raid': 1, 'restrictions.min_account_age_days': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'JoinGateSettings':
+        return cls(
+            raid_enabled=bool(_get(doc, 'raid.enabled')),
+            threshold=int(_get(doc, 'raid.threshold', 10)),
+            interval=int(_get(doc, 'raid.interval', 10)),
+            action=_str(_get(doc, 'raid.action')) or 'lockdown',
+            timeout_minutes=int(_get(doc, 'raid.timeout_minutes', 60)),
+            alert_channel_id=_id(_get(doc, 'raid.alert_channel_id')),
+            min_account_age_days=int(_get(doc, 'restrictions.min_account_age_days', 0))
+        )
+
+class WelcomeSettings(NamedTuple):
+    welcome_channel: Optional[int] = None
+    welcome_message: str = 'Welcome {user} to {server}!'
+    leave_channel: Optional[int] = None
+    leave_message: str = 'Goodbye {user}! We now have {count} members.'
+    autorole_id: Optional[int] = None
+
+    collection = 'welcome_settings'
+    key = 'welcome'
+    projection = {'welcome_channel': 1, 'welcome_message': 1, 'leave_channel': 1,
+                  'leave_message': 1, 'autorole_id': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'WelcomeSettings':
+        return cls(
+            welcome_channel=_id(doc.get('welcome_channel')),
+            welcome_message=doc.get('welcome_message') or cls._field_defaults['welcome_message'],
+            leave_channel=_id(doc.get('leave_channel')),
+            leave_message=doc.get('leave_message') or cls._field_defaults['leave_message'],
+            autorole_id=_id(doc.get('autorole_id'))
+        )
+
+class ModMailSettings(NamedTuple):
+    enabled: bool = False
+    channel_id: Optional[int] = None
+    log_channel_id: Optional[int] = None
+
+    collection = 'guild_settings'
+    key = 'modmail'
+    projection = {'modmail.enabled': 1, 'modmail.channel_id': 1, 'modmail.log_channel_id': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'ModMailSettings':
+        return cls(
+            enabled=bool(_get(doc, 'modmail.enabled')),
+            channel_id=_id(_get(doc, 'modmail.channel_id')),
+            log_channel_id=_id(_get(doc, 'modmail.log_channel_id'))
+        )
+
+class TicketSettings(NamedTuple):
+    enabled: bool = False
+    channel_id: Optional[int] = None
+    log_channel_id: Optional[int] = None
+    user_limit: int = 1
+
+    collection = 'guild_settings'
+    key = 'tickets'
+    projection = {'tickets.enabled': 1, 'tickets.channel_id': 1, 'tickets.log_channel_id': 1,
+                  'tickets.user_limit': 1}
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, Any]) -> 'TicketSettings':
+        return cls(
+            enabled=bool(_get(doc, 'tickets.enabled')),
+            channel_id=_id(_get(doc, 'tickets.channel_id')),
+            log_channel_id=_id(_get(doc, 'tickets.log_channel_id')),
+            user_limit=int(_get(doc, 'tickets.user_limit', 1))
+        )
+
+FEATURE_SETTINGS: Tuple[Type[tuple], ...] = (
+    AutomodSettings, AutoresponderSettings, LevelingSettings, ModerationSettings,
+    JoinGateSettings, WelcomeSettings, ModMailSettings, TicketSettings,
+)
@@ -0,0 +1,227 @@
+"""Whole-guild configuration snapshots.
+
+A snapshot is a gzip-compressed, line-delimited file of MongoDB extended
+JSON: a header line, one ``{"c": collection, "d": document}`` line per
+document, and an ``{"end": ...}`` trailer with per-collection counts. Export
+streams each collection's cursor straight into a spooled temp file, so a
+guild with thousands of autoresponses never sits in memory as one JSON blob.
+
+Restore reads the file twice. The first pass checks the header, the trailer
+and that every document belongs to the guild, so a truncated or foreign
+file writes nothing. The second pass applies the documents in
+``batch_size`` ``bulk_write`` batches. Documents of a captured collection
+that are not in the snapshot are deleted. In diff mode each batch is
+compared with what is stored first and only changed documents are written.
+
+Only configuration is captured. Member data (levels, warnings, cases,
+tickets) is left alone.
+"""
+import gzip
+import tempfile
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple
+
+from bson import json_util
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+from core.logger import get_logger
+
+SNAPSHOT_VERSION = 1
+
+# Collection -> field holding the guild ID
+SNAPSHOT_COLLECTIONS: Dict[str, str] = {
+    'guild_settings': '_id',
+    'automod_settings': '_id',
+    'welcome_settings': '_id',
+    'yt_subscriptions': '_id',
+    'autorole': 'guild_id',
+    'autorole_conditions': 'guild_id',
+    'reaction_roles': 'guild_id',
+    'autoresponder': 'guild_id',
+    'autoresponder_vars': 'guild_id',
+    'autoresponder_schedule': 'guild_id',
+    'level_rewards': 'guild_id',
+    'level_roles': 'guild_id',
+    'level_badges': 'guild_id',
+    'xp_multipliers': 'guild_id',
+    'playlists': 'guild_id',
+    'ticket_panels': 'guild_id',
+    'ticket_categories': 'guild_id',
+    'support_team': 'guild_id',
+    'ticket_blacklist': 'guild_id',
+    'modmail_categories': 'guild_id',
+    'modmail_snippets': 'guild_id',
+    'modmail_team': 'guild_id',
+    'modmail_schedules': 'guild_id',
+    'modmail_blacklist': 'guild_id',
+}
+
+# Naive datetimes, as motor returns them, so diff mode compares like with like
+JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS.with_options(tz_aware=False)
+
+class RestoreStats(NamedTuple):
+    written: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    # Documents whose _id already belongs to another guild; never overwritten
+    conflicts: int = 0
+
+class SnapshotError(ValueError):
+    """The file is not a complete snapshot of the guild it is being restored into."""
+
+def _line(record: Dict[str, Any]) -> bytes:
+    return json_util.dumps(record, json_options=JSON_OPTIONS).encode('utf-8') + b"\n"
+
+def _records(fileobj: BinaryIO):
+    fileobj.seek(0)
+    with gzip.GzipFile(fileobj=fileobj, mode='rb') as archive:
+        for raw in archive:
+            if raw.strip():
+                yield json_util.loads(raw, json_options=JSON_OPTIONS)
+
+async def write_snapshot(db, guild_id: int, batch_size: int = 500,
+                         spool_size: int = 1024 * 1024) -> Tuple[tempfile.SpooledTemporaryFile, Dict[str, int]]:
+    """Stream every configuration collection for ``guild_id`` into a compressed spooled file."""
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_size, mode='w+b')
+    counts: Dict[str, int] = {}
+    try:
+        with gzip.GzipFile(fileobj=spool, mode='wb', compresslevel=6) as archive:
+            archive.write(_line({
+                'snapshot': SNAPSHOT_VERSION,
+                'guild_id': guild_id,
+                'created_at': datetime.utcnow(),
+                'collections': list(SNAPSHOT_COLLECTIONS)
+            }))
+            for name, field in SNAPSHOT_COLLECTIONS.items():
+                count = 0
+                async for doc in db.get_collection(name).find({field: guild_id}).batch_size(batch_size):
+                    archive.write(_line({'c': name, 'd': doc}))
+                    count += 1
+                counts[name] = count
+            archive.write(_line({'end': True, 'counts': counts}))
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, counts
+
+def read_header(fileobj: BinaryIO, guild_id: int) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """Validate the whole file for ``guild_id`` without writing anything.
+
+    Returns the header and the number of documents per collection.
+    """
+    header: Optional[Dict[str, Any]] = None
+    counts: Dict[str, int] = {}
+    try:
+        for record in _records(fileobj):
+            if header is None:
+                if record.get('snapshot') != SNAPSHOT_VERSION:
+                    raise SnapshotError("Not a configuration snapshot, or an unsupported version")
+                if record.get('guild_id') != guild_id:
+                    raise SnapshotError(f"Snapshot belongs to guild {record.get('guild_id')}")
+                header = record
+            elif record.get('end'):
+                if {name: n for name, n in (record.get('counts') or {}).items() if n} != counts:
+                    raise SnapshotError("Snapshot document counts do not match its trailer")
+                return header, counts
+            else:
+                name, doc = record.get('c'), record.get('d') or {}
+                field = SNAPSHOT_COLLECTIONS.get(name)
+                if field is None or doc.get(field) != guild_id or '_id' not in doc:
+                    raise SnapshotError(f"Unexpected document in {name}")
+                counts[name] = counts.get(name, 0) + 1
+    except (OSError, EOFError, ValueError) as e:
+        if isinstance(e, SnapshotError):
+            raise
+        raise SnapshotError(f"Unreadable snapshot: {str(e)}")
+    raise SnapshotError("Snapshot is truncated")
+
+class SnapshotRestore:
+    """Applies a validated snapshot to one guild."""
+
+    def __init__(self, db, guild_id: int, diff: bool = False, batch_size: int = 500):
+        self.db = db
+        self.guild_id = guild_id
+        self.diff = diff
+        self.batch_size = batch_size
+        self.stats: Dict[str, RestoreStats] = {}
+        self.logger = get_logger()
+
+    def _add(self, name: str, written: int = 0, unchanged: int = 0, deleted: int = 0, conflicts: int = 0):
+        stats = self.stats.get(name, RestoreStats())
+        self.stats[name] = RestoreStats(stats.written + written, stats.unchanged + unchanged,
+                                        stats.deleted + deleted, stats.conflicts + conflicts)
+
+    async def _flush(self, name: str, docs: List[Dict[str, Any]]):
+        if not docs:
+            return
+        field = SNAPSHOT_COLLECTIONS[name]
+        collection = self.db.get_collection(name)
+        if self.diff:
+            query = {'_id': {'$in': [d['_id'] for d in docs]}, field: self.guild_id}
+            stored = {doc['_id']: doc async for doc in collection.find(query)}
+            changed = [doc for doc in docs if stored.get(doc['_id']) != doc]
+        else:
+            changed = docs
+        conflicts = 0
+        if changed:
+            # Scoped to the guild: an _id taken by another guild fails as a duplicate key
+            # instead of replacing that guild's document
+            ops = [ReplaceOne({'_id': d['_id'], field: self.guild_id}, d, upsert=True) for d in changed]
+            try:
+                await collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get('writeErrors', [])
+                if any(error.get('code') != 11000 for error in errors):
+                    raise
+                conflicts = len(errors)
+                self.logger.warning(f"Skipped {conflicts} {name} documents owned by another guild "
+                                    f"while restoring into {self.guild_id}")
+        self._add(name, written=len(changed) - conflicts, unchanged=len(docs) - len(changed), conflicts=conflicts)
+
+    async def _delete_missing(self, name: str, kept: List[Any]):
+        """Remove the guild's documents that the snapshot does not contain."""
+        field = SNAPSHOT_COLLECTIONS[name]
+        collection = self.db.get_collection(name)
+        if field == '_id':
+            # One document per guild; a single {'_id': ...} filter cannot hold both conditions
+            query = {'_id': self.guild_id} if not kept else None
+        else:
+            query = {field: self.guild_id, '_id': {'$nin': kept}}
+        stale = [doc['_id'] async for doc in collection.find(query, {'_id': 1})] if query else []
+        for start in range(0, len(stale), self.batch_size):
+            batch = stale[start:start + self.batch_size]
+            # The guild field lets TrackedCollection tell which guild changed
+            await collection.bulk_write([DeleteOne({'_id': _id, field: self.guild_id}) for _id in batch], ordered=False)
+        self._add(name, deleted=len(stale))
+
+    async def apply(self, fileobj: BinaryIO) -> Dict[str, RestoreStats]:
+        header, counts = read_header(fileobj, self.guild_id)
+        captured = [name for name in header['collections'] if name in SNAPSHOT_COLLECTIONS]
+        kept: Dict[str, List[Any]] = {name: [] for name in captured}
+        current, batch = None, []
+
+        for record in _records(fileobj):
+            if 'c' not in record:
+                continue
+            name, doc = record['c'], record['d']
+            if name != current or len(batch) >= self.batch_size:
+                await self._flush(current, batch)
+                current, batch = name, []
+            batch.append(doc)
+            kept.setdefault(name, []).append(doc['_id'])
+        await self._flush(current, batch)
+
+        for name in captured:
+            await self._delete_missing(name, kept[name])
+
+        self.logger.info(
+            f"Restored snapshot into {self.guild_id} ({'diff' if self.diff else 'full'}): "
+            + ", ".join(f"{n}={s.written}/{s.unchanged}/{s.deleted}/{s.conflicts}" for n, s in self.stats.items() if any(s))
+        )
+        return self.stats
+
+async def restore_snapshot(db, guild_id: int, fileobj: BinaryIO, diff: bool = False,
+                           batch_size: int = 500) -> Dict[str, RestoreStats]:
+    """Restore ``fileobj`` into ``guild_id``; returns written/unchanged/deleted counts per collection."""
+    return await SnapshotRestore(db, guild_id, diff, batch_size).apply(fileobj)
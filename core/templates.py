@@ -0,0 +1,182 @@
+"""Named configuration templates rolled out to many guilds at once.
+
+A template holds the fields of a guild's single document in each of
+``TEMPLATE_COLLECTIONS``, captured from a source guild. Role and channel
+IDs only mean something in their own guild, so the fields listed in
+``REFERENCES`` are stored by name and resolved again in every target guild
+from discord.py's role and channel cache. Names a target guild lacks are
+dropped and reported.
+
+Applying sends one unordered ``bulk_write`` per collection covering every
+target guild, ``$set``-ing the template fields so unrelated settings stay
+untouched. Only the guilds that were written are notified, so only their
+cached settings are dropped.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import discord
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from core.logger import get_logger
+
+# Collection -> field holding the guild ID; each has one document per guild
+TEMPLATE_COLLECTIONS: Dict[str, str] = {
+    'automod_settings': '_id',
+    'autorole': 'guild_id',
+    'welcome_settings': '_id',
+}
+
+# Collection -> field -> what its IDs refer to. 'roles' is a list of role IDs,
+# 'role_keys' a dict keyed by role ID (autorole level roles).
+REFERENCES: Dict[str, Dict[str, str]] = {
+    'automod_settings': {'bypass_roles': 'roles', 'log_channel': 'channel'},
+    'autorole': {'join_roles': 'roles', 'bot_roles': 'roles', 'boost_roles': 'roles',
+                 'verification_role': 'role', 'level_roles': 'role_keys'},
+    'welcome_settings': {'welcome_channel': 'channel', 'leave_channel': 'channel', 'autorole_id': 'role'},
+}
+
+class TemplateResult(NamedTuple):
+    guild_id: int
+    ok: bool
+    error: Optional[str] = None
+    missing: Tuple[str, ...] = ()
+
+def _name(objects: Dict[int, Any], object_id: Any) -> Optional[str]:
+    obj = objects.get(object_id) if isinstance(object_id, int) else None
+    return obj.name if obj is not None else None
+
+def to_names(guild: discord.Guild, collection: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace the role and channel IDs in ``fields`` with names."""
+    roles = {role.id: role for role in guild.roles}
+    channels = {channel.id: channel for channel in guild.channels}
+    out = dict(fields)
+    for field, kind in REFERENCES.get(collection, {}).items():
+        if field not in out:
+            continue
+        value = out[field]
+        if kind == 'roles':
+            out[field] = [n for n in (_name(roles, v) for v in value or ()) if n]
+        elif kind == 'role':
+            out[field] = _name(roles, value)
+        elif kind == 'channel':
+            out[field] = _name(channels, value)
+        elif kind == 'role_keys':
+            # Stored as pairs; role names are not safe as MongoDB keys
+            pairs = ((_name(roles, int(k)) if str(k).isdigit() else None, v) for k, v in (value or {}).items())
+            out[field] = [[n, v] for n, v in pairs if n]
+    return out
+
+def to_ids(guild: discord.Guild, collection: str, fields: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Resolve the names in a template's fields to ``guild``'s IDs. Returns the fields and what was missing."""
+    roles = {role.name: role.id for role in guild.roles}
+    channels = {channel.name: channel.id for channel in guild.channels}
+    out, missing = dict(fields), []
+
+    def resolve(lookup: Dict[str, int], name: Any, kind: str) -> Optional[int]:
+        if name is None:
+            return None
+        if name not in lookup:
+            missing.append(f"{kind} {name}")
+            return None
+        return lookup[name]
+
+    for field, kind in REFERENCES.get(collection, {}).items():
+        if field not in out:
+            continue
+        value = out[field]
+        if kind == 'roles':
+            out[field] = [i for i in (resolve(roles, n, 'role') for n in value or ()) if i is not None]
+        elif kind == 'role':
+            out[field] = resolve(roles, value, 'role')
+        elif kind == 'channel':
+            out[field] = resolve(channels, value, 'channel')
+        elif kind == 'role_keys':
+            resolved = ((resolve(roles, n, 'role'), v) for n, v in value or ())
+            out[field] = {str(i): v for i, v in resolved if i is not None}
+    return out, missing
+
+class ConfigTemplates:
+    """Stores templates in ``config_templates`` and applies them in bulk."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.db = bot.db
+        self.logger = get_logger()
+
+    async def save(self, name: str, guild: discord.Guild, author_id: int) -> Dict[str, int]:
+        """Capture ``guild``'s configuration as template ``name``. Returns fields per collection."""
+        collections = {}
+        for collection, field in TEMPLATE_COLLECTIONS.items():
+            doc = await self.db.get_collection(collection).find_one({field: guild.id}) or {}
+            fields = {k: v for k, v in doc.items() if k not in ('_id', field)}
+            if fields:
+                collections[collection] = to_names(guild, collection, fields)
+
+        await self.db.config_templates.update_one(
+            {'_id': name},
+            {'$set': {'collections': collections, 'source_guild': guild.id,
+                      'updated_by': author_id, 'updated_at': datetime.utcnow()},
+             '$setOnInsert': {'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+        return {collection: len(fields) for collection, fields in collections.items()}
+
+    async def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return await self.db.config_templates.find_one({'_id': name})
+
+    async def names(self) -> List[str]:
+        return [doc['_id'] async for doc in self.db.config_templates.find({}, {'_id': 1}).sort('_id', 1)]
+
+    async def delete(self, name: str) -> bool:
+        result = await self.db.config_templates.delete_one({'_id': name})
+        return result.deleted_count > 0
+
+    async def apply(self, name: str, guild_ids: Iterable[int]) -> List[TemplateResult]:
+        """Apply template ``name`` to every guild in ``guild_ids``; one result per guild."""
+        template = await self.get(name)
+        if template is None:
+            raise KeyError(name)
+
+        errors: Dict[int, str] = {}
+        missing: Dict[int, List[str]] = {}
+        guilds: List[discord.Guild] = []
+        for guild_id in dict.fromkeys(guild_ids):
+            guild = self.bot.find_guild(guild_id)
+            if guild is None:
+                errors[guild_id] = "Bot is not in this guild on any shard this process runs"
+            else:
+                guilds.append(guild)
+                missing[guild_id] = []
+
+        for collection, template_fields in template.get('collections', {}).items():
+            key = TEMPLATE_COLLECTIONS.get(collection)
+            targets = [g for g in guilds if g.id not in errors]
+            if key is None or not targets:
+                continue
+
+            ops = []
+            for guild in targets:
+                fields, unresolved = to_ids(guild, collection, template_fields)
+                missing[guild.id].extend(unresolved)
+                ops.append(UpdateOne({key: guild.id}, {'$set': fields}, upsert=True))
+
+            failed: Dict[int, str] = {}
+            try:
+                await self.db.get_collection(collection).bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    failed[targets[error['index']].id] = f"{collection}: {error.get('errmsg', 'write failed')}"
+            except PyMongoError as e:
+                failed = {guild.id: f"{collection}: {str(e)}" for guild in targets}
+            errors.update(failed)
+
+        results = []
+        for guild_id in dict.fromkeys(guild_ids):
+            if guild_id in errors:
+                results.append(TemplateResult(guild_id, False, errors[guild_id]))
+            else:
+                results.append(TemplateResult(guild_id, True, missing=tuple(dict.fromkeys(missing[guild_id]))))
+        applied = sum(r.ok for r in results)
+        self.logger.info(f"Applied template {name} to {applied}/{len(results)} guilds")
+        return results
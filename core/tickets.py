@@ -0,0 +1,157 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import discord
+from cachetools import TTLCache
+from pymongo import DESCENDING, ReturnDocument
+from core.logger import get_logger
+from core.settings import TicketSettings
+
+class TicketResult(NamedTuple):
+    number: Optional[int]
+    channel_id: Optional[int]
+    created: bool
+
+class TicketPipeline:
+    """Opens tickets without duplicates, even when users double-click.
+
+    A request passes through three gates before a channel is made:
+
+    - the interaction id: Discord can deliver the same interaction twice, and
+      a repeat gets the first delivery's result (kept for ``request_ttl``);
+    - a per-(guild, user) in-flight task: a second click while the first is
+      still being handled waits for it and gets the same ticket;
+    - the user's open tickets in ``tickets`` against ``tickets.user_limit``.
+
+    Ticket numbers come from one ``find_one_and_update`` ``$inc`` on the
+    guild's document in ``ticket_counters``. Channel creation goes through a
+    per-guild queue drained by one worker that waits ``spacing`` seconds
+    between channels, so a burst of tickets is spread out instead of hitting
+    the channel-create rate limit all at once. The worker exits when its
+    queue is empty.
+    """
+
+    def __init__(self, bot, spacing: float = 1.0, request_ttl: float = 900.0):
+        self.bot = bot
+        self.db = bot.db
+        self.spacing = spacing
+        self.logger = get_logger()
+        self.inflight: Dict[Tuple[int, int], asyncio.Task] = {}
+        self.requests: TTLCache = TTLCache(maxsize=10000, ttl=request_ttl)
+        self.queues: Dict[int, asyncio.Queue] = {}
+        self.workers: Dict[int, asyncio.Task] = {}
+
+    async def next_number(self, guild_id: int) -> int:
+        counter = await self.db.ticket_counters.find_one_and_update(
+            {'_id': guild_id},
+            {'$inc': {'last': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter['last']
+
+    async def open(self, guild: discord.Guild, user: discord.abc.User, interaction_id: int,
+                   category: Optional[discord.CategoryChannel] = None) -> TicketResult:
+        """Open a ticket for ``user``, or return the one an earlier click opened."""
+        task = self.requests.get(interaction_id)
+        if task is None:
+            key = (guild.id, user.id)
+            task = self.inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._open(guild, user, interaction_id, category))
+                self.inflight[key] = task
+                task.add_done_callback(lambda _: self.inflight.pop(key, None))
+            self.requests[interaction_id] = task
+        # Shielded so one caller's cancellation does not cancel the others' ticket
+        return await asyncio.shield(task)
+
+    async def _open(self, guild: discord.Guild, user: discord.abc.User, interaction_id: int,
+                    category: Optional[discord.CategoryChannel]) -> TicketResult:
+        settings = await self.bot.get_settings(TicketSettings, guild.id)
+        limit = max(settings.user_limit, 1)
+        existing = await self.db.tickets.find(
+            {'guild_id': guild.id, 'user_id': user.id, 'status': 'open'},
+            {'number': 1, 'channel_id': 1}
+        ).to_list(length=limit)
+        if len(existing) >= limit:
+            return TicketResult(existing[0].get('number'), existing[0].get('channel_id'), False)
+
+        number = await self.next_number(guild.id)
+        channel = await self.enqueue(guild.id, lambda: self.create_channel(guild, user, number, category))
+        await self.db.tickets.insert_one({
+            'guild_id': guild.id,
+            'user_id': user.id,
+            'number': number,
+            'channel_id': channel.id,
+            'status': 'open',
+            'interaction_id': interaction_id,
+            'created_at': datetime.utcnow()
+        })
+        return TicketResult(number, channel.id, True)
+
+    async def create_channel(self, guild: discord.Guild, user: discord.abc.User, number: int,
+                             category: Optional[discord.CategoryChannel]) -> discord.TextChannel:
+        # Permissions go in with the create call rather than a second request per channel
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(read_messages=False),
+            user: discord.PermissionOverwrite(read_messages=True, send_messages=True),
+            guild.me: discord.PermissionOverwrite(read_messages=True, send_messages=True, manage_channels=True)
+        }
+        channel = await guild.create_text_channel(
+            f"ticket-{number:04d}", category=category, overwrites=overwrites,
+            reason=f"Ticket #{number} opened by {user} ({user.id})"
+        )
+        await channel.send(f"Ticket #{number} created by {user.mention}.")
+        return channel
+
+    async def enqueue(self, guild_id: int, create: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``create`` on the guild's channel queue and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        queue = self.queues.setdefault(guild_id, asyncio.Queue())
+        queue.put_nowait((create, future))
+        worker = self.workers.get(guild_id)
+        if worker is None or worker.done():
+            self.workers[guild_id] = asyncio.create_task(self._drain(guild_id, queue))
+        return await future
+
+    async def _drain(self, guild_id: int, queue: asyncio.Queue):
+        last = 0.0
+        try:
+            while not queue.empty():
+                create, future = queue.get_nowait()
+                if future.cancelled():
+                    continue
+                wait = last + self.spacing - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    future.set_result(await create())
+                except Exception as e:
+                    self.logger.error(f"Error creating ticket channel in {guild_id}: {str(e)}")
+                    if not future.done():
+                        future.set_exception(e)
+                last = time.monotonic()
+        finally:
+            self.workers.pop(guild_id, None)
+            if queue.empty():
+                self.queues.pop(guild_id, None)
+
+    async def get(self, guild_id: int, channel_id: int) -> Optional[Dict[str, Any]]:
+        """The open ticket in ``channel_id``, if it is one."""
+        return await self.db.tickets.find_one({'guild_id': guild_id, 'channel_id': channel_id, 'status': 'open'})
+
+    async def close(self, guild_id: int, channel_id: int, closed_by: int) -> Optional[Dict[str, Any]]:
+        """Mark the ticket in ``channel_id`` closed and return it, if it is one."""
+        return await self.db.tickets.find_one_and_update(
+            {'guild_id': guild_id, 'channel_id': channel_id, 'status': 'open'},
+            {'$set': {'status': 'closed', 'closed_by': closed_by, 'closed_at': datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def open_tickets(self, guild_id: int, limit: int = 25) -> List[Dict[str, Any]]:
+        """Newest open tickets in the guild."""
+        return await self.db.tickets.find(
+            {'guild_id': guild_id, 'status': 'open'}
+        ).sort('created_at', DESCENDING).limit(limit).to_list(length=limit)
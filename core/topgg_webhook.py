@@ -1,18 +1,16 @@
 from aiohttp import web
 import discord
 from core.logger import get_logger
-from core.config import Config
 
 logger = get_logger()
 
 class TopGGWebhook:
     """Handles Top.gg webhook requests for vote notifications"""
+    PATH = "/dblwebhook"
+
     def __init__(self, bot, auth_token: str):
         self.bot = bot
         self.auth_token = auth_token
-        self.app = web.Application()
-        self.app.router.add_post("/dblwebhook", self.handle_webhook)
-        self.webhook_task = None
         self.logger = logger
 
     async def handle_webhook(self, request):
@@ -56,30 +54,10 @@ class TopGGWebhook:
             self.logger.error(f"Error handling Top.gg webhook: {str(e)}")
             return web.Response(status=500)
 
-    async def start(self):
-        """Start the webhook server"""
-        try:
-            runner = web.AppRunner(self.app)
-            await runner.setup()
-            
-            # Get port from config or use default
-            port = getattr(Config, 'TOPGG_WEBHOOK_PORT', 8080)
-            
-            site = web.TCPSite(runner, '0.0.0.0', port)
-            await site.start()
-            
-            self.logger.info(
-                f"Top.gg webhook server started on port {port}",
-                extra={'port': port}
-            )
-            
-        except Exception as e:
-            self.logger.error(f"Error starting Top.gg webhook server: {str(e)}")
+    def register(self, server):
+        """Serve the webhook from the process's web server"""
+        server.add_webhook('POST', self.PATH, self.handle_webhook)
+        self.logger.info(f"Top.gg webhook registered on {self.PATH}")
 
-    async def stop(self):
-        """Stop the webhook server"""
-        try:
-            await self.app.shutdown()
-            self.logger.info("Top.gg webhook server stopped")
-        except Exception as e:
-            self.logger.error(f"Error stopping Top.gg webhook server: {str(e)}")
+    def unregister(self, server):
+        server.remove_webhook('POST', self.PATH, self.handle_webhook)
@@ -0,0 +1,129 @@
+"""Streaming channel transcripts.
+
+``channel.history()`` is consumed one API page at a time; each page is
+rendered and pushed through a gzip stream into a ``SpooledTemporaryFile``
+that rolls over to disk past ``spool_size``. Only the current page is ever
+held in memory, so peak memory does not grow with channel length.
+Attachments are linked, never downloaded.
+"""
+import gzip
+import html
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Tuple
+
+import discord
+
+HTML_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body{{font-family:sans-serif;background:#313338;color:#dbdee1;margin:0;padding:16px}}
+.m{{padding:4px 0;border-bottom:1px solid #3f4147}}
+.a{{font-weight:bold;color:#f2f3f5}}.t{{color:#949ba4;font-size:12px;margin-left:6px}}
+.c{{white-space:pre-wrap;margin-top:2px}}.e{{border-left:4px solid #5865f2;padding-left:8px;margin-top:4px}}
+a{{color:#00a8fc}}
+</style></head><body>
+<h2>{title}</h2>
+"""
+HTML_FOOT = "<p class=\"t\">{count} messages &middot; exported {exported}</p></body></html>\n"
+
+def _timestamp(message) -> str:
+    return message.created_at.strftime("%Y-%m-%d %H:%M:%S UTC")
+
+def render_text(message) -> str:
+    lines = [f"[{_timestamp(message)}] {message.author} ({message.author.id}): {message.content}"]
+    for embed in message.embeds:
+        lines.append(f"    [embed] {embed.title or ''} {embed.description or ''}".rstrip())
+    for attachment in message.attachments:
+        lines.append(f"    [attachment] {attachment.filename} ({attachment.size} bytes) {attachment.url}")
+    return "\n".join(lines) + "\n"
+
+def render_html(message) -> str:
+    parts = [
+        f'<div class="m"><span class="a">{html.escape(str(message.author))}</span>'
+        f'<span class="t">{_timestamp(message)}</span>'
+    ]
+    if message.content:
+        parts.append(f'<div class="c">{html.escape(message.content)}</div>')
+    for embed in message.embeds:
+        parts.append(
+            f'<div class="e"><b>{html.escape(embed.title or "")}</b>'
+            f'<div class="c">{html.escape(embed.description or "")}</div></div>'
+        )
+    for attachment in message.attachments:
+        parts.append(
+            f'<div><a href="{html.escape(attachment.url, quote=True)}">{html.escape(attachment.filename)}</a>'
+            f' <span class="t">{attachment.size} bytes</span></div>'
+        )
+    parts.append("</div>\n")
+    return "".join(parts)
+
+class TranscriptWriter:
+    """Incrementally writes a gzip-compressed text or HTML transcript to a spooled file."""
+
+    def __init__(self, title: str, fmt: str = "html", spool_size: int = 1024 * 1024):
+        if fmt not in ("html", "txt"):
+            raise ValueError(f"Unknown transcript format: {fmt}")
+        self.title = title
+        self.fmt = fmt
+        self.count = 0
+        self.spool = tempfile.SpooledTemporaryFile(max_size=spool_size, mode="w+b")
+        self._gzip = gzip.GzipFile(fileobj=self.spool, mode="wb", compresslevel=6)
+        self._render = render_html if fmt == "html" else render_text
+        if fmt == "html":
+            self._write(HTML_HEAD.format(title=html.escape(title)))
+        else:
+            self._write(f"{title}\n{'=' * len(title)}\n")
+
+    def _write(self, text: str):
+        self._gzip.write(text.encode("utf-8"))
+
+    def write_page(self, messages: List[Any]):
+        self._write("".join(self._render(message) for message in messages))
+        self.count += len(messages)
+
+    def finish(self) -> tempfile.SpooledTemporaryFile:
+        exported = datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC")
+        if self.fmt == "html":
+            self._write(HTML_FOOT.format(count=self.count, exported=exported))
+        else:
+            self._write(f"\n{self.count} messages, exported {exported}\n")
+        self._gzip.close()
+        self.spool.seek(0)
+        return self.spool
+
+    def close(self):
+        self._gzip.close()
+        self.spool.close()
+
+async def write_transcript(channel, title: str, fmt: str = "html", page_size: int = 100,
+                           include: Optional[Callable[[Any], bool]] = None,
+                           spool_size: int = 1024 * 1024) -> Tuple[tempfile.SpooledTemporaryFile, int]:
+    """Stream ``channel``'s history, oldest first, into a compressed spooled file.
+
+    ``page_size`` matches the history API page, so one request's worth of
+    messages is rendered and compressed at a time. Returns the file, rewound,
+    and the number of messages written.
+    """
+    writer = TranscriptWriter(title, fmt, spool_size)
+    try:
+        page = []
+        async for message in channel.history(limit=None, oldest_first=True):
+            if include is not None and not include(message):
+                continue
+            page.append(message)
+            if len(page) >= page_size:
+                writer.write_page(page)
+                page = []
+        if page:
+            writer.write_page(page)
+        return writer.finish(), writer.count
+    except BaseException:
+        writer.close()
+        raise
+
+async def export_transcript(channel, title: str, filename: str, fmt: str = "html",
+                            **kwargs) -> Tuple[discord.File, int]:
+    """Build a transcript ready to upload; discord.File closes the spool once sent."""
+    spool, count = await write_transcript(channel, title, fmt, **kwargs)
+    return discord.File(spool, filename=f"{filename}.{fmt}.gz"), count
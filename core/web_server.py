@@ -0,0 +1,186 @@
+"""The process's single embedded HTTP server.
+
+One aiohttp app on ``WEB_PORT`` serves everything the bot exposes:
+
+- ``/metrics``: the Prometheus exposition, rendered in a worker thread at
+  most once per ``metrics_ttl`` seconds. Scrapes in between get the cached
+  bytes, and concurrent scrapes share one render;
+- ``/healthz``: liveness. It answers from the event loop without touching
+  Discord, MongoDB or the metrics registry, so it is as cheap as a request
+  can be;
+- ``/readyz``: readiness. It returns per-shard gateway state for every bot in
+  the process plus the database circuit breaker, with 503 until all are up;
+- webhooks: handlers registered with ``add_webhook`` (Top.gg votes on
+  ``/dblwebhook``, the YouTube WebSub callback). They are looked up per
+  request, so a cog can add or remove its routes after the server started.
+
+In cluster mode several processes set ``PROMETHEUS_MULTIPROC_DIR``. Each
+process's metrics then go to files there, ``/metrics`` aggregates all of
+them, and the processes share the port with ``SO_REUSEPORT``, so whichever
+answers a scrape reports the whole cluster. Custom collectors (the cache
+gauges) are not written to those files; the answering process adds its own,
+labelled by shard. ``/healthz`` and ``/readyz`` are not aggregated: they
+describe only the process the kernel handed the request to, so a readiness
+probe on the shared port checks one random worker.
+"""
+import asyncio
+import math
+import os
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from core.logger import get_logger
+
+WebhookHandler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+def multiprocess_dir() -> Optional[str]:
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.getenv("prometheus_multiproc_dir")
+
+# Default collectors that describe only the worker answering the scrape
+PROCESS_LOCAL_PREFIXES = ('process_', 'python_')
+
+class _Families:
+    """Already collected metric families, for rendering with ``generate_latest``."""
+
+    def __init__(self, families: List):
+        self.families = families
+
+    def collect(self):
+        return self.families
+
+def render_metrics() -> bytes:
+    """The exposition for this process, or for every process in cluster mode."""
+    if not multiprocess_dir():
+        return generate_latest(REGISTRY)
+    shared = CollectorRegistry()
+    multiprocess.MultiProcessCollector(shared)
+    families = list(shared.collect())
+    # Counters, gauges and histograms come back from the files above; anything
+    # else in the local registry is a custom collector the files never see
+    names = {family.name for family in families}
+    families.extend(
+        family for family in REGISTRY.collect()
+        if family.name not in names and not family.name.startswith(PROCESS_LOCAL_PREFIXES)
+    )
+    registry = CollectorRegistry()
+    registry.register(_Families(families))
+    return generate_latest(registry)
+
+class WebServer:
+    """Metrics, health probes and webhooks on one port."""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8000, metrics_ttl: float = 5.0):
+        self.host = host
+        self.port = port
+        self.metrics_ttl = metrics_ttl
+        self.bots: List = []
+        self.webhooks: Dict[Tuple[str, str], WebhookHandler] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.logger = get_logger()
+
+        self._metrics: Optional[bytes] = None
+        self._rendered_at = 0.0
+        self._render: Optional[asyncio.Future] = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.handle_metrics)
+        self.app.router.add_get('/healthz', self.handle_healthz)
+        self.app.router.add_get('/readyz', self.handle_readyz)
+        self.app.router.add_route('*', '/{path:.*}', self.handle_webhook)
+
+    def add_bot(self, bot):
+        if bot not in self.bots:
+            self.bots.append(bot)
+
+    def remove_bot(self, bot):
+        if bot in self.bots:
+            self.bots.remove(bot)
+
+    def add_webhook(self, method: str, path: str, handler: WebhookHandler):
+        """Route ``method path`` to ``handler``; a later registration replaces an earlier one."""
+        self.webhooks[(method.upper(), path)] = handler
+
+    def remove_webhook(self, method: str, path: str, handler: Optional[WebhookHandler] = None):
+        """Drop the route, only if it still points at ``handler`` when one is given."""
+        key = (method.upper(), path)
+        if handler is None or self.webhooks.get(key) == handler:
+            self.webhooks.pop(key, None)
+
+    async def metrics(self) -> bytes:
+        if self._metrics is not None and time.monotonic() - self._rendered_at < self.metrics_ttl:
+            return self._metrics
+        if self._render is None:
+            # Rendering walks every collector; keep it off the event loop and do it once
+            self._render = asyncio.get_running_loop().run_in_executor(None, render_metrics)
+            try:
+                self._metrics = await self._render
+                self._rendered_at = time.monotonic()
+            finally:
+                self._render = None
+            return self._metrics
+        return await asyncio.shield(self._render)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        try:
+            body = await self.metrics()
+        except Exception as e:
+            self.logger.error(f"Error rendering metrics: {str(e)}")
+            return web.Response(status=500)
+        return web.Response(body=body, headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+    async def handle_healthz(self, request: web.Request) -> web.Response:
+        return web.Response(text="ok")
+
+    def readiness(self) -> Tuple[bool, dict]:
+        shards = []
+        database = True
+        for bot in self.bots:
+            ready = bot.is_ready()
+            for shard_id, shard in sorted(bot.shards.items()):
+                latency = shard.latency
+                shards.append({
+                    'shard_id': shard_id,
+                    'ready': ready and not shard.is_closed(),
+                    'latency_ms': round(latency * 1000) if math.isfinite(latency) else None,
+                })
+            if getattr(bot.db, 'degraded', False):
+                database = False
+        ok = bool(shards) and database and all(shard['ready'] for shard in shards)
+        return ok, {'ready': ok, 'database': database, 'shards': shards}
+
+    async def handle_readyz(self, request: web.Request) -> web.Response:
+        ok, body = self.readiness()
+        return web.json_response(body, status=200 if ok else 503)
+
+    async def handle_webhook(self, request: web.Request) -> web.StreamResponse:
+        handler = self.webhooks.get((request.method, request.path))
+        if handler is None:
+            allowed = any(path == request.path for _, path in self.webhooks)
+            return web.Response(status=405 if allowed else 404)
+        return await handler(request)
+
+    async def start(self):
+        """Start the server"""
+        try:
+            self.runner = web.AppRunner(self.app, access_log=None)
+            await self.runner.setup()
+            # Cluster processes share the port; any of them can answer
+            site = web.TCPSite(self.runner, self.host, self.port, reuse_port=bool(multiprocess_dir()) or None)
+            await site.start()
+            self.logger.info(f"Web server started on port {self.port}")
+        except Exception as e:
+            self.logger.error(f"Error starting web server: {str(e)}")
+
+    async def stop(self):
+        """Stop the server"""
+        try:
+            if self.runner is not None:
+                await self.runner.cleanup()
+                self.runner = None
+            if multiprocess_dir():
+                multiprocess.mark_process_dead(os.getpid())
+            self.logger.info("Web server stopped")
+        except Exception as e:
+            self.logger.error(f"Error stopping web server: {str(e)}")
@@ -0,0 +1,233 @@
+"""WebSub (PubSubHubbub) push notifications for YouTube uploads.
+
+YouTube publishes every channel's upload feed through a WebSub hub. Instead
+of waiting for the next poll, the bot subscribes its callback URL to a
+channel's topic and the hub POSTs the Atom entry the moment a video goes up.
+
+A subscription goes through the usual WebSub handshake:
+
+- ``subscribe`` records the channel as ``pending`` in ``yt_websub`` and asks
+  the hub for a lease of ``lease_seconds``;
+- the hub confirms with a GET carrying ``hub.challenge``, which is echoed
+  back only for a topic whose request is still pending (renewals go back to
+  pending too). The callback is unauthenticated, so the hub's lease is
+  capped at ``lease_seconds``; the expiry is stored and a ``websub_renew``
+  scheduler job is set ``renew_margin`` before it ends;
+- notifications are POSTed with ``X-Hub-Signature``, an HMAC of the body
+  keyed with the subscription secret. Unsigned or mis-signed bodies are
+  acknowledged (as the spec requires) and dropped.
+
+Payloads are parsed with ``core.youtube.parse_feed`` and go through the
+same ``FeedPoller.plan``/``deliver`` fan-out as polled feeds. Both paths
+move the same ``last`` markers, so a video one of them announced is not
+announced again by the other. Channels without an active lease are left to
+the poller.
+"""
+import asyncio
+import hmac
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+from aiohttp import web
+from core.logger import get_logger
+from core.youtube import FeedPoller, Video, parse_feed
+
+HUB_URL = "https://pubsubhubbub.appspot.com/subscribe"
+TOPIC_URL = "https://www.youtube.com/xml/feeds/videos.xml?channel_id={channel_id}"
+CALLBACK_PATH = "/websub/youtube"
+
+SIGNATURE_ALGORITHMS = {'sha1', 'sha256', 'sha384', 'sha512'}
+MAX_PAYLOAD = 1024 * 1024
+
+def topic_channel(topic: str) -> Optional[str]:
+    """The channel ID in a YouTube topic URL."""
+    values = parse_qs(urlparse(topic or "").query).get('channel_id')
+    return values[0] if values else None
+
+def sign(secret: str, body: bytes, algorithm: str = 'sha1') -> str:
+    return f"{algorithm}={hmac.new(secret.encode(), body, algorithm).hexdigest()}"
+
+def verify_signature(secret: str, body: bytes, header: Optional[str]) -> bool:
+    """Check an ``X-Hub-Signature`` header (``<algorithm>=<hex digest>``) against ``body``."""
+    algorithm, _, digest = (header or "").partition("=")
+    if algorithm not in SIGNATURE_ALGORITHMS or not digest:
+        return False
+    return hmac.compare_digest(sign(secret, body, algorithm), f"{algorithm}={digest.lower()}")
+
+class WebSubReceiver:
+    """Subscribes YouTube topics at a hub and feeds its notifications to ``poller``."""
+
+    def __init__(self, db, poller: FeedPoller, scheduler, callback_url: str, secret: str,
+                 hub_url: str = HUB_URL, lease_seconds: int = 432000, renew_margin: int = 3600):
+        self.db = db
+        self.http = poller.http
+        self.poller = poller
+        self.scheduler = scheduler
+        self.callback_url = callback_url
+        self.secret = secret
+        self.hub_url = hub_url
+        self.lease_seconds = lease_seconds
+        self.renew_margin = min(renew_margin, lease_seconds // 2)
+        self.tasks: Set[asyncio.Task] = set()
+        self.logger = get_logger()
+        scheduler.register('websub_renew', self.renew)
+
+    def register(self, server):
+        """Serve the callback from the process's web server"""
+        server.add_webhook('GET', CALLBACK_PATH, self.handle_verify)
+        server.add_webhook('POST', CALLBACK_PATH, self.handle_notify)
+
+    def unregister(self, server):
+        server.remove_webhook('GET', CALLBACK_PATH, self.handle_verify)
+        server.remove_webhook('POST', CALLBACK_PATH, self.handle_notify)
+
+    async def _request(self, mode: str, channel_id: str):
+        data = {
+            'hub.callback': self.callback_url,
+            'hub.mode': mode,
+            'hub.topic': TOPIC_URL.format(channel_id=channel_id),
+            'hub.verify': 'async',
+        }
+        if mode == 'subscribe':
+            data['hub.secret'] = self.secret
+            data['hub.lease_seconds'] = str(self.lease_seconds)
+        async with self.http.post(self.hub_url, data=data) as response:
+            if response.status not in (202, 204):
+                raise aiohttp.ClientResponseError(
+                    response.request_info, response.history, status=response.status,
+                    message=f"Hub refused {mode} for {channel_id}"
+                )
+
+    async def subscribe(self, channel_id: str):
+        # Recorded first: the hub may verify before its response reaches us
+        await self.db.yt_websub.update_one(
+            {'_id': channel_id},
+            {'$set': {'state': 'pending', 'requested_at': datetime.utcnow()}},
+            upsert=True
+        )
+        await self._request('subscribe', channel_id)
+
+    async def unsubscribe(self, channel_id: str):
+        await self.db.yt_websub.update_one(
+            {'_id': channel_id},
+            {'$set': {'state': 'unsubscribing', 'requested_at': datetime.utcnow()}},
+            upsert=True
+        )
+        await self.scheduler.cancel(f"websub:{channel_id}")
+        await self._request('unsubscribe', channel_id)
+
+    async def active(self) -> Set[str]:
+        """Channels whose lease is verified and has not run out."""
+        query = {'state': 'active', 'expires_at': {'$gt': datetime.utcnow()}}
+        return {doc['_id'] async for doc in self.db.yt_websub.find(query, {'_id': 1})}
+
+    async def sync(self, channel_ids: Iterable[str], retry_after: int = 600, concurrency: int = 10):
+        """Subscribe every channel in ``channel_ids`` that has no live or recently requested lease."""
+        wanted = set(channel_ids)
+        now = datetime.utcnow()
+        states = {doc['_id']: doc async for doc in self.db.yt_websub.find({'_id': {'$in': list(wanted)}})}
+        missing = []
+        for channel_id in wanted:
+            state = states.get(channel_id, {})
+            if state.get('state') == 'active' and state.get('expires_at') and state['expires_at'] > now:
+                continue
+            requested_at = state.get('requested_at')
+            if state.get('state') in ('pending', 'denied') and requested_at and requested_at > now - timedelta(seconds=retry_after):
+                continue
+            missing.append(channel_id)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request(channel_id: str):
+            async with semaphore:
+                try:
+                    await self.subscribe(channel_id)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    self.logger.error(f"Error subscribing to WebSub topic {channel_id}: {str(e)}")
+
+        await asyncio.gather(*(request(channel_id) for channel_id in missing))
+        return len(missing)
+
+    async def renew(self, payload: Dict[str, Any]):
+        """Scheduler job: renew the lease, or drop it if nobody follows the channel any more."""
+        channel_id = payload['channel_id']
+        if await self.poller.subscribers([channel_id]):
+            await self.subscribe(channel_id)
+        else:
+            await self.unsubscribe(channel_id)
+
+    async def handle_verify(self, request: web.Request) -> web.Response:
+        """Hub intent verification; echo the challenge only for topics we asked for."""
+        mode = request.query.get('hub.mode')
+        channel_id = topic_channel(request.query.get('hub.topic'))
+        challenge = request.query.get('hub.challenge')
+        state = await self.db.yt_websub.find_one({'_id': channel_id}) if channel_id else None
+
+        if mode == 'denied' and state is not None:
+            self.logger.warning(f"WebSub hub denied {channel_id}: {request.query.get('hub.reason')}")
+            await self.db.yt_websub.update_one({'_id': channel_id}, {'$set': {'state': 'denied'}})
+            return web.Response(status=200)
+        if not challenge or state is None:
+            return web.Response(status=404)
+
+        if mode == 'subscribe' and state.get('state') == 'pending':
+            try:
+                lease = int(request.query.get('hub.lease_seconds', self.lease_seconds))
+            except ValueError:
+                lease = self.lease_seconds
+            # Anyone can send this GET; never store a longer lease than we asked for
+            lease = min(max(lease, 1), self.lease_seconds)
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=lease)
+            await self.db.yt_websub.update_one(
+                {'_id': channel_id},
+                {'$set': {'state': 'active', 'verified_at': now, 'expires_at': expires_at}}
+            )
+            await self.scheduler.schedule(
+                'websub_renew',
+                expires_at - timedelta(seconds=min(self.renew_margin, lease // 2)),
+                {'channel_id': channel_id},
+                key=f"websub:{channel_id}"
+            )
+            return web.Response(status=200, text=challenge)
+
+        if mode == 'unsubscribe' and state.get('state') == 'unsubscribing':
+            await self.db.yt_websub.delete_one({'_id': channel_id})
+            return web.Response(status=200, text=challenge)
+
+        return web.Response(status=404)
+
+    async def handle_notify(self, request: web.Request) -> web.Response:
+        """A pushed Atom payload; always acknowledged so the hub does not retry it."""
+        if (request.content_length or 0) > MAX_PAYLOAD:
+            return web.Response(status=413)
+        body = await request.read()
+        if not verify_signature(self.secret, body, request.headers.get('X-Hub-Signature')):
+            self.logger.warning("Dropped WebSub notification with a bad signature", extra={'ip': request.remote})
+            return web.Response(status=202)
+
+        try:
+            videos = parse_feed(body)
+        except Exception as e:
+            self.logger.error(f"Error parsing WebSub notification: {str(e)}")
+            return web.Response(status=202)
+
+        # Answered straight away; a popular channel's fan-out can outlast the hub's timeout
+        task = asyncio.create_task(self.deliver(videos))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return web.Response(status=204)
+
+    async def deliver(self, videos: List[Video]):
+        by_channel: Dict[str, List[Video]] = {}
+        for video in videos:
+            by_channel.setdefault(video.channel_id, []).append(video)
+        for channel_id, channel_videos in by_channel.items():
+            try:
+                subscribers = (await self.poller.subscribers([channel_id])).get(channel_id, [])
+                deliveries, updates = self.poller.plan(channel_id, channel_videos, subscribers)
+                await self.poller.deliver(deliveries, updates)
+            except Exception as e:
+                self.logger.error(f"Error delivering WebSub notification for {channel_id}: {str(e)}")
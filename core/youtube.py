@@ -0,0 +1,264 @@
+"""YouTube upload polling over the public Atom feeds.
+
+Every channel's uploads are published at ``FEED_URL`` without an API key or
+quota. ``FeedPoller.poll`` reads ``yt_subscriptions`` once, groups the
+subscribers by YouTube channel so a channel followed by 500 guilds is
+fetched once, and fetches the feeds concurrently under a semaphore. Each
+feed's ``ETag`` and ``Last-Modified`` are kept in ``yt_feeds`` and sent
+back as ``If-None-Match``/``If-Modified-Since``, so an unchanged feed costs
+a bodyless 304.
+
+Feeds list entries newest first. ``FeedParser`` yields each entry as soon as
+its closing tag arrives, and a fetch stops reading once it reaches an entry
+every subscriber has already seen. New videos are handed to ``notify`` once
+per video with all the Discord channels that should get it, and every
+subscriber's ``last`` is moved forward in one ``bulk_write``.
+"""
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from xml.etree import ElementTree
+
+import aiohttp
+from pymongo import UpdateOne
+from core.logger import get_logger
+
+FEED_URL = "https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+YT = "{http://www.youtube.com/xml/schemas/2015}"
+
+class Video(NamedTuple):
+    video_id: str
+    channel_id: str
+    title: str
+    url: str
+    author: str
+    published: datetime
+
+class Subscriber(NamedTuple):
+    guild_id: int
+    channel_id: int
+    last: Optional[datetime]
+
+class FeedResult(NamedTuple):
+    channel_id: str
+    status: int
+    etag: Optional[str]
+    last_modified: Optional[str]
+    videos: List[Video]
+
+class PollStats(NamedTuple):
+    channels: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    failed: int = 0
+    videos: int = 0
+    deliveries: int = 0
+
+# Sends one video to every Discord channel in the list
+Notify = Callable[[Video, List[int]], Awaitable[Any]]
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """A feed or stored timestamp as an aware datetime; None if missing or unreadable."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _video(entry: ElementTree.Element) -> Optional[Video]:
+    video_id = entry.findtext(f"{YT}videoId")
+    published = parse_time(entry.findtext(f"{ATOM}published"))
+    if not video_id or published is None:
+        return None
+    link = entry.find(f"{ATOM}link")
+    return Video(
+        video_id=video_id,
+        channel_id=entry.findtext(f"{YT}channelId") or "",
+        title=entry.findtext(f"{ATOM}title") or "",
+        url=link.get("href") if link is not None else f"https://www.youtube.com/watch?v={video_id}",
+        author=entry.findtext(f"{ATOM}author/{ATOM}name") or "",
+        published=published,
+    )
+
+class FeedParser:
+    """Incremental Atom parser: ``feed`` bytes as they arrive, get finished entries back."""
+
+    def __init__(self):
+        self.parser = ElementTree.XMLPullParser(events=("end",))
+
+    def _drain(self) -> List[Video]:
+        videos = []
+        for _, element in self.parser.read_events():
+            if element.tag == f"{ATOM}entry":
+                video = _video(element)
+                if video is not None:
+                    videos.append(video)
+                element.clear()
+        return videos
+
+    def feed(self, data: bytes) -> List[Video]:
+        self.parser.feed(data)
+        return self._drain()
+
+    def close(self) -> List[Video]:
+        self.parser.close()
+        return self._drain()
+
+def parse_feed(data: bytes) -> List[Video]:
+    """Every entry in a complete Atom document."""
+    parser = FeedParser()
+    return parser.feed(data) + parser.close()
+
+class FeedPoller:
+    """Fetches each subscribed channel's feed once per poll and fans new videos out."""
+
+    def __init__(self, db, http, notify: Notify, concurrency: int = 20, timeout: float = 15.0,
+                 feed_url: str = FEED_URL):
+        self.db = db
+        self.http = http
+        self.notify = notify
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.feed_url = feed_url
+        self.logger = get_logger()
+
+    async def subscribers(self, channel_ids: Optional[Iterable[str]] = None) -> Dict[str, List[Subscriber]]:
+        """Subscribers grouped by YouTube channel, optionally only for ``channel_ids``."""
+        query = {'feeds.channel_id': {'$in': list(channel_ids)}} if channel_ids is not None else {}
+        wanted = set(query['feeds.channel_id']['$in']) if query else None
+        grouped: Dict[str, List[Subscriber]] = defaultdict(list)
+        async for doc in self.db.yt_subscriptions.find(query, {'feeds': 1}):
+            for feed in doc.get('feeds', []):
+                channel_id = feed.get('channel_id')
+                if not channel_id or not feed.get('webhook_channel') or (wanted is not None and channel_id not in wanted):
+                    continue
+                grouped[channel_id].append(Subscriber(doc['_id'], feed['webhook_channel'], parse_time(feed.get('last'))))
+        return dict(grouped)
+
+    async def fetch(self, channel_id: str, state: Dict[str, Any], seen: Optional[datetime]) -> FeedResult:
+        """Conditionally GET one feed, reading entries only until one published at or before ``seen``."""
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+
+        try:
+            async with self.http.get(self.feed_url.format(channel_id=channel_id), headers=headers,
+                                     timeout=self.timeout) as response:
+                if response.status == 304:
+                    return FeedResult(channel_id, 304, state.get('etag'), state.get('last_modified'), [])
+                if response.status != 200:
+                    self.logger.warning(f"YouTube feed {channel_id} returned HTTP {response.status}")
+                    return FeedResult(channel_id, response.status, state.get('etag'), state.get('last_modified'), [])
+
+                parser, videos, done = FeedParser(), [], False
+                async for chunk in response.content.iter_chunked(16 * 1024):
+                    for video in parser.feed(chunk):
+                        if seen is not None and video.published <= seen:
+                            done = True
+                            break
+                        videos.append(video)
+                    if done:
+                        break
+                else:
+                    videos.extend(v for v in parser.close() if seen is None or v.published > seen)
+                return FeedResult(channel_id, 200, response.headers.get('ETag'),
+                                  response.headers.get('Last-Modified'), videos)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ElementTree.ParseError) as e:
+            self.logger.error(f"Error fetching YouTube feed {channel_id}: {str(e)}")
+            return FeedResult(channel_id, 0, state.get('etag'), state.get('last_modified'), [])
+
+    def plan(self, channel_id: str, videos: List[Video],
+             subscribers: List[Subscriber]) -> Tuple[Dict[Video, List[int]], List[UpdateOne]]:
+        """Which Discord channels get which videos, and the updates moving each subscriber's ``last``.
+
+        A subscriber without ``last`` (added before this poller) is caught up
+        to the newest video without being notified of the backlog.
+        """
+        deliveries: Dict[Video, List[int]] = defaultdict(list)
+        updates: List[UpdateOne] = []
+        if not videos:
+            return {}, []
+        newest = max(video.published for video in videos)
+        ordered = sorted(videos, key=lambda video: video.published)
+        for subscriber in subscribers:
+            if subscriber.last is not None and subscriber.last >= newest:
+                continue
+            if subscriber.last is not None:
+                for video in ordered:
+                    if video.published > subscriber.last:
+                        deliveries[video].append(subscriber.channel_id)
+            updates.append(UpdateOne(
+                {'_id': subscriber.guild_id},
+                {'$set': {'feeds.$[f].last': newest.isoformat()}},
+                array_filters=[{'f.channel_id': channel_id, 'f.webhook_channel': subscriber.channel_id}]
+            ))
+        return dict(deliveries), updates
+
+    async def deliver(self, deliveries: Dict[Video, List[int]], updates: List[UpdateOne]) -> int:
+        """Notify every video's channels concurrently, then save the subscribers' progress."""
+        results = await asyncio.gather(
+            *(self.notify(video, channels) for video, channels in sorted(deliveries.items(), key=lambda i: i[0].published)),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"Error sending YouTube notification: {str(result)}")
+        if updates:
+            await self.db.yt_subscriptions.bulk_write(updates, ordered=False)
+        return sum(len(channels) for channels in deliveries.values())
+
+    async def poll(self, channel_ids: Optional[Iterable[str]] = None, exclude: Iterable[str] = ()) -> PollStats:
+        """Check every subscribed feed (or only ``channel_ids``) once, skipping ``exclude``."""
+        subscribers = await self.subscribers(channel_ids)
+        for channel_id in exclude:
+            subscribers.pop(channel_id, None)
+        if not subscribers:
+            return PollStats()
+        states = {doc['_id']: doc async for doc in self.db.yt_feeds.find({'_id': {'$in': list(subscribers)}})}
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(channel_id: str) -> FeedResult:
+            subs = subscribers[channel_id]
+            # Entries at or before the oldest subscriber's last video are not read
+            seen = None if any(s.last is None for s in subs) else min(s.last for s in subs)
+            async with semaphore:
+                return await self.fetch(channel_id, states.get(channel_id, {}), seen)
+
+        results = await asyncio.gather(*(fetch(channel_id) for channel_id in subscribers))
+
+        deliveries: Dict[Video, List[int]] = {}
+        updates: List[UpdateOne] = []
+        states_ops: List[UpdateOne] = []
+        now = datetime.utcnow()
+        for result in results:
+            planned, ops = self.plan(result.channel_id, result.videos, subscribers[result.channel_id])
+            deliveries.update(planned)
+            updates.extend(ops)
+            states_ops.append(UpdateOne(
+                {'_id': result.channel_id},
+                {'$set': {'etag': result.etag, 'last_modified': result.last_modified,
+                          'status': result.status, 'checked_at': now}},
+                upsert=True
+            ))
+
+        delivered = await self.deliver(deliveries, updates)
+        await self.db.yt_feeds.bulk_write(states_ops, ordered=False)
+
+        stats = PollStats(
+            channels=len(results),
+            fetched=sum(r.status == 200 for r in results),
+            not_modified=sum(r.status == 304 for r in results),
+            failed=sum(r.status not in (200, 304) for r in results),
+            videos=len(deliveries),
+            deliveries=delivered,
+        )
+        self.logger.info(f"Polled {stats.channels} YouTube feeds: {stats.fetched} changed, "
+                         f"{stats.not_modified} unchanged, {stats.failed} failed, {stats.deliveries} notifications")
+        return stats
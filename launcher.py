@@ -4,9 +4,10 @@ import asyncio
 import logging
 from core.bot import Bot
 from core.config import Config
-from core.logger import get_logger
+from core.http_client import HTTPService
+from core.logger import get_logger, use_http_client
+from core.web_server import WebServer
 import discord
-from prometheus_client import start_http_server
 import uvloop
 import signal
 import psutil
@@ -19,6 +20,10 @@ class Launcher:
     def __init__(self):
         self.loop = asyncio.get_event_loop()
         self.bots = []
+        self.web = WebServer(port=Config.WEB_PORT, metrics_ttl=Config.METRICS_CACHE_TTL)
+        # One outgoing HTTP pool for every shard in this process
+        self.http = HTTPService.from_config()
+        use_http_client(self.http)
         self.shutting_down = False
         
         # Set up signal handlers
@@ -42,16 +47,17 @@ class Launcher:
         
         # Close all bots
         await asyncio.gather(*[bot.close() for bot in self.bots])
+        await self.web.stop()
+        await self.http.close()
         
         # Stop the event loop
         self.loop.stop()
 
     async def launch(self):
         """Launch bot shards."""
-        # Start Prometheus metrics server
-        if Config.PROMETHEUS_PORT:
-            start_http_server(Config.PROMETHEUS_PORT)
-            get_logger().info(f"Prometheus metrics server started on port {Config.PROMETHEUS_PORT}")
+        # One server for metrics, health probes and webhooks; up before the shards so probes answer
+        if Config.WEB_PORT:
+            await self.web.start()
         
         try:
             # Calculate shard distribution
@@ -63,7 +69,11 @@ class Launcher:
                 Config.SHARD_IDS = [shard_id]
                 
                 # Create bot instance
-                bot = Bot()
+                bot = Bot(http_client=self.http)
+                bot.peers = self.bots  # lets each shard resolve guilds owned by the others
+                if Config.WEB_PORT:
+                    bot.web_server = self.web
+                    self.web.add_bot(bot)
                 
                 self.bots.append(bot)
                 
@@ -140,6 +150,8 @@ class Launcher:
             # Close all bot instances
             for bot in self.bots:
                 await bot.close()
+            await self.web.stop()
+            await self.http.close()
             
             # Clear any remaining tasks
             pending = asyncio.all_tasks(self.loop)
@@ -0,0 +1,535 @@
+"""Shared test helpers: the benchmark marker and an in-memory stand-in for motor.
+
+``FakeDB`` hands out ``FakeCollection``s by attribute, item or
+``get_collection``, like ``core.database.Database``. The collections
+understand the query and update operators the bot's code sends, count
+reads, record writes and bulk batches, and raise the same pymongo errors
+(E11000 on a taken ``_id``) as a server would. ``FakeDB(tracked=True)``
+routes the configured-guild collections through ``TrackedCollection``
+with a ``FakeConfigured`` that records what was marked and notified.
+"""
+import copy
+import gc
+import re
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import pytest
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from core.guild_index import TRACKED_COLLECTIONS, TrackedCollection
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", default=False, help="run tests marked benchmark")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: slow memory/throughput measurements, skipped unless --benchmark")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="benchmark; run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+def _retained(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+@pytest.fixture
+def retained():
+    """Bytes still allocated after ``build()`` returns, while its result is alive."""
+    return _retained
+
+def _freeze(value):
+    """A hashable stand-in for ``value``, so compound ``_id``s can key a dict."""
+    if isinstance(value, dict):
+        return tuple((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+_MISSING = object()
+
+def _values(doc, path: str) -> List[Any]:
+    """Every value at dotted ``path``, descending into arrays as MongoDB does."""
+    current = [doc]
+    for part in path.split('.'):
+        found = []
+        for value in current:
+            if isinstance(value, dict) and part in value:
+                found.append(value[part])
+            elif isinstance(value, list):
+                if part.isdigit() and int(part) < len(value):
+                    found.append(value[int(part)])
+                else:
+                    found.extend(v[part] for v in value if isinstance(v, dict) and part in v)
+        current = found
+    return current
+
+_TYPES = {'string': str, 'object': dict, 'array': list, 'date': datetime, 'int': int, 'long': int,
+          'double': float, 'bool': bool, 'objectId': ObjectId}
+
+def _candidates(values: List[Any]) -> List[Any]:
+    # An array matches a condition when it or any of its elements does
+    out = []
+    for value in values:
+        out.append(value)
+        if isinstance(value, list):
+            out.extend(value)
+    return out
+
+def _compare(op: str, value, arg) -> bool:
+    try:
+        return {'$gt': value > arg, '$gte': value >= arg, '$lt': value < arg, '$lte': value <= arg}[op]
+    except TypeError:
+        return False
+
+def _condition(values: List[Any], cond) -> bool:
+    if not (isinstance(cond, dict) and cond and all(k.startswith('$') for k in cond)):
+        return any(v == cond for v in _candidates(values))
+    for op, arg in cond.items():
+        candidates = _candidates(values)
+        if op == '$eq':
+            ok = any(v == arg for v in candidates)
+        elif op == '$ne':
+            ok = not any(v == arg for v in candidates)
+        elif op == '$in':
+            ok = any(v in arg for v in candidates) or (not values and None in arg)
+        elif op == '$nin':
+            ok = not any(v in arg for v in candidates)
+        elif op in ('$gt', '$gte', '$lt', '$lte'):
+            ok = any(v is not None and _compare(op, v, arg) for v in candidates)
+        elif op == '$exists':
+            ok = bool(values) == bool(arg)
+        elif op == '$type':
+            ok = any(isinstance(v, _TYPES[arg]) and not (arg in ('int', 'long') and isinstance(v, bool))
+                     for v in values)
+        elif op == '$regex':
+            ok = any(isinstance(v, str) and re.search(arg, v) for v in candidates)
+        elif op == '$not':
+            ok = not _condition(values, arg)
+        elif op == '$elemMatch':
+            ok = any(isinstance(v, list) and any(matches(e, arg) for e in v if isinstance(e, dict)) for v in values)
+        else:
+            raise NotImplementedError(op)
+        if not ok:
+            return False
+    return True
+
+def matches(doc: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    for key, cond in (query or {}).items():
+        if key == '$or':
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif key == '$and':
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        elif key == '$nor':
+            if any(matches(doc, sub) for sub in cond):
+                return False
+        elif not _condition(_values(doc, key), cond):
+            return False
+    return True
+
+def _project(doc, projection):
+    if not projection:
+        return copy.deepcopy(doc)
+    if isinstance(projection, (list, tuple)):
+        projection = dict.fromkeys(projection, 1)
+    include = {k for k, v in projection.items() if v and k != '_id'}
+    if include:
+        out = {}
+        for path in include:
+            found = _values(doc, path)
+            if found:
+                _assign(out, path, copy.deepcopy(found[0]))
+        if projection.get('_id', 1) and '_id' in doc:
+            out['_id'] = doc['_id']
+        return out
+    out = copy.deepcopy(doc)
+    for path, keep in projection.items():
+        if not keep:
+            _unset(out, path)
+    return out
+
+def _assign(doc, path: str, value):
+    *parents, last = path.split('.')
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+def _unset(doc, path: str):
+    *parents, last = path.split('.')
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+def _targets(doc, path: str, array_filters) -> List[tuple]:
+    """(container, key) pairs a dotted update path with ``$[name]`` segments points at."""
+    parts = path.split('.')
+    targets = [(None, None, doc)]
+    for i, part in enumerate(parts):
+        last = i == len(parts) - 1
+        nxt = []
+        for _, _, node in targets:
+            if part.startswith('$[') and part.endswith(']'):
+                name = part[2:-1]
+                flt = next((f for f in array_filters or () if any(k.split('.')[0] == name for k in f)), {})
+                cond = {k[len(name) + 1:]: v for k, v in flt.items()}
+                for index, element in enumerate(node or []):
+                    if not cond or matches(element, cond):
+                        nxt.append((node, index, element))
+            elif isinstance(node, list) and part.isdigit():
+                nxt.append((node, int(part), node[int(part)] if int(part) < len(node) else None))
+            else:
+                if not last and not isinstance(node.get(part), (dict, list)):
+                    node[part] = {}
+                nxt.append((node, part, node.get(part, _MISSING)))
+        targets = nxt
+    return [(container, key) for container, key, _ in targets]
+
+def apply_update(doc: Dict[str, Any], update, inserting: bool = False, array_filters=None):
+    if not any(k.startswith('$') for k in update):
+        _id = doc.get('_id')
+        doc.clear()
+        doc.update(copy.deepcopy(update))
+        if _id is not None:
+            doc.setdefault('_id', _id)
+        return
+    for op, fields in update.items():
+        if op == '$setOnInsert' and not inserting:
+            continue
+        for path, arg in fields.items():
+            for container, key in _targets(doc, path, array_filters):
+                current = container[key] if (isinstance(container, list) or key in container) else _MISSING
+                if op in ('$set', '$setOnInsert'):
+                    container[key] = copy.deepcopy(arg)
+                elif op == '$unset':
+                    if not isinstance(container, list):
+                        container.pop(key, None)
+                elif op == '$inc':
+                    container[key] = (0 if current is _MISSING else current) + arg
+                elif op in ('$min', '$max'):
+                    if current is _MISSING or (arg < current if op == '$min' else arg > current):
+                        container[key] = arg
+                elif op in ('$push', '$addToSet'):
+                    items = arg['$each'] if isinstance(arg, dict) and '$each' in arg else [arg]
+                    array = container.setdefault(key, []) if not isinstance(container, list) else container[key]
+                    for item in items:
+                        if op == '$push' or item not in array:
+                            array.append(copy.deepcopy(item))
+                elif op == '$pull':
+                    if current is not _MISSING:
+                        keep = [v for v in current if not (matches(v, arg) if isinstance(arg, dict) and isinstance(v, dict)
+                                                           else _condition([v], arg))]
+                        container[key] = keep
+                else:
+                    raise NotImplementedError(op)
+
+def _upsert_seed(query) -> Dict[str, Any]:
+    doc = {}
+    for key, cond in (query or {}).items():
+        if key.startswith('$') or (isinstance(cond, dict) and any(k.startswith('$') for k in cond)):
+            continue
+        _assign(doc, key, copy.deepcopy(cond))
+    return doc
+
+def _sort_key(doc, field):
+    # Missing values sort before everything else, as in MongoDB
+    value = (_values(doc, field) or [None])[0]
+    return (value is not None, value if value is not None else 0)
+
+class _ValidationError(Exception):
+    code = 121
+
+    def __str__(self):
+        return "Document failed validation"
+
+class FakeCursor:
+    def __init__(self, docs: List[Dict[str, Any]]):
+        self.docs = docs
+
+    def sort(self, key, direction=1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        # Stable sorts, least significant key first
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: _sort_key(d, field), reverse=order < 0)
+        return self
+
+    def skip(self, n: int):
+        self.docs = self.docs[n:]
+        return self
+
+    def limit(self, n: int):
+        if n:
+            self.docs = self.docs[:n]
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs if length is None else self.docs[:length])
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+class FakeCollection:
+    """In-memory motor collection; ``docs`` maps ``_id`` to the stored document."""
+
+    def __init__(self, docs=()):
+        self.docs: Dict[Any, Dict[str, Any]] = {}
+        self.reads = 0
+        self.writes: List[tuple] = []  # (method, filter or document)
+        self.bulk_calls: List[int] = []
+        # Writes whose filter names one of these values fail document validation
+        self.reject = set()
+        self.index_calls: List[list] = []
+        self.dropped: List[str] = []
+        for doc in docs:
+            self.docs[_freeze(doc['_id'])] = doc
+
+    def _matching(self, query) -> List[Dict[str, Any]]:
+        _id = (query or {}).get('_id', _MISSING)
+        if _id is not _MISSING and not (isinstance(_id, dict) and any(k.startswith('$') for k in _id)):
+            # Keyed lookup, like the _id index; keeps big bulk writes fast
+            doc = self.docs.get(_freeze(_id))
+            return [doc] if doc is not None and matches(doc, query) else []
+        return [doc for doc in self.docs.values() if matches(doc, query)]
+
+    def _rejected(self, query) -> bool:
+        return any(not isinstance(v, dict) and _freeze(v) in self.reject for v in (query or {}).values())
+
+    def _insert(self, doc: Dict[str, Any]):
+        doc.setdefault('_id', ObjectId())
+        key = _freeze(doc['_id'])
+        if key in self.docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error dup key: {{ _id: {doc['_id']!r} }}", 11000)
+        self.docs[key] = doc
+        return doc['_id']
+
+    # Reads
+
+    def find(self, query=None, projection=None, sort=None, limit=0):
+        self.reads += 1
+        cursor = FakeCursor([_project(d, projection) for d in self._matching(query)])
+        if sort:
+            cursor.sort(sort)
+        return cursor.limit(limit)
+
+    async def find_one(self, query=None, projection=None, sort=None):
+        self.reads += 1
+        docs = FakeCursor(self._matching(query))
+        if sort:
+            docs.sort(sort)
+        return _project(docs.docs[0], projection) if docs.docs else None
+
+    async def count_documents(self, query=None, limit=0):
+        self.reads += 1
+        count = len(self._matching(query))
+        return min(count, limit) if limit else count
+
+    async def distinct(self, key, query=None):
+        self.reads += 1
+        seen = []
+        for doc in self._matching(query):
+            for value in _candidates(_values(doc, key)):
+                if not isinstance(value, list) and value not in seen:
+                    seen.append(value)
+        return seen
+
+    # Writes
+
+    async def insert_one(self, document):
+        self.writes.append(('insert_one', document))
+        return SimpleNamespace(inserted_id=self._insert(copy.deepcopy(document)), acknowledged=True)
+
+    async def insert_many(self, documents, ordered=True):
+        self.writes.append(('insert_many', documents))
+        return SimpleNamespace(inserted_ids=[self._insert(copy.deepcopy(d)) for d in documents])
+
+    def _update(self, filter, update, upsert, many=False, array_filters=None):
+        if self._rejected(filter):
+            raise _ValidationError()
+        targets = self._matching(filter)
+        if not many:
+            targets = targets[:1]
+        modified = 0
+        for doc in targets:
+            before = copy.deepcopy(doc)
+            apply_update(doc, update, array_filters=array_filters)
+            modified += doc != before
+        upserted_id = None
+        if not targets and upsert:
+            doc = _upsert_seed(filter)
+            apply_update(doc, update, inserting=True, array_filters=array_filters)
+            upserted_id = self._insert(doc)
+        return SimpleNamespace(matched_count=len(targets), modified_count=modified,
+                               upserted_id=upserted_id, acknowledged=True)
+
+    async def update_one(self, filter, update, upsert=False, array_filters=None):
+        self.writes.append(('update_one', filter))
+        return self._update(filter, update, upsert, array_filters=array_filters)
+
+    async def update_many(self, filter, update, upsert=False, array_filters=None):
+        self.writes.append(('update_many', filter))
+        return self._update(filter, update, upsert, many=True, array_filters=array_filters)
+
+    async def replace_one(self, filter, replacement, upsert=False):
+        self.writes.append(('replace_one', filter))
+        return self._update(filter, replacement, upsert)
+
+    async def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False,
+                                  return_document=ReturnDocument.BEFORE, array_filters=None):
+        self.writes.append(('find_one_and_update', filter))
+        docs = FakeCursor(self._matching(filter))
+        if sort:
+            docs.sort(sort)
+        if docs.docs:
+            doc = docs.docs[0]
+            before = copy.deepcopy(doc)
+            apply_update(doc, update, array_filters=array_filters)
+            return _project(doc if return_document == ReturnDocument.AFTER else before, projection)
+        if not upsert:
+            return None
+        doc = _upsert_seed(filter)
+        apply_update(doc, update, inserting=True, array_filters=array_filters)
+        self._insert(doc)
+        return _project(doc, projection) if return_document == ReturnDocument.AFTER else None
+
+    async def find_one_and_delete(self, filter, projection=None, sort=None):
+        self.writes.append(('find_one_and_delete', filter))
+        docs = FakeCursor(self._matching(filter))
+        if sort:
+            docs.sort(sort)
+        if not docs.docs:
+            return None
+        return _project(self.docs.pop(_freeze(docs.docs[0]['_id'])), projection)
+
+    def _delete(self, filter, many: bool) -> int:
+        targets = self._matching(filter)
+        if not many:
+            targets = targets[:1]
+        for doc in targets:
+            del self.docs[_freeze(doc['_id'])]
+        return len(targets)
+
+    async def delete_one(self, filter):
+        self.writes.append(('delete_one', filter))
+        return SimpleNamespace(deleted_count=self._delete(filter, False), acknowledged=True)
+
+    async def delete_many(self, filter):
+        self.writes.append(('delete_many', filter))
+        return SimpleNamespace(deleted_count=self._delete(filter, True), acknowledged=True)
+
+    async def bulk_write(self, requests, ordered=True):
+        requests = list(requests)
+        self.writes.append(('bulk_write', requests))
+        self.bulk_calls.append(len(requests))
+        counts = dict.fromkeys(('nInserted', 'nMatched', 'nModified', 'nUpserted', 'nRemoved'), 0)
+        errors = []
+        for index, op in enumerate(requests):
+            try:
+                if isinstance(op, InsertOne):
+                    self._insert(copy.deepcopy(op._doc))
+                    counts['nInserted'] += 1
+                elif isinstance(op, (DeleteOne, DeleteMany)):
+                    counts['nRemoved'] += self._delete(op._filter, isinstance(op, DeleteMany))
+                elif isinstance(op, (UpdateOne, UpdateMany, ReplaceOne)):
+                    result = self._update(op._filter, op._doc, op._upsert, many=isinstance(op, UpdateMany),
+                                          array_filters=getattr(op, '_array_filters', None))
+                    counts['nMatched'] += result.matched_count
+                    counts['nModified'] += result.modified_count
+                    counts['nUpserted'] += result.upserted_id is not None
+                else:
+                    raise NotImplementedError(type(op).__name__)
+            except (DuplicateKeyError, _ValidationError) as e:
+                errors.append({'index': index, 'code': e.code, 'errmsg': str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({'writeErrors': errors, **counts})
+        return SimpleNamespace(acknowledged=True, inserted_count=counts['nInserted'],
+                               matched_count=counts['nMatched'], modified_count=counts['nModified'],
+                               upserted_count=counts['nUpserted'], deleted_count=counts['nRemoved'])
+
+    async def create_indexes(self, indexes):
+        self.index_calls.append(indexes)
+        return [index.document['name'] for index in indexes]
+
+    async def drop_index(self, name):
+        self.dropped.append(name)
+
+class FakeConfigured:
+    """Records what ``TrackedCollection`` marks and notifies."""
+    collections = TRACKED_COLLECTIONS
+
+    def __init__(self):
+        self.marked: List[tuple] = []
+        self.notified: List[tuple] = []
+
+    def mark(self, name, guild_id):
+        self.marked.append((name, guild_id))
+
+    def unmark(self, name, guild_id):
+        pass
+
+    def notify(self, name, guild_id):
+        self.notified.append((name, guild_id))
+
+class FakeDB:
+    """Collections by attribute, item or ``get_collection``, created on first use."""
+
+    def __init__(self, tracked: bool = False):
+        self.collections: Dict[str, FakeCollection] = {}
+        self.configured = FakeConfigured()
+        self.tracked = tracked
+        self.name = 'test'
+
+    def get_collection(self, name: str):
+        collection = self.collections.setdefault(name, FakeCollection())
+        if self.tracked and name in TRACKED_COLLECTIONS:
+            # As Database does, tracked collections go through the proxy
+            return TrackedCollection(collection, name, self.configured)
+        return collection
+
+    def __getitem__(self, name: str):
+        return self.get_collection(name)
+
+    def __setitem__(self, name: str, collection: FakeCollection):
+        self.collections[name] = collection
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    def seed(self, name: str, *docs):
+        collection = self.collections.setdefault(name, FakeCollection())
+        for doc in docs:
+            collection.docs[_freeze(doc['_id'])] = doc
+        return collection
+
+@pytest.fixture
+def fake_db():
+    return FakeDB()
@@ -0,0 +1,53 @@
+import pytest
+from types import SimpleNamespace
+import discord
+from cogs.automod.automod import AutoMod, find_violation
+from core.settings import AutomodSettings
+
+SETTINGS = AutomodSettings(enabled=True, anti_links=True, anti_invites=True, anti_badwords=True,
+                           badwords=('heck', 'bad phrase'), bypass_roles=frozenset({7}),
+                           action_type='timeout', action_minutes=30)
+
+def test_find_violation():
+    assert find_violation(SETTINGS, "join discord.gg/abc") == "invites"
+    assert find_violation(SETTINGS, "see https://example.com") == "links"
+    assert find_violation(SETTINGS, "oh HECK") == "badwords"
+    assert find_violation(SETTINGS, "what a bad phrase!") == "badwords"
+    assert find_violation(SETTINGS, "heckle") is None
+    assert find_violation(SETTINGS._replace(anti_links=False), "see https://example.com") is None
+
+class FakeMember(discord.Member):
+    id = 42
+    guild = SimpleNamespace(id=1)
+
+    def __init__(self, role_ids):
+        self._role_ids = role_ids
+
+    @property
+    def roles(self):
+        return [SimpleNamespace(id=r) for r in self._role_ids]
+
+@pytest.mark.asyncio
+async def test_violations_go_through_escalation():
+    calls, deleted = [], []
+
+    class Punishments:
+        async def apply_violation(self, member, violation, reason=None, default=None):
+            calls.append((member.id, violation, repr(default)))
+
+    bot = SimpleNamespace(db=None, get_cog=lambda name: Punishments() if name == "AutoModPunishments" else None)
+    cog = AutoMod(bot)
+
+    async def delete():
+        deleted.append(True)
+
+    message = SimpleNamespace(author=FakeMember([]), guild=SimpleNamespace(id=1), content="discord.gg/raid", delete=delete)
+    assert await cog.check_message(message, SETTINGS) == "invites"
+    assert calls == [(42, "invites", "timeout:30")] and deleted == [True]
+
+    # Bypass roles and clean messages are left alone
+    message.author = FakeMember([7])
+    assert await cog.check_message(message, SETTINGS) is None
+    message.author, message.content = FakeMember([]), "hello"
+    assert await cog.check_message(message, SETTINGS) is None
+    assert len(calls) == 1
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from core.cache import SWRCache
+
+class Source:
+    def __init__(self):
+        self.value = 1
+        self.calls = 0
+        self.fail = False
+
+    async def load(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("down")
+        return {'v': self.value}
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache, source = SWRCache(maxsize=10, ttl=60), Source()
+    results = await asyncio.gather(*(cache.get_or_load('k', source.load) for _ in range(10)))
+    assert source.calls == 1 and all(r == {'v': 1} for r in results)
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_one_refresh_runs():
+    cache, source = SWRCache(maxsize=10, ttl=0.05, max_stale=60), Source()
+    await cache.get_or_load('k', source.load)
+    await asyncio.sleep(0.06)
+    source.value = 2
+    stale = await asyncio.gather(*(cache.get_or_load('k', source.load) for _ in range(5)))
+    assert all(r == {'v': 1} for r in stale)
+    await asyncio.sleep(0.03)
+    assert source.calls == 2
+    assert await cache.get_or_load('k', source.load) == {'v': 2}
+
+@pytest.mark.asyncio
+async def test_last_known_good_until_max_stale():
+    cache, source = SWRCache(maxsize=10, ttl=0.01, max_stale=0.2, retry_after=0), Source()
+    await cache.get_or_load('k', source.load)
+    source.fail = True
+    await asyncio.sleep(0.02)
+    assert await cache.get_or_load('k', source.load) == {'v': 1}
+    await asyncio.sleep(0.03)
+    assert await cache.get_or_load('k', source.load) == {'v': 1}
+
+    await asyncio.sleep(0.2)
+    with pytest.raises(ConnectionError):
+        await cache.get_or_load('k', source.load)
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_overwritten():
+    cache, source = SWRCache(maxsize=10, ttl=60), Source()
+    task = asyncio.create_task(cache.get_or_load('k', source.load))
+    await asyncio.sleep(0)
+    cache.pop('k', None)
+    await task
+    assert 'k' not in cache
+
+def test_size_aware_eviction():
+    cache = SWRCache(maxsize=100, ttl=60, max_bytes=1000, sizeof=lambda v: len(v))
+    cache['a'] = 'x' * 400
+    cache['b'] = 'x' * 400
+    cache['a']  # a is now most recently used
+    cache['c'] = 'x' * 400
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.currsize == 800 and cache.evictions == 1
+
+@pytest.mark.asyncio
+async def test_missing_documents_cached_for_negative_ttl():
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return None
+
+    cache = SWRCache(maxsize=10, ttl=60, negative_ttl=0.05)
+    assert await cache.get_or_load('k', load) is None
+    assert await cache.get_or_load('k', load) is None
+    assert len(calls) == 1 and cache.negative_hits == 1
+
+    await asyncio.sleep(0.06)
+    await cache.get_or_load('k', load)
+    await asyncio.sleep(0.01)
+    assert len(calls) == 2
+
+    plain = SWRCache(maxsize=10, ttl=60)
+    await plain.get_or_load('k', load)
+    assert 'k' not in plain
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from cachetools import TTLCache
+from core.cache import SWRCache
+from prometheus_client import REGISTRY
+from core.cache_registry import CACHE_COLLECTOR, CacheCollector, CacheRegistry
+
+def filled_swr(n: int) -> SWRCache:
+    cache = SWRCache(maxsize=10_000, ttl=60, sizeof=lambda v: 1000)
+    for i in range(n):
+        cache[i] = {'i': i}
+    return cache
+
+def test_swr_caches_report_exact_bytes_and_counters():
+    registry = CacheRegistry()
+    cache = filled_swr(10)
+    cache.get(1)
+    registry.register('settings', cache)
+    stats = registry.collect()['settings']
+    assert stats.entries == 10 and stats.bytes == 10_000
+    assert stats.evictions == 0 and stats.oldest_age >= stats.mean_age >= 0
+
+def test_other_mappings_are_sampled():
+    registry = CacheRegistry(sample_size=16)
+    cooldowns = TTLCache(maxsize=100_000, ttl=60)
+    for i in range(50_000):
+        cooldowns[i] = 1.0
+    registry.register('cooldowns', cooldowns, shrinkable=False)
+    stats = registry.collect()['cooldowns']
+    assert stats.entries == 50_000
+    assert 50_000 * 40 < stats.bytes < 50_000 * 200
+    assert stats.hits is None
+
+def test_budget_shrinks_only_shrinkable_caches():
+    registry = CacheRegistry(budget=20_000)
+    settings, users = filled_swr(20), filled_swr(20)
+    streams = OrderedDict((i, [i] * 10) for i in range(100))
+    registry.register('settings', settings)
+    registry.register('user', users)
+    registry.register('raid_streams', streams, shrinkable=False)
+    registry.collect()
+
+    assert registry.enforce() > 0
+    assert len(streams) == 100
+    assert settings.currsize + users.currsize < 20_000
+    # Oldest entries go first
+    assert 0 not in settings and 19 in settings
+
+def test_under_budget_is_a_no_op():
+    registry = CacheRegistry(budget=10**9)
+    registry.register('settings', filled_swr(5))
+    registry.collect()
+    assert registry.enforce() == 0
+
+def test_budget_covers_every_bot_in_the_process():
+    collector = CacheCollector()
+    shards = [filled_swr(15) for _ in range(2)]
+    registries = []
+    for shard, cache in enumerate(shards):
+        registry = CacheRegistry(budget=20_000)
+        registry.register('settings', cache)
+        registry.collect()
+        collector.add(str(shard), registry)
+        registries.append(registry)
+
+    # Each bot alone fits, but together they hold 30k of a 20k budget
+    assert registries[0].enforce() == 0
+    for registry in registries:
+        registry.enforce(collector.total_bytes)
+    assert sum(cache.currsize for cache in shards) <= 20_000
+    assert collector.total_bytes <= 20_000
+
+def test_prometheus_families():
+    registry = CacheRegistry(budget=1000)
+    registry.register('settings', filled_swr(2))
+    registry.register('streams', {'a': 1})
+    registry.collect()
+    collector = CacheCollector()
+    collector.add('0', registry)
+    families = {f.name: f for f in collector.collect()}
+    assert {s.labels['cache'] for s in families['bot_cache_bytes'].samples} == {'settings', 'streams'}
+    assert [s.labels['cache'] for s in families['bot_cache_hits'].samples if s.name == 'bot_cache_hits_total'] == ['settings']
+    assert families['bot_cache_budget_bytes'].samples[0].value == 1000
+
+def test_one_collector_serves_every_bot_in_the_process():
+    registries = []
+    for shard in range(2):
+        registry = CacheRegistry(budget=1000 * (shard + 1))
+        registry.register('settings', filled_swr(2))
+        registry.collect()
+        # What each Bot does in __init__; a second Bot must not clash
+        CACHE_COLLECTOR.add(str(shard), registry)
+        registries.append(registry)
+    try:
+        for shards in ('0', '1'):
+            assert REGISTRY.get_sample_value('bot_cache_bytes', {'shards': shards, 'cache': 'settings'})
+        assert REGISTRY.get_sample_value('bot_cache_budget_bytes', {'shards': '1'}) == 2000
+    finally:
+        for registry in registries:
+            CACHE_COLLECTOR.remove(registry)
+    assert REGISTRY.get_sample_value('bot_cache_bytes', {'shards': '0', 'cache': 'settings'}) is None
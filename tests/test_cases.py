@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from conftest import FakeDB
+from core.cases import CaseStore
+
+@pytest.fixture
+def store():
+    return CaseStore(FakeDB(), block_size=10)
+
+@pytest.mark.asyncio
+async def test_case_numbers_are_unique_with_one_round_trip_per_block(store):
+    numbers = await asyncio.gather(*(store.next_case_no(1) for _ in range(25)))
+    assert sorted(numbers) == list(range(1, 26))
+    assert len(store.db.case_counters.writes) == 3
+    assert await store.next_case_no(2) == 1
+
+@pytest.mark.asyncio
+async def test_restart_skips_rest_of_block(store):
+    await store.next_case_no(1)
+    restarted = CaseStore(store.db, block_size=10)
+    assert await restarted.next_case_no(1) == 11
+
+@pytest.mark.asyncio
+async def test_history_pages_newest_first(store):
+    start = datetime(2024, 1, 1)
+    for i in range(25):
+        await store.create(1, 42, 7, "warn" if i % 2 else "kick", f"reason {i}")
+        # Every third case shares a timestamp to exercise the tie-breaker
+        list(store.db.cases.docs.values())[-1]['created_at'] = start + timedelta(seconds=i - i % 3)
+    await store.create(1, 99, 7, "warn")
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = await store.history(1, 42, after=cursor, limit=10)
+        seen.extend(case['case_no'] for case in page)
+        if cursor is None:
+            break
+    assert seen == list(range(25, 0, -1))
+
+    warns, cursor = await store.history(1, 42, action="warn", limit=20)
+    assert len(warns) == 12 and cursor is None
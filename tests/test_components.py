@@ -0,0 +1,151 @@
+import pytest
+import discord
+from types import SimpleNamespace
+from discord.ui import Button, View
+from core.components import ComponentRouter, custom_id, parse, static_view
+from core.config_gui import MODALS, MODULES, SETTINGS, main_panel, module_panel
+from cogs.welcome.welcome_config import WelcomeConfigPanel
+
+PANELS = 10_000
+OWNER = 1_234_567_890_123_456_789
+
+class Response:
+    def __init__(self):
+        self.sent = []
+
+    def is_done(self):
+        return bool(self.sent)
+
+    async def send_message(self, content, ephemeral=False):
+        self.sent.append(content)
+
+def interaction(value, kind=discord.InteractionType.component):
+    return SimpleNamespace(type=kind, data={'custom_id': value}, response=Response())
+
+def test_custom_id_round_trip():
+    encoded = custom_id('np.duration', OWNER, 42)
+    action, state = parse(encoded)
+    assert action == 'np.duration' and [int(v, 36) for v in state] == [OWNER, 42]
+    assert len(encoded) < 40
+
+    with pytest.raises(ValueError):
+        custom_id('cfg.setting', 'a:b')
+    with pytest.raises(ValueError):
+        custom_id('x', 'y' * 100)
+
+@pytest.mark.asyncio
+async def test_dispatch_converts_state():
+    router, calls = ComponentRouter(), []
+
+    async def handler(inter, module, owner_id):
+        calls.append((module, owner_id))
+
+    router.register('cfg.setting', handler, str, int)
+    assert await router.dispatch(interaction(custom_id('cfg.setting', 'automod', OWNER)))
+    assert calls == [('automod', OWNER)]
+
+    # Unknown actions, wrong arity, bad state and views' own ids are left alone
+    assert not await router.dispatch(interaction('cfg.other:1'))
+    assert not await router.dispatch(interaction('cfg.setting:automod'))
+    assert not await router.dispatch(interaction('cfg.setting:automod:!!'))
+    assert not await router.dispatch(interaction('3f2a9c0d1e4b5a6978c0d1e2f3a4b5c6'))
+    assert not await router.dispatch(interaction('cfg.setting:a:1', discord.InteractionType.application_command))
+
+    router.unregister('cfg.setting')
+    assert not await router.dispatch(interaction(custom_id('cfg.setting', 'automod', OWNER)))
+
+@pytest.mark.asyncio
+async def test_handler_errors_are_answered():
+    router = ComponentRouter()
+
+    async def broken(inter):
+        raise RuntimeError("boom")
+
+    router.register('tk.open', broken)
+    inter = interaction('tk.open')
+    assert await router.dispatch(inter)
+    assert inter.response.sent == ["An error occurred. Please try again."]
+
+@pytest.mark.asyncio
+async def test_config_panels_are_static():
+    view = main_panel(OWNER)
+    assert view.is_finished()
+    assert view.children[0].custom_id == custom_id('cfg.module', OWNER)
+    assert [o.value for o in view.children[0].options] == list(MODULES)
+
+    for module in SETTINGS:
+        ids = [item.custom_id for item in module_panel(module, OWNER).children]
+        assert ids == [custom_id('cfg.back', OWNER), custom_id('cfg.setting', module, OWNER)]
+    assert all(module in SETTINGS and setting in {s[3] for s in SETTINGS[module]} for module, setting in MODALS)
+
+class PersistentTicketView(View):
+    """The old ticket panel: one live View per message, kept by the view store."""
+
+    def __init__(self, bot, channel_id):
+        super().__init__(timeout=None)
+        self.bot = bot
+        self.channel_id = channel_id
+
+    @discord.ui.button(label="Create Ticket", style=discord.ButtonStyle.primary)
+    async def create_ticket(self, interaction, button):
+        pass
+
+@pytest.mark.asyncio
+async def test_welcome_panel_is_owner_and_admin_only():
+    deleted = []
+
+    async def delete_one(query):
+        deleted.append(query)
+
+    panel = WelcomeConfigPanel(SimpleNamespace(db=SimpleNamespace(welcome_settings=SimpleNamespace(delete_one=delete_one))))
+    router = ComponentRouter()
+    panel.register(router)
+    assert all(b.custom_id.endswith(custom_id('', OWNER)) for b in WelcomeConfigPanel.view(OWNER).children)
+
+    def click(value, user_id, admin):
+        clicked = interaction(value)
+        clicked.guild_id = 1
+        clicked.user = SimpleNamespace(id=user_id, guild_permissions=SimpleNamespace(administrator=admin))
+        return clicked
+
+    # Someone else clicking an old panel, and the owner after losing admin
+    for user_id, admin in ((OWNER + 1, True), (OWNER, False)):
+        for action in ('wc.reset', 'wc.reset_confirm', 'wc.welcome'):
+            clicked = click(custom_id(action, OWNER), user_id, admin)
+            assert await router.dispatch(clicked)
+            assert clicked.response.sent == ["You cannot use this panel"]
+    assert deleted == []
+
+    # Panels sent before owner ids were encoded no longer route
+    assert not await router.dispatch(click('wc.reset', OWNER, True))
+
+    clicked = click(custom_id('wc.reset_confirm', OWNER), OWNER, True)
+    assert await router.dispatch(clicked)
+    assert deleted == [{'_id': 1}]
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_memory_per_10k_panels(retained):
+    bot = SimpleNamespace()
+
+    def views():
+        # What discord.py's view store holds for 10k live panels
+        return [PersistentTicketView(bot, channel_id) for channel_id in range(PANELS)]
+
+    def routed():
+        router = ComponentRouter()
+
+        async def open_ticket(interaction):
+            pass
+
+        router.register('tk.open', open_ticket)
+        for _ in range(PANELS):
+            # Built, serialised for the send, then dropped
+            static_view(Button(label="Create Ticket", custom_id=custom_id('tk.open'))).to_components()
+        return router
+
+    before = retained(views)
+    after = retained(routed)
+
+    assert before > 5 * 2**20
+    assert after < 64 * 1024
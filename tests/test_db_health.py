@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from pymongo.errors import AutoReconnect, DuplicateKeyError
+from core.db_health import CircuitBreaker, DBHealth, DatabaseUnavailable
+
+class FakeAdmin:
+    def __init__(self):
+        self.healthy = True
+        self.pings = 0
+
+    async def command(self, name):
+        self.pings += 1
+        if not self.healthy:
+            raise AutoReconnect("down")
+        return {'ok': 1}
+
+class FakeClient:
+    def __init__(self):
+        self.admin = FakeAdmin()
+
+def make_health(threshold=3, reset=60.0):
+    changes = []
+    breaker = CircuitBreaker(threshold, reset, on_change=changes.append)
+    return DBHealth(FakeClient(), 4, op_timeout=0.05, breaker=breaker), changes
+
+async def fail():
+    raise AutoReconnect("down")
+
+async def hang():
+    await asyncio.sleep(1)
+
+async def ok():
+    return 'ok'
+
+@pytest.mark.asyncio
+async def test_trips_after_consecutive_failures_and_fails_fast():
+    health, changes = make_health()
+    for operation in (fail, hang, fail):
+        with pytest.raises((AutoReconnect, asyncio.TimeoutError)):
+            await health.call(operation)
+    assert health.breaker.is_open and changes == [True]
+
+    calls = []
+    async def tracked():
+        calls.append(1)
+    with pytest.raises(DatabaseUnavailable):
+        await health.call(tracked)
+    assert calls == []  # Nothing was sent while open
+
+@pytest.mark.asyncio
+async def test_application_errors_do_not_trip():
+    health, _ = make_health(threshold=1)
+    async def duplicate():
+        raise DuplicateKeyError("dup")
+    with pytest.raises(DuplicateKeyError):
+        await health.call(duplicate)
+    assert not health.breaker.is_open
+
+@pytest.mark.asyncio
+async def test_half_open_trial_and_probe_recovery():
+    health, changes = make_health(threshold=1, reset=0.0)
+    with pytest.raises(AutoReconnect):
+        await health.call(fail)
+    # Reset timeout elapsed: one trial goes through and re-opens on failure
+    with pytest.raises(AutoReconnect):
+        await health.call(fail)
+    assert health.breaker.is_open
+
+    health.client.admin.healthy = True
+    await health.probe()
+    assert not health.breaker.is_open
+    assert changes == [True, False]
+    assert await health.call(ok) == 'ok'
+
+@pytest.mark.asyncio
+async def test_warm_up_pings_min_pool_size():
+    health, _ = make_health()
+    assert await health.warm_up()
+    assert health.client.admin.pings == 4 and health.ready.is_set()
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_starts_degraded_until_probe_succeeds():
+    health, changes = make_health()
+    health.client.admin.healthy = False
+    # Logged rather than raised, so setup_hook carries on
+    assert not await health.warm_up()
+    assert health.breaker.is_open and not health.ready.is_set()
+    with pytest.raises(DatabaseUnavailable):
+        await health.call(ok)
+
+    health.client.admin.healthy = True
+    await health.probe()
+    assert health.ready.is_set() and not health.breaker.is_open
+    assert changes == [True, False]
@@ -0,0 +1,66 @@
+import time
+import pytest
+from types import SimpleNamespace
+from conftest import FakeCollection
+from core.escalation import EscalationEngine, EscalationStep
+
+def make_engine(steps, timeout=24, counters=None):
+    settings = FakeCollection([{'_id': 1, 'punishments': {'escalation': {'timeout': timeout, 'steps': steps}}}])
+    violations = FakeCollection(counters or [])
+    engine = EscalationEngine(SimpleNamespace(automod_settings=settings, violation_counters=violations))
+    return engine, settings, violations
+
+def test_parse_step():
+    step = EscalationStep.parse(" Timeout:30 ")
+    assert (step.action, step.duration) == ("timeout", 30)
+    with pytest.raises(ValueError):
+        EscalationStep.parse("explode")
+
+@pytest.mark.asyncio
+async def test_steps_escalate_and_cap():
+    engine, _, _ = make_engine({'spam': ['warn', 'timeout:10', 'kick']})
+    actions = [repr(await engine.record(1, 42, 'spam')) for _ in range(5)]
+    assert actions == ['warn', 'timeout:10', 'kick', 'kick', 'kick']
+    assert await engine.record(1, 42, 'links') is None
+
+@pytest.mark.asyncio
+async def test_counters_decay():
+    engine, _, _ = make_engine({'spam': ['warn', 'kick']}, timeout=1)
+    config = await engine.config_for(1)
+    now = time.time()
+    assert engine.bump(config, 1, 42, 'spam', now=now).action == 'warn'
+    # Ten half-lives later the earlier violation has all but vanished
+    assert engine.bump(config, 1, 42, 'spam', now=now + 36000).action == 'warn'
+
+@pytest.mark.asyncio
+async def test_flush_and_restore():
+    engine, _, violations = make_engine({'spam': ['warn', 'kick']})
+    await engine.record(1, 42, 'spam')
+    assert await engine.flush() == 1
+    (op,) = violations.writes[0][1]
+    saved = dict(op._doc['$set'], _id=op._filter['_id'])
+
+    restored, _, _ = make_engine({'spam': ['warn', 'kick']}, counters=[saved])
+    assert (await restored.record(1, 42, 'spam')).action == 'kick'
+
+@pytest.mark.asyncio
+async def test_raid_rate_without_reads():
+    engine, settings, violations = make_engine({'spam': ['warn', 'timeout:10', 'mute:60', 'kick', 'ban']})
+    for i in range(20_000):
+        await engine.record(1, i % 5000, 'spam')
+
+    # One config read and one counter load for the guild, and no writes, however many events
+    assert settings.reads + violations.reads == 2
+    assert violations.writes == []
+    assert len(engine) == 5000
+    assert await engine.flush() == 5000
+    assert len(violations.writes) == 1
+
+@pytest.mark.asyncio
+async def test_non_positive_timeout_is_clamped():
+    for timeout in (0, -5):
+        engine, _, _ = make_engine({'spam': ['warn', 'kick']}, timeout=timeout)
+        config = await engine.config_for(1)
+        assert config.half_life == 3600
+        # Used to divide by a zero half-life
+        assert repr(await engine.record(1, 42, 'spam')) == 'warn'
@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+import discord
+from types import SimpleNamespace
+from core.fanout import Broadcaster, bucket_key, percentile
+
+TARGETS = 5_000
+
+def http_error(cls, status):
+    return cls(SimpleNamespace(status=status, reason="error"), "error")
+
+class FakeHTTP:
+    def __init__(self, failures=None, delay=0.001):
+        self.failures = failures or {}
+        self.delay = delay
+        self.sent = []
+        self.payloads = set()
+        self.inflight = self.peak = 0
+
+    async def send_message(self, channel_id, *, params):
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+            pending = self.failures.get(channel_id)
+            if pending:
+                raise pending.pop(0)
+            self.sent.append(channel_id)
+            self.payloads.add(id(params.payload))
+            return {'id': channel_id}
+        finally:
+            self.inflight -= 1
+
+def bot(http):
+    return SimpleNamespace(http=http, allowed_mentions=discord.AllowedMentions.none())
+
+def test_percentile_and_buckets():
+    assert percentile([], 0.5) == 0.0
+    ordered = [float(i) for i in range(1, 101)]
+    assert (percentile(ordered, 0.5), percentile(ordered, 0.95), percentile(ordered, 0.99)) == (50.0, 95.0, 99.0)
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.75) == 3.0
+    assert bucket_key(1) != bucket_key(2) and bucket_key(1) == bucket_key(1)
+
+@pytest.mark.asyncio
+async def test_one_payload_many_channels_concurrently():
+    http = FakeHTTP()
+    broadcaster = Broadcaster(bot(http), concurrency=50, rate=0)
+    embed = discord.Embed(title="New video", url="https://www.youtube.com/watch?v=x")
+
+    stats = await broadcaster.broadcast(list(range(TARGETS)) + [0, 1], kind='test', embed=embed)
+
+    assert stats.targets == TARGETS and stats.sent == TARGETS and stats.failed == 0
+    assert sorted(http.sent) == list(range(TARGETS))
+    # Rendered once, and sends overlap
+    assert len(http.payloads) == 1 and http.peak == 50
+    assert 0 < stats.p50 <= stats.p95 <= stats.p99 <= stats.elapsed
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_only():
+    http = FakeHTTP(failures={
+        1: [http_error(discord.HTTPException, 500), http_error(discord.HTTPException, 503)],
+        2: [http_error(discord.Forbidden, 403)],
+        3: [http_error(discord.HTTPException, 500)] * 4,
+        4: [http_error(discord.HTTPException, 400)],
+    })
+    broadcaster = Broadcaster(bot(http), rate=0, backoff=0.001)
+
+    stats = await broadcaster.broadcast([1, 2, 3, 4, 5], kind='test', content="hello", retries=2)
+
+    assert sorted(http.sent) == [1, 5]
+    assert stats.sent == 2 and stats.failed == 3 and stats.retried == 4
+    # Forbidden and other client errors are not retried
+    assert len(http.failures[2]) == 0 and len(http.failures[4]) == 0 and len(http.failures[3]) == 1
+
+@pytest.mark.asyncio
+async def test_rate_is_paced():
+    http = FakeHTTP(delay=0)
+    broadcaster = Broadcaster(bot(http), concurrency=20, rate=200)
+
+    stats = await broadcaster.broadcast(range(41), kind='test', content="hi")
+
+    assert stats.sent == 41 and stats.elapsed >= 0.19
@@ -0,0 +1,125 @@
+import asyncio
+import pytest
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from conftest import FakeCollection, FakeDB
+from core.guild_index import ConfiguredGuilds, TrackedCollection
+
+@pytest.fixture
+def db():
+    db = FakeDB()
+    db.seed('guild_settings', {'_id': 1}, {'_id': 2})
+    db.seed('autoresponder', {'_id': 'a', 'guild_id': 1}, {'_id': 'b', 'guild_id': 1})
+    return db
+
+@pytest.fixture
+def configured():
+    return ConfiguredGuilds({'guild_settings': '_id', 'autoresponder': 'guild_id'})
+
+@pytest.mark.asyncio
+async def test_everything_might_be_configured_until_loaded(configured, db):
+    assert configured.might_have('guild_settings', 3)
+    await configured.load(db)
+    assert configured.might_have('guild_settings', 1)
+    assert not configured.might_have('guild_settings', 3)
+    assert configured.might_have('autoresponder', 1) and not configured.might_have('autoresponder', 2)
+
+@pytest.mark.asyncio
+async def test_reloads_pick_up_writes_made_elsewhere(db):
+    configured = ConfiguredGuilds({'guild_settings': '_id', 'autoresponder': 'guild_id'}, refresh=0.01)
+    await configured.load(db)
+    # Another shard's bot or another process writes without this instance seeing it
+    db.seed('guild_settings', {'_id': 3})
+    assert not configured.might_have('guild_settings', 3)
+
+    task = asyncio.create_task(configured.refresh_forever(db))
+    try:
+        await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+    assert configured.might_have('guild_settings', 3)
+
+@pytest.mark.asyncio
+async def test_guilds_marked_during_a_reload_are_kept(configured, db):
+    await configured.load(db)
+    # Writes land where the running scan cannot see them, as they may on a real server
+    settings = TrackedCollection(FakeCollection(), 'guild_settings', configured)
+
+    reload = asyncio.create_task(configured.load(db))
+    await asyncio.sleep(0)
+    await settings.update_one({'_id': 3}, {'$set': {'prefix': '?'}}, upsert=True)
+    await reload
+    assert configured.might_have('guild_settings', 3)
+
+@pytest.mark.asyncio
+async def test_upserts_and_inserts_mark_the_guild(configured, db):
+    await configured.load(db)
+    settings = TrackedCollection(db['guild_settings'], 'guild_settings', configured)
+    triggers = TrackedCollection(db['autoresponder'], 'autoresponder', configured)
+
+    await settings.update_one({'_id': 3}, {'$set': {'prefix': '?'}})
+    assert not configured.might_have('guild_settings', 3)
+    await settings.update_one({'_id': 3}, {'$set': {'prefix': '?'}}, upsert=True)
+    assert configured.might_have('guild_settings', 3)
+
+    await triggers.insert_one({'guild_id': 5, 'content': 'hi'})
+    assert configured.might_have('autoresponder', 5)
+
+@pytest.mark.asyncio
+async def test_deletes_unmark_only_whole_guilds(configured, db):
+    await configured.load(db)
+    settings = TrackedCollection(db['guild_settings'], 'guild_settings', configured)
+    triggers = TrackedCollection(db['autoresponder'], 'autoresponder', configured)
+
+    await triggers.delete_one({'guild_id': 1, 'content': 'hi'})
+    assert configured.might_have('autoresponder', 1)
+    await triggers.delete_many({'guild_id': 1})
+    assert not configured.might_have('autoresponder', 1)
+
+    await settings.delete_one({'_id': 2})
+    assert not configured.might_have('guild_settings', 2)
+
+@pytest.mark.asyncio
+async def test_writes_notify_listeners_and_reads_pass_through(configured, db):
+    seen = []
+    configured.subscribe('guild_settings', seen.append)
+    settings = TrackedCollection(db['guild_settings'], 'guild_settings', configured)
+    await settings.update_one({'_id': 1}, {'$set': {'prefix': '?'}}, upsert=True)
+    assert seen == [1]
+    assert await settings.find_one({'_id': 2}) == {'_id': 2}
+
+@pytest.mark.asyncio
+async def test_bulk_write_marks_upserts_and_notifies_applied_guilds(configured, db):
+    await configured.load(db)
+    seen = []
+    configured.subscribe('guild_settings', seen.append)
+    configured.subscribe('autoresponder', seen.append)
+    settings = TrackedCollection(db['guild_settings'], 'guild_settings', configured)
+    triggers = TrackedCollection(db['autoresponder'], 'autoresponder', configured)
+
+    await settings.bulk_write([
+        UpdateOne({'_id': 3}, {'$set': {'prefix': '?'}}, upsert=True),
+        UpdateOne({'_id': 4}, {'$set': {'prefix': '?'}}),
+        DeleteOne({'_id': 2}),
+    ])
+    assert configured.might_have('guild_settings', 3) and not configured.might_have('guild_settings', 4)
+    # Which deletes matched is unknown, so the guild stays marked
+    assert configured.might_have('guild_settings', 2)
+    assert seen == [3, 4, 2]
+
+    # The guild field can come from the replacement or the inserted document
+    await triggers.bulk_write([
+        ReplaceOne({'_id': ObjectId()}, {'guild_id': 6, 'trigger': 'hi'}, upsert=True),
+        InsertOne({'guild_id': 7, 'trigger': 'hey'}),
+    ])
+    assert configured.might_have('autoresponder', 6) and configured.might_have('autoresponder', 7)
+
+    seen.clear()
+    db['guild_settings'].reject.add(404)
+    with pytest.raises(BulkWriteError):
+        await settings.bulk_write([
+            UpdateOne({'_id': 404}, {'$set': {'prefix': '?'}}, upsert=True),
+            UpdateOne({'_id': 5}, {'$set': {'prefix': '?'}}, upsert=True),
+        ], ordered=False)
+    assert seen == [5]
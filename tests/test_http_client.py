@@ -0,0 +1,87 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from prometheus_client import REGISTRY
+from core.http_client import HTTPService
+
+class Origin:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.peers = set()
+        self.inflight = self.peak = 0
+
+    async def handle(self, request):
+        self.peers.add(request.transport.get_extra_info('peername'))
+        self.inflight += 1
+        self.peak = max(self.peak, self.inflight)
+        try:
+            await asyncio.sleep(self.delay)
+            return web.json_response({'agent': request.headers.get('User-Agent')})
+        finally:
+            self.inflight -= 1
+
+async def serve(origin):
+    app = web.Application()
+    app.router.add_get('/', origin.handle)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+@pytest.mark.asyncio
+async def test_connections_are_reused_and_requests_timed():
+    origin = Origin()
+    server = await serve(origin)
+    http = HTTPService()
+    labels = {'host': server.host, 'method': 'GET', 'status': '200'}
+    before = REGISTRY.get_sample_value('bot_http_request_seconds_count', labels) or 0
+    try:
+        for _ in range(5):
+            async with http.get(str(server.make_url('/'))) as response:
+                body = await response.json()
+        assert body['agent'].startswith("SB-Moderation")
+        # Keep-alive: five requests, one connection
+        assert len(origin.peers) == 1
+        assert REGISTRY.get_sample_value('bot_http_request_seconds_count', labels) == before + 5
+    finally:
+        await http.close()
+        await server.close()
+    assert http._session is None
+
+@pytest.mark.asyncio
+async def test_per_host_limit_and_errors_counted():
+    origin = Origin(delay=0.05)
+    server = await serve(origin)
+    http = HTTPService(limit_per_host=2)
+
+    async def fetch():
+        async with http.get(str(server.make_url('/'))) as response:
+            return response.status
+
+    try:
+        assert await asyncio.gather(*(fetch() for _ in range(6))) == [200] * 6
+        assert origin.peak == 2
+    finally:
+        await server.close()
+
+    labels = {'host': '127.0.0.1', 'method': 'GET', 'error': 'ClientConnectorError'}
+    before = REGISTRY.get_sample_value('bot_http_errors_total', labels) or 0
+    try:
+        with pytest.raises(aiohttp.ClientConnectorError):
+            async with http.get("http://127.0.0.1:9/"):
+                pass
+        assert REGISTRY.get_sample_value('bot_http_errors_total', labels) == before + 1
+    finally:
+        await http.close()
+
+def test_webhook_logs_follow_the_shared_client():
+    from core.logger import DiscordWebhookHandler, get_logger, use_http_client
+    handler = DiscordWebhookHandler("")
+    get_logger().addHandler(handler)
+    http = HTTPService.from_config()
+    try:
+        use_http_client(http)
+        assert handler.http is http
+    finally:
+        get_logger().removeHandler(handler)
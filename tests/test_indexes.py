@@ -0,0 +1,26 @@
+import pytest
+from conftest import FakeDB
+from core.indexes import INDEXES, ensure_indexes, indexes_for
+
+def test_registry_has_no_duplicates():
+    seen = set()
+    for spec in INDEXES:
+        key = (spec.collection, spec.name)
+        assert key not in seen
+        seen.add(key)
+
+def test_access_patterns_lead_with_index_prefix():
+    # The sample query must constrain the index's leading field, or use it for sorting
+    for spec in INDEXES:
+        leading = spec.keys[0][0]
+        sort_fields = [field for field, _ in spec.sort or []]
+        assert leading in spec.query or leading in sort_fields, spec.name
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_one_call_per_collection():
+    db = FakeDB()
+    created = await ensure_indexes(db, ['cases', 'users'])
+    assert set(created) == {'cases', 'users'}
+    assert len(db.cases.index_calls) == 1
+    assert created['cases'] == [spec.name for spec in indexes_for('cases')]
+    assert db.tickets.index_calls == []
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import discord
+from conftest import FakeDB
+import core.mass_role as mass_role
+from core.mass_role import ConditionError, MassRoleJob, MemberCondition
+
+NOW = datetime(2025, 6, 1, tzinfo=timezone.utc)
+ROLE_ID = 99
+
+class FakeMember:
+    def __init__(self, member_id, joined_at=None, created_at=None, roles=(), bot=False, guild=None):
+        self.id = member_id
+        self.joined_at = joined_at or NOW - timedelta(days=10)
+        self.created_at = created_at or NOW - timedelta(days=400)
+        self.roles = set(roles)
+        self.bot = bot
+        self.guild = guild
+
+    def get_role(self, role_id):
+        return role_id if role_id in self.roles else None
+
+    async def add_roles(self, role, reason=None):
+        self.guild.calls.append(self.id)
+        if self.id in self.guild.forbidden:
+            raise discord.Forbidden(SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+        self.roles.add(role.id)
+
+class FakeGuild:
+    def __init__(self, count):
+        self.id = 1
+        self.calls = []
+        self.forbidden = set()
+        self.members = [FakeMember(i, guild=self) for i in range(1, count + 1)]
+
+    async def fetch_members(self, limit=None, after=None):
+        for member in self.members:
+            if after is None or member.id > after.id:
+                yield member
+
+def test_condition_parsing():
+    condition = MemberCondition.compile("joined_before:2025-05-25 lacks_role:5 min_age:30 type:human")
+    assert condition(FakeMember(1), NOW)
+    assert not condition(FakeMember(1, roles={5}), NOW)
+    assert not condition(FakeMember(1, joined_at=NOW - timedelta(days=1)), NOW)
+    assert not condition(FakeMember(1, created_at=NOW - timedelta(days=3)), NOW)
+    assert not condition(FakeMember(1, bot=True), NOW)
+    # An empty condition matches everyone
+    assert MemberCondition.compile("")(FakeMember(1, bot=True), NOW)
+
+    for bad in ("joined_before:yesterday", "has_role:abc", "type:robot", "colour:red", "min_age"):
+        with pytest.raises(ConditionError):
+            MemberCondition.compile(bad)
+
+@pytest.mark.asyncio
+async def test_checkpoint_only_covers_applied_members_and_resumes(monkeypatch):
+    monkeypatch.setattr(mass_role, 'PAGE_SIZE', 3)
+    guild = FakeGuild(10)
+    guild.forbidden = {5}
+    bot = SimpleNamespace(db=FakeDB())
+    role = SimpleNamespace(id=ROLE_ID)
+
+    job = MassRoleJob(bot, guild, role, 'add', MemberCondition.compile(""))
+    state = await job.run()
+    # The second page stopped on member 5; the checkpoint stays at the end of the first page
+    assert state['status'] == 'cancelled'
+    assert state['last_member_id'] == 3 and state['scanned'] == 3
+    assert bot.db.mass_role_jobs.docs[job.job_id]['last_member_id'] == 3
+
+    applied = {m.id for m in guild.members if ROLE_ID in m.roles}
+    assert {1, 2, 3} <= applied and 5 not in applied
+    guild.forbidden.clear()
+    guild.calls.clear()
+    resumed = MassRoleJob(bot, guild, role, 'add', MemberCondition.compile(""))
+    state = await resumed.run()
+    assert state['status'] == 'done' and state['scanned'] == 10
+    assert all(ROLE_ID in member.roles for member in guild.members)
+    # Members applied before the stop are rescanned but not changed again
+    assert sorted(guild.calls) == [m.id for m in guild.members if m.id not in applied]
@@ -0,0 +1,58 @@
+import pytest
+from datetime import datetime, timedelta
+from conftest import FakeCollection, FakeDB
+from core.migrations import Migration, MigrationRunner, member_compound_keys, noprefix_expiry_dates
+
+def make_runner(db, calls):
+    async def step(db):
+        calls.append(1)
+    return MigrationRunner(db, [Migration(1, "test", step)], wait_timeout=0)
+
+@pytest.mark.asyncio
+async def test_runs_once_and_records_state():
+    db, calls = FakeDB(), []
+    assert await make_runner(db, calls).run()
+    assert await make_runner(db, calls).run()
+    assert calls == [1]
+    assert set(db['_migrations'].docs) == {'lock', 'indexes', 1}
+
+@pytest.mark.asyncio
+async def test_waits_for_lock_held_elsewhere():
+    db, calls = FakeDB(), []
+    db['_migrations'].docs['lock'] = {'_id': 'lock', 'owner': 'other',
+                                      'lease_until': datetime.utcnow() + timedelta(minutes=1)}
+    assert not await make_runner(db, calls).run()
+    assert calls == []
+
+@pytest.mark.asyncio
+async def test_noprefix_expiry_dates():
+    db = FakeDB()
+    db['noprefix_users'] = FakeCollection([
+        {'_id': 1, 'expires_at': '2030-01-01T00:00:00'},
+        {'_id': 2, 'expires_at': None},
+        {'_id': 3, 'expires_at': 'garbage'},
+    ])
+    await noprefix_expiry_dates(db, batch_size=1)
+    docs = db['noprefix_users'].docs
+    assert docs[1]['expires_at'] == datetime(2030, 1, 1)
+    assert docs[2]['expires_at'] is None
+    assert docs[3]['expires_at'] == 'garbage'
+
+@pytest.mark.asyncio
+async def test_member_compound_keys():
+    db = FakeDB()
+    db.seed('users', {'_id': 10, 'guild_id': 1, 'warns': 2}, {'_id': 11, 'warns': 1})
+    db.seed('user_levels', {'_id': 'oid', 'guild_id': 1, 'user_id': 10, 'xp': 5})
+    db.seed('levels', {'_id': 10, 'xp': 50, 'level': 7})
+    await member_compound_keys(db, batch_size=1)
+    # A second run finds nothing left to do
+    await member_compound_keys(db, batch_size=1)
+
+    users = {repr(d['_id']): d for d in db['users'].docs.values()}
+    assert users["{'g': 1, 'u': 10}"] == {'_id': {'g': 1, 'u': 10}, 'guild_id': 1, 'user_id': 10, 'warns': 2}
+    # Without a guild there is nothing to key by, so the document stays put
+    assert users['11'] == {'_id': 11, 'warns': 1}
+
+    assert list(db['user_levels'].docs.values()) == [{'_id': {'g': 1, 'u': 10}, 'guild_id': 1, 'user_id': 10, 'xp': 5}]
+    assert not db['levels'].docs and list(db['levels_global'].docs.values()) == [{'_id': 10, 'xp': 50, 'level': 7}]
+    assert db['users'].dropped == ['guild_id_1__id_1', 'guild_id_1__id_1']
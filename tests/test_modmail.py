@@ -0,0 +1,76 @@
+import gzip
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import discord
+from conftest import FakeDB
+from cogs.modmail.modmail import GuildPickerView, ModMail
+from core.modmail_router import thread_id
+
+GUILD_ID = 1
+CHANNEL_ID = 50
+START = datetime(2024, 1, 1)
+
+class Author(SimpleNamespace):
+    def __str__(self):
+        return self.name
+
+def forwarded(i, user_id, text):
+    embed = discord.Embed(title="New ModMail", description=text)
+    embed.set_footer(text=f"User ID: {user_id}")
+    return SimpleNamespace(id=i, author=Author(id=9, name="bot"), content="", embeds=[embed],
+                           attachments=[], created_at=START + timedelta(seconds=i))
+
+class FakeChannel:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def history(self, limit=None, oldest_first=False):
+        for message in self.messages:
+            yield message
+
+class FakeContext:
+    def __init__(self, channels):
+        self.guild = SimpleNamespace(id=GUILD_ID, get_channel=channels.get)
+        self.sent = []
+
+    @asynccontextmanager
+    async def typing(self):
+        yield
+
+    async def send(self, embed=None, file=None):
+        self.sent.append((embed, file))
+
+def make_cog(threads):
+    db = FakeDB()
+    db.seed('modmail_threads', *({'_id': _id, **doc} for _id, doc in threads.items()))
+    return ModMail(SimpleNamespace(db=db))
+
+@pytest.mark.asyncio
+async def test_transcript_needs_a_thread_in_this_guild():
+    # The user only ever wrote to another server's staff
+    cog = make_cog({thread_id(7, 2): {'thread_channel_id': 60}})
+    ctx = FakeContext({CHANNEL_ID: FakeChannel([forwarded(1, 7, "secret")])})
+    await ModMail.transcript.callback(cog, ctx, SimpleNamespace(id=7, mention="<@7>"))
+    embed, file = ctx.sent[0]
+    assert file is None and "no modmail thread" in embed.title
+
+@pytest.mark.asyncio
+async def test_transcript_holds_only_this_users_forwarded_messages():
+    cog = make_cog({thread_id(7, GUILD_ID): {'thread_channel_id': CHANNEL_ID}})
+    channel = FakeChannel([forwarded(1, 7, "hello staff"), forwarded(2, 8, "someone else"),
+                           forwarded(3, 7, "any news?")])
+    ctx = FakeContext({CHANNEL_ID: channel})
+    await ModMail.transcript.callback(cog, ctx, SimpleNamespace(id=7, mention="<@7>"))
+    embed, file = ctx.sent[0]
+    html = gzip.decompress(file.fp.read()).decode()
+    assert "(2 messages)" in embed.title
+    assert "hello staff" in html and "any news?" in html and "someone else" not in html
+
+@pytest.mark.asyncio
+async def test_guild_picker_lists_guilds_on_other_shards():
+    names = {1: "Here", 2: "Server 2"}
+    bot = SimpleNamespace(db=None, modmail=SimpleNamespace(guild_name=names.get))
+    view = GuildPickerView(ModMail(bot), SimpleNamespace(author=SimpleNamespace(id=7)), (1, 2))
+    assert [(o.label, o.value) for o in view.select.options] == [("Here", "1"), ("Server 2", "2")]
@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime
+from types import SimpleNamespace
+from conftest import FakeDB
+from core.guild_index import ConfiguredGuilds
+from core.indexes import member_key
+from core.modmail_router import ModMailRouter, Route, thread_id
+
+class FakeGuild:
+    def __init__(self, guild_id, members):
+        self.id = guild_id
+        self.name = f"guild {guild_id}"
+        self.members = members
+        self.listings = 0
+
+    async def fetch_members(self, limit=None):
+        self.listings += 1
+        for user_id in sorted(self.members):
+            yield SimpleNamespace(id=user_id)
+
+@pytest.fixture
+def router():
+    guilds = {1: FakeGuild(1, {100, 200}), 2: FakeGuild(2, {200}), 3: FakeGuild(3, {100, 200})}
+    db = FakeDB()
+    db.seed('modmail_threads',
+            {'_id': thread_id(300, 3), 'user_id': 300, 'guild_id': 3, 'thread_channel_id': 9, 'status': 'open'})
+    db.seed('guild_settings', *({'_id': g, 'modmail': {'enabled': True}} for g in guilds))
+    db.seed('modmail_members', *(
+        {'_id': member_key(g.id, u), 'guild_id': g.id, 'user_id': u, 'seen_at': datetime(2024, 1, 1)}
+        for g in guilds.values() for u in g.members
+    ))
+    db.configured = ConfiguredGuilds({'guild_settings': '_id'})
+    # Only guild 1 is on this bot's shard
+    bot = SimpleNamespace(db=db, get_guild={1: guilds[1]}.get, guilds=guilds)
+    return ModMailRouter(bot)
+
+@pytest.mark.asyncio
+async def test_open_thread_routes_without_member_checks(router):
+    await router.start()
+    assert await router.route(300) == Route(3)
+    assert router.db.modmail_members.reads == 0
+
+@pytest.mark.asyncio
+async def test_mutual_guilds_come_from_records_on_every_shard(router):
+    await router.start()
+    router.enabled.discard(3)
+    reads = router.db.guild_settings.reads + router.db.modmail_threads.reads
+
+    # Guild 2 is not cached on this bot but is still found, with one query
+    assert await router.route(200) == Route(None, (1, 2))
+    assert await router.route(200) == Route(None, (1, 2))
+    assert router.db.modmail_members.reads == 1
+    assert router.db.guild_settings.reads + router.db.modmail_threads.reads == reads
+    assert router.guild_name(1) == "guild 1" and router.guild_name(2) == "Server 2"
+
+@pytest.mark.asyncio
+async def test_member_sync_rewrites_the_guilds_records(router):
+    await router.start()
+    guild = router.bot.guilds[1]
+    guild.members = {200, 400}
+
+    await router.sync_guilds([guild, router.bot.guilds[2]])
+    members = {(d['guild_id'], d['user_id']) for d in router.db.modmail_members.docs.values()}
+    assert {u for g, u in members if g == 1} == {200, 400}
+    assert {u for g, u in members if g == 2} == {200}
+    assert router.guild_name(2) == "guild 2"
+
+    # A recent sync is not repeated
+    await router.sync_guilds([guild])
+    assert guild.listings == 1
+
+@pytest.mark.asyncio
+async def test_ambiguous_users_get_candidates(router):
+    await router.start()
+    assert await router.route(200) == Route(None, (1, 2, 3))
+    await router.open_thread(200, 2, 7)
+    assert await router.route(200) == Route(2)
+    assert await router.close_thread(200, 2)
+    assert await router.route(200) == Route(None, (1, 2, 3))
+
+@pytest.mark.asyncio
+async def test_membership_events_patch_the_cache(router):
+    await router.start()
+    assert await router.route(100) == Route(None, (1, 3))
+    await router.member_left(3, 100)
+    assert await router.route(100) == Route(1)
+    await router.member_joined(2, 100)
+    assert await router.route(100) == Route(None, (1, 2))
+
+@pytest.mark.asyncio
+async def test_disabling_a_guild_takes_it_out_of_routes(router):
+    await router.start()
+    router.db.guild_settings.docs[1]['modmail']['enabled'] = False
+    await router.refresh_guild(1)
+    assert await router.route(100) == Route(3)
@@ -0,0 +1,86 @@
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+import discord
+import core.purge as purge
+from core.purge import PurgeFilter, PurgeFilterError, PurgeJob
+
+def make_message(message_id, content="", author_id=1, bot=False, age=timedelta(minutes=1),
+                 attachments=(), pinned=False, channel=None):
+    message = SimpleNamespace(
+        id=message_id, content=content, author=SimpleNamespace(id=author_id, bot=bot),
+        created_at=discord.utils.utcnow() - age, attachments=list(attachments), pinned=pinned,
+    )
+
+    async def delete():
+        channel.single.append(message_id)
+
+    message.delete = delete
+    return message
+
+class FakeChannel:
+    def __init__(self):
+        self.id = 10
+        self.messages = []
+        self.bulk = []
+        self.single = []
+        self.history_args = None
+
+    def add(self, *args, **kwargs):
+        self.messages.append(make_message(len(self.messages) + 1, *args, channel=self, **kwargs))
+
+    async def history(self, limit=None, before=None, after=None):
+        self.history_args = (limit, before and before.id, after and after.id)
+        # Newest first, as Discord returns them
+        for message in reversed(self.messages[:limit]):
+            yield message
+
+    async def delete_messages(self, messages):
+        self.bulk.append([m.id for m in messages])
+
+def test_filter_matching():
+    channel = FakeChannel()
+    human = make_message(1, "see https://example.com", channel=channel)
+    bot = make_message(2, "Beep", author_id=2, bot=True, attachments=["file"], channel=channel)
+    pinned = make_message(3, "rules", pinned=True, channel=channel)
+
+    assert PurgeFilter("")(human) and not PurgeFilter("")(pinned)
+    assert PurgeFilter("links humans")(human) and not PurgeFilter("links")(bot)
+    assert PurgeFilter("bots attachments contains:beep")(bot)
+    assert PurgeFilter("user:<@2>")(bot) and not PurgeFilter("user:2")(human)
+    assert PurgeFilter(r"regex:^see\s")(human) and not PurgeFilter(r"regex:^see\s")(bot)
+
+    pushed_down = PurgeFilter("before:500 after:100 bots")
+    assert (pushed_down.before, pushed_down.after) == (500, 100)
+    for bad in ("colour:red", "user:abc", "regex:(", "before:soon"):
+        with pytest.raises(PurgeFilterError):
+            PurgeFilter(bad)
+
+@pytest.mark.asyncio
+async def test_bulk_and_single_split_at_cutoff():
+    channel = FakeChannel()
+    for _ in range(3):
+        channel.add(age=timedelta(days=20))
+    for _ in range(4):
+        channel.add(age=timedelta(days=1))
+    # Just inside the 14 day window, but past the safety margin
+    channel.add(age=timedelta(days=14) - timedelta(minutes=1))
+
+    state = await PurgeJob(channel, 100, PurgeFilter("")).run()
+    assert state['status'] == 'done' and state['deleted'] == 8
+    assert channel.bulk == [[7, 6, 5, 4]]
+    assert sorted(channel.single) == [1, 2, 3, 8]
+
+@pytest.mark.asyncio
+async def test_stops_at_amount_in_bulk_chunks(monkeypatch):
+    monkeypatch.setattr(purge, 'BULK_DELETE_SIZE', 3)
+    channel = FakeChannel()
+    for i in range(20):
+        channel.add("keep" if i % 2 else "spam")
+
+    state = await PurgeJob(channel, 5, PurgeFilter("contains:spam"), skip_ids={19}).run()
+    # Scanning stops as soon as five matches are found, newest first, skipping the command message
+    assert state['matched'] == 5 and state['deleted'] == 5
+    assert channel.bulk == [[17, 15, 13], [11, 9]]
+    assert state['scanned'] == 12 and channel.single == []
+    assert channel.history_args[1:] == (None, None)
@@ -0,0 +1,74 @@
+import pytest
+from core.raid_detector import RaidDetector, name_skeleton, age_bucket
+
+def test_name_skeleton_collapses_variants():
+    assert name_skeleton("Raider_123") == name_skeleton("r4id3r999")
+    assert name_skeleton("1234") == "_"
+
+def test_rate_threshold_triggers_once():
+    detector = RaidDetector(cooldown=60)
+    verdicts = []
+    for i in range(20):
+        verdict = detector.record_join(1, i, f"user{i}x{i}", f"hash{i}", 400, threshold=10, interval=10, now=100 + i * 0.1)
+        if verdict:
+            verdicts.append(verdict)
+
+    assert len(verdicts) == 1
+    assert verdicts[0].join_count == 10
+    assert verdicts[0].suspects == list(range(10))
+    assert detector.in_raid(1, now=105)
+
+def test_window_expiry_keeps_counts_consistent():
+    detector = RaidDetector()
+    for i in range(5):
+        detector.record_join(1, i, "spammer", None, 0.5, threshold=100, interval=10, now=i)
+    detector.record_join(1, 99, "regular", "abc", 900, threshold=100, interval=10, now=100)
+
+    stream = detector.streams[1]
+    assert len(stream.joins) == 1
+    assert stream.name_clusters == {name_skeleton("regular"): 1}
+    assert detector.histogram(1)[age_bucket(900)] == 1
+    assert sum(detector.histogram(1)) == 1
+
+def test_similar_names_trigger_below_rate_threshold():
+    detector = RaidDetector()
+    verdict = None
+    for i in range(5):
+        verdict = detector.record_join(1, i, f"raider{i}", f"h{i}", 400, threshold=10, interval=30, now=i) or verdict
+    assert verdict is not None
+    assert "similar name" in verdict.reason
+
+def test_memory_is_bounded():
+    detector = RaidDetector(max_guilds=3, max_joins_per_guild=50)
+    for guild_id in range(10):
+        for i in range(200):
+            detector.record_join(guild_id, i, f"u{i}", None, 100, threshold=10_000, interval=3600, now=i)
+
+    assert len(detector.streams) == 3
+    assert all(len(stream.joins) <= 50 for stream in detector.streams.values())
+
+@pytest.mark.asyncio
+async def test_members_queued_during_a_batch_are_timed_out():
+    import asyncio
+    from types import SimpleNamespace
+    from cogs.admin.server_management import ServerManagement
+
+    edited = []
+
+    class FakeHTTP:
+        async def edit_member(self, guild_id, member_id, **fields):
+            if member_id == 1:
+                # A late joiner arrives while the first batch is in flight
+                cog.queue_timeout(guild, raid, 2)
+            await asyncio.sleep(0)
+            edited.append(member_id)
+
+    bot = SimpleNamespace(db=None, http=FakeHTTP(), caches=SimpleNamespace(register=lambda *a, **k: None))
+    cog = ServerManagement(bot)
+    guild, raid = SimpleNamespace(id=10), SimpleNamespace(timeout_minutes=5)
+    cog.pending_timeouts[guild.id] = [1]
+    task = cog.flush_tasks[guild.id] = asyncio.create_task(cog.flush_timeouts(guild, 5, delay=0))
+    await task
+    # The late joiner was handled by the running flush, not left behind
+    assert cog.flush_tasks[guild.id] is task
+    assert edited == [1, 2] and not cog.pending_timeouts.get(guild.id)
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from conftest import FakeCollection
+from core.scheduler import Scheduler
+
+@pytest.fixture
+def collection():
+    return FakeCollection()
+
+@pytest.mark.asyncio
+async def test_job_fires_and_is_removed(collection):
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    fired = []
+
+    async def handler(payload):
+        fired.append(payload['n'])
+
+    scheduler.register('test', handler)
+    await scheduler.start()
+    await scheduler.schedule('test', datetime.utcnow() + timedelta(seconds=0.2), {'n': 1}, key='a')
+    await asyncio.sleep(0.5)
+    await scheduler.stop()
+
+    assert fired == [1]
+    assert collection.docs == {}
+
+@pytest.mark.asyncio
+async def test_overdue_jobs_are_claimed_on_start(collection):
+    past = datetime.utcnow() - timedelta(minutes=10)
+    collection.docs['old'] = {'_id': 'old', 'token': 't', 'kind': 'test', 'due_at': past,
+                              'payload': {}, 'attempts': 0, 'lease_owner': None, 'lease_until': None}
+    # Leased by a live process: must not be stolen
+    collection.docs['taken'] = {'_id': 'taken', 'token': 't', 'kind': 'test', 'due_at': past, 'payload': {},
+                                'attempts': 0, 'lease_owner': 'other',
+                                'lease_until': datetime.utcnow() + timedelta(minutes=5)}
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    fired = []
+
+    async def handler(payload):
+        fired.append(True)
+
+    scheduler.register('test', handler)
+    await scheduler.start()
+    await asyncio.sleep(0.2)
+    await scheduler.stop()
+
+    assert fired == [True]
+    assert list(collection.docs) == ['taken']
+
+@pytest.mark.asyncio
+async def test_cancel_and_reschedule(collection):
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    fired = []
+
+    async def handler(payload):
+        fired.append(payload['n'])
+
+    scheduler.register('test', handler)
+    await scheduler.start()
+    soon = datetime.utcnow() + timedelta(seconds=0.2)
+    await scheduler.schedule('test', soon, {'n': 1}, key='x')
+    await scheduler.schedule('test', soon, {'n': 2}, key='x')
+    await scheduler.schedule('test', soon, {'n': 3}, key='y')
+    await scheduler.cancel('y')
+    await asyncio.sleep(0.5)
+    await scheduler.stop()
+
+    assert fired == [2]
+
+@pytest.mark.asyncio
+async def test_far_jobs_stay_in_mongo(collection):
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    await scheduler.schedule('test', datetime.utcnow() + timedelta(hours=1), {}, key='later')
+    assert scheduler.pending() == 0
+    assert collection.docs['later']['lease_owner'] is None
+
+@pytest.mark.asyncio
+async def test_moving_a_job_out_of_the_window_drops_the_queued_copy(collection):
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    fired = []
+
+    async def handler(payload):
+        fired.append(payload['n'])
+
+    scheduler.register('test', handler)
+    await scheduler.start()
+    await scheduler.schedule('test', datetime.utcnow() + timedelta(seconds=0.2), {'n': 1}, key='mute')
+    # Re-muted for longer: the old unmute must not fire
+    await scheduler.schedule('test', datetime.utcnow() + timedelta(hours=1), {'n': 2}, key='mute')
+    await asyncio.sleep(0.4)
+    await scheduler.stop()
+
+    assert fired == []
+    assert collection.docs['mute']['payload'] == {'n': 2}
+
+@pytest.mark.asyncio
+async def test_copies_leased_elsewhere_do_not_run(collection):
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    fired = []
+
+    async def handler(payload):
+        fired.append(True)
+
+    scheduler.register('test', handler)
+    await scheduler.start()
+    await scheduler.schedule('test', datetime.utcnow() + timedelta(seconds=0.2), {}, key='j')
+    # Another bot's scheduler took the lease over after this copy was queued
+    collection.docs['j']['lease_owner'] = 'other'
+    await asyncio.sleep(0.4)
+    await scheduler.stop()
+
+    assert fired == [] and 'j' in collection.docs
+
+@pytest.mark.asyncio
+async def test_schedule_without_replace_keeps_the_existing_job(collection):
+    scheduler = Scheduler(SimpleNamespace(scheduled_jobs=collection), window=5)
+    later = datetime.utcnow() + timedelta(hours=1)
+    await scheduler.schedule('test', later, {'n': 1}, key='k')
+    collection.docs['k']['lease_owner'] = 'other'
+    token = collection.docs['k']['token']
+
+    await scheduler.schedule('test', later, {'n': 2}, key='k', replace=False)
+    assert collection.docs['k']['token'] == token and collection.docs['k']['lease_owner'] == 'other'
+    await scheduler.schedule('test', later, {'n': 3}, key='new', replace=False)
+    assert collection.docs['new']['payload'] == {'n': 3}
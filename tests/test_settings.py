@@ -0,0 +1,72 @@
+import pytest
+from core.settings import (
+    AutomodSettings, JoinGateSettings, LevelingSettings, ModerationSettings, WelcomeSettings
+)
+
+GUILDS = 100_000
+
+def guild_settings_doc(guild_id: int) -> dict:
+    """A configured guild as stored in guild_settings."""
+    return {
+        '_id': guild_id,
+        'prefix': '!',
+        'moderation': {'mute_role_id': guild_id + 1, 'log_channel_id': guild_id + 2},
+        'leveling': {'enabled': True, 'xp_range': {'min': 15, 'max': 25}, 'announce_channel': guild_id + 3},
+        'raid': {'enabled': True, 'threshold': 8, 'interval': 10, 'action': 'timeout',
+                 'timeout_minutes': 60, 'alert_channel_id': guild_id + 4},
+        'restrictions': {'min_account_age_days': 3},
+        'autoresponder': {'enabled': True, 'cooldown': 5},
+        'music': {'dj_role': guild_id + 5, 'volume': 80, 'max_queue': 200, '247': False},
+        'modmail': {'category_id': guild_id + 6, 'log_channel_id': guild_id + 7,
+                    'greeting': f"Thanks for contacting the staff of guild {guild_id}!"},
+        'tickets': {'category_id': guild_id + 8, 'support_roles': [guild_id + 9, guild_id + 10],
+                    'transcripts': True, 'counter': guild_id % 5000},
+        'punishments': {'escalation': {'enabled': True, 'timeout': 24,
+                                       'steps': ['warn', 'timeout:10', 'timeout:60', 'kick', 'ban']}},
+    }
+
+def test_defaults_for_missing_fields():
+    assert AutomodSettings.from_doc({}) == AutomodSettings()
+    assert LevelingSettings.from_doc({'leveling': None}) == LevelingSettings()
+    welcome = WelcomeSettings.from_doc({'welcome_channel': 5})
+    assert welcome.welcome_channel == 5 and welcome.welcome_message == 'Welcome {user} to {server}!'
+
+def test_projected_fields_are_parsed():
+    doc = guild_settings_doc(1000)
+    assert ModerationSettings.from_doc(doc).mute_role_id == 1001
+    gate = JoinGateSettings.from_doc(doc)
+    assert gate.raid_enabled and gate.threshold == 8 and gate.action == 'timeout'
+    assert gate.alert_channel_id == 1004 and gate.min_account_age_days == 3
+
+    automod = AutomodSettings.from_doc({
+        'enabled': True, 'badwords': ['Foo', 'bar'], 'bypass_roles': [1, 2],
+        'action': {'type': 'ban', 'duration_minutes': 0}
+    })
+    assert automod.badwords == ('foo', 'bar') and automod.bypass_roles == {1, 2}
+    assert automod.action_type == 'ban' and automod.action_minutes == 0
+
+def test_settings_are_read_only():
+    settings = LevelingSettings(enabled=True)
+    try:
+        settings.enabled = False
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("settings must be immutable")
+    assert not hasattr(settings, '__dict__')
+
+@pytest.mark.benchmark
+def test_cache_footprint_for_100k_guilds(retained):
+    """Full documents (before) vs the slim objects hot paths cache (after)."""
+    before = retained(lambda: {f"settings:{g}": guild_settings_doc(g) for g in range(GUILDS)})
+
+    def slim():
+        cache = {}
+        for g in range(GUILDS):
+            doc = guild_settings_doc(g)
+            for feature in (LevelingSettings, ModerationSettings, JoinGateSettings):
+                cache[f"{feature.key}:{g}"] = feature.from_doc(doc)
+        return cache
+
+    after = retained(slim)
+    assert after < before / 2
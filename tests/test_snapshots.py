@@ -0,0 +1,113 @@
+import copy
+import gzip
+import io
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from conftest import FakeDB
+from core.snapshots import SNAPSHOT_COLLECTIONS, SnapshotError, read_header, restore_snapshot, write_snapshot
+
+GUILD = 111122223333444455
+
+def seeded_db():
+    db = FakeDB(tracked=True)
+    db.seed('guild_settings',
+            {'_id': GUILD, 'prefix': '?', 'tickets': {'enabled': True, 'log_channel_id': 987654321098765432}},
+            {'_id': 42, 'prefix': '!'})
+    db.seed('autoresponder', *(
+        {'_id': ObjectId(), 'guild_id': GUILD, 'trigger': f"hi{i}", 'response': f"hello {i}",
+         'created_at': datetime(2024, 1, 1, 12, 0, i)}
+        for i in range(25)
+    ))
+    db.seed('autoresponder', {'_id': ObjectId(), 'guild_id': 42, 'trigger': 'other', 'response': 'guild'})
+    db.seed('level_rewards', {'_id': ObjectId(), 'guild_id': GUILD, 'level': 5, 'role_id': 1})
+    return db
+
+def guild_docs(db, name):
+    return sorted((d for d in db.collections[name].docs.values() if d.get(SNAPSHOT_COLLECTIONS[name]) == GUILD),
+                  key=lambda d: str(d['_id']))
+
+@pytest.mark.asyncio
+async def test_export_is_guild_scoped_line_delimited_json():
+    db = seeded_db()
+    spool, counts = await write_snapshot(db, GUILD)
+
+    assert counts['guild_settings'] == 1 and counts['autoresponder'] == 25 and counts['level_rewards'] == 1
+    lines = gzip.decompress(spool.read()).splitlines()
+    assert len(lines) == 2 + 27
+    assert b'"other"' not in b"".join(lines)
+    header, read_counts = read_header(spool, GUILD)
+    assert header['guild_id'] == GUILD and read_counts == {k: v for k, v in counts.items() if v}
+
+@pytest.mark.asyncio
+async def test_full_restore_round_trips_and_removes_extras():
+    db = seeded_db()
+    spool, _ = await write_snapshot(db, GUILD)
+    original = {name: copy.deepcopy(guild_docs(db, name)) for name in ('guild_settings', 'autoresponder', 'level_rewards')}
+
+    # Drift after the snapshot: an edit, a new entry and a deleted one
+    db.collections['guild_settings'].docs[GUILD]['prefix'] = '$'
+    db.seed('autoresponder', {'_id': ObjectId(), 'guild_id': GUILD, 'trigger': 'new', 'response': 'x'})
+    db.collections['level_rewards'].docs.clear()
+    db.seed('welcome_settings', {'_id': GUILD, 'welcome_channel': 1}, {'_id': 42, 'welcome_channel': 2})
+
+    stats = await restore_snapshot(db, GUILD, spool, batch_size=10)
+
+    assert {name: guild_docs(db, name) for name in original} == original
+    assert stats['autoresponder'].written == 25 and stats['autoresponder'].deleted == 1
+    assert db.collections['autoresponder'].bulk_calls[:3] == [10, 10, 5]
+    # Other guilds are untouched
+    assert db.collections['guild_settings'].docs[42] == {'_id': 42, 'prefix': '!'}
+    assert list(db.collections['welcome_settings'].docs) == [42]
+    assert ('guild_settings', GUILD) in db.configured.marked
+    assert ('autoresponder', GUILD) in db.configured.notified
+
+@pytest.mark.asyncio
+async def test_diff_restore_writes_only_changes():
+    db = seeded_db()
+    spool, _ = await write_snapshot(db, GUILD)
+    target = next(iter(guild_docs(db, 'autoresponder')))
+    target['response'] = 'edited'
+
+    stats = await restore_snapshot(db, GUILD, spool, diff=True)
+
+    assert stats['autoresponder'].written == 1 and stats['autoresponder'].unchanged == 24
+    assert stats['guild_settings'].written == 0 and stats['guild_settings'].unchanged == 1
+    assert db.collections['autoresponder'].docs[target['_id']]['response'] != 'edited'
+
+@pytest.mark.asyncio
+async def test_restore_cannot_overwrite_another_guilds_document():
+    db = seeded_db()
+    victim = next(d for d in db.collections['autoresponder'].docs.values() if d['guild_id'] == 42)
+    spool, _ = await write_snapshot(db, GUILD)
+    # A crafted snapshot: our guild_id, another guild's _id
+    lines = gzip.decompress(spool.read()).splitlines(keepends=True)
+    forged = b'{"c": "autoresponder", "d": {"_id": {"$oid": "%s"}, "guild_id": %d, "trigger": "pwned"}}\n' % (
+        str(victim['_id']).encode(), GUILD
+    )
+    lines.insert(1, forged)
+    crafted = lines[:-1] + [lines[-1].replace(b'"autoresponder": 25', b'"autoresponder": 26')]
+
+    stats = await restore_snapshot(db, GUILD, io.BytesIO(gzip.compress(b"".join(crafted))))
+
+    assert db.collections['autoresponder'].docs[victim['_id']] == victim
+    assert stats['autoresponder'].conflicts == 1 and stats['autoresponder'].written == 25
+
+@pytest.mark.asyncio
+async def test_foreign_or_truncated_snapshots_write_nothing():
+    db = seeded_db()
+    spool, _ = await write_snapshot(db, GUILD)
+    data = spool.read()
+
+    with pytest.raises(SnapshotError):
+        await restore_snapshot(db, 42, io.BytesIO(data))
+
+    lines = gzip.decompress(data).splitlines(keepends=True)
+    truncated = io.BytesIO(gzip.compress(b"".join(lines[:-1])))
+    with pytest.raises(SnapshotError):
+        await restore_snapshot(db, GUILD, truncated)
+
+    with pytest.raises(SnapshotError):
+        await restore_snapshot(db, GUILD, io.BytesIO(b"not gzip"))
+
+    assert all(not c.bulk_calls for c in db.collections.values())
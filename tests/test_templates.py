@@ -0,0 +1,87 @@
+import pytest
+from types import SimpleNamespace
+from conftest import FakeDB
+from core.templates import ConfigTemplates, to_ids, to_names
+
+SOURCE = 100
+
+def guild(guild_id, roles=(), channels=()):
+    return SimpleNamespace(
+        id=guild_id,
+        roles=[SimpleNamespace(id=guild_id * 10 + i, name=name) for i, name in enumerate(roles)],
+        channels=[SimpleNamespace(id=guild_id * 100 + i, name=name) for i, name in enumerate(channels)],
+    )
+
+def setup():
+    guilds = {
+        SOURCE: guild(SOURCE, ['Moderator', 'Member', 'Regular'], ['mod-logs', 'welcome']),
+        1: guild(1, ['Member', 'Moderator', 'Regular'], ['welcome', 'mod-logs']),
+        2: guild(2, ['Member'], ['welcome']),
+        3: guild(3, ['Moderator', 'Member', 'Regular'], ['mod-logs', 'welcome']),
+    }
+    db = FakeDB(tracked=True)
+    db.seed('automod_settings',
+            {'_id': SOURCE, 'spam_threshold': 5, 'bypass_roles': [SOURCE * 10], 'log_channel': SOURCE * 100})
+    db.seed('welcome_settings',
+            {'_id': SOURCE, 'welcome_channel': SOURCE * 100 + 1, 'welcome_message': 'Hi {user}'},
+            {'_id': 1, 'welcome_message': 'old', 'leave_message': 'bye'})
+    db.seed('autorole',
+            {'_id': 'x', 'guild_id': SOURCE, 'join_roles': [SOURCE * 10 + 1], 'level_roles': {str(SOURCE * 10 + 2): 10}})
+    bot = SimpleNamespace(db=db, get_guild=guilds.get, find_guild=guilds.get)
+    return bot, guilds
+
+def test_references_round_trip_by_name():
+    _, guilds = setup()
+    fields = {'bypass_roles': [SOURCE * 10, 999], 'log_channel': SOURCE * 100, 'level_roles': {str(SOURCE * 10 + 2): 10}}
+    named = to_names(guilds[SOURCE], 'automod_settings', fields)
+    assert named['bypass_roles'] == ['Moderator'] and named['log_channel'] == 'mod-logs'
+
+    resolved, missing = to_ids(guilds[1], 'automod_settings', named)
+    assert resolved['bypass_roles'] == [11] and resolved['log_channel'] == 101 and missing == []
+
+    named = to_names(guilds[SOURCE], 'autorole', {'level_roles': {str(SOURCE * 10 + 2): 10}})
+    assert named['level_roles'] == [['Regular', 10]]
+    resolved, missing = to_ids(guilds[2], 'autorole', named)
+    assert resolved['level_roles'] == {} and missing == ['role Regular']
+
+@pytest.mark.asyncio
+async def test_apply_batches_one_write_per_collection():
+    bot, _ = setup()
+    templates = ConfigTemplates(bot)
+    counts = await templates.save('default', bot.get_guild(SOURCE), 42)
+    assert counts == {'automod_settings': 3, 'autorole': 2, 'welcome_settings': 2}
+
+    results = await templates.apply('default', [1, 2, 3, 1])
+
+    assert [r.guild_id for r in results] == [1, 2, 3] and all(r.ok for r in results)
+    for name in ('automod_settings', 'autorole', 'welcome_settings'):
+        assert bot.db.collections[name].bulk_calls == [3]
+    assert results[1].missing == ('role Moderator', 'channel mod-logs', 'role Regular')
+
+    welcome = await bot.db.welcome_settings.find_one({'_id': 1})
+    # Template fields overwrite, the guild's other settings stay
+    assert welcome == {'_id': 1, 'welcome_message': 'Hi {user}', 'leave_message': 'bye', 'welcome_channel': 100}
+    autorole = await bot.db.autorole.find_one({'guild_id': 3})
+    assert autorole['join_roles'] == [31] and autorole['level_roles'] == {'32': 10}
+    assert ('welcome_settings', 3) in bot.db.configured.marked
+    assert ('welcome_settings', 3) in bot.db.configured.notified
+
+@pytest.mark.asyncio
+async def test_apply_reports_per_guild_failures():
+    bot, _ = setup()
+    templates = ConfigTemplates(bot)
+    await templates.save('default', bot.get_guild(SOURCE), 42)
+    bot.db.collections['autorole'].reject.add(3)
+
+    results = {r.guild_id: r for r in await templates.apply('default', [1, 3, 404])}
+
+    assert results[1].ok
+    assert not results[3].ok and 'Document failed validation' in results[3].error
+    assert not results[404].ok and results[404].error == "Bot is not in this guild on any shard this process runs"
+    # Only written guilds have their caches dropped
+    assert ('autorole', 3) not in bot.db.configured.notified
+    assert ('autorole', 1) in bot.db.configured.notified
+    assert all(g != 404 for _, g in bot.db.configured.marked)
+
+    with pytest.raises(KeyError):
+        await templates.apply('missing', [1])
@@ -0,0 +1,161 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from conftest import FakeDB
+from core.settings import TicketSettings
+from core.tickets import TicketPipeline
+from cogs.tickets.tickets import TicketCog
+
+class Member:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.mention = f"<@{user_id}>"
+
+class FakeChannel:
+    def __init__(self, channel_id, name):
+        self.id = channel_id
+        self.name = name
+        self.sent = []
+
+    async def send(self, content):
+        self.sent.append(content)
+
+class FakeGuild:
+    def __init__(self, guild_id=1, latency=0.01):
+        self.id = guild_id
+        self.default_role = Member(guild_id)
+        self.me = Member(0)
+        self.latency = latency
+        self.created = []
+
+    async def create_text_channel(self, name, category=None, overwrites=None, reason=None):
+        await asyncio.sleep(self.latency)
+        channel = FakeChannel(1000 + len(self.created), name)
+        self.created.append((time.monotonic(), channel))
+        return channel
+
+def make_pipeline(spacing=0.0, user_limit=1):
+    async def get_settings(feature, guild_id):
+        return TicketSettings(enabled=True, user_limit=user_limit)
+
+    db = FakeDB()
+    return TicketPipeline(SimpleNamespace(db=db, get_settings=get_settings), spacing=spacing)
+
+@pytest.mark.asyncio
+async def test_double_click_creates_one_channel():
+    pipeline, guild, user = make_pipeline(), FakeGuild(), Member(7)
+
+    first, second = await asyncio.gather(
+        pipeline.open(guild, user, interaction_id=1),
+        pipeline.open(guild, user, interaction_id=2)
+    )
+
+    assert first == second and first.created and first.number == 1
+    assert len(guild.created) == 1 and guild.created[0][1].name == "ticket-0001"
+    assert len(pipeline.db.tickets.docs) == 1 and not pipeline.inflight
+
+@pytest.mark.asyncio
+async def test_repeated_interaction_returns_first_result():
+    pipeline, guild, user = make_pipeline(user_limit=2), FakeGuild(), Member(7)
+
+    first = await pipeline.open(guild, user, interaction_id=1)
+    repeat = await pipeline.open(guild, user, interaction_id=1)
+    another = await pipeline.open(guild, user, interaction_id=2)
+
+    assert repeat == first
+    assert another.created and another.number == 2
+    assert len(guild.created) == 2
+
+@pytest.mark.asyncio
+async def test_user_limit_returns_existing_ticket():
+    pipeline, guild, user = make_pipeline(), FakeGuild(), Member(7)
+
+    first = await pipeline.open(guild, user, interaction_id=1)
+    later = await pipeline.open(guild, user, interaction_id=2)
+
+    assert not later.created and later.channel_id == first.channel_id
+    assert len(guild.created) == 1
+
+    await pipeline.close(guild.id, first.channel_id, closed_by=9)
+    reopened = await pipeline.open(guild, user, interaction_id=3)
+    assert reopened.created and reopened.number == 2
+
+@pytest.mark.asyncio
+async def test_burst_is_spaced_and_numbered():
+    pipeline, guild = make_pipeline(spacing=0.05), FakeGuild(latency=0)
+
+    results = await asyncio.gather(*(pipeline.open(guild, Member(100 + i), interaction_id=i) for i in range(5)))
+
+    assert sorted(r.number for r in results) == [1, 2, 3, 4, 5]
+    times = [t for t, _ in guild.created]
+    assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+    assert not pipeline.workers and not pipeline.queues
+
+    listed = await pipeline.open_tickets(guild.id)
+    assert len(listed) == 5
+
+@pytest.mark.asyncio
+async def test_failed_create_does_not_block_the_user():
+    pipeline, guild, user = make_pipeline(), FakeGuild(), Member(7)
+    calls = 0
+
+    async def flaky(name, category=None, overwrites=None, reason=None):
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("rate limited")
+        return FakeChannel(5, name)
+
+    guild.create_text_channel = flaky
+    with pytest.raises(RuntimeError):
+        await pipeline.open(guild, user, interaction_id=1)
+
+    retry = await pipeline.open(guild, user, interaction_id=2)
+    assert retry.created and retry.channel_id == 5
+
+class Response:
+    def __init__(self):
+        self.messages = []
+
+    async def send_message(self, content, ephemeral=False):
+        self.messages.append(content)
+
+class TicketChannel(FakeChannel):
+    def __init__(self, channel_id, name, staff=()):
+        super().__init__(channel_id, name)
+        self.staff = set(staff)
+        self.guild = SimpleNamespace(id=1, get_channel=lambda channel_id: None)
+        self.deleted = False
+
+    def permissions_for(self, member):
+        return SimpleNamespace(manage_channels=member.id in self.staff)
+
+    async def delete(self):
+        self.deleted = True
+
+def close_interaction(channel, user_id):
+    return SimpleNamespace(guild_id=1, channel_id=channel.id, channel=channel, user=Member(user_id),
+                           response=Response())
+
+@pytest.mark.asyncio
+async def test_only_the_opener_or_staff_close_a_ticket():
+    pipeline, guild = make_pipeline(), FakeGuild()
+    ticket = await pipeline.open(guild, Member(7), interaction_id=1)
+    bot = SimpleNamespace(db=pipeline.db, tickets=pipeline, get_settings=pipeline.bot.get_settings,
+                          components=SimpleNamespace(register=lambda *a: None))
+    cog = TicketCog(bot)
+    channel = TicketChannel(ticket.channel_id, "ticket-0001", staff={9})
+
+    interaction = close_interaction(channel, 8)
+    await cog.ticket_close.callback(cog, interaction)
+    assert not channel.deleted and "creator or staff" in interaction.response.messages[0]
+
+    # A channel merely named like a ticket is not one
+    lookalike = TicketChannel(5000, "ticket-9999", staff={8})
+    interaction = close_interaction(lookalike, 8)
+    await cog.ticket_close.callback(cog, interaction)
+    assert not lookalike.deleted and "ticket channel" in interaction.response.messages[0]
+
+    await cog.ticket_close.callback(cog, close_interaction(channel, 9))
+    assert channel.deleted and list(pipeline.db.tickets.docs.values())[0]['closed_by'] == 9
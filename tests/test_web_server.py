@@ -0,0 +1,150 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+import core.web_server as web_server
+from core.web_server import WebServer
+
+class FakeShard:
+    def __init__(self, closed=False, latency=0.05):
+        self.closed = closed
+        self.latency = latency
+
+    def is_closed(self):
+        return self.closed
+
+class FakeDB:
+    degraded = False
+
+class FakeBot:
+    def __init__(self, shards, ready=True):
+        self.shards = shards
+        self.ready = ready
+        self.db = FakeDB()
+
+    def is_ready(self):
+        return self.ready
+
+@asynccontextmanager
+async def serving(server):
+    test_server = TestServer(server.app)
+    await test_server.start_server()
+    try:
+        async with ClientSession(base_url=test_server.make_url('/')) as session:
+            yield session
+    finally:
+        await test_server.close()
+
+@pytest.mark.asyncio
+async def test_metrics_are_cached_and_renders_shared(monkeypatch):
+    renders = []
+
+    def render():
+        renders.append(1)
+        return b"bot_up 1\n"
+
+    monkeypatch.setattr(web_server, 'render_metrics', render)
+    server = WebServer(metrics_ttl=60)
+    async with serving(server) as session:
+        async def scrape():
+            async with session.get('/metrics') as response:
+                assert response.headers['Content-Type'] == CONTENT_TYPE_LATEST
+                return await response.read()
+
+        bodies = await asyncio.gather(*(scrape() for _ in range(5)))
+        assert bodies == [b"bot_up 1\n"] * 5
+        assert await scrape() == b"bot_up 1\n"
+        assert len(renders) == 1
+
+        # The liveness probe never renders
+        async with session.get('/healthz') as response:
+            assert response.status == 200
+        assert len(renders) == 1
+
+        server.metrics_ttl = 0
+        await scrape()
+        assert len(renders) == 2
+
+@pytest.mark.asyncio
+async def test_readiness_per_shard():
+    server = WebServer()
+    async with serving(server) as session:
+        async with session.get('/readyz') as response:
+            assert response.status == 503  # no bots yet
+
+        first = FakeBot({0: FakeShard(latency=0.042)})
+        second = FakeBot({1: FakeShard(latency=float('inf'))}, ready=False)
+        server.add_bot(first)
+        server.add_bot(second)
+        async with session.get('/readyz') as response:
+            body = await response.json()
+            assert response.status == 503
+            assert body['shards'] == [
+                {'shard_id': 0, 'ready': True, 'latency_ms': 42},
+                {'shard_id': 1, 'ready': False, 'latency_ms': None},
+            ]
+
+        second.ready = True
+        second.shards[1].latency = 0.1
+        async with session.get('/readyz') as response:
+            assert response.status == 200 and (await response.json())['ready']
+
+        first.db.degraded = True
+        async with session.get('/readyz') as response:
+            body = await response.json()
+            assert response.status == 503 and body['database'] is False
+
+        server.remove_bot(first)
+        server.remove_bot(second)
+        assert server.bots == []
+
+@pytest.mark.asyncio
+async def test_webhooks_register_after_start():
+    server = WebServer()
+    calls = []
+
+    async def vote(request):
+        calls.append(await request.json())
+        return web.Response(status=200)
+
+    async with serving(server) as session:
+        async with session.post('/dblwebhook', json={}) as response:
+            assert response.status == 404
+
+        server.add_webhook('post', '/dblwebhook', vote)
+        async with session.post('/dblwebhook', json={'user': '1'}) as response:
+            assert response.status == 200
+        async with session.get('/dblwebhook') as response:
+            assert response.status == 405
+        assert calls == [{'user': '1'}]
+
+        # Removing someone else's handler leaves the route alone
+        async def other(request):
+            return web.Response()
+
+        server.remove_webhook('POST', '/dblwebhook', other)
+        assert ('POST', '/dblwebhook') in server.webhooks
+        server.remove_webhook('POST', '/dblwebhook', vote)
+        async with session.post('/dblwebhook', json={}) as response:
+            assert response.status == 404
+
+class LocalCollector:
+    def collect(self):
+        family = GaugeMetricFamily('bot_test_local_bytes', 'Process-local custom gauge')
+        family.add_metric([], 7)
+        yield family
+
+def test_multiprocess_render_keeps_local_collectors(monkeypatch, tmp_path):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    collector = LocalCollector()
+    REGISTRY.register(collector)
+    try:
+        body = web_server.render_metrics().decode()
+    finally:
+        REGISTRY.unregister(collector)
+    assert 'bot_test_local_bytes 7.0' in body
+    # Stats of the answering worker alone are left out
+    assert 'process_cpu_seconds_total' not in body
@@ -0,0 +1,196 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from conftest import FakeDB
+from core.websub import CALLBACK_PATH, TOPIC_URL, WebSubReceiver, sign, topic_channel, verify_signature
+from core.http_client import HTTPService
+from core.web_server import WebServer
+from core.youtube import FeedPoller
+
+CHANNEL = "UC" + "a" * 22
+SECRET = "s3cret"
+PUBLISHED = datetime(2025, 8, 10, 12, 0, tzinfo=timezone.utc)
+
+def entry_payload(channel_id, video_id, published):
+    return f"""<?xml version='1.0' encoding='UTF-8'?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">
+  <link rel="hub" href="https://pubsubhubbub.appspot.com"/>
+  <title>YouTube video feed</title>
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>Pushed video</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>
+    <author><name>Channel</name></author>
+    <published>{published.isoformat()}</published>
+    <updated>{published.isoformat()}</updated>
+  </entry>
+</feed>""".encode()
+
+class Hub:
+    """A WebSub hub stand-in: accepts subscriptions, verifies intent and publishes."""
+
+    def __init__(self):
+        self.requests = []
+        self.verifications = []
+        self.secrets = {}
+        self.verified = asyncio.Event()
+
+    async def handle(self, request):
+        form = await request.post()
+        self.requests.append(dict(form))
+        asyncio.create_task(self.verify(dict(form)))
+        return web.Response(status=202)
+
+    async def verify(self, form):
+        params = {'hub.mode': form['hub.mode'], 'hub.topic': form['hub.topic'], 'hub.challenge': 'c-123'}
+        if form['hub.mode'] == 'subscribe':
+            params['hub.lease_seconds'] = form['hub.lease_seconds']
+        async with aiohttp.ClientSession() as session:
+            async with session.get(form['hub.callback'], params=params) as response:
+                ok = response.status == 200 and await response.text() == 'c-123'
+        self.verifications.append((form['hub.mode'], ok))
+        if ok and form['hub.mode'] == 'subscribe':
+            self.secrets[form['hub.topic']] = (form['hub.callback'], form['hub.secret'])
+        self.verified.set()
+
+    async def publish(self, topic, body, signature=None):
+        callback, secret = self.secrets[topic]
+        headers = {'Content-Type': 'application/atom+xml', 'X-Hub-Signature': signature or sign(secret, body)}
+        async with aiohttp.ClientSession() as session:
+            async with session.post(callback, data=body, headers=headers) as response:
+                return response.status
+
+class FakeScheduler:
+    def __init__(self):
+        self.handlers, self.jobs = {}, {}
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    async def schedule(self, kind, due_at, payload, key=None):
+        self.jobs[key] = (kind, due_at, payload)
+
+    async def cancel(self, key):
+        return self.jobs.pop(key, None) is not None
+
+@asynccontextmanager
+async def running(lease_seconds=3600):
+    hub, db, scheduler, sent = Hub(), FakeDB(), FakeScheduler(), []
+    db.yt_subscriptions.docs[1] = {'_id': 1, 'feeds': [
+        {'channel_id': CHANNEL, 'webhook_channel': 10, 'last': (PUBLISHED - timedelta(days=1)).isoformat()}]}
+
+    async def notify(video, channels):
+        sent.append((video.video_id, channels))
+
+    hub_app = web.Application()
+    hub_app.router.add_post('/subscribe', hub.handle)
+    hub_server = TestServer(hub_app)
+    await hub_server.start_server()
+
+    http = HTTPService()
+    poller = FeedPoller(db, http, notify)
+    receiver = WebSubReceiver(db, poller, scheduler, "", SECRET, hub_url=str(hub_server.make_url('/subscribe')),
+                              lease_seconds=lease_seconds, renew_margin=600)
+    server = WebServer()
+    receiver.register(server)
+    callback_server = TestServer(server.app)
+    await callback_server.start_server()
+    receiver.callback_url = str(callback_server.make_url(CALLBACK_PATH))
+    try:
+        yield hub, db, scheduler, receiver, sent
+    finally:
+        await http.close()
+        await callback_server.close()
+        await hub_server.close()
+
+def test_signatures():
+    body = b"<feed/>"
+    assert verify_signature(SECRET, body, sign(SECRET, body))
+    assert verify_signature(SECRET, body, sign(SECRET, body, 'sha256'))
+    assert not verify_signature(SECRET, body + b" ", sign(SECRET, body))
+    assert not verify_signature("other", body, sign(SECRET, body))
+    assert not verify_signature(SECRET, body, None)
+    assert not verify_signature(SECRET, body, "md5=" + "0" * 32)
+    assert topic_channel(TOPIC_URL.format(channel_id=CHANNEL)) == CHANNEL
+
+@pytest.mark.asyncio
+async def test_subscribe_verify_and_receive():
+    async with running() as (hub, db, scheduler, receiver, sent):
+        assert await receiver.sync([CHANNEL]) == 1
+        await asyncio.wait_for(hub.verified.wait(), 5)
+
+        assert hub.verifications == [('subscribe', True)]
+        assert hub.requests[0]['hub.secret'] == SECRET and hub.requests[0]['hub.lease_seconds'] == '3600'
+        assert await receiver.active() == {CHANNEL}
+        # Renewal is booked before the lease runs out; an active lease is not requested again
+        kind, due_at, payload = scheduler.jobs[f"websub:{CHANNEL}"]
+        assert kind == 'websub_renew' and payload == {'channel_id': CHANNEL}
+        assert due_at < db.yt_websub.docs[CHANNEL]['expires_at'] - timedelta(seconds=599)
+        assert await receiver.sync([CHANNEL]) == 0
+
+        topic = TOPIC_URL.format(channel_id=CHANNEL)
+        assert await hub.publish(topic, entry_payload(CHANNEL, "vid1", PUBLISHED)) == 204
+        await asyncio.gather(*receiver.tasks)
+        assert sent == [("vid1", [10])]
+
+        # A repeat push of the same video is not announced again
+        assert await hub.publish(topic, entry_payload(CHANNEL, "vid1", PUBLISHED)) == 204
+        await asyncio.gather(*receiver.tasks)
+        assert sent == [("vid1", [10])]
+
+@pytest.mark.asyncio
+async def test_forged_and_unrequested_are_rejected():
+    async with running() as (hub, db, scheduler, receiver, sent):
+        await receiver.sync([CHANNEL])
+        await asyncio.wait_for(hub.verified.wait(), 5)
+        topic = TOPIC_URL.format(channel_id=CHANNEL)
+
+        status = await hub.publish(topic, entry_payload(CHANNEL, "fake", PUBLISHED), signature="sha1=" + "0" * 40)
+        await asyncio.gather(*receiver.tasks)
+        assert status == 202 and sent == []
+
+        # Verification for a topic nobody asked for is refused
+        other = TOPIC_URL.format(channel_id="UC" + "b" * 22)
+        async with aiohttp.ClientSession() as session:
+            params = {'hub.mode': 'subscribe', 'hub.topic': other, 'hub.challenge': 'x'}
+            async with session.get(receiver.callback_url, params=params) as response:
+                assert response.status == 404
+
+            # Replaying a verification for an active lease cannot extend it
+            expires_at = db.yt_websub.docs[CHANNEL]['expires_at']
+            params = {'hub.mode': 'subscribe', 'hub.topic': topic, 'hub.challenge': 'x', 'hub.lease_seconds': '999999999'}
+            async with session.get(receiver.callback_url, params=params) as response:
+                assert response.status == 404
+            assert db.yt_websub.docs[CHANNEL]['expires_at'] == expires_at
+
+            # A pending request is verified, but never for longer than was asked
+            db.yt_websub.docs[CHANNEL]['state'] = 'pending'
+            async with session.get(receiver.callback_url, params=params) as response:
+                assert response.status == 200
+            assert db.yt_websub.docs[CHANNEL]['expires_at'] <= datetime.utcnow() + timedelta(seconds=3600)
+
+@pytest.mark.asyncio
+async def test_lapsed_lease_falls_back_and_renewal_drops_unfollowed():
+    async with running(lease_seconds=1) as (hub, db, scheduler, receiver, sent):
+        await receiver.sync([CHANNEL])
+        await asyncio.wait_for(hub.verified.wait(), 5)
+        db.yt_websub.docs[CHANNEL]['expires_at'] = datetime.utcnow() - timedelta(seconds=1)
+        # No live lease: the poller takes the channel back and sync asks again
+        assert await receiver.active() == set()
+        hub.verified.clear()
+        assert await receiver.sync([CHANNEL]) == 1
+        await asyncio.wait_for(hub.verified.wait(), 5)
+
+        hub.verified.clear()
+        db.yt_subscriptions.docs[1]['feeds'] = []
+        await scheduler.handlers['websub_renew']({'channel_id': CHANNEL})
+        await asyncio.wait_for(hub.verified.wait(), 5)
+        assert hub.requests[-1]['hub.mode'] == 'unsubscribe'
+        assert hub.verifications[-1] == ('unsubscribe', True)
+        assert CHANNEL not in db.yt_websub.docs and f"websub:{CHANNEL}" not in scheduler.jobs
@@ -0,0 +1,136 @@
+import pytest
+from contextlib import asynccontextmanager
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from conftest import FakeDB
+from core.http_client import HTTPService
+from core.youtube import FeedParser, FeedPoller, parse_feed, parse_time
+
+BASE = datetime(2025, 8, 10, 12, 0, tzinfo=timezone.utc)
+CHANNELS = [f"UC{i:022d}" for i in range(3)]
+
+def atom(channel_id, count):
+    entries = "".join(f"""
+  <entry>
+    <yt:videoId>{channel_id}-v{i}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>Video {i}</title>
+    <link rel="alternate" href="https://www.youtube.com/watch?v={channel_id}-v{i}"/>
+    <author><name>Channel {channel_id[-1]}</name></author>
+    <published>{(BASE + timedelta(hours=i)).isoformat()}</published>
+  </entry>""" for i in reversed(range(count)))
+    return (f'<?xml version="1.0" encoding="UTF-8"?><feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+            f'xmlns="http://www.w3.org/2005/Atom"><title>Channel</title>{entries}\n</feed>').encode()
+
+class FeedStub:
+    """Serves feeds with an ETag, honouring If-None-Match like YouTube does."""
+
+    def __init__(self):
+        self.feeds = {channel_id: 3 for channel_id in CHANNELS}
+        self.hits = Counter()
+        self.not_modified = 0
+
+    async def handle(self, request):
+        channel_id = request.query['channel_id']
+        self.hits[channel_id] += 1
+        if channel_id not in self.feeds:
+            return web.Response(status=404)
+        etag = f'"{channel_id}-{self.feeds[channel_id]}"'
+        if request.headers.get('If-None-Match') == etag:
+            self.not_modified += 1
+            return web.Response(status=304)
+        return web.Response(body=atom(channel_id, self.feeds[channel_id]), headers={'ETag': etag},
+                            content_type='application/atom+xml')
+
+def subscribe(db, guilds, channel_id, last):
+    for guild_id in guilds:
+        doc = db.yt_subscriptions.docs.setdefault(guild_id, {'_id': guild_id, 'feeds': []})
+        doc['feeds'].append({'channel_id': channel_id, 'webhook_channel': guild_id * 10, 'last': last})
+
+@asynccontextmanager
+async def feed_server():
+    feeds = FeedStub()
+    app = web.Application()
+    app.router.add_get('/feeds/videos.xml', feeds.handle)
+    server = TestServer(app)
+    await server.start_server()
+    feeds.url = str(server.make_url('/feeds/videos.xml')) + '?channel_id={channel_id}'
+    try:
+        yield feeds
+    finally:
+        await server.close()
+
+def test_parser_yields_entries_as_they_complete():
+    data = atom(CHANNELS[0], 3)
+    parser = FeedParser()
+    first_entry_end = data.index(b'</entry>') + len(b'</entry>')
+    assert [v.title for v in parser.feed(data[:first_entry_end])] == ['Video 2']
+    assert [v.title for v in parser.feed(data[first_entry_end:]) + parser.close()] == ['Video 1', 'Video 0']
+
+    video = parse_feed(data)[0]
+    assert video.video_id == f"{CHANNELS[0]}-v2" and video.author == "Channel 0"
+    assert video.published == BASE + timedelta(hours=2)
+    assert parse_time("2025-08-10T12:00:00Z") == BASE
+
+@pytest.mark.asyncio
+async def test_poll_dedupes_feeds_and_fans_out():
+    async with feed_server() as stub:
+        db, sent = FakeDB(), []
+
+        async def notify(video, channels):
+            sent.append((video.video_id, sorted(channels)))
+
+        # 500 guilds follow channel 0, seen up to video 0; one follows channel 1 and is new
+        subscribe(db, range(1, 501), CHANNELS[0], BASE.isoformat())
+        subscribe(db, [1], CHANNELS[1], None)
+        http = HTTPService()
+        poller = FeedPoller(db, http, notify, concurrency=2, feed_url=stub.url)
+        try:
+            stats = await poller.poll()
+
+            assert stub.hits == Counter({CHANNELS[0]: 1, CHANNELS[1]: 1})
+            assert stats.channels == 2 and stats.fetched == 2 and stats.deliveries == 1000
+            # Oldest first, once per video with every channel; the new subscriber gets no backlog
+            assert [video_id for video_id, _ in sent] == [f"{CHANNELS[0]}-v1", f"{CHANNELS[0]}-v2"]
+            assert sent[0][1] == [g * 10 for g in range(1, 501)]
+            assert db.yt_subscriptions.bulk_calls == [501]
+            feeds = db.yt_subscriptions.docs[1]['feeds']
+            assert all(parse_time(f['last']) == BASE + timedelta(hours=2) for f in feeds)
+
+            # Unchanged feeds come back 304 and notify nobody
+            sent.clear()
+            stats = await poller.poll()
+            assert stats.not_modified == 2 and stub.not_modified == 2 and not sent
+
+            stub.feeds[CHANNELS[0]] = 4
+            stats = await poller.poll([CHANNELS[0]])
+            assert stats.channels == 1 and [video_id for video_id, _ in sent] == [f"{CHANNELS[0]}-v3"]
+            assert db.yt_feeds.docs[CHANNELS[0]]['etag'] == f'"{CHANNELS[0]}-4"'
+        finally:
+            await http.close()
+
+@pytest.mark.asyncio
+async def test_failing_feeds_do_not_block_others():
+    async with feed_server() as stub:
+        db, sent = FakeDB(), []
+
+        async def notify(video, channels):
+            if video.channel_id == CHANNELS[2]:
+                raise RuntimeError("Missing Access")
+            sent.append(video.video_id)
+
+        subscribe(db, [1], "UC" + "x" * 22, BASE.isoformat())
+        subscribe(db, [2], CHANNELS[1], BASE.isoformat())
+        subscribe(db, [3], CHANNELS[2], BASE.isoformat())
+        http = HTTPService()
+        poller = FeedPoller(db, http, notify, feed_url=stub.url)
+        try:
+            stats = await poller.poll()
+        finally:
+            await http.close()
+
+        assert stats.failed == 1 and stats.fetched == 2
+        assert sent == [f"{CHANNELS[1]}-v1", f"{CHANNELS[1]}-v2"]
+        assert db.yt_feeds.docs["UC" + "x" * 22]['status'] == 404
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from pymongo.errors import DuplicateKeyError
+from core.config import Config
+from core.web_server import WebServer
+from core.websub import CALLBACK_PATH
+from cogs.yt_notifier import yt_notifier
+from cogs.yt_notifier.yt_notifier import YTNotifier
+
+class FakeLeases:
+    def __init__(self):
+        self.docs = {}
+
+    def _matches(self, doc, query):
+        return any(
+            ('owner' in clause and doc['owner'] == clause['owner'])
+            or ('until' in clause and doc['until'] < clause['until']['$lt'])
+            for clause in query['$or']
+        )
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        doc = self.docs.get(query['_id'])
+        if doc is None:
+            doc = self.docs[query['_id']] = {'_id': query['_id']}
+        elif not self._matches(doc, query):
+            # The upsert collides with the existing _id
+            raise DuplicateKeyError("E11000 duplicate key error")
+        doc.update(update['$set'])
+        return doc
+
+class FakeBot:
+    def __init__(self, web_server):
+        self.db = SimpleNamespace()
+        self.http_client = None
+        self.scheduler = SimpleNamespace(register=lambda kind, handler: None)
+        self.web_server = web_server
+        self.closed = False
+        self.ready = asyncio.Event()
+
+    def is_closed(self):
+        return self.closed
+
+    async def wait_until_ready(self):
+        await self.ready.wait()
+
+@pytest.mark.asyncio
+async def test_one_bot_per_process_polls_and_receives_websub(monkeypatch):
+    monkeypatch.setattr(Config, 'YT_WEBSUB_CALLBACK_URL', 'https://bot.example/websub')
+    monkeypatch.setattr(Config, 'YT_WEBSUB_SECRET', 'secret')
+    monkeypatch.setattr(YTNotifier, 'poller_owner', None)
+    server = WebServer()
+    # One bot per shard, as the launcher builds them
+    first, second = YTNotifier(FakeBot(server)), YTNotifier(FakeBot(server))
+    try:
+        for cog in (first, second):
+            await cog.cog_load()
+        assert first.owns_polling() and not second.owns_polling()
+        assert server.webhooks[('POST', CALLBACK_PATH)] == first.websub.handle_notify
+
+        # A closed owner hands polling and the callback to the next bot
+        first.bot.closed = True
+        assert second.owns_polling() and not first.owns_polling()
+        assert server.webhooks[('POST', CALLBACK_PATH)] == second.websub.handle_notify
+
+        second.cog_unload()
+        assert YTNotifier.poller_owner is None and ('POST', CALLBACK_PATH) not in server.webhooks
+    finally:
+        first.cog_unload()
+        second.cog_unload()
+
+@pytest.mark.asyncio
+async def test_one_process_in_a_cluster_polls(monkeypatch):
+    leases = FakeLeases()
+    cogs = []
+    for _ in range(2):
+        bot = FakeBot(WebServer())
+        bot.db = SimpleNamespace(leases=leases)
+        cogs.append(YTNotifier(bot))
+    try:
+        monkeypatch.setattr(yt_notifier, 'PROCESS_ID', 'host:1')
+        assert await cogs[0].holds_poll_lease()
+        assert await cogs[0].holds_poll_lease()
+        monkeypatch.setattr(yt_notifier, 'PROCESS_ID', 'host:2')
+        assert not await cogs[1].holds_poll_lease()
+
+        # The first process stopped renewing; the lease passes on
+        leases.docs[yt_notifier.POLL_LEASE_ID]['until'] = datetime.utcnow() - timedelta(seconds=1)
+        assert await cogs[1].holds_poll_lease()
+        assert leases.docs[yt_notifier.POLL_LEASE_ID]['owner'] == 'host:2'
+    finally:
+        for cog in cogs:
+            cog.cog_unload()